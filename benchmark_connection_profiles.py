@@ -0,0 +1,77 @@
+"""
+Benchmark profila konekcije - propusnost (redova/s) za default, lean i wan profile
+
+Pokretanje:
+    python benchmark_connection_profiles.py            # lokalni MySQL stand-in sa širokim redovima
+    python benchmark_connection_profiles.py --mysql "SELECT * FROM tickets LIMIT 200000"
+                                                       # konfigurisana BLBS baza
+"""
+import sys
+import time
+from typing import Tuple
+
+from config.config_manager import ConfigManager
+from database.blbs_connector import BLBSConnector
+from database.connection_profiles import CONNECTION_PROFILES, compression_supported
+from database.mysql_standin import MySQLStandInServer
+
+
+ROWS = 50000
+REPEAT = 3
+
+SETUP_SQL = f"""
+CREATE TABLE tickets (id INTEGER PRIMARY KEY, created_at TEXT, updated_at TEXT, price REAL, note TEXT);
+WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {ROWS})
+INSERT INTO tickets
+SELECT i, datetime('2024-01-01', '+' || (i % 900) || ' minutes'), datetime('2024-02-01', '+' || i || ' seconds'),
+       i * 0.25, 'Karta izdata na liniji ' || (i % 40) || ' - ' || hex(randomblob(24))
+FROM n;
+"""
+
+
+def measure(config, profile: str, query: str) -> Tuple[float, int]:
+    """Najbolje vreme (sekunde) za strimovanje celog rezultata i broj redova"""
+    best = None
+    for _ in range(REPEAT):
+        connector = BLBSConnector(config, profile=profile)
+        try:
+            started = time.perf_counter()
+            rows = sum(len(batch) for batch in connector.iter_query(query, batch_size=5000))
+            elapsed = time.perf_counter() - started
+        finally:
+            connector.disconnect()
+        best = elapsed if best is None else min(best, elapsed)
+    return best, rows
+
+
+def run(config, query: str):
+    print(f"Kompresija protokola podržana: {'da' if compression_supported() else 'ne (pymysql)'}")
+    print(f"Upit: {query}")
+    print()
+    print(f"{'Profil':12} {'Redova':>10} {'Vreme (s)':>10} {'Redova/s':>12} {'Ubrzanje':>9}")
+    print("-" * 57)
+    baseline = None
+    for profile in CONNECTION_PROFILES:
+        elapsed, rows = measure(config, profile, query)
+        baseline = baseline or elapsed
+        print(f"{profile:12} {rows:>10} {elapsed:>10.3f} {rows / elapsed:>12,.0f} {baseline / elapsed:>8.2f}x")
+
+
+def main():
+    print("*** BLBS AI Agent - Benchmark profila konekcije ***")
+    print("=" * 57)
+
+    if len(sys.argv) > 2 and sys.argv[1] == '--mysql':
+        config = ConfigManager().load_config()
+        if not config:
+            print("Prvo konfigurisajte MySQL konekciju!")
+            return
+        run(config, sys.argv[2])
+        return
+
+    with MySQLStandInServer(setup_sql=SETUP_SQL) as server:
+        run(server.config(), "SELECT * FROM tickets")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,27 +3,41 @@ Menadžer konfiguracije za BLBS AI Agent
 """
 import json
 import os
-from typing import Dict, Optional
+from typing import Dict, List, Optional
+from database.fan_out import target_name
 from utils.encryption import EncryptionManager
 
 
 class ConfigManager:
     def __init__(self):
         self.config_file = os.path.join(os.path.dirname(__file__), 'blbs_config.json')
+        # Dodatne BLBS baze (po jedna po prevozniku/gradu) za upite nad celom mrežom
+        self.targets_file = os.path.join(os.path.dirname(__file__), 'blbs_targets.json')
         self.encryption = EncryptionManager()
     
+    def _encrypt(self, config_data: Dict[str, str]) -> Dict:
+        return {
+            'host': self.encryption.encrypt_data(config_data.get('host', '')),
+            'username': self.encryption.encrypt_data(config_data.get('username', '')),
+            'password': self.encryption.encrypt_data(config_data.get('password', '')),
+            'database': self.encryption.encrypt_data(config_data.get('database', '')),
+            'port': config_data.get('port', '3306'),  # Port ne mora biti enkriptovan
+        }
+    
+    def _decrypt(self, encrypted_config: Dict) -> Dict[str, str]:
+        return {
+            'host': self.encryption.decrypt_data(encrypted_config['host']),
+            'username': self.encryption.decrypt_data(encrypted_config['username']),
+            'password': self.encryption.decrypt_data(encrypted_config['password']),
+            'database': self.encryption.decrypt_data(encrypted_config['database']),
+            'port': encrypted_config.get('port', '3306')
+        }
+    
     def save_config(self, config_data: Dict[str, str]) -> bool:
         """Čuva konfiguraciju u enkriptovanom obliku"""
         try:
             # Enkriptuj osetljive podatke
-            encrypted_config = {
-                'host': self.encryption.encrypt_data(config_data.get('host', '')),
-                'username': self.encryption.encrypt_data(config_data.get('username', '')),
-                'password': self.encryption.encrypt_data(config_data.get('password', '')),
-                'database': self.encryption.encrypt_data(config_data.get('database', '')),
-                'port': config_data.get('port', '3306'),  # Port ne mora biti enkriptovan
-                'configured': True
-            }
+            encrypted_config = {**self._encrypt(config_data), 'configured': True}
             
             with open(self.config_file, 'w', encoding='utf-8') as f:
                 json.dump(encrypted_config, f, indent=2)
@@ -46,15 +60,7 @@ class ConfigManager:
                 return None
             
             # Dekriptuj podatke
-            config = {
-                'host': self.encryption.decrypt_data(encrypted_config['host']),
-                'username': self.encryption.decrypt_data(encrypted_config['username']),
-                'password': self.encryption.decrypt_data(encrypted_config['password']),
-                'database': self.encryption.decrypt_data(encrypted_config['database']),
-                'port': encrypted_config.get('port', '3306')
-            }
-            
-            return config
+            return self._decrypt(encrypted_config)
         except Exception as e:
             print(f"Greška pri učitavanju konfiguracije: {e}")
             return None
@@ -71,4 +77,58 @@ class ConfigManager:
             return True
         except Exception as e:
             print(f"Greška pri brisanju konfiguracije: {e}")
-            return False
\ No newline at end of file
+            return False
+    
+    def load_targets(self) -> List[Dict[str, str]]:
+        """Sve BLBS baze za upite nad mrežom: osnovna konfiguracija (baza@host) + dodatne baze (svaka sa 'name')"""
+        targets = []
+        config = self.load_config()
+        if config:
+            targets.append({'name': target_name(config), **config})
+        if os.path.exists(self.targets_file):
+            try:
+                with open(self.targets_file, 'r', encoding='utf-8') as f:
+                    for item in json.load(f):
+                        targets.append({'name': item['name'], **self._decrypt(item)})
+            except Exception as e:
+                print(f"Greška pri učitavanju liste baza: {e}")
+        return targets
+    
+    def save_target(self, name: str, config_data: Dict[str, str]) -> bool:
+        """Dodaje dodatnu bazu pod imenom `name` (ime mora biti jedinstveno, uključujući osnovnu bazu)"""
+        try:
+            if name in self.target_names():
+                print(f"Baza sa imenom {name} već postoji")
+                return False
+            items = self._load_target_items()
+            items.append({'name': name, **self._encrypt(config_data)})
+            with open(self.targets_file, 'w', encoding='utf-8') as f:
+                json.dump(items, f, indent=2)
+            return True
+        except Exception as e:
+            print(f"Greška pri čuvanju baze {name}: {e}")
+            return False
+    
+    def target_names(self) -> List[str]:
+        """Imena svih baza iz load_targets"""
+        return [target['name'] for target in self.load_targets()]
+    
+    def delete_target(self, name: str) -> bool:
+        """Uklanja dodatnu bazu iz liste"""
+        try:
+            items = self._load_target_items()
+            remaining = [item for item in items if item['name'] != name]
+            if len(remaining) == len(items):
+                return False
+            with open(self.targets_file, 'w', encoding='utf-8') as f:
+                json.dump(remaining, f, indent=2)
+            return True
+        except Exception as e:
+            print(f"Greška pri brisanju baze {name}: {e}")
+            return False
+    
+    def _load_target_items(self) -> List[Dict]:
+        if not os.path.exists(self.targets_file):
+            return []
+        with open(self.targets_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
@@ -0,0 +1,169 @@
+"""
+Planer agregacija - statistika i trendovi se računaju u MySQL-u umesto u Python-u
+"""
+import datetime
+from typing import Dict, List, Optional, Sequence
+
+from pymysql.constants import FIELD_TYPE
+
+from database import query_planner
+from database.columnar import FLOAT_TYPES, INTEGER_TYPES
+
+
+NUMERIC_TYPES = INTEGER_TYPES | FLOAT_TYPES | {FIELD_TYPE.DECIMAL, FIELD_TYPE.NEWDECIMAL}
+TEMPORAL_TYPES = {FIELD_TYPE.DATE, FIELD_TYPE.NEWDATE, FIELD_TYPE.DATETIME, FIELD_TYPE.TIMESTAMP}
+
+# Tipovi izveštaja kojima se uz uzorak šalju agregati; trend dobija i vremenske grupe
+AGGREGATED_REPORT_TYPES = ('statistički', 'trend analiza')
+BUCKETED_REPORT_TYPES = ('trend analiza',)
+
+# Raspon (u danima) iznad kog se grupiše po mesecu umesto po danu
+MONTHLY_BUCKET_DAYS = 120
+
+
+def quote_identifier(name: str) -> str:
+    """MySQL identifikator u backtick-ovima"""
+    return '`' + str(name).replace('`', '``') + '`'
+
+
+class AggregationPlanner:
+    """Obmotava analitički upit kao podupit i računa sažetke kolona na serveru
+
+    Za svaki izveštaj se šalje nekoliko malih upita (opis kolona, jedan red
+    sažetaka, grupisanje po datumu, uzorak), pa sa servera dolaze kilobajti
+    bez obzira na veličinu tabele.
+    """
+
+    def __init__(self, connector, max_buckets: int = 400, max_date_columns: int = 2):
+        self.connector = connector
+        self.max_buckets = max_buckets
+        self.max_date_columns = max_date_columns
+
+    def summarize(self, query: str, sample_size: int = 20, buckets: bool = True) -> Optional[Dict]:
+        """Vraća {'row_count', 'columns', 'buckets', 'sample'} ili None ako upit ne može da se obmota"""
+        if not query_planner.is_select(query):
+            return None
+
+        description = self.connector.describe(query)
+        if description is None:
+            return None
+
+        columns = [(d[0], d[1]) for d in description]
+        summary_row = self.connector.execute(self.summary_query(query, columns))
+        if not summary_row:
+            return None
+
+        result = {
+            'row_count': int(summary_row[0][0]),
+            'columns': self._parse_summary(columns, summary_row[0]),
+            'buckets': {},
+            'sample': [],
+        }
+
+        if buckets and result['row_count']:
+            temporal = [name for name, type_code in columns if type_code in TEMPORAL_TYPES]
+            for name in temporal[:self.max_date_columns]:
+                info = result['columns'][name]
+                monthly = self._span_days(info.get('min'), info.get('max')) > MONTHLY_BUCKET_DAYS
+                rows = self.connector.execute(self.bucket_query(query, name, monthly))
+                if rows is not None:
+                    result['buckets'][name] = {'granularity': 'mesec' if monthly else 'dan',
+                                               'counts': [(str(b), int(c)) for b, c in rows]}
+
+        if sample_size and result['row_count']:
+            sample = self.connector.execute(query_planner.sample_query(query, sample_size))
+            result['sample'] = list(sample or [])
+        return result
+
+    @staticmethod
+    def summary_query(query: str, columns: Sequence) -> str:
+        """Jedan red sa COUNT/COUNT DISTINCT/MIN/MAX/AVG za sve kolone"""
+        parts = ["COUNT(*)"]
+        for name, type_code in columns:
+            column = quote_identifier(name)
+            parts.append(f"COUNT({column})")
+            parts.append(f"COUNT(DISTINCT {column})")
+            if type_code in NUMERIC_TYPES:
+                parts.extend([f"MIN({column})", f"MAX({column})", f"AVG({column})"])
+            elif type_code in TEMPORAL_TYPES:
+                parts.extend([f"MIN({column})", f"MAX({column})"])
+        select_list = ",\n       ".join(parts)
+        return f"SELECT {select_list}\nFROM (\n{query_planner.clean_query(query)}\n) AS blbs_agg"
+
+    def bucket_query(self, query: str, column_name: str, monthly: bool = False) -> str:
+        """Broj redova po danu (ili mesecu) za datumsku kolonu"""
+        column = quote_identifier(column_name)
+        bucket = f"DATE_FORMAT({column}, '%Y-%m')" if monthly else f"DATE({column})"
+        return (f"SELECT {bucket} AS bucket, COUNT(*) AS cnt\n"
+                f"FROM (\n{query_planner.clean_query(query)}\n) AS blbs_agg\n"
+                f"WHERE {column} IS NOT NULL\n"
+                f"GROUP BY bucket ORDER BY bucket\nLIMIT {int(self.max_buckets)}")
+
+    @staticmethod
+    def _parse_summary(columns: Sequence, row: Sequence) -> Dict[str, Dict]:
+        parsed, i = {}, 1
+        for name, type_code in columns:
+            info = {'non_null': int(row[i]), 'distinct': int(row[i + 1])}
+            i += 2
+            if type_code in NUMERIC_TYPES:
+                info.update(min=row[i], max=row[i + 1], avg=row[i + 2])
+                i += 3
+            elif type_code in TEMPORAL_TYPES:
+                info.update(min=row[i], max=row[i + 1])
+                i += 2
+            parsed[name] = info
+        return parsed
+
+    @staticmethod
+    def _span_days(low, high) -> int:
+        try:
+            if isinstance(low, str) and isinstance(high, str):
+                # "lean" profil vraća datume kao ISO tekst
+                low, high = datetime.datetime.fromisoformat(low), datetime.datetime.fromisoformat(high)
+            return (high - low).days
+        except (TypeError, ValueError):
+            return 0
+
+
+def format_summary(summary: Dict) -> str:
+    """Tekstualni prikaz agregata za AI prompt"""
+    lines: List[str] = [f"Ukupno redova: {summary['row_count']}", "", "Kolone:"]
+    for name, info in summary['columns'].items():
+        parts = [f"ne-NULL {info['non_null']}", f"različitih {info['distinct']}"]
+        if 'min' in info:
+            parts.append(f"min {info['min']}")
+            parts.append(f"max {info['max']}")
+        if info.get('avg') is not None:
+            parts.append(f"prosek {float(info['avg']):.4g}")
+        lines.append(f"- {name}: " + ", ".join(parts))
+
+    for name, bucketed in summary['buckets'].items():
+        lines.append("")
+        lines.append(f"Broj redova po {bucketed['granularity']}u ({name}):")
+        lines.extend(f"  {bucket}: {count}" for bucket, count in bucketed['counts'])
+    return "\n".join(lines)
+
+
+def fetch_report_data(connector, query: str, report_type: str, sample_size: int = 50,
+                      sample_only: bool = False) -> Optional[Dict]:
+    """Prikuplja podatke za AI izveštaj: uzorak, ukupan broj redova i (po tipu) agregate
+
+    Sa sample_only=True (preskup upit) čita se samo LIMIT uzorak, bez COUNT-a i
+    agregata, pa je 'total' None.
+    """
+    if sample_only and query_planner.is_select(query):
+        sample = connector.execute(query_planner.sample_query(query, sample_size))
+        if sample is None:
+            return None
+        return {'sample': list(sample), 'total': None, 'summary': None}
+
+    if report_type in AGGREGATED_REPORT_TYPES:
+        summary = AggregationPlanner(connector).summarize(
+            query, sample_size=min(sample_size, 20), buckets=report_type in BUCKETED_REPORT_TYPES)
+        if summary is not None:
+            return {'sample': summary['sample'], 'total': summary['row_count'], 'summary': summary}
+
+    sql_results = connector.fetch_sample(query, sample_size)
+    if sql_results is None:
+        return None
+    return {'sample': sql_results[0], 'total': sql_results[1], 'summary': None}
@@ -0,0 +1,345 @@
+"""
+Asyncio pristup BLBS bazi - async pool i konektor za konkurentne izveštaje
+"""
+import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+import pymysql
+import pymysql.cursors
+
+from database import query_planner
+from database.blbs_connector import CONNECT_TIMEOUT, READ_TIMEOUT_GRACE, create_connection
+from database.circuit_breaker import CircuitBreaker, CircuitOpenError, get_breaker
+from database.connection_pool import PoolExhaustedError, pool_read_timeout
+from database.query_control import query_registry
+
+
+class AsyncConnectionPool:
+    """Ograničen pool MySQL konekcija za asyncio kod
+
+    Slobodna mesta čuva asyncio.Semaphore, pa korutine koje čekaju konekciju
+    ne zauzimaju niti. Blokirajući pymysql pozivi (konekcija, upit, čitanje
+    paketa redova) idu u zaseban ThreadPoolExecutor sa po jednom niti po
+    konekciji, tako da jedna event petlja opslužuje sve zahteve.
+    """
+
+    def __init__(self, config: Dict[str, str], max_size: int = 10, idle_timeout: float = 300.0,
+                 acquire_timeout: float = 10.0, health_check_interval: float = 30.0,
+                 read_timeout: Optional[float] = None, connection_factory: Optional[Callable] = None,
+                 timeout: Optional[float] = None):
+        if max_size < 1:
+            raise ValueError("max_size mora biti bar 1")
+        self.config = config
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.acquire_timeout = acquire_timeout
+        self.health_check_interval = health_check_interval
+        self.timeout = timeout
+        self.read_timeout = read_timeout if read_timeout is not None else pool_read_timeout(timeout)
+        self._factory = connection_factory or (lambda: create_connection(
+            self.config, autocommit=True, connect_timeout=CONNECT_TIMEOUT, read_timeout=self.read_timeout))
+        # Isti circuit breaker kao sinhroni konektori ka ovom host-u
+        self.breaker = get_breaker(config)
+        self.executor = ThreadPoolExecutor(max_workers=max_size, thread_name_prefix='blbs-async-db')
+        self._idle: List[Tuple[object, float]] = []
+        self._in_use = 0
+        self._closed = False
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    async def run(self, func, *args, **kwargs):
+        """Izvršava blokirajući poziv u niti pool-a"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    async def acquire(self):
+        """Pozajmljuje konekciju; čeka najviše `acquire_timeout` sekundi (CircuitOpenError dok host ne odgovara)"""
+        if self._closed:
+            raise PoolExhaustedError("Pool je zatvoren")
+        self.breaker.check()
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_size)
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.acquire_timeout)
+        except asyncio.TimeoutError:
+            error = PoolExhaustedError(
+                f"Nema slobodne konekcije posle {self.acquire_timeout:.0f}s (max {self.max_size})")
+            # Neutralan ishod - oslobađa mesto probe ako je ovo bio probni zahtev
+            self.breaker.record(error)
+            raise error
+
+        try:
+            connection = await self._checkout()
+        except BaseException as e:
+            self._slots.release()
+            self.breaker.record(e)
+            raise
+        self.breaker.record_success()
+        self._in_use += 1
+        return connection
+
+    async def release(self, connection, discard: bool = False):
+        """Vraća konekciju u pool (discard=True je zatvara umesto da je vrati)"""
+        self._in_use -= 1
+        try:
+            if discard or self._closed or not getattr(connection, 'open', True):
+                await self.run(self._close_quietly, connection)
+            else:
+                self._idle.append((connection, time.monotonic()))
+        finally:
+            self._slots.release()
+
+    @asynccontextmanager
+    async def connection(self):
+        """Async context manager: pozajmi konekciju i vrati je na kraju bloka"""
+        connection = await self.acquire()
+        try:
+            yield connection
+        except BaseException:
+            await self.release(connection, discard=not getattr(connection, 'open', True))
+            raise
+        else:
+            await self.release(connection)
+
+    async def close(self):
+        """Zatvara slobodne konekcije i executor; pozajmljene se zatvaraju pri vraćanju"""
+        self._closed = True
+        idle, self._idle = self._idle, []
+        for connection, _ in idle:
+            await self.run(self._close_quietly, connection)
+        self.executor.shutdown(wait=False)
+
+    def stats(self) -> Dict[str, int]:
+        """Vraća trenutno stanje pool-a"""
+        idle = len(self._idle)
+        return {'size': idle + self._in_use, 'idle': idle, 'in_use': self._in_use, 'max_size': self.max_size}
+
+    async def _checkout(self):
+        cutoff = time.monotonic() - self.idle_timeout
+        while self._idle:
+            connection, last_used = self._idle.pop()
+            if last_used < cutoff:
+                await self.run(self._close_quietly, connection)
+            elif await self._is_healthy(connection, last_used):
+                return connection
+            else:
+                await self.run(self._close_quietly, connection)
+        return await self.run(self._factory)
+
+    async def _is_healthy(self, connection, last_used: float) -> bool:
+        if not getattr(connection, 'open', True):
+            return False
+        if time.monotonic() - last_used < self.health_check_interval:
+            return True
+        try:
+            await self.run(connection.ping, reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close_quietly(connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+class AsyncBLBSConnector:
+    """Asyncio verzija BLBSConnector-a (connect, execute, stream, fetch_sample)
+
+    Metode se ponašaju kao u BLBSConnector-u: greške se ispisuju i vraća se
+    None, a jedan konektor drži najviše jednu konekciju. Za konkurentne
+    izveštaje se pravi po jedan konektor nad zajedničkim AsyncConnectionPool-om.
+    """
+
+    def __init__(self, config: Dict[str, str], pool: Optional[AsyncConnectionPool] = None,
+                 timeout: Optional[float] = None, query_id: Optional[str] = None,
+                 breaker: Optional[CircuitBreaker] = None):
+        self.config = config
+        self.pool = pool
+        if breaker is None:
+            breaker = pool.breaker if pool is not None else get_breaker(config)
+        self.breaker = breaker
+        self.timeout = timeout
+        self.query_id = query_id
+        self.connection = None
+        self.description = None
+        self.cancelled = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.disconnect()
+
+    async def connect(self) -> bool:
+        """Otvara konekciju sa bazom (odmah vraća False dok je circuit breaker host-a otvoren)"""
+        try:
+            if self.pool is not None:
+                # Pool sam proverava prekidač i beleži ishod
+                self.connection = await self.pool.acquire()
+                return True
+            self.breaker.check()
+            options = {'connect_timeout': CONNECT_TIMEOUT}
+            if self.timeout:
+                options['read_timeout'] = self.timeout + READ_TIMEOUT_GRACE
+            self.connection = await self._run(create_connection, self.config, **options)
+        except CircuitOpenError as e:
+            print(f"Greška pri konekciji: {e}")
+            return False
+        except Exception as e:
+            if self.pool is None:
+                self.breaker.record(e)
+            print(f"Greška pri konekciji: {e}")
+            return False
+        self.breaker.record_success()
+        return True
+
+    async def disconnect(self):
+        """Zatvara konekciju (pooled konekciju vraća u pool)"""
+        if self.connection:
+            connection, self.connection = self.connection, None
+            await self._close(connection)
+        if self.query_id is not None:
+            query_registry.forget(self.query_id)
+
+    async def execute(self, query: str, params=None) -> Optional[tuple]:
+        """Izvršava parametrizovan SQL upit (`%s` placeholderi) i vraća sve redove"""
+        try:
+            return await self._fetch_all(query, params)
+        except Exception as e:
+            self._report_failure(e)
+            return None
+
+    async def stream(self, query: str, params=None, batch_size: int = 1000) -> AsyncIterator[list]:
+        """Izvršava upit nebaferovano (SSCursor) i vraća redove u paketima
+
+        Svaki paket se čita u niti pool-a, pa event petlja između paketa
+        opslužuje druge zahteve. Ako potrošač prekine iteraciju pre kraja,
+        konekcija se odbacuje umesto da se pročita ostatak rezultata.
+        """
+        if not self.connection:
+            if not await self.connect():
+                raise ConnectionError("Nije moguće povezati sa MySQL bazom")
+
+        connection = self.connection
+        cursor = connection.cursor(pymysql.cursors.SSCursor)
+        finished = tracked = False
+        try:
+            tracked = self._start_tracking(connection)
+            await self._run(cursor.execute, self._with_time_limit(query), params)
+            self.description = cursor.description
+            while True:
+                rows = await self._run(cursor.fetchmany, batch_size)
+                if not rows:
+                    break
+                yield rows
+            finished = True
+        finally:
+            if tracked:
+                # Može da čeka KILL koji je u toku - ne blokira event petlju
+                await self._run(query_registry.unregister, self.query_id)
+            result = getattr(cursor, '_result', None)
+            if finished or not (result is not None and result.unbuffered_active):
+                await self._run(cursor.close)
+                if not connection.open:
+                    await self._drop_connection(connection)
+            else:
+                # Prekid nebaferovanog upita zatvaranjem konekcije (bez čitanja ostatka)
+                result.unbuffered_active = False
+                await self._drop_connection(connection)
+
+    async def fetch_sample(self, query: str, sample_size: int = 50) -> Optional[Tuple[list, int]]:
+        """Vraća prvih `sample_size` redova i ukupan broj redova upita (kao BLBSConnector)"""
+        try:
+            plan = query_planner.plan_sample(query, sample_size)
+            if plan is None:
+                sample, total = [], 0
+                async for rows in self.stream(query):
+                    if len(sample) < sample_size:
+                        sample.extend(rows[:sample_size - len(sample)])
+                    total += len(rows)
+                return sample, total
+
+            sample_sql, count_sql = plan
+            sample = list(await self._fetch_all(sample_sql))
+            if len(sample) < sample_size:
+                return sample, len(sample)
+            total = (await self._fetch_all(count_sql))[0][0]
+            return sample, int(total)
+        except Exception as e:
+            self._report_failure(e)
+            return None
+
+    async def cancel(self) -> Tuple[bool, str]:
+        """Otkazuje upit ovog konektora (KILL QUERY preko zasebne konekcije)"""
+        if self.query_id is None:
+            return False, "Upit nema identifikator i ne može biti otkazan."
+        # Ne koristi executor pool-a - sve njegove niti mogu čekati na upite
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, query_registry.cancel, self.query_id)
+
+    async def _fetch_all(self, query: str, params=None) -> tuple:
+        """Izvršava upit baferovano i prosleđuje greške pozivaocu"""
+        if not self.connection:
+            if not await self.connect():
+                raise ConnectionError("Nije moguće povezati sa MySQL bazom")
+
+        connection = self.connection
+        tracked = self._start_tracking(connection)
+        try:
+            return await self._run(self._query_blocking, connection, self._with_time_limit(query), params)
+        except Exception:
+            if not connection.open:
+                await self._drop_connection(connection)
+            raise
+        finally:
+            if tracked:
+                # Može da čeka KILL koji je u toku - ne blokira event petlju
+                await self._run(query_registry.unregister, self.query_id)
+
+    def _query_blocking(self, connection, query: str, params) -> tuple:
+        with connection.cursor() as cursor:
+            cursor.execute(query, params)
+            self.description = cursor.description
+            return cursor.fetchall()
+
+    async def _run(self, func, *args, **kwargs):
+        if self.pool is not None:
+            return await self.pool.run(func, *args, **kwargs)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+
+    def _with_time_limit(self, query: str) -> str:
+        if not self.timeout:
+            return query
+        return query_planner.with_time_limit(query, self.timeout)
+
+    def _start_tracking(self, connection) -> bool:
+        if self.query_id is None:
+            return False
+        query_registry.register(self.query_id, self.config, connection.thread_id())
+        return True
+
+    def _report_failure(self, error: Exception):
+        if query_registry.is_cancelled(self.query_id):
+            self.cancelled = True
+            print(f"Upit {self.query_id} je otkazan")
+        else:
+            print(f"Greška pri izvršavanju upita: {error}")
+
+    async def _close(self, connection, discard: bool = False):
+        if self.pool is not None:
+            await self.pool.release(connection, discard=discard)
+        else:
+            await self._run(AsyncConnectionPool._close_quietly, connection)
+
+    async def _drop_connection(self, connection):
+        """Trajno zatvara (i odbacuje iz pool-a) konekciju koja više nije upotrebljiva"""
+        if self.connection is connection:
+            self.connection = None
+        await self._close(connection, discard=True)
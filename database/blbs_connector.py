@@ -1,37 +1,97 @@
 """
 BLBS Database Connector - Konekcija sa MySQL bazom
 """
+import time
+
 import pymysql
-from typing import Dict, Tuple, Optional
+import pymysql.cursors
+from pymysql.constants import CLIENT
+from typing import Dict, Iterator, List, Sequence, Tuple, Optional
+
+from database import prepared_statements, query_planner, sql_normalizer
+from database.circuit_breaker import CircuitOpenError, get_breaker
+from database.connection_profiles import profile_options
+from database.columnar import ColumnarResult
+from database.query_control import query_registry
+from database.query_stats import estimate_bytes, query_stats
+from database.resource_governor import ResultGovernor, ResultLimits
+from database.result_digest import ResultDigest
+
+# Rezerva iznad MAX_EXECUTION_TIME da greška servera stigne pre read timeout-a
+READ_TIMEOUT_GRACE = 30
+
+# Najduže čekanje na TCP konekciju/handshake; nedostupan host dalje odbija circuit breaker
+CONNECT_TIMEOUT = 5
+
+
+def create_connection(config: Dict[str, str], profile: Optional[str] = None, **options):
+    """Otvara novu pymysql konekciju na osnovu konfiguracije (i profila iz connection_profiles)"""
+    options = {**profile_options(profile), **options}
+    return pymysql.connect(
+        host=config['host'],
+        user=config['username'],
+        password=config['password'],
+        database=config['database'],
+        port=int(config['port']),
+        charset='utf8mb4',
+        **options
+    )
 
 
 class BLBSConnector:
-    def __init__(self, config: Dict[str, str]):
+    def __init__(self, config: Dict[str, str], pool=None, cache=None,
+                 timeout: Optional[float] = None, query_id: Optional[str] = None,
+                 profile: Optional[str] = None, stats=None, limits: Optional[ResultLimits] = None,
+                 breaker=None):
         self.config = config
+        self.pool = pool
+        # Pooled konekcije nose profil pool-a
+        self.profile = profile if profile is not None else getattr(pool, 'profile', None)
+        self.cache = cache
+        # Latencija po otisku upita (podrazumevano deljena statistika procesa)
+        self.stats = stats if stats is not None else query_stats
+        self.timeout = timeout
+        self.query_id = query_id
+        # Ograničenje redova/bajtova po upitu; prekoračenje prekida upit i ostavlja skraćen rezultat
+        self.limits = limits
         self.connection = None
+        self.description = None
+        self.cancelled = False
+        # Razlog skraćivanja rezultata poslednjeg poziva (execute, fetch_sample, iter_query, execute_batch...)
+        self.truncated: Optional[str] = None
+        # Otisak sadržaja vraćenih rezultata (start_digest), za otkrivanje nepromenjenih podataka
+        self.digest: Optional[ResultDigest] = None
+        # Circuit breaker host-a (podrazumevano deljen po host:port) - dok je otvoren, connect odmah odbija
+        self.breaker = breaker if breaker is not None else get_breaker(config)
     
     def test_connection(self) -> Tuple[bool, str]:
-        """Testira konekciju sa bazom podataka"""
+        """Testira konekciju sa bazom podataka (uvek pokušava, i kada je circuit breaker otvoren)"""
         try:
-            # Pokušaj konekcije
-            connection = pymysql.connect(
-                host=self.config['host'],
-                user=self.config['username'],
-                password=self.config['password'],
-                database=self.config['database'],
-                port=int(self.config['port']),
-                charset='utf8mb4',
-                connect_timeout=10
-            )
+            # Pokušaj konekcije (iz pool-a ako postoji)
+            try:
+                if self.pool is not None:
+                    connection = self.pool.acquire()
+                else:
+                    connection = create_connection(self.config, self.profile, connect_timeout=CONNECT_TIMEOUT)
+            except Exception as e:
+                self.breaker.record(e)
+                raise
             
-            # Testiranje osnovnih SQL komandi
-            with connection.cursor() as cursor:
-                cursor.execute("SELECT VERSION()")
-                version = cursor.fetchone()
-                cursor.execute("SELECT DATABASE()")
-                database = cursor.fetchone()
+            # Testiranje osnovnih SQL komandi (konekcija iz pool-a ne znači da host i sada odgovara)
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT VERSION()")
+                    version = cursor.fetchone()
+                    cursor.execute("SELECT DATABASE()")
+                    database = cursor.fetchone()
+            except pymysql.MySQLError as e:
+                self.breaker.record(e)
+                self._close(connection, discard=not connection.open)
+                raise
             
-            connection.close()
+            self._close(connection)
+            # Odgovor servera na ručni test je dokaz da host radi - zatvara i otvoren prekidač
+            self.breaker.reset()
             
             status_message = f"""
 ✅ KONEKCIJA USPEŠNA!
@@ -77,37 +137,451 @@ Status: GREŠKA ❌
             return False, error_message
     
     def connect(self) -> bool:
-        """Otvara konekciju sa bazom"""
+        """Otvara konekciju sa bazom (odmah vraća False dok je circuit breaker host-a otvoren)"""
         try:
-            self.connection = pymysql.connect(
-                host=self.config['host'],
-                user=self.config['username'],
-                password=self.config['password'],
-                database=self.config['database'],
-                port=int(self.config['port']),
-                charset='utf8mb4'
-            )
-            return True
+            self.breaker.check()
+            if self.pool is not None:
+                self.connection = self.pool.acquire()
+            else:
+                options = {'connect_timeout': CONNECT_TIMEOUT}
+                if self.timeout:
+                    options['read_timeout'] = self.timeout + READ_TIMEOUT_GRACE
+                self.connection = create_connection(self.config, self.profile, **options)
+        except CircuitOpenError as e:
+            print(f"Greška pri konekciji: {e}")
+            return False
         except Exception as e:
+            self.breaker.record(e)
             print(f"Greška pri konekciji: {e}")
             return False
+        self.breaker.record_success()
+        return True
     
     def disconnect(self):
-        """Zatvara konekciju"""
+        """Zatvara konekciju (pooled konekciju vraća u pool)"""
         if self.connection:
-            self.connection.close()
+            self._close(self.connection)
             self.connection = None
+        if self.query_id is not None:
+            query_registry.forget(self.query_id)
+    
+    def _close(self, connection, discard: bool = False):
+        """Vraća konekciju u pool ili je zatvara"""
+        if self.pool is not None:
+            self.pool.release(connection, discard=discard)
+        else:
+            connection.close()
     
     def execute_query(self, query: str) -> Optional[list]:
         """Izvršava SQL upit"""
+        return self.execute(query)
+    
+    def execute(self, query: str, params=None, prepare: bool = False,
+                use_cache: bool = True) -> Optional[list]:
+        """Izvršava parametrizovan SQL upit (`%s` placeholderi)
+        
+        Sa prepare=True upit ide kroz server-side prepared naredbu keširanu po
+        konekciji, pa ponovljeni šabloni izveštaja preskaču parsiranje i planiranje.
+        SELECT rezultati se čitaju iz keša rezultata ako je zadat (i use_cache=True).
+        """
+        self.truncated = None
+        if use_cache and self.cache is not None and query_planner.is_select(query):
+            key = self.cache.make_key(self._cache_namespace(), query, params)
+            rows = self.cache.get_or_load(key, lambda: self._execute(query, params, prepare),
+                                          cacheable=lambda _: not self.truncated)
+        else:
+            rows = self._execute(query, params, prepare)
+        if self.digest is not None and rows is not None:
+            self.digest.mark('rows').update(rows)
+        return rows
+    
+    def start_digest(self) -> ResultDigest:
+        """Počinje nov otisak sadržaja svih rezultata koje konektor vraća
+        
+        Obuhvata execute, fetch_sample i iter_query (i rezultate iz keša), pa
+        dva ista niza poziva nad nepromenjenim podacima daju isti otisak.
+        """
+        self.digest = ResultDigest()
+        return self.digest
+    
+    def _execute(self, query: str, params, prepare: bool) -> Optional[list]:
+        try:
+            return self._fetch_all(query, params, prepare)
+        except Exception as e:
+            self._report_failure(e)
+            return None
+    
+    def executemany(self, query: str, seq_of_params) -> Optional[int]:
+        """Izvršava isti upit za više skupova parametara, vraća broj izmenjenih redova"""
         if not self.connection:
             if not self.connect():
                 return None
         
         try:
             with self.connection.cursor() as cursor:
-                cursor.execute(query)
-                return cursor.fetchall()
+                return cursor.executemany(query, seq_of_params)
         except Exception as e:
             print(f"Greška pri izvršavanju upita: {e}")
-            return None
\ No newline at end of file
+            self.breaker.record(e)
+            if not self.connection.open:
+                self._close(self.connection, discard=True)
+                self.connection = None
+            return None
+    
+    def iter_query(self, query: str, params=None, batch_size: int = 1000) -> Iterator[list]:
+        """Izvršava SQL upit nebaferovano (SSCursor) i vraća redove u paketima
+        
+        Memorija je ograničena na jedan paket. Ako potrošač prekine iteraciju pre
+        kraja, konekcija se odbacuje umesto da se pročita ostatak rezultata.
+        Kada je zadato ograničenje (`limits`) i rezultat ga pređe, upit se
+        prekida na serveru, poslednji paket se skraćuje, a `truncated` dobija razlog.
+        """
+        self.truncated = None
+        batches = self._iter_rows(query, params, batch_size)
+        try:
+            if self.digest is not None:
+                self.digest.mark('rows')
+            for rows in batches:
+                if self.digest is not None:
+                    self.digest.update(rows)
+                yield rows
+        finally:
+            batches.close()
+    
+    def _iter_rows(self, query: str, params, batch_size: int) -> Iterator[list]:
+        if not self.connection:
+            if not self.connect():
+                raise ConnectionError("Nije moguće povezati sa MySQL bazom")
+        
+        connection = self.connection
+        cursor = connection.cursor(pymysql.cursors.SSCursor)
+        finished = tracked = failed = False
+        governor = ResultGovernor(self.limits) if self.limits is not None else None
+        started = time.perf_counter()
+        fetched = size = 0
+        try:
+            tracked = self._start_tracking(connection)
+            cursor.execute(self._with_time_limit(query), params)
+            self.description = cursor.description
+            while True:
+                rows = cursor.fetchmany(governor.batch_size(batch_size) if governor else batch_size)
+                if not rows:
+                    break
+                if governor is not None:
+                    rows = governor.admit(rows)
+                    if governor.exceeded:
+                        self._stop_on_server(connection, governor.exceeded)
+                fetched += len(rows)
+                size += estimate_bytes(rows)
+                if rows:
+                    yield rows
+                if governor is not None and governor.exceeded:
+                    break
+            finished = True
+            self.breaker.record_success()
+        except Exception as e:
+            failed = True
+            self.breaker.record(e)
+            raise
+        finally:
+            self.stats.record(query, time.perf_counter() - started, fetched, size, error=failed)
+            if tracked:
+                query_registry.unregister(self.query_id)
+            stopped = governor is not None and governor.exceeded
+            if (finished or not self._has_pending_rows(cursor)) and not stopped:
+                cursor.close()
+                if not connection.open:
+                    self._drop_connection(connection)
+            else:
+                self._abort_unbuffered(cursor, connection)
+    
+    def execute_batch(self, queries: Sequence[str], use_cache: bool = True) -> Optional[List[Dict]]:
+        """Izvršava više SELECT upita u jednom slanju i vraća rezultat za svaki upit
+        
+        Na konekciji sa CLIENT.MULTI_STATEMENTS (profili 'multi'/'wan_lean_multi')
+        upiti idu serveru kao jedan tekst, a skupovi rezultata se čitaju redom
+        (nextset); na ostalim konekcijama izvršavaju se jedan po jedan. Upiti iz
+        keša se ne šalju. Svaki rezultat je {'columns', 'rows', 'error', 'truncated'};
+        ako upit padne, server ne izvršava naredne i oni dobijaju grešku.
+        """
+        self.truncated = None
+        for query in queries:
+            valid, reason = sql_normalizer.validate_select(query)
+            if not valid:
+                print(f"Greška: paket sme da sadrži samo pojedinačne SELECT upite - {reason} ({query[:60]})")
+                return None
+        
+        results: List[Optional[Dict]] = [None] * len(queries)
+        keys = [None] * len(queries)
+        if use_cache and self.cache is not None:
+            for i, query in enumerate(queries):
+                keys[i] = self.cache.make_key(self._cache_namespace(), query, ('batch',))
+                results[i] = self.cache.get(keys[i])
+        pending = [i for i, result in enumerate(results) if result is None]
+        
+        try:
+            fetched = self._fetch_batch([queries[i] for i in pending])
+        except Exception as e:
+            self._report_failure(e)
+            return None
+        for i, result in zip(pending, fetched):
+            results[i] = result
+            if keys[i] is not None and result['error'] is None and not result['truncated']:
+                self.cache.put(keys[i], result)
+        return results
+    
+    def describe(self, query: str) -> Optional[tuple]:
+        """Vraća opis kolona upita (cursor.description) bez čitanja redova"""
+        self.truncated = None
+        try:
+            self._fetch_all(query_planner.describe_query(query))
+            return self.description
+        except Exception as e:
+            self._report_failure(e)
+            return None
+    
+    def query_columnar(self, query: str, params=None, batch_size: int = 1000):
+        """Izvršava upit i vraća rezultat u kolonskom obliku (ColumnarResult)"""
+        try:
+            return ColumnarResult.from_batches(lambda: self.description,
+                                               self.iter_query(query, params, batch_size))
+        except Exception as e:
+            self._report_failure(e)
+            return None
+    
+    def fetch_sample(self, query: str, sample_size: int = 50) -> Optional[Tuple[list, int]]:
+        """Vraća prvih `sample_size` redova i ukupan broj redova upita
+        
+        SELECT upiti se obmotavaju LIMIT-om, pa preko mreže prelaze samo redovi
+        uzorka; ukupan broj se dobija odvojenim COUNT(*) upitom i to samo kada
+        uzorak nije već obuhvatio ceo rezultat.
+        """
+        self.truncated = None
+        if self.cache is not None and query_planner.is_select(query):
+            key = self.cache.make_key(self._cache_namespace(), query, ('sample', sample_size))
+            result = self.cache.get_or_load(key, lambda: self._fetch_sample(query, sample_size),
+                                            cacheable=lambda _: not self.truncated)
+        else:
+            result = self._fetch_sample(query, sample_size)
+        if self.digest is not None and result is not None:
+            self.digest.mark('sample').update(result[0]).mark('total').update([(result[1],)])
+        return result
+    
+    def _fetch_sample(self, query: str, sample_size: int) -> Optional[Tuple[list, int]]:
+        try:
+            plan = query_planner.plan_sample(query, sample_size)
+            if plan is None:
+                return self._stream_sample(query, sample_size)
+            
+            sample_sql, count_sql = plan
+            sample = list(self._fetch_all(sample_sql))
+            if len(sample) < sample_size:
+                return sample, len(sample)
+            
+            try:
+                total = self._fetch_all(count_sql)[0][0]
+            except pymysql.MySQLError as e:
+                # Npr. duplirana imena kolona u izvedenoj tabeli - brojimo strimovanjem
+                print(f"COUNT upit nije uspeo, brojim strimovanjem: {e}")
+                return sample, self._stream_sample(query, 0)[1]
+            return sample, int(total)
+        except Exception as e:
+            self._report_failure(e)
+            return None
+    
+    def _stream_sample(self, query: str, sample_size: int) -> Tuple[list, int]:
+        """Strimuje ceo rezultat zadržavajući samo uzorak i brojač redova"""
+        sample, total = [], 0
+        for rows in self._iter_rows(query, None, 1000):
+            if len(sample) < sample_size:
+                sample.extend(rows[:sample_size - len(sample)])
+            total += len(rows)
+        return sample, total
+    
+    def _fetch_all(self, query: str, params=None, prepare: bool = False) -> tuple:
+        """Izvršava upit baferovano i prosleđuje greške pozivaocu"""
+        if not self.connection:
+            if not self.connect():
+                raise ConnectionError("Nije moguće povezati sa MySQL bazom")
+        
+        if self.limits is not None:
+            # Ograničen rezultat se čita strimovanjem da bi mogao da se prekine
+            return tuple(row for rows in self._iter_rows(query, params, 1000) for row in rows)
+        
+        connection = self.connection
+        tracked = self._start_tracking(connection)
+        started = time.perf_counter()
+        try:
+            with connection.cursor() as cursor:
+                if prepare and not isinstance(params, dict):
+                    prepared_statements.cache_for(connection).execute(
+                        cursor, self._with_time_limit(query), params)
+                else:
+                    cursor.execute(self._with_time_limit(query), params)
+                self.description = cursor.description
+                rows = cursor.fetchall()
+            self.stats.record(query, time.perf_counter() - started, len(rows), estimate_bytes(rows))
+            self.breaker.record_success()
+            return rows
+        except Exception as e:
+            self.stats.record(query, time.perf_counter() - started, error=True)
+            self.breaker.record(e)
+            if not connection.open:
+                # Konekcija je pukla - ne vraćamo je u pool
+                self._drop_connection(connection)
+            raise
+        finally:
+            if tracked:
+                query_registry.unregister(self.query_id)
+    
+    def _fetch_batch(self, queries: List[str]) -> List[Dict]:
+        """Šalje upite paketa (jedan round trip uz MULTI_STATEMENTS) i razdvaja skupove rezultata"""
+        if not queries:
+            return []
+        if not self.connection:
+            if not self.connect():
+                raise ConnectionError("Nije moguće povezati sa MySQL bazom")
+        
+        connection = self.connection
+        statements = [self._batch_statement(query) for query in queries]
+        results: List[Dict] = []
+        tracked = self._start_tracking(connection)
+        started = time.perf_counter()
+        try:
+            with connection.cursor() as cursor:
+                if connection.client_flag & CLIENT.MULTI_STATEMENTS:
+                    # Novi red pre ';' - završni "-- komentar" ne sme da proguta separator
+                    try:
+                        cursor.execute("\n;\n".join(statements))
+                        while True:
+                            started = self._collect_batch_result(results, queries[len(results)], cursor, started)
+                            if len(results) == len(queries) or not cursor.nextset():
+                                break
+                    except pymysql.MySQLError as e:
+                        if not connection.open:
+                            raise
+                        failed = len(results)
+                        self._record_batch_error(results, queries[failed], e, started,
+                                                 skipped=len(queries) - failed - 1)
+                else:
+                    for query, statement in zip(queries, statements):
+                        try:
+                            cursor.execute(statement)
+                            started = self._collect_batch_result(results, query, cursor, started)
+                        except pymysql.MySQLError as e:
+                            if not connection.open:
+                                raise
+                            self._record_batch_error(results, query, e, started)
+                            started = time.perf_counter()
+            self.breaker.record_success()
+            return results
+        except Exception as e:
+            self.breaker.record(e)
+            if not connection.open:
+                self._drop_connection(connection)
+            raise
+        finally:
+            if tracked:
+                query_registry.unregister(self.query_id)
+    
+    def _batch_statement(self, query: str) -> str:
+        """Upit paketa sa ograničenjem redova na serveru (LIMIT max_rows + 1) i vremenskim budžetom"""
+        query = query_planner.clean_query(query)
+        if self.limits is not None and self.limits.max_rows is not None:
+            query = query_planner.sample_query(query, self.limits.max_rows + 1)
+        return self._with_time_limit(query)
+    
+    def _collect_batch_result(self, results: List[Dict], query: str, cursor, started: float) -> float:
+        """Čita tekući skup rezultata paketa; vraća trenutak završetka (početak merenja sledećeg)"""
+        rows = cursor.fetchall()
+        finished = time.perf_counter()
+        self.stats.record(query, finished - started, len(rows), estimate_bytes(rows))
+        truncated = None
+        max_rows = self.limits.max_rows if self.limits is not None else None
+        if max_rows is not None and len(rows) > max_rows:
+            rows = rows[:max_rows]
+            truncated = self.truncated = f"prekoračeno ograničenje od {max_rows} redova"
+        self.description = cursor.description
+        results.append({'columns': [d[0] for d in cursor.description or ()], 'rows': rows,
+                        'error': None, 'truncated': truncated})
+        return finished
+    
+    def _record_batch_error(self, results: List[Dict], query: str, error: Exception, started: float,
+                            skipped: int = 0):
+        """Greška u paketu: upit koji je pao dobija grešku, a `skipped` neizvršenih upita napomenu"""
+        self.stats.record(query, time.perf_counter() - started, error=True)
+        print(f"Greška pri izvršavanju upita iz paketa: {error}")
+        results.append({'columns': None, 'rows': None, 'error': str(error), 'truncated': None})
+        results.extend({'columns': None, 'rows': None, 'truncated': None,
+                        'error': "Nije izvršeno - prethodni upit u paketu nije uspeo"} for _ in range(skipped))
+    
+    def cancel(self) -> Tuple[bool, str]:
+        """Otkazuje upit ovog konektora (KILL QUERY preko zasebne konekcije)"""
+        if self.query_id is None:
+            return False, "Upit nema identifikator i ne može biti otkazan."
+        return query_registry.cancel(self.query_id)
+    
+    def _stop_on_server(self, connection, reason: str):
+        """Prekoračeno ograničenje rezultata - KILL QUERY da server prestane sa radom"""
+        self.truncated = reason
+        print(f"Rezultat upita je skraćen: {reason}")
+        try:
+            killer = create_connection(self.config, connect_timeout=5, read_timeout=10)
+            try:
+                with killer.cursor() as cursor:
+                    cursor.execute(f"KILL QUERY {int(connection.thread_id())}")
+            finally:
+                killer.close()
+        except Exception as e:
+            # Konekcija se svejedno odbacuje, pa server prekida upit pri sledećem slanju
+            print(f"Greška pri prekidanju upita na serveru: {e}")
+    
+    def _with_time_limit(self, query: str) -> str:
+        """Dodaje MAX_EXECUTION_TIME hint ako je zadat vremenski budžet"""
+        if not self.timeout:
+            return query
+        return query_planner.with_time_limit(query, self.timeout)
+    
+    def _start_tracking(self, connection) -> bool:
+        """Prijavljuje upit registru da bi mogao biti otkazan"""
+        if self.query_id is None:
+            return False
+        query_registry.register(self.query_id, self.config, connection.thread_id())
+        return True
+    
+    def _report_failure(self, error: Exception):
+        if query_registry.is_cancelled(self.query_id):
+            self.cancelled = True
+            print(f"Upit {self.query_id} je otkazan")
+        else:
+            print(f"Greška pri izvršavanju upita: {error}")
+    
+    def _cache_namespace(self) -> tuple:
+        """Deo ključa keša koji razdvaja različite baze (i profile - lean vraća tekst umesto objekata)"""
+        return self.config['host'], str(self.config['port']), self.config['database'], self.profile or 'default'
+    
+    @staticmethod
+    def _has_pending_rows(cursor) -> bool:
+        result = getattr(cursor, '_result', None)
+        return bool(result is not None and result.unbuffered_active)
+    
+    def _abort_unbuffered(self, cursor, connection):
+        """Prekida nebaferovani upit zatvaranjem konekcije (bez čitanja ostatka)"""
+        cursor._result.unbuffered_active = False
+        try:
+            cursor.close()
+        except Exception:
+            pass
+        self._drop_connection(connection)
+    
+    def _drop_connection(self, connection):
+        """Trajno zatvara (i odbacuje iz pool-a) konekciju koja više nije upotrebljiva"""
+        if self.pool is not None:
+            self.pool.release(connection, discard=True)
+        else:
+            try:
+                connection.close()
+            except Exception:
+                pass
+        if self.connection is connection:
+            self.connection = None
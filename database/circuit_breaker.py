@@ -0,0 +1,254 @@
+"""
+Circuit breaker po MySQL host-u - brzo odbijanje zahteva dok server ne odgovara
+"""
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+import pymysql
+
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+STATE_LABELS = {CLOSED: 'zatvoren', OPEN: 'otvoren', HALF_OPEN: 'poluotvoren'}
+
+# Greške klijenta koje znače da host ne odgovara: ne može da se poveže (2003),
+# nepoznat host (2005), server je nestao / veza je pukla (2006, 2013, 2055)
+_HOST_ERROR_CODES = (2003, 2005, 2006, 2013, 2055)
+
+
+class CircuitOpenError(ConnectionError):
+    """Zahtev je odbijen bez pokušaja konekcije jer je host označen kao nedostupan"""
+
+
+def is_host_failure(error: BaseException) -> bool:
+    """Da li greška znači da MySQL host ne odgovara (a ne grešku u upitu, kredencijalima ili pool-u)"""
+    if isinstance(error, pymysql.err.OperationalError):
+        return bool(error.args) and error.args[0] in _HOST_ERROR_CODES
+    return isinstance(error, TimeoutError)
+
+
+class CircuitBreaker:
+    """Prati ishode konekcija i upita ka jednom host-u i odbija zahteve dok je host nedostupan
+
+    - zatvoren: zahtevi prolaze; kada u poslednjih `window` sekundi bude bar
+      `minimum_calls` ishoda, a udeo grešaka host-a dostigne `failure_threshold`,
+      prekidač se otvara
+    - otvoren: svaki zahtev odmah dobija CircuitOpenError, bez čekanja na
+      connect timeout, dok ne prođe `cooldown` sekundi
+    - poluotvoren: propušta najviše `probes` probnih zahteva; uspeh zatvara
+      prekidač, greška host-a ga ponovo otvara na `cooldown` sekundi
+
+    Greške koje nisu greške host-a (sintaksa, kredencijali, pun pool) su
+    neutralne - samo oslobađaju mesto probnog zahteva.
+    """
+
+    def __init__(self, name: str, failure_threshold: float = 0.5, minimum_calls: int = 4,
+                 window: float = 60.0, cooldown: float = 15.0, probes: int = 1,
+                 clock: Callable[[], float] = time.monotonic):
+        if not 0 < failure_threshold <= 1:
+            raise ValueError("failure_threshold mora biti između 0 i 1")
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.minimum_calls = max(1, minimum_calls)
+        self.window = window
+        self.cooldown = cooldown
+        self.probes = max(1, probes)
+        self._clock = clock
+        self._outcomes: Deque[Tuple[float, bool]] = deque()
+        self._failures = 0
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probing = 0
+        self._probe_started = 0.0
+        self._lock = threading.Lock()
+        self.rejected = 0
+        self.trips = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def allow(self) -> bool:
+        """Da li zahtev sme ka host-u (u poluotvorenom stanju zauzima mesto probe)"""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN:
+                now = self._clock()
+                # Proba bez zabeleženog ishoda (prekinut zahtev) ne sme trajno da blokira host
+                if self._probing >= self.probes and now - self._probe_started >= self.cooldown:
+                    self._probing = 0
+                if self._probing < self.probes:
+                    self._probing += 1
+                    self._probe_started = now
+                    return True
+            self.rejected += 1
+            return False
+
+    def check(self):
+        """Kao allow(), ali odbijanje podiže CircuitOpenError"""
+        if not self.allow():
+            raise CircuitOpenError(self.describe())
+
+    def record(self, error: Optional[BaseException] = None):
+        """Beleži ishod zahteva: None je uspeh, greška host-a neuspeh, ostale greške su neutralne"""
+        if error is None:
+            self.record_success()
+        elif is_host_failure(error):
+            self.record_failure(error)
+        else:
+            with self._lock:
+                self._probing = max(0, self._probing - 1)
+
+    def record_success(self):
+        """Host je odgovorio - uspešna proba zatvara prekidač
+
+        U otvorenom stanju uspeh se ne računa: to je zahtev započet pre otvaranja.
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == HALF_OPEN:
+                self._reset()
+            elif state == CLOSED:
+                self._add(True)
+
+    def record_failure(self, error: Optional[BaseException] = None):
+        """Host nije odgovorio"""
+        with self._lock:
+            if error is not None:
+                self.last_error = str(error) or type(error).__name__
+            state = self._current_state()
+            if state == HALF_OPEN:
+                self._trip()
+            elif state == CLOSED:
+                self._add(False)
+                calls = len(self._outcomes)
+                if calls >= self.minimum_calls and self._failures / calls >= self.failure_threshold:
+                    self._trip()
+
+    def reset(self):
+        """Vraća prekidač u zatvoreno stanje (npr. posle promene konfiguracije)"""
+        with self._lock:
+            self._reset()
+            self.last_error = None
+
+    def retry_in(self) -> float:
+        """Sekundi do sledeće probe (0 ako prekidač nije otvoren)"""
+        with self._lock:
+            if self._current_state() != OPEN:
+                return 0.0
+            return max(0.0, self.cooldown - (self._clock() - self._opened_at))
+
+    def describe(self) -> str:
+        """Poruka za korisnika kada je zahtev odbijen"""
+        text = (f"MySQL host {self.name} ne odgovara - zahtevi se odbijaju bez čekanja "
+                f"još {self.retry_in():.0f}s")
+        if self.last_error:
+            text += f" (poslednja greška: {self.last_error})"
+        return text
+
+    def status(self) -> Dict[str, object]:
+        with self._lock:
+            state = self._current_state()
+            self._expire(self._clock())
+            calls = len(self._outcomes)
+            retry_in = max(0.0, self.cooldown - (self._clock() - self._opened_at)) if state == OPEN else 0.0
+            return {
+                'name': self.name,
+                'state': state,
+                'label': STATE_LABELS[state],
+                'calls': calls,
+                'failures': self._failures,
+                'failure_rate': round(self._failures / calls, 3) if calls else 0.0,
+                'window': self.window,
+                'retry_in': round(retry_in, 1),
+                'rejected': self.rejected,
+                'trips': self.trips,
+                'last_error': self.last_error,
+            }
+
+    def _current_state(self) -> str:
+        """Stanje uz prelaz otvoren -> poluotvoren po isteku `cooldown` (poziva se pod lock-om)"""
+        if self._state == OPEN and self._clock() - self._opened_at >= self.cooldown:
+            self._state = HALF_OPEN
+            self._probing = 0
+        return self._state
+
+    def _add(self, ok: bool):
+        now = self._clock()
+        self._outcomes.append((now, ok))
+        if not ok:
+            self._failures += 1
+        self._expire(now)
+
+    def _expire(self, now: float):
+        cutoff = now - self.window
+        while self._outcomes and self._outcomes[0][0] < cutoff:
+            if not self._outcomes.popleft()[1]:
+                self._failures -= 1
+
+    def _trip(self):
+        self._state = OPEN
+        self._opened_at = self._clock()
+        self._probing = 0
+        self.trips += 1
+        print(f"Circuit breaker za {self.name} je otvoren: {self.last_error}")
+
+    def _reset(self):
+        self._state = CLOSED
+        self._outcomes.clear()
+        self._failures = 0
+        self._probing = 0
+
+
+_breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(config: Dict[str, str], **options) -> CircuitBreaker:
+    """Deljeni prekidač za host:port iz konfiguracije (svi konektori i pool-ovi ka istom serveru)"""
+    key = (str(config['host']), str(config['port']))
+    with _breakers_lock:
+        breaker = _breakers.get(key)
+        if breaker is None:
+            breaker = CircuitBreaker(f"{key[0]}:{key[1]}", **options)
+            _breakers[key] = breaker
+        return breaker
+
+
+def breaker_status() -> List[Dict[str, object]]:
+    """Stanje svih prekidača (za početnu stranicu i Tk status)"""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return [breaker.status() for breaker in breakers]
+
+
+def reset_breakers():
+    """Zatvara sve prekidače (npr. posle promene MySQL konfiguracije)"""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    for breaker in breakers:
+        breaker.reset()
+
+
+def format_breakers(statuses: List[Dict[str, object]]) -> str:
+    """Tekstualni prikaz stanja prekidača (za Tk panel i konzolu)"""
+    if not statuses:
+        return "Circuit breaker: još nema pokušaja konekcije."
+    lines = ["Circuit breaker po MySQL host-u:"]
+    for status in statuses:
+        line = (f"  {status['name']}: {status['label']} - {status['failures']}/{status['calls']} grešaka "
+                f"u poslednjih {status['window']:.0f}s, odbijeno {status['rejected']}, otvaran {status['trips']}x")
+        if status['state'] == OPEN:
+            line += f", nova proba za {status['retry_in']:.0f}s"
+        if status['last_error'] and status['state'] != CLOSED:
+            line += f"\n    poslednja greška: {status['last_error']}"
+        lines.append(line)
+    return "\n".join(lines)
@@ -0,0 +1,247 @@
+"""
+Kolonski prikaz rezultata upita - tipizirani nizovi umesto liste tuple-ova
+"""
+from array import array
+from itertools import compress
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from pymysql.constants import FIELD_TYPE
+
+try:
+    import numpy as np
+except ImportError:  # NumPy je opcion - bez njega radi array modul
+    np = None
+
+
+INTEGER_TYPES = {FIELD_TYPE.TINY, FIELD_TYPE.SHORT, FIELD_TYPE.LONG, FIELD_TYPE.LONGLONG,
+                 FIELD_TYPE.INT24, FIELD_TYPE.YEAR}
+FLOAT_TYPES = {FIELD_TYPE.FLOAT, FIELD_TYPE.DOUBLE}
+STRING_TYPES = {FIELD_TYPE.VARCHAR, FIELD_TYPE.VAR_STRING, FIELD_TYPE.STRING, FIELD_TYPE.ENUM,
+                FIELD_TYPE.SET, FIELD_TYPE.TINY_BLOB, FIELD_TYPE.MEDIUM_BLOB, FIELD_TYPE.LONG_BLOB,
+                FIELD_TYPE.BLOB}
+
+
+class ObjectColumn:
+    """Kolona proizvoljnih Python vrednosti (datumi, Decimal, bytes...)"""
+
+    kind = 'object'
+
+    def __init__(self, name: str, values: Optional[list] = None):
+        self.name = name
+        self.values = values if values is not None else []
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def extend(self, values: Sequence):
+        self.values.extend(values)
+
+    def __getitem__(self, index: int):
+        return self.values[index]
+
+    def non_null(self) -> list:
+        return [v for v in self.values if v is not None]
+
+    def null_count(self) -> int:
+        return sum(1 for v in self.values if v is None)
+
+    def nbytes(self) -> int:
+        return 8 * len(self.values)
+
+    def to_list(self, start: int = 0, stop: Optional[int] = None) -> list:
+        return self.values[start:stop]
+
+
+class TypedColumn:
+    """Numerička kolona u `array` nizu sa maskom validnosti za NULL vrednosti"""
+
+    def __init__(self, name: str, typecode: str):
+        self.name = name
+        self.kind = 'int' if typecode == 'q' else 'float'
+        self.data = array(typecode)
+        self.valid = bytearray()
+        self._nulls = 0
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def extend(self, values: Sequence):
+        if None not in values:
+            self.data.extend(values)
+            self.valid.extend(b'\x01' * len(values))
+            return
+        zero = 0 if self.kind == 'int' else 0.0
+        self.data.extend(zero if v is None else v for v in values)
+        self.valid.extend(0 if v is None else 1 for v in values)
+        self._nulls += sum(1 for v in values if v is None)
+
+    def __getitem__(self, index: int):
+        return self.data[index] if self.valid[index] else None
+
+    def non_null(self):
+        return self.data if not self._nulls else array(self.data.typecode, compress(self.data, self.valid))
+
+    def null_count(self) -> int:
+        return self._nulls
+
+    def nbytes(self) -> int:
+        return self.data.itemsize * len(self.data) + len(self.valid)
+
+    def to_list(self, start: int = 0, stop: Optional[int] = None) -> list:
+        """Vrednosti u opsegu [start, stop) - konvertuje se samo isečak niza"""
+        data = self.data[start:stop]
+        if not self._nulls:
+            return data.tolist()
+        return [v if ok else None for v, ok in zip(data, self.valid[start:stop])]
+
+    def to_numpy(self):
+        """NumPy pogled na podatke (bez kopiranja) i maska validnosti"""
+        if np is None:
+            raise ImportError("NumPy nije instaliran")
+        return np.frombuffer(self.data, dtype=self.data.typecode), np.frombuffer(self.valid, dtype=np.bool_)
+
+
+class DictionaryColumn:
+    """Tekstualna kolona kodirana rečnikom - svaka različita vrednost se čuva jednom"""
+
+    kind = 'dictionary'
+
+    def __init__(self, name: str):
+        self.name = name
+        self.codes = array('I')
+        self.dictionary: List[object] = [None]
+        self._index: Dict[object, int] = {None: 0}
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def extend(self, values: Sequence):
+        index, dictionary = self._index, self.dictionary
+        codes = []
+        for value in values:
+            code = index.get(value)
+            if code is None:
+                code = index[value] = len(dictionary)
+                dictionary.append(value)
+            codes.append(code)
+        self.codes.extend(codes)
+
+    def __getitem__(self, index: int):
+        return self.dictionary[self.codes[index]]
+
+    def non_null(self) -> list:
+        return [self.dictionary[c] for c in self.codes if c]
+
+    def null_count(self) -> int:
+        return self.codes.count(0)
+
+    def distinct_count(self) -> int:
+        return len(self.dictionary) - 1
+
+    def nbytes(self) -> int:
+        return self.codes.itemsize * len(self.codes) + sum(len(v) for v in self.dictionary[1:] if hasattr(v, '__len__'))
+
+    def to_list(self, start: int = 0, stop: Optional[int] = None) -> list:
+        dictionary = self.dictionary
+        return [dictionary[c] for c in self.codes[start:stop]]
+
+    def to_numpy(self):
+        """NumPy niz kodova i rečnik vrednosti (kod 0 je NULL)"""
+        if np is None:
+            raise ImportError("NumPy nije instaliran")
+        return np.frombuffer(self.codes, dtype=np.uint32), self.dictionary
+
+
+def _column_for(name: str, type_code: Optional[int]):
+    if type_code in INTEGER_TYPES:
+        return TypedColumn(name, 'q')
+    if type_code in FLOAT_TYPES:
+        return TypedColumn(name, 'd')
+    if type_code in STRING_TYPES:
+        return DictionaryColumn(name)
+    return ObjectColumn(name)
+
+
+class ColumnarResult:
+    """Rezultat upita organizovan po kolonama
+
+    Gradi se direktno iz paketa redova kursora, pa lista tuple-ova nikada ne
+    postoji u celosti. Statistike se računaju nad celim nizovima kolona.
+    """
+
+    def __init__(self, description: Sequence):
+        self.columns = [_column_for(d[0], d[1]) for d in description]
+        self._by_name = {c.name: i for i, c in enumerate(self.columns)}
+        self.row_count = 0
+
+    @classmethod
+    def from_batches(cls, description: Sequence, batches: Iterable[Sequence[tuple]]) -> 'ColumnarResult':
+        """Gradi rezultat iz paketa redova (npr. BLBSConnector.iter_query)"""
+        result = None
+        for rows in batches:
+            if result is None:
+                result = cls(description() if callable(description) else description)
+            result.append_batch(rows)
+        if result is None:
+            result = cls(description() if callable(description) else description)
+        return result
+
+    def append_batch(self, rows: Sequence[tuple]):
+        """Dodaje paket redova, kolonu po kolonu"""
+        if not rows:
+            return
+        for i, values in enumerate(zip(*rows)):
+            column = self.columns[i]
+            try:
+                column.extend(values)
+            except (TypeError, OverflowError):
+                # Vrednost ne staje u tip kolone (npr. UNSIGNED BIGINT) - pređi na objekte
+                promoted = ObjectColumn(column.name, column.to_list(0, self.row_count))
+                promoted.extend(values)
+                self.columns[i] = promoted
+        self.row_count += len(rows)
+
+    def __len__(self) -> int:
+        return self.row_count
+
+    @property
+    def column_names(self) -> List[str]:
+        return [c.name for c in self.columns]
+
+    def column(self, name: str):
+        return self.columns[self._by_name[name]]
+
+    def row(self, index: int) -> tuple:
+        return tuple(c[index] for c in self.columns)
+
+    def rows(self, start: int = 0, stop: Optional[int] = None) -> List[tuple]:
+        """Vraća redove kao tuple-ove (za ispis i kompatibilnost)"""
+        stop = self.row_count if stop is None else min(stop, self.row_count)
+        if start >= stop:
+            return []
+        return list(zip(*(c.to_list(start, stop) for c in self.columns)))
+
+    def head(self, count: int = 50) -> List[tuple]:
+        return self.rows(0, count)
+
+    def nbytes(self) -> int:
+        """Procena memorije koju zauzimaju kolone"""
+        return sum(c.nbytes() for c in self.columns)
+
+    def summary(self) -> Dict[str, Dict[str, object]]:
+        """Statistika po koloni: broj NULL-ova, min/max/prosek ili broj različitih vrednosti"""
+        summary = {}
+        for column in self.columns:
+            info: Dict[str, object] = {'type': column.kind, 'nulls': column.null_count()}
+            values = column.non_null()
+            if isinstance(column, TypedColumn) and len(values):
+                info.update(min=min(values), max=max(values), avg=sum(values) / len(values))
+            elif isinstance(column, DictionaryColumn):
+                info['distinct'] = column.distinct_count()
+            elif values:
+                try:
+                    info.update(min=min(values), max=max(values))
+                except TypeError:
+                    pass
+            summary[column.name] = info
+        return summary
@@ -0,0 +1,563 @@
+"""
+Lokalni kolonski fajl format za ponovljene izveštaje - kompresovani blokovi i zone mape
+"""
+import datetime
+import decimal
+import hashlib
+import json
+import mmap
+import os
+import re
+import shutil
+import zlib
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from pymysql.constants import FIELD_TYPE
+
+from database import query_planner
+from database.aggregation_planner import AGGREGATED_REPORT_TYPES, BUCKETED_REPORT_TYPES, MONTHLY_BUCKET_DAYS
+from database.columnar import FLOAT_TYPES, INTEGER_TYPES
+
+
+DEFAULT_STORE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                 'config', 'blbs_columnar')
+
+MANIFEST_FILE = 'manifest.json'
+DATA_FILE = 'data.bin'
+DEFAULT_CHUNK_ROWS = 65536
+
+DECIMAL_TYPES = {FIELD_TYPE.DECIMAL, FIELD_TYPE.NEWDECIMAL}
+
+# Ime tabele je ujedno ime direktorijuma kopije - bez '.', '/' i sličnog
+_TABLE_NAME_RE = re.compile(r'^[A-Za-z0-9_$]{1,64}$')
+
+FILTER_OPERATORS = ('=', '!=', '<', '<=', '>', '>=', 'in')
+AGGREGATE_FUNCTIONS = ('count', 'sum', 'avg', 'min', 'max')
+
+# Upit za izveštaj iz kolonske kopije: SELECT kolone FROM tabela [WHERE uslov AND uslov ...]
+_IDENTIFIER = r"(?:`[^`]+`|[A-Za-z0-9_$]+)"
+_LITERAL = r"(?:'(?:[^'\\]|'')*'|-?\d+(?:\.\d+)?)"
+_CONDITION = rf"{_IDENTIFIER}\s*(?:>=|<=|<>|!=|=|<|>|\bin\b)\s*(?:{_LITERAL}|\(\s*{_LITERAL}(?:\s*,\s*{_LITERAL})*\s*\))"
+_REPORT_QUERY_RE = re.compile(
+    rf"^select\s+(?P<columns>\*|{_IDENTIFIER}(?:\s*,\s*{_IDENTIFIER})*)\s+from\s+(?P<table>{_IDENTIFIER})"
+    rf"(?:\s+where\s+(?P<where>{_CONDITION}(?:\s+and\s+{_CONDITION})*))?$", re.I | re.S)
+_CONDITION_RE = re.compile(
+    rf"(?P<column>{_IDENTIFIER})\s*(?P<op>>=|<=|<>|!=|=|<|>|\bin\b)\s*(?P<value>{_LITERAL}|\([^)]*\))", re.I)
+_LITERAL_RE = re.compile(_LITERAL)
+_ISO_DATE_RE = re.compile(r'^\d{4}-\d{2}-\d{2}')
+
+
+def valid_table_name(table) -> bool:
+    """Da li je ime obično MySQL ime tabele (slova, cifre, '_' i '$') koje sme biti ime direktorijuma"""
+    return isinstance(table, str) and bool(_TABLE_NAME_RE.match(table))
+
+
+def _unquote(name: str) -> str:
+    return name[1:-1].replace('``', '`') if name.startswith('`') else name
+
+
+def _literal(text: str):
+    if text.startswith("'"):
+        return text[1:-1].replace("''", "'")
+    return float(text) if '.' in text else int(text)
+
+
+def parse_report_query(query: str) -> Optional[Tuple[str, Optional[List[str]], List[Tuple]]]:
+    """(tabela, kolone ili None za *, filteri) za jednostavan upit nad jednom tabelom, inače None"""
+    match = _REPORT_QUERY_RE.match(query_planner.clean_query(query))
+    if match is None:
+        return None
+    columns = None
+    if match['columns'] != '*':
+        columns = [_unquote(c.strip()) for c in re.findall(_IDENTIFIER, match['columns'])]
+    filters = []
+    for condition in _CONDITION_RE.finditer(match['where'] or ''):
+        operator = condition['op'].lower()
+        if operator == 'in':
+            value = tuple(_literal(v) for v in _LITERAL_RE.findall(condition['value']))
+        else:
+            value = _literal(condition['value'])
+        filters.append((_unquote(condition['column']), '!=' if operator == '<>' else operator, value))
+    return _unquote(match['table']), columns, filters
+
+
+def _column_kind(type_code, sample_value) -> str:
+    """'int', 'float' ili 'str' - iz MySQL tipa ili (bez tipa, npr. SQLite) iz prve vrednosti"""
+    if type_code in INTEGER_TYPES:
+        return 'int'
+    if type_code in FLOAT_TYPES or type_code in DECIMAL_TYPES:
+        return 'float'
+    if type_code is None:
+        if isinstance(sample_value, bool) or isinstance(sample_value, int):
+            return 'int'
+        if isinstance(sample_value, (float, decimal.Decimal)):
+            return 'float'
+    return 'str'
+
+
+def _to_stored(kind: str, value):
+    if value is None:
+        return None
+    if kind == 'float':
+        return float(value)
+    if kind == 'str':
+        if isinstance(value, datetime.datetime):
+            return value.isoformat(sep=' ')
+        if isinstance(value, (datetime.date, datetime.time)):
+            return value.isoformat()
+        if isinstance(value, bytes):
+            return value.decode('utf-8', 'replace')
+        return str(value)
+    return value
+
+
+def _encode_chunk(kind: str, values: List) -> Tuple[str, bytes]:
+    """Kodira vrednosti jedne kolone jednog bloka, vraća (kodiranje, kompresovani bajtovi)"""
+    valid = bytes(0 if v is None else 1 for v in values)
+    if kind in ('int', 'float'):
+        try:
+            data = array('q' if kind == 'int' else 'd',
+                         (0 if v is None else v for v in values)).tobytes()
+            return kind, zlib.compress(valid + data)
+        except (OverflowError, TypeError):
+            pass  # npr. UNSIGNED BIGINT - blok ide u JSON
+    elif kind == 'str':
+        # Rečnik: distinct vrednosti + kod po redu (0 = NULL)
+        codes, dictionary, lookup = array('I'), [], {}
+        for value in values:
+            if value is None:
+                codes.append(0)
+                continue
+            code = lookup.get(value)
+            if code is None:
+                dictionary.append(value)
+                code = lookup[value] = len(dictionary)
+            codes.append(code)
+        header = json.dumps(dictionary, ensure_ascii=False).encode('utf-8')
+        return 'dict', zlib.compress(len(header).to_bytes(4, 'little') + header + codes.tobytes())
+    return 'json', zlib.compress(json.dumps(values).encode('utf-8'))
+
+
+def _decode_chunk(encoding: str, payload: bytes, rows: int) -> list:
+    raw = zlib.decompress(payload)
+    if encoding in ('int', 'float'):
+        data = array('q' if encoding == 'int' else 'd')
+        data.frombytes(raw[rows:])
+        valid = raw[:rows]
+        if all(valid):
+            return data.tolist()
+        return [v if ok else None for v, ok in zip(data, valid)]
+    if encoding == 'dict':
+        size = int.from_bytes(raw[:4], 'little')
+        dictionary = [None] + json.loads(raw[4:4 + size].decode('utf-8'))
+        codes = array('I')
+        codes.frombytes(raw[4 + size:])
+        return [dictionary[code] for code in codes]
+    return json.loads(raw.decode('utf-8'))
+
+
+class ColumnarWriter:
+    """Upisuje redove u kolonski fajl: blokovi od `chunk_rows` redova, svaka kolona posebno
+
+    Za svaku kolonu svakog bloka čuvaju se kodiranje, pozicija u data.bin,
+    broj NULL vrednosti i min/max (zona mapa) po kojima čitač preskače
+    blokove koji ne mogu da zadovolje filter.
+    """
+
+    def __init__(self, path: str, names: Sequence[str], kinds: Sequence[str],
+                 chunk_rows: int = DEFAULT_CHUNK_ROWS):
+        self.path = path
+        self.names = list(names)
+        self.kinds = list(kinds)
+        self.chunk_rows = chunk_rows
+        self.chunks: List[Dict] = []
+        self.row_count = 0
+        self._pending: List[tuple] = []
+        os.makedirs(path, exist_ok=True)
+        self._data = open(os.path.join(path, DATA_FILE), 'wb')
+
+    def write(self, rows: Iterable[Sequence]):
+        for row in rows:
+            self._pending.append(row)
+            if len(self._pending) >= self.chunk_rows:
+                self._flush()
+
+    def close(self, source: Optional[Dict] = None):
+        """Upisuje poslednji blok i manifest"""
+        self._flush()
+        self._data.close()
+        manifest = {
+            'columns': [{'name': n, 'kind': k} for n, k in zip(self.names, self.kinds)],
+            'row_count': self.row_count,
+            'chunk_rows': self.chunk_rows,
+            'chunks': self.chunks,
+            'source': source or {},
+        }
+        with open(os.path.join(self.path, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False)
+
+    def _flush(self):
+        if not self._pending:
+            return
+        rows, self._pending = self._pending, []
+        chunk = {'rows': len(rows), 'columns': []}
+        for index, kind in enumerate(self.kinds):
+            values = [_to_stored(kind, row[index]) for row in rows]
+            present = [v for v in values if v is not None]
+            encoding, payload = _encode_chunk(kind, values)
+            chunk['columns'].append({
+                'encoding': encoding,
+                'offset': self._data.tell(),
+                'length': len(payload),
+                'nulls': len(values) - len(present),
+                'min': min(present) if present else None,
+                'max': max(present) if present else None,
+            })
+            self._data.write(payload)
+        self.chunks.append(chunk)
+        self.row_count += len(rows)
+
+
+class ColumnarTable:
+    """Čitač kolonskog fajla preko mmap-a sa filter/project/group-by upitima
+
+    Filteri su torke (kolona, operator, vrednost) spojene sa AND. Blok se
+    preskače ako ga zona mapa isključuje, zatim se dekodiraju samo kolone
+    filtera, a projektovane kolone samo za blokove u kojima je nešto prošlo.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        self.columns = [c['name'] for c in self.manifest['columns']]
+        self.kinds = {c['name']: c['kind'] for c in self.manifest['columns']}
+        self._file = open(os.path.join(path, DATA_FILE), 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        self.chunks_scanned = 0
+        self.chunks_skipped = 0
+
+    def __len__(self) -> int:
+        return self.manifest['row_count']
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._file.close()
+
+    def select(self, columns: Optional[Sequence[str]] = None,
+               filters: Sequence[Tuple] = (), limit: Optional[int] = None) -> Iterator[tuple]:
+        """Redovi (samo izabrane kolone) koji zadovoljavaju sve filtere"""
+        columns = list(columns or self.columns)
+        indexes = self._indexes(columns)
+        produced = 0
+        for chunk_index, selected in self._matching(filters):
+            decoded = [self._column(chunk_index, i) for i in indexes]
+            for row in selected:
+                yield tuple(values[row] for values in decoded)
+                produced += 1
+                if limit is not None and produced >= limit:
+                    return
+
+    def aggregate(self, group_by: Sequence = (), aggregates: Optional[Dict[str, Tuple[str, Optional[str]]]] = None,
+                  filters: Sequence[Tuple] = ()) -> List[tuple]:
+        """GROUP BY: vraća sortirane redove (ključevi grupe..., agregati...)
+
+        `group_by` sadrži imena kolona ili ('day'|'month', kolona) za vremenske
+        grupe nad ISO datumima; `aggregates` je {alias: (funkcija, kolona)},
+        gde je kolona None za count(*).
+        """
+        aggregates = aggregates or {'count': ('count', None)}
+        keys = [(g, None) if isinstance(g, str) else (g[1], g[0]) for g in group_by]
+        specs = list(aggregates.values())
+        for function, _ in specs:
+            if function not in AGGREGATE_FUNCTIONS:
+                raise ValueError(f"Nepoznata agregatna funkcija: {function}")
+
+        key_indexes = self._indexes([name for name, _ in keys])
+        spec_indexes = [None if column is None else self._indexes([column])[0] for _, column in specs]
+        groups: Dict[tuple, list] = {}
+
+        for chunk_index, selected in self._matching(filters):
+            key_values = [self._column(chunk_index, i) for i in key_indexes]
+            columns = {i: self._column(chunk_index, i) for i in set(spec_indexes) if i is not None}
+            for row in selected:
+                key = tuple(_bucket(values[row], bucket) for values, (_, bucket) in zip(key_values, keys))
+                state = groups.get(key)
+                if state is None:
+                    state = groups[key] = [[0, None] for _ in specs]
+                for slot, (function, _), index in zip(state, specs, spec_indexes):
+                    value = 1 if index is None else columns[index][row]
+                    if value is None:
+                        continue
+                    if function == 'count':
+                        slot[0] += 1
+                    elif function in ('sum', 'avg'):
+                        slot[0] += 1
+                        slot[1] = value if slot[1] is None else slot[1] + value
+                    elif function == 'min':
+                        slot[1] = value if slot[1] is None or value < slot[1] else slot[1]
+                    else:
+                        slot[1] = value if slot[1] is None or value > slot[1] else slot[1]
+
+        result = []
+        for key, state in groups.items():
+            values = []
+            for (function, _), (count, value) in zip(specs, state):
+                if function == 'count':
+                    values.append(count)
+                elif function == 'avg':
+                    values.append(value / count if count else None)
+                else:
+                    values.append(value)
+            result.append(key + tuple(values))
+        return sorted(result, key=lambda row: tuple((v is None, v) for v in row[:len(keys)]))
+
+    def summarize(self, date_column: Optional[str] = None, monthly: bool = False,
+                  sample_size: int = 20, columns: Optional[Sequence[str]] = None,
+                  filters: Sequence[Tuple] = ()) -> Dict:
+        """Sažetak u obliku AggregationPlanner.summarize (za format_summary i AI prompt)"""
+        columns = list(columns or self.columns)
+        indexes = self._indexes(columns)
+        distinct = [set() for _ in columns]
+        non_null = [0] * len(columns)
+        row_count = 0
+        for chunk_index, selected in self._matching(filters):
+            row_count += len(selected)
+            for position, index in enumerate(indexes):
+                values = self._column(chunk_index, index)
+                present = [values[row] for row in selected if values[row] is not None]
+                non_null[position] += len(present)
+                distinct[position].update(present)
+
+        numeric = [name for name in columns if self.kinds[name] in ('int', 'float')]
+        aggregates = {}
+        for name in numeric:
+            aggregates.update({f"min {name}": ('min', name), f"max {name}": ('max', name),
+                               f"avg {name}": ('avg', name)})
+        # min/max/prosek za sve numeričke kolone u jednom prolazu bez grupisanja
+        totals = self.aggregate(aggregates=aggregates, filters=filters) if aggregates else []
+        totals = dict(zip(aggregates, totals[0])) if totals else {}
+
+        result = {}
+        for position, name in enumerate(columns):
+            info = {'non_null': non_null[position], 'distinct': len(distinct[position])}
+            if name in numeric and non_null[position]:
+                info.update(min=totals[f"min {name}"], max=totals[f"max {name}"], avg=totals[f"avg {name}"])
+            result[name] = info
+
+        buckets = {}
+        if date_column:
+            counts = self.aggregate(group_by=[('month' if monthly else 'day', date_column)], filters=filters)
+            buckets[date_column] = {'granularity': 'mesec' if monthly else 'dan',
+                                    'counts': [(str(b), int(c)) for b, c in counts if b is not None]}
+        return {'row_count': row_count, 'columns': result, 'buckets': buckets,
+                'sample': list(self.select(columns, filters, limit=sample_size)) if sample_size else []}
+
+    def date_column(self, columns: Optional[Sequence[str]] = None) -> Optional[Tuple[str, bool]]:
+        """(prva tekstualna kolona sa ISO datumima, da li grupisati po mesecu) ili None"""
+        for name in columns or self.columns:
+            index = self.columns.index(name)
+            zones = [chunk['columns'][index] for chunk in self.manifest['chunks']
+                     if chunk['columns'][index]['min'] is not None]
+            if self.kinds[name] != 'str' or not zones:
+                continue
+            low, high = min(z['min'] for z in zones), max(z['max'] for z in zones)
+            if not (_ISO_DATE_RE.match(low) and _ISO_DATE_RE.match(high)):
+                continue
+            try:
+                span = datetime.date.fromisoformat(high[:10]) - datetime.date.fromisoformat(low[:10])
+            except ValueError:
+                continue
+            return name, span.days > MONTHLY_BUCKET_DAYS
+        return None
+
+    def _indexes(self, columns: Sequence[str]) -> List[int]:
+        try:
+            return [self.columns.index(name) for name in columns]
+        except ValueError as e:
+            raise KeyError(f"Nepoznata kolona: {e}")
+
+    def _matching(self, filters: Sequence[Tuple]) -> Iterator[Tuple[int, List[int]]]:
+        """(indeks bloka, indeksi redova koji prolaze filtere) za blokove koje zona mapa ne isključuje"""
+        prepared = []
+        for column, operator, value in filters:
+            if operator not in FILTER_OPERATORS:
+                raise ValueError(f"Nepoznat operator: {operator}")
+            prepared.append((self._indexes([column])[0], operator, value))
+
+        for chunk_index, chunk in enumerate(self.manifest['chunks']):
+            if any(not _zone_may_match(chunk['columns'][i], op, value) for i, op, value in prepared):
+                self.chunks_skipped += 1
+                continue
+            self.chunks_scanned += 1
+            selected = range(chunk['rows'])
+            for i, op, value in prepared:
+                values = self._column(chunk_index, i)
+                selected = [row for row in selected if _matches(values[row], op, value)]
+                if not selected:
+                    break
+            if selected:
+                yield chunk_index, list(selected)
+
+    def _column(self, chunk_index: int, column_index: int) -> list:
+        chunk = self.manifest['chunks'][chunk_index]
+        meta = chunk['columns'][column_index]
+        payload = self._data[meta['offset']:meta['offset'] + meta['length']]
+        return _decode_chunk(meta['encoding'], payload, chunk['rows'])
+
+
+def _bucket(value, bucket: Optional[str]):
+    if bucket is None or value is None:
+        return value
+    return str(value)[:7 if bucket == 'month' else 10]
+
+
+def _matches(value, operator: str, expected) -> bool:
+    if value is None:
+        return False
+    if operator == '=':
+        return value == expected
+    if operator == '!=':
+        return value != expected
+    if operator == 'in':
+        return value in expected
+    if operator == '<':
+        return value < expected
+    if operator == '<=':
+        return value <= expected
+    if operator == '>':
+        return value > expected
+    return value >= expected
+
+
+def _zone_may_match(meta: Dict, operator: str, expected) -> bool:
+    """Da li blok (po min/max) može da sadrži red koji prolazi filter"""
+    low, high = meta['min'], meta['max']
+    if low is None:
+        return False
+    try:
+        if operator == '=':
+            return low <= expected <= high
+        if operator == 'in':
+            return any(low <= v <= high for v in expected)
+        if operator == '<':
+            return low < expected
+        if operator == '<=':
+            return low <= expected
+        if operator == '>':
+            return high > expected
+        if operator == '>=':
+            return high >= expected
+    except TypeError:
+        return True
+    return True
+
+
+class ColumnarMirror:
+    """Kolonske kopije odabranih tabela u `store_dir/<tabela>/`"""
+
+    def __init__(self, store_dir: str = DEFAULT_STORE_DIR, chunk_rows: int = DEFAULT_CHUNK_ROWS):
+        self.store_dir = store_dir
+        self.chunk_rows = chunk_rows
+
+    def mirror(self, connector, table: str, query: Optional[str] = None,
+               batch_size: int = 5000) -> Optional[int]:
+        """Strimuje tabelu (ili upit) iz konektora u novi kolonski fajl, vraća broj redova"""
+        target = self._table_path(table)
+        if target is None:
+            print(f"Greška: neispravno ime tabele za kolonsku kopiju: {table!r}")
+            return None
+        query = query or f"SELECT * FROM `{table}`"
+        staging = target + '.tmp'
+        shutil.rmtree(staging, ignore_errors=True)
+        writer = None
+        stream = connector.iter_query(query, None, batch_size)
+        try:
+            for rows in stream:
+                if writer is None:
+                    description = connector.description
+                    kinds = [_column_kind(d[1], next((r[i] for r in rows if r[i] is not None), None))
+                             for i, d in enumerate(description)]
+                    writer = ColumnarWriter(staging, [d[0] for d in description], kinds, self.chunk_rows)
+                writer.write(rows)
+            if writer is None:
+                description = connector.description or ()
+                writer = ColumnarWriter(staging, [d[0] for d in description],
+                                        [_column_kind(d[1], None) for d in description], self.chunk_rows)
+            writer.close(source={'table': table, 'query': query})
+        except Exception as e:
+            print(f"Greška pri pravljenju kolonske kopije tabele {table}: {e}")
+            if writer is not None and not writer._data.closed:
+                writer._data.close()
+            shutil.rmtree(staging, ignore_errors=True)
+            return None
+        finally:
+            stream.close()
+
+        # Zamena stare kopije novom tek kada je nova kompletna
+        shutil.rmtree(target, ignore_errors=True)
+        os.replace(staging, target)
+        return writer.row_count
+
+    def open(self, table: str) -> Optional[ColumnarTable]:
+        """Otvara kolonsku kopiju tabele ili None ako ne postoji"""
+        path = self._table_path(table)
+        if path is None or not os.path.exists(os.path.join(path, MANIFEST_FILE)):
+            return None
+        return ColumnarTable(path)
+
+    def report_data(self, query: str, report_type: str, sample_size: int = 50) -> Optional[Dict]:
+        """Podaci za AI izveštaj (kao fetch_report_data) iz kolonske kopije, bez upita ka MySQL-u
+
+        Pokriven je samo upit `SELECT kolone FROM tabela [WHERE kolona op vrednost AND ...]`
+        nad tabelom koja ima kopiju; za ostale upite vraća None. 'content_hash'
+        je otisak manifesta, pa se menja tek sa novom kopijom.
+        """
+        parsed = parse_report_query(query)
+        if parsed is None:
+            return None
+        name, columns, filters = parsed
+        table = self.open(name)
+        if table is None:
+            return None
+        try:
+            with table:
+                content_hash = hashlib.sha256(json.dumps(table.manifest, sort_keys=True).encode()).hexdigest()
+                if report_type in AGGREGATED_REPORT_TYPES:
+                    dated = table.date_column(columns) if report_type in BUCKETED_REPORT_TYPES else None
+                    summary = table.summarize(dated[0] if dated else None, bool(dated and dated[1]),
+                                              min(sample_size, 20), columns, filters)
+                    return {'sample': summary['sample'], 'total': summary['row_count'], 'summary': summary,
+                            'table': name, 'content_hash': content_hash}
+                total = table.aggregate(filters=filters)
+                return {'sample': list(table.select(columns, filters, limit=sample_size)),
+                        'total': total[0][0] if total else 0, 'summary': None,
+                        'table': name, 'content_hash': content_hash}
+        except (KeyError, ValueError, TypeError) as e:
+            print(f"Greška pri izveštaju iz kolonske kopije tabele {name}: {e}")
+            return None
+
+    def tables(self) -> List[str]:
+        if not os.path.isdir(self.store_dir):
+            return []
+        return sorted(name for name in os.listdir(self.store_dir)
+                      if valid_table_name(name) and os.path.exists(os.path.join(self.store_dir, name, MANIFEST_FILE)))
+
+    def _table_path(self, table: str) -> Optional[str]:
+        """Direktorijum kopije tabele; None ako ime nije ispravno ili putanja izlazi iz `store_dir`"""
+        if not valid_table_name(table):
+            return None
+        root = os.path.realpath(self.store_dir)
+        path = os.path.realpath(os.path.join(root, table))
+        if os.path.dirname(path) != root:
+            return None
+        return path
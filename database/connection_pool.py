@@ -0,0 +1,210 @@
+"""
+Pool konekcija za BLBS MySQL bazu
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+from database.blbs_connector import CONNECT_TIMEOUT, READ_TIMEOUT_GRACE, create_connection
+
+
+# Read timeout konekcija pool-a bez vremenskog budžeta (zaštita od servera koji ne odgovara)
+DEFAULT_READ_TIMEOUT = 600.0
+
+
+def pool_read_timeout(timeout: Optional[float]) -> float:
+    """Read timeout za upite sa budžetom `timeout` - kao kod konekcije van pool-a (budžet + READ_TIMEOUT_GRACE)"""
+    return timeout + READ_TIMEOUT_GRACE if timeout else DEFAULT_READ_TIMEOUT
+
+
+class PoolExhaustedError(Exception):
+    """Nijedna konekcija nije postala slobodna u zadatom roku"""
+
+
+class ConnectionPool:
+    """Ograničen, thread-safe pool MySQL konekcija
+
+    - najviše `max_size` otvorenih konekcija (slobodnih + pozajmljenih)
+    - slobodne konekcije starije od `idle_timeout` sekundi se zatvaraju
+    - konekcija koja je mirovala duže od `health_check_interval` se pinguje pre pozajmice
+    - jedna nit uvek dobija istu konekciju dok je ne vrati (ugnježdene pozajmice se broje);
+      discard u ugnježdenoj pozajmici zatvara konekciju tek pri vraćanju spoljne
+    - read timeout konekcija sledi vremenski budžet upita (`timeout`) uz READ_TIMEOUT_GRACE
+    """
+
+    def __init__(self, config: Dict[str, str], max_size: int = 5, idle_timeout: float = 300.0,
+                 acquire_timeout: float = 10.0, health_check_interval: float = 30.0,
+                 read_timeout: Optional[float] = None, connection_factory: Optional[Callable] = None,
+                 profile: Optional[str] = None, timeout: Optional[float] = None):
+        if max_size < 1:
+            raise ValueError("max_size mora biti bar 1")
+        self.config = config
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.acquire_timeout = acquire_timeout
+        self.health_check_interval = health_check_interval
+        self.timeout = timeout
+        self.read_timeout = read_timeout if read_timeout is not None else pool_read_timeout(timeout)
+        self.profile = profile
+        self._factory = connection_factory or (lambda: create_connection(
+            self.config, self.profile, autocommit=True, connect_timeout=CONNECT_TIMEOUT, read_timeout=self.read_timeout))
+        self._idle: List[Tuple[object, float]] = []
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._local = threading.local()
+
+    def acquire(self):
+        """Pozajmljuje konekciju iz pool-a"""
+        checkout = getattr(self._local, 'checkout', None)
+        if checkout is not None:
+            checkout[1] += 1
+            return checkout[0]
+
+        connection = self._checkout()
+        # [konekcija, broj pozajmica, odbaciti pri poslednjem vraćanju]
+        self._local.checkout = [connection, 1, False]
+        return connection
+
+    def release(self, connection, discard: bool = False):
+        """Vraća konekciju u pool (discard=True je zatvara umesto da je vrati)"""
+        checkout = getattr(self._local, 'checkout', None)
+        if checkout is not None and checkout[0] is connection:
+            checkout[1] -= 1
+            checkout[2] = checkout[2] or discard
+            if checkout[1] > 0:
+                # Spoljni nosilac još koristi konekciju
+                return
+            self._local.checkout = None
+            discard = checkout[2]
+
+        if discard or self._closed or not getattr(connection, 'open', True):
+            self._close_connection(connection)
+            return
+
+        with self._cond:
+            self._idle.append((connection, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Context manager: pozajmi konekciju i vrati je na kraju bloka"""
+        connection = self.acquire()
+        try:
+            yield connection
+        except Exception:
+            self.release(connection, discard=not getattr(connection, 'open', True))
+            raise
+        else:
+            self.release(connection)
+
+    def close(self):
+        """Zatvara sve slobodne konekcije; pozajmljene se zatvaraju pri vraćanju"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for connection, _ in idle:
+            self._close_connection(connection)
+
+    def stats(self) -> Dict[str, int]:
+        """Vraća trenutno stanje pool-a"""
+        with self._cond:
+            idle = len(self._idle)
+            return {'size': self._size, 'idle': idle, 'in_use': self._size - idle, 'max_size': self.max_size}
+
+    def _checkout(self):
+        deadline = time.monotonic() + self.acquire_timeout
+        while True:
+            create = False
+            with self._cond:
+                if self._closed:
+                    raise PoolExhaustedError("Pool je zatvoren")
+                expired = self._evict_idle()
+                if self._idle:
+                    connection, last_used = self._idle.pop()
+                elif self._size < self.max_size:
+                    self._size += 1
+                    create = True
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolExhaustedError(
+                            f"Nema slobodne konekcije posle {self.acquire_timeout:.0f}s (max {self.max_size})")
+                    self._cond.wait(remaining)
+                    continue
+
+            for stale in expired:
+                try:
+                    stale.close()
+                except Exception:
+                    pass
+
+            if create:
+                try:
+                    return self._factory()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+
+            if self._is_healthy(connection, last_used):
+                return connection
+            self._close_connection(connection)
+
+    def _evict_idle(self) -> list:
+        """Izbacuje konekcije koje su predugo slobodne (poziva se pod lock-om)"""
+        if not self._idle:
+            return []
+        cutoff = time.monotonic() - self.idle_timeout
+        expired = [connection for connection, last_used in self._idle if last_used < cutoff]
+        if expired:
+            self._idle = [(c, t) for c, t in self._idle if t >= cutoff]
+            self._size -= len(expired)
+        return expired
+
+    def _is_healthy(self, connection, last_used: float) -> bool:
+        if not getattr(connection, 'open', True):
+            return False
+        if time.monotonic() - last_used < self.health_check_interval:
+            return True
+        try:
+            connection.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def _close_connection(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+
+_pools: Dict[Tuple, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(config: Dict[str, str], **options) -> ConnectionPool:
+    """Vraća deljeni pool za datu konfiguraciju, profil i vremenski budžet (kreira ga po potrebi)"""
+    key = (tuple(sorted(config.items())), options.get('profile'), options.get('timeout'))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(config, **options)
+            _pools[key] = pool
+        return pool
+
+
+def close_pools():
+    """Zatvara sve deljene pool-ove (npr. posle promene konfiguracije)"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
@@ -0,0 +1,58 @@
+"""
+Profili konekcije - kompresija MySQL protokola i "lean" konverteri tipova
+"""
+from typing import Dict, Optional
+
+import pymysql
+from pymysql.constants import CLIENT, FIELD_TYPE
+from pymysql.converters import conversions
+
+
+# Tipovi koji u "lean" profilu ostaju tekst kakav server šalje
+# (DATETIME/TIMESTAMP kao ISO 'YYYY-MM-DD HH:MM:SS', DECIMAL kao '12.50')
+LEAN_RAW_TYPES = (FIELD_TYPE.DATETIME, FIELD_TYPE.TIMESTAMP, FIELD_TYPE.DATE, FIELD_TYPE.NEWDATE,
+                  FIELD_TYPE.TIME, FIELD_TYPE.DECIMAL, FIELD_TYPE.NEWDECIMAL)
+
+LEAN_CONVERSIONS = {key: value for key, value in conversions.items() if key not in LEAN_RAW_TYPES}
+
+# Ime profila -> dodatne opcije za pymysql.connect
+CONNECTION_PROFILES: Dict[str, Dict] = {
+    'default': {},
+    # Kompresija protokola za spore (WAN) veze - tekstualni redovi se sabijaju ~3-5x
+    'wan': {'compress': True},
+    # Bez pravljenja datetime/Decimal objekata - za izgradnju AI prompta, gde se vrednosti samo ispisuju
+    'lean': {'conv': LEAN_CONVERSIONS},
+    'wan_lean': {'compress': True, 'conv': LEAN_CONVERSIONS},
+    # Više naredbi u jednom slanju (paketi izveštaja) - samo za poseban pool, jer širi posledice SQL injection-a
+    'multi': {'client_flag': CLIENT.MULTI_STATEMENTS},
+    'wan_lean_multi': {'compress': True, 'conv': LEAN_CONVERSIONS, 'client_flag': CLIENT.MULTI_STATEMENTS},
+}
+
+_compression_supported: Optional[bool] = None
+
+
+def compression_supported() -> bool:
+    """Da li instalirani drajver podržava kompresiju MySQL protokola (proverava se jednom)"""
+    global _compression_supported
+    if _compression_supported is None:
+        try:
+            pymysql.connections.Connection(compress=True, defer_connect=True)
+            _compression_supported = True
+        except NotImplementedError:
+            _compression_supported = False
+            print("Napomena: drajver ne podržava kompresiju MySQL protokola - profil radi bez nje")
+        except Exception:
+            _compression_supported = False
+    return _compression_supported
+
+
+def profile_options(name: Optional[str]) -> Dict:
+    """Opcije konekcije za profil; kompresija se izostavlja ako je drajver ne podržava"""
+    if not name:
+        return {}
+    if name not in CONNECTION_PROFILES:
+        raise ValueError(f"Nepoznat profil konekcije: {name}")
+    options = dict(CONNECTION_PROFILES[name])
+    if options.get('compress') and not compression_supported():
+        del options['compress']
+    return options
@@ -0,0 +1,161 @@
+"""
+Procena cene upita pre izvršavanja - EXPLAIN FORMAT=JSON i budžet redova
+"""
+import json
+from typing import Dict, List, Optional
+
+from database import query_planner
+
+
+# Podrazumevani budžet: procenjen broj pregledanih redova iznad kog se upit ne izvršava ceo
+DEFAULT_ROW_BUDGET = 5_000_000
+
+# 'sample' - izveštaj dobija samo LIMIT uzorak (bez COUNT-a i agregata), 'refuse' - upit se odbija
+OVER_BUDGET_ACTIONS = ('sample', 'refuse')
+
+# Tabele sa manje redova se ne prijavljuju kao pune pretrage
+FULL_SCAN_REPORT_ROWS = 10_000
+
+
+class QueryCostGuard:
+    """Pre-flight provera analitičkog upita preko EXPLAIN FORMAT=JSON
+
+    Procenjuje broj pregledanih redova (redovi po pretrazi puta broj redova
+    prethodnih tabela u spoju), beleži pune pretrage tabela i pretrage bez
+    upotrebljivog indeksa. Ako je procena iznad budžeta, upit se odbija ili
+    se izveštaj spušta na uzorak, u zavisnosti od `action`.
+    """
+
+    def __init__(self, max_rows_examined: int = DEFAULT_ROW_BUDGET, action: str = 'sample',
+                 max_query_cost: Optional[float] = None):
+        if action not in OVER_BUDGET_ACTIONS:
+            raise ValueError(f"action mora biti jedno od: {', '.join(OVER_BUDGET_ACTIONS)}")
+        self.max_rows_examined = max_rows_examined
+        self.action = action
+        self.max_query_cost = max_query_cost
+
+    def check(self, connector, query: str) -> Dict:
+        """Vraća procenu sa ključem 'action': 'run', 'sample' ili 'refuse'"""
+        estimate = explain_cost(connector, query)
+        if estimate is None:
+            return {'available': False, 'action': 'run', 'message': 'Procena cene upita nije dostupna.'}
+
+        over_rows = estimate['rows_examined'] > self.max_rows_examined
+        over_cost = (self.max_query_cost is not None and estimate['query_cost'] is not None
+                     and estimate['query_cost'] > self.max_query_cost)
+        if over_rows or over_cost:
+            estimate['action'] = self.action
+            budget = f"budžet je {self.max_rows_examined:,} redova"
+            if self.action == 'refuse':
+                estimate['message'] = f"Upit je odbijen: procena ~{estimate['rows_examined']:,} pregledanih redova, {budget}."
+            else:
+                estimate['message'] = f"Upit je preskup (~{estimate['rows_examined']:,} redova, {budget}) - izveštaj koristi samo uzorak."
+        else:
+            estimate['action'] = 'run'
+            estimate['message'] = f"Procena: ~{estimate['rows_examined']:,} pregledanih redova."
+        return estimate
+
+
+def explain_cost(connector, query: str) -> Optional[Dict]:
+    """Izvršava EXPLAIN FORMAT=JSON i vraća procenu ili None (upit nije SELECT / greška)"""
+    if not query_planner.is_select(query):
+        return None
+    rows = connector.execute(f"EXPLAIN FORMAT=JSON\n{query_planner.clean_query(query)}", use_cache=False)
+    if not rows:
+        return None
+    try:
+        plan = json.loads(rows[0][0])
+    except (TypeError, ValueError) as e:
+        print(f"Greška pri čitanju EXPLAIN plana: {e}")
+        return None
+    return analyze_plan(plan)
+
+
+def analyze_plan(plan: Dict) -> Dict:
+    """Procena iz EXPLAIN FORMAT=JSON dokumenta"""
+    block = plan.get('query_block', plan)
+    tables: List[Dict] = []
+    rows_examined = _walk(block, tables)
+
+    full_scans, warnings = [], []
+    for table in tables:
+        if table['access_type'] in ('ALL', 'index') and table['rows'] >= FULL_SCAN_REPORT_ROWS:
+            full_scans.append(table['name'])
+            kind = "puna pretraga tabele" if table['access_type'] == 'ALL' else "puna pretraga indeksa"
+            hint = "nema upotrebljivog indeksa" if not table['possible_keys'] else \
+                f"mogući indeksi {', '.join(table['possible_keys'])} se ne koriste"
+            warnings.append(f"{table['name']}: {kind} (~{table['rows']:,} redova), {hint}")
+    if _contains_key(block, 'using_filesort'):
+        warnings.append("sortiranje bez indeksa (filesort)")
+    if _contains_key(block, 'using_temporary_table'):
+        warnings.append("privremena tabela za GROUP BY/DISTINCT")
+
+    cost = block.get('cost_info', {}).get('query_cost')
+    return {
+        'available': True,
+        'rows_examined': int(rows_examined),
+        'query_cost': float(cost) if cost is not None else None,
+        'full_scans': full_scans,
+        'warnings': warnings,
+        'tables': tables,
+    }
+
+
+def format_estimate(estimate: Optional[Dict]) -> str:
+    """Tekstualni prikaz procene za korisnika"""
+    if not estimate or not estimate.get('available'):
+        return ""
+    lines = [estimate['message']]
+    if estimate.get('query_cost') is not None:
+        lines.append(f"Cena po optimizatoru: {estimate['query_cost']:,.1f}")
+    lines.extend(f"⚠ {warning}" for warning in estimate.get('warnings', []))
+    return "\n".join(lines)
+
+
+def _walk(node, tables: List[Dict], prefix_rows: float = 1.0) -> float:
+    """Sabira pregledane redove; u nested_loop svaka tabela se čita po jednom za svaki prethodni red"""
+    if isinstance(node, list):
+        return sum(_walk(item, tables, prefix_rows) for item in node)
+    if not isinstance(node, dict):
+        return 0.0
+
+    examined = 0.0
+    for key, value in node.items():
+        if key == 'nested_loop':
+            prefix = prefix_rows
+            for item in value:
+                table = item.get('table', item)
+                examined += _table_rows(table, tables, prefix)
+                produced = table.get('rows_produced_per_join')
+                if produced is not None:
+                    prefix = prefix_rows * max(float(produced), 1.0)
+        elif key == 'table':
+            examined += _table_rows(value, tables, prefix_rows)
+        elif isinstance(value, (dict, list)):
+            examined += _walk(value, tables, prefix_rows)
+    return examined
+
+
+def _table_rows(table: Dict, tables: List[Dict], prefix_rows: float) -> float:
+    per_scan = float(table.get('rows_examined_per_scan', 0) or 0)
+    tables.append({
+        'name': table.get('table_name', '?'),
+        'access_type': table.get('access_type', ''),
+        'key': table.get('key'),
+        'possible_keys': table.get('possible_keys') or [],
+        'rows': int(per_scan),
+    })
+    # Izvedene tabele i podupiti unutar tabele
+    nested = sum(_walk(value, tables) for key, value in table.items() if isinstance(value, (dict, list))
+                 and key not in ('cost_info', 'used_columns', 'possible_keys', 'used_key_parts', 'ref'))
+    return per_scan * prefix_rows + nested
+
+
+def _contains_key(node, wanted: str) -> bool:
+    if isinstance(node, dict):
+        if node.get(wanted):
+            return True
+        return any(_contains_key(value, wanted) for value in node.values())
+    if isinstance(node, list):
+        return any(_contains_key(item, wanted) for item in node)
+    return False
@@ -0,0 +1,103 @@
+"""
+Izvoz rezultata upita u CSV/JSONL uz konstantnu memoriju (nebaferovani kursor)
+"""
+import csv
+import datetime
+import decimal
+import io
+import json
+from typing import Callable, Dict, Iterable, Iterator, Sequence, Tuple
+
+from database import sql_normalizer
+
+
+def _json_default(value):
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    if isinstance(value, datetime.datetime):
+        return value.isoformat(sep=' ')
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, bytes):
+        return value.decode('utf-8', 'replace')
+    return str(value)
+
+
+def _check_query(query: str):
+    valid, reason = sql_normalizer.validate_select(query)
+    if not valid:
+        raise ValueError(f"Izvoz je dozvoljen samo za SELECT upite: {reason}")
+
+
+def _csv_chunks(batches: Iterable[Sequence[tuple]], description: Callable[[], Sequence],
+                header: bool = True) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    first = True
+    for rows in batches:
+        if first and header:
+            writer.writerow([d[0] for d in description()])
+        first = False
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if first and header and description():
+        # Prazan rezultat - samo zaglavlje
+        writer.writerow([d[0] for d in description()])
+        yield buffer.getvalue()
+
+
+def _jsonl_chunks(batches: Iterable[Sequence[tuple]], description: Callable[[], Sequence]) -> Iterator[str]:
+    names = None
+    for rows in batches:
+        if names is None:
+            names = [d[0] for d in description()]
+        yield "".join(json.dumps(dict(zip(names, row)), default=_json_default, ensure_ascii=False) + "\n"
+                      for row in rows)
+
+
+def iter_csv(connector, query: str, params=None, batch_size: int = 1000,
+             header: bool = True) -> Iterator[str]:
+    """CSV tekst u delovima - jedan deo po paketu redova iz SSCursor-a"""
+    _check_query(query)
+    yield from _csv_chunks(connector.iter_query(query, params, batch_size), lambda: connector.description, header)
+
+
+def iter_jsonl(connector, query: str, params=None, batch_size: int = 1000) -> Iterator[str]:
+    """JSON Lines (jedan objekat po redu) u delovima - jedan deo po paketu redova"""
+    _check_query(query)
+    yield from _jsonl_chunks(connector.iter_query(query, params, batch_size), lambda: connector.description)
+
+
+def iter_buffer(buffer, export_format: str = 'csv', batch_size: int = 1000) -> Iterator[str]:
+    """Izvoz već pročitanog rezultata (ResultBuffer) - bez ponovnog izvršavanja upita"""
+    if export_format == 'csv':
+        return _csv_chunks(buffer.iter_batches(batch_size), lambda: buffer.description)
+    if export_format == 'jsonl':
+        return _jsonl_chunks(buffer.iter_batches(batch_size), lambda: buffer.description)
+    raise ValueError(f"Nepoznat format izvoza: {export_format}")
+
+
+# format -> (generator, MIME tip)
+EXPORT_FORMATS: Dict[str, Tuple[Callable[..., Iterator[str]], str]] = {
+    'csv': (iter_csv, 'text/csv'),
+    'jsonl': (iter_jsonl, 'application/x-ndjson'),
+}
+
+
+def export_to_file(connector, query: str, path: str, export_format: str = 'csv',
+                   batch_size: int = 1000) -> Tuple[bool, str]:
+    """Upisuje izvoz direktno u fajl, vraća (uspeh, poruka)"""
+    encoder = EXPORT_FORMATS.get(export_format)
+    if encoder is None:
+        return False, f"Nepoznat format izvoza: {export_format}"
+    size = 0
+    try:
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            for chunk in encoder[0](connector, query, batch_size=batch_size):
+                f.write(chunk)
+                size += len(chunk)
+        return True, f"Izvoz završen: {path} ({size / 1024:.0f} KB)"
+    except Exception as e:
+        return False, f"Greška pri izvozu: {e}"
@@ -0,0 +1,176 @@
+"""
+Isti upit nad više BLBS baza (po jedna po prevozniku/gradu) uz spajanje rezultata
+"""
+import queue
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from pymysql.constants import FIELD_TYPE
+
+from database import sql_normalizer
+from database.blbs_connector import BLBSConnector
+from database.connection_pool import get_pool
+from database.resource_governor import ResultLimits
+
+
+SOURCE_COLUMN = 'izvor'
+
+_DONE = object()
+
+
+class _Failure:
+    def __init__(self, error: Exception):
+        self.error = error
+
+
+def target_name(target: Dict[str, str]) -> str:
+    """Ime baze u spojenom rezultatu ('name' ili baza@host)"""
+    return target.get('name') or f"{target['database']}@{target['host']}"
+
+
+class FanOutQuery:
+    """Izvršava isti SELECT paralelno nad svim bazama i spaja rezultate u jedan strim
+
+    Svaka baza dobija svoju nit (najviše `max_workers` istovremeno) i svoju
+    konekciju iz deljenog pool-a; paketi redova idu u zajednički ograničen
+    red čekanja i vraćaju se čim stignu, sa imenom baze kao prvom kolonom.
+    Izveštaj nad celom mrežom zato traje koliko najsporija baza, a ne zbir
+    svih. Baza koja padne (ili vrati druge kolone) ne prekida ostale - greška
+    se beleži u `sources`.
+    """
+
+    def __init__(self, targets: Sequence[Dict[str, str]], max_workers: int = 8,
+                 profile: Optional[str] = None, timeout: Optional[float] = None,
+                 limits: Optional[ResultLimits] = None, batch_size: int = 1000, queue_size: int = 4):
+        self.targets = list(targets)
+        self.max_workers = max_workers
+        self.profile = profile
+        self.timeout = timeout
+        self.limits = limits
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.description = None
+        self.sources: Dict[str, Dict] = {}
+
+    @property
+    def failed(self) -> Dict[str, str]:
+        """Baze čiji rezultat nije (ceo) ušao u spojeni strim: ime -> greška"""
+        return {name: source['error'] for name, source in self.sources.items() if source['error']}
+
+    def iter_batches(self, query: str, params=None) -> Iterator[list]:
+        """Paketi spojenih redova (izvor, kolone upita...) redom kojim stižu iz baza"""
+        valid, reason = sql_normalizer.validate_select(query)
+        if not valid:
+            raise ValueError(f"Upit nad više baza mora biti SELECT: {reason}")
+        names = [target_name(target) for target in self.targets]
+        if len(set(names)) != len(names):
+            raise ValueError("Imena baza moraju biti jedinstvena")
+        self.description = None
+        self.sources = {name: {'rows': 0, 'elapsed': None, 'truncated': None, 'error': None} for name in names}
+        if not self.targets:
+            return
+
+        shared = queue.Queue(self.queue_size * max(1, min(len(self.targets), self.max_workers)))
+        stop = threading.Event()
+        rejected = {name: threading.Event() for name in names}
+        pending = iter(zip(names, self.targets))
+        pending_lock = threading.Lock()
+
+        def work():
+            while not stop.is_set():
+                with pending_lock:
+                    item = next(pending, None)
+                if item is None:
+                    return
+                self._scan_target(item[0], item[1], query, params, shared, stop, rejected[item[0]])
+
+        threads = [threading.Thread(target=work, daemon=True)
+                   for _ in range(max(1, min(len(self.targets), self.max_workers)))]
+        for thread in threads:
+            thread.start()
+
+        try:
+            producers = len(self.targets)
+            columns = None
+            while producers:
+                name, item, description = shared.get()
+                source = self.sources[name]
+                if item is _DONE or isinstance(item, _Failure):
+                    producers -= 1
+                    if isinstance(item, _Failure):
+                        source['error'] = str(item.error) or type(item.error).__name__
+                    elif self.description is None and description:
+                        self.description = self._merged_description(description)
+                    continue
+                if rejected[name].is_set():
+                    continue
+                item_columns = [d[0] for d in description]
+                if columns is None:
+                    columns = item_columns
+                    self.description = self._merged_description(description)
+                elif item_columns != columns:
+                    # Baza sa drugačijom šemom ne sme da pomeri kolone ostalih
+                    source['error'] = f"različite kolone: {', '.join(item_columns)}"
+                    rejected[name].set()
+                    continue
+                source['rows'] += len(item)
+                yield [(name,) + tuple(row) for row in item]
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+    def execute(self, query: str, params=None) -> Optional[list]:
+        """Ceo spojeni rezultat; None ako nijedna baza nije uspela"""
+        try:
+            rows = [row for batch in self.iter_batches(query, params) for row in batch]
+        except Exception as e:
+            print(f"Greška pri izvršavanju upita nad više baza: {e}")
+            return None
+        if self.targets and len(self.failed) == len(self.targets):
+            return None
+        return rows
+
+    def status(self) -> List[Dict]:
+        """Stanje po bazi: broj redova, trajanje, skraćivanje i greška"""
+        return [{'source': name, **source} for name, source in self.sources.items()]
+
+    def _scan_target(self, name: str, target: Dict[str, str], query: str, params,
+                     shared: queue.Queue, stop: threading.Event, rejected: threading.Event):
+        started = time.perf_counter()
+        config = {key: value for key, value in target.items() if key != 'name'}
+        connector = BLBSConnector(config, pool=get_pool(config, profile=self.profile, timeout=self.timeout),
+                                  timeout=self.timeout, limits=self.limits)
+        stream = None
+        try:
+            stream = connector.iter_query(query, params, self.batch_size)
+            for rows in stream:
+                if rejected.is_set() or not self._put(shared, (name, rows, connector.description), stop):
+                    break
+            self.sources[name]['truncated'] = connector.truncated
+            self.sources[name]['elapsed'] = round(time.perf_counter() - started, 3)
+            self._put(shared, (name, _DONE, connector.description), stop)
+        except Exception as e:
+            self.sources[name]['elapsed'] = round(time.perf_counter() - started, 3)
+            self._put(shared, (name, _Failure(e), None), stop)
+        finally:
+            # Prekinut strim odbacuje konekciju umesto da čita ostatak rezultata
+            if stream is not None:
+                stream.close()
+            connector.disconnect()
+
+    @staticmethod
+    def _put(target: queue.Queue, item, stop: threading.Event) -> bool:
+        while not stop.is_set():
+            try:
+                target.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    @staticmethod
+    def _merged_description(description: Sequence) -> tuple:
+        source = (SOURCE_COLUMN, FIELD_TYPE.VAR_STRING, None, None, None, None, False)
+        return (source,) + tuple(description)
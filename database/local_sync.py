@@ -0,0 +1,351 @@
+"""
+Inkrementalna sinhronizacija BLBS tabela u lokalnu SQLite kopiju (high-water mark)
+"""
+import datetime
+import decimal
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from database import query_planner
+from database.aggregation_planner import quote_identifier
+from database.prepared_statements import to_server_placeholders
+from database.result_digest import ResultDigest
+
+
+DEFAULT_STORE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                  'config', 'blbs_local.sqlite3')
+
+STATE_TABLE = 'blbs_sync_state'
+
+
+def to_local_value(value):
+    """Pretvara MySQL vrednost u tip koji SQLite čuva"""
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, datetime.datetime):
+        return value.isoformat(sep=' ')
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, datetime.timedelta):
+        return str(value)
+    return value
+
+
+def source_name(config: Dict[str, str]) -> str:
+    """Izvorna baza lokalne kopije (host:port/baza) - oznake važe samo za bazu iz koje su preneti redovi"""
+    return f"{config['host']}:{config['port']}/{config['database']}"
+
+
+def _quote_local(name: str) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+class LocalStore:
+    """Lokalna SQLite kopija odabranih BLBS tabela sa stanjem sinhronizacije
+
+    Svaka praćena tabela ima high-water mark: poslednju viđenu vrednost
+    rastuće kolone (auto-increment id ili `updated_at`) i ključ poslednjeg
+    reda. Sinhronizacija povlači samo redove iza te oznake, u paketima po
+    ključu, i upisuje ih sa INSERT OR REPLACE, pa izmenjeni redovi
+    zamenjuju stare. Obrisani redovi se ne prate. Redovi sa NULL u koloni
+    oznake nemaju mesto u redosledu, pa se prate zasebnom oznakom po ključu
+    (`null_key`): prenose se samo novi, a izmena se vidi tek kada red dobije
+    vrednost u koloni oznake. Sinhronizacija iz druge baze (promenjena MySQL
+    konfiguracija) briše lokalnu kopiju tabele i kreće od početka.
+    """
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH):
+        self.path = path
+        self._sync_lock = threading.Lock()
+        self._initialized = False
+
+    @contextmanager
+    def _open(self) -> Iterator[sqlite3.Connection]:
+        """SQLite konekcija u transakciji (commit na kraju bloka, zatim zatvaranje)"""
+        db = sqlite3.connect(self.path, timeout=30)
+        try:
+            with db:
+                if not self._initialized:
+                    db.execute(f"""CREATE TABLE IF NOT EXISTS {STATE_TABLE} (
+                        table_name TEXT PRIMARY KEY,
+                        watermark_column TEXT NOT NULL,
+                        key_column TEXT NOT NULL,
+                        watermark,
+                        watermark_key,
+                        rows_synced INTEGER NOT NULL DEFAULT 0,
+                        synced_at REAL,
+                        source TEXT,
+                        null_key
+                    )""")
+                    # Baza napravljena pre praćenja izvora i NULL redova
+                    existing = [row[1] for row in db.execute(f"PRAGMA table_info({STATE_TABLE})")]
+                    for column in ('source', 'null_key'):
+                        if column not in existing:
+                            db.execute(f"ALTER TABLE {STATE_TABLE} ADD COLUMN {column}")
+                    self._initialized = True
+                yield db
+        finally:
+            db.close()
+
+    def track(self, table: str, watermark_column: str = 'id', key_column: str = 'id'):
+        """Dodaje tabelu u sinhronizaciju (watermark_column == key_column za auto-increment režim)"""
+        with self._open() as db:
+            db.execute(f"INSERT OR IGNORE INTO {STATE_TABLE} (table_name, watermark_column, key_column) "
+                       f"VALUES (?, ?, ?)", (table, watermark_column, key_column))
+
+    def untrack(self, table: str):
+        """Uklanja tabelu i njenu lokalnu kopiju"""
+        with self._open() as db:
+            db.execute(f"DELETE FROM {STATE_TABLE} WHERE table_name = ?", (table,))
+            db.execute(f"DROP TABLE IF EXISTS {_quote_local(table)}")
+
+    def reset(self):
+        """Briše lokalne kopije i oznake svih praćenih tabela (npr. posle promene MySQL konfiguracije)"""
+        with self._sync_lock, self._open() as db:
+            for (table,) in db.execute(f"SELECT table_name FROM {STATE_TABLE}").fetchall():
+                self._reset_table(db, table, None)
+
+    def tracked(self) -> List[Dict]:
+        """Stanje svih praćenih tabela"""
+        with self._open() as db:
+            db.row_factory = sqlite3.Row
+            return [dict(row) for row in db.execute(f"SELECT * FROM {STATE_TABLE} ORDER BY table_name")]
+
+    def sync(self, connector, table: str, batch_size: int = 5000) -> Optional[int]:
+        """Povlači nove/izmenjene redove jedne tabele, vraća broj upisanih redova ili None"""
+        with self._sync_lock:
+            state = next((s for s in self.tracked() if s['table_name'] == table), None)
+            if state is None:
+                print(f"Tabela {table} nije praćena")
+                return None
+            try:
+                return self._sync_table(connector, state, batch_size)
+            except Exception as e:
+                print(f"Greška pri sinhronizaciji tabele {table}: {e}")
+                return None
+
+    def sync_all(self, connector, batch_size: int = 5000) -> Dict[str, Optional[int]]:
+        """Sinhronizuje sve praćene tabele"""
+        return {state['table_name']: self.sync(connector, state['table_name'], batch_size)
+                for state in self.tracked()}
+
+    def connector(self) -> 'LocalConnector':
+        """Konektor nad lokalnom kopijom (isti interfejs kao BLBSConnector za izveštaje)"""
+        return LocalConnector(self.path)
+
+    def _sync_table(self, connector, state: Dict, batch_size: int) -> int:
+        table = state['table_name']
+        column, key = state['watermark_column'], state['key_column']
+        watermark, last_key = state['watermark'], state['watermark_key']
+        by_key = column == key
+        total = 0
+        current = source_name(connector.config)
+
+        with self._open() as db:
+            if state['source'] != current:
+                # Oznaka i redovi druge baze (ili nepoznatog izvora) ne smeju da se mešaju sa ovom
+                if state['source'] is not None or watermark is not None:
+                    print(f"Tabela {table}: izvor je promenjen ({state['source']} -> {current}), "
+                          f"lokalna kopija se puni ispočetka")
+                self._reset_table(db, table, current)
+                watermark = last_key = None
+            while True:
+                query, params = self._batch_query(table, column, key, watermark, last_key, batch_size)
+                rows = connector.execute(query, params, use_cache=False)
+                if rows is None:
+                    raise ConnectionError("upit ka MySQL bazi nije uspeo")
+                if not rows:
+                    break
+
+                names = self._store_rows(db, connector, table, key, rows)
+                last = rows[-1]
+                last_key = to_local_value(last[names.index(key)])
+                watermark = last_key if by_key else to_local_value(last[names.index(column)])
+                total += len(rows)
+                # Oznaka se pomera u istoj transakciji sa podacima
+                db.execute(f"UPDATE {STATE_TABLE} SET watermark = ?, watermark_key = ?, "
+                           f"rows_synced = rows_synced + ? WHERE table_name = ?",
+                           (watermark, last_key, len(rows), table))
+                db.commit()
+                if len(rows) < batch_size:
+                    break
+
+            if not by_key:
+                null_key = None if state['source'] != current else state['null_key']
+                total += self._sync_null_rows(db, connector, table, column, key, null_key, batch_size)
+            db.execute(f"UPDATE {STATE_TABLE} SET synced_at = ? WHERE table_name = ?", (time.time(), table))
+        return total
+
+    def _sync_null_rows(self, db: sqlite3.Connection, connector, table: str, column: str, key: str,
+                        last_key, batch_size: int) -> int:
+        """Prenosi nove redove bez vrednosti u koloni oznake (ključ iza `last_key`), u paketima po ključu"""
+        q_table, q_column, q_key = quote_identifier(table), quote_identifier(column), quote_identifier(key)
+        total = 0
+        while True:
+            where, params = f"WHERE {q_column} IS NULL", None
+            if last_key is not None:
+                where, params = where + f" AND {q_key} > %s", (last_key,)
+            rows = connector.execute(f"SELECT * FROM {q_table}\n{where}\nORDER BY {q_key}\nLIMIT {int(batch_size)}",
+                                     params, use_cache=False)
+            if rows is None:
+                raise ConnectionError("upit ka MySQL bazi nije uspeo")
+            if not rows:
+                break
+            names = self._store_rows(db, connector, table, key, rows)
+            last_key = to_local_value(rows[-1][names.index(key)])
+            total += len(rows)
+            db.execute(f"UPDATE {STATE_TABLE} SET null_key = ?, rows_synced = rows_synced + ? WHERE table_name = ?",
+                       (last_key, len(rows), table))
+            db.commit()
+            if len(rows) < batch_size:
+                break
+        return total
+
+    @staticmethod
+    def _reset_table(db: sqlite3.Connection, table: str, source: Optional[str]):
+        db.execute(f"DROP TABLE IF EXISTS {_quote_local(table)}")
+        db.execute(f"UPDATE {STATE_TABLE} SET watermark = NULL, watermark_key = NULL, null_key = NULL, "
+                   f"rows_synced = 0, source = ? WHERE table_name = ?", (source, table))
+
+    def _store_rows(self, db: sqlite3.Connection, connector, table: str, key: str, rows) -> List[str]:
+        """Upisuje paket (INSERT OR REPLACE), vraća imena kolona"""
+        names = [d[0] for d in connector.description]
+        self._ensure_table(db, table, names, key)
+        placeholders = ", ".join("?" * len(names))
+        db.executemany(
+            f"INSERT OR REPLACE INTO {_quote_local(table)} "
+            f"({', '.join(_quote_local(n) for n in names)}) VALUES ({placeholders})",
+            [tuple(to_local_value(v) for v in row) for row in rows])
+        return names
+
+    @staticmethod
+    def _batch_query(table: str, column: str, key: str, watermark, last_key,
+                     batch_size: int) -> Tuple[str, Optional[tuple]]:
+        """Sledeći paket iza oznake, sortiran po (kolona oznake, ključ)"""
+        q_table, q_column, q_key = quote_identifier(table), quote_identifier(column), quote_identifier(key)
+        if column == key:
+            where, params = (f"WHERE {q_key} > %s", (watermark,)) if watermark is not None else ("", None)
+            order = q_key
+        else:
+            # Redovi sa istim updated_at se razdvajaju po ključu da paket ne preskoči nijedan;
+            # NULL vrednosti (MySQL ih sortira prve) idu zasebno, inače bi oznaka ostala None
+            where, params = ((f"WHERE {q_column} > %s OR ({q_column} = %s AND {q_key} > %s)",
+                              (watermark, watermark, last_key)) if watermark is not None
+                             else (f"WHERE {q_column} IS NOT NULL", None))
+            order = f"{q_column}, {q_key}"
+        query = f"SELECT * FROM {q_table}\n{where}\nORDER BY {order}\nLIMIT {int(batch_size)}"
+        return query, params
+
+    @staticmethod
+    def _ensure_table(db: sqlite3.Connection, table: str, names: List[str], key: str):
+        existing = [row[1] for row in db.execute(f"PRAGMA table_info({_quote_local(table)})")]
+        if not existing:
+            columns = ", ".join(_quote_local(n) + (" PRIMARY KEY" if n == key else "") for n in names)
+            db.execute(f"CREATE TABLE {_quote_local(table)} ({columns})")
+            return
+        # Nova kolona u MySQL tabeli
+        for name in names:
+            if name not in existing:
+                db.execute(f"ALTER TABLE {_quote_local(table)} ADD COLUMN {_quote_local(name)}")
+
+
+class LocalConnector:
+    """Read-only konektor nad lokalnom SQLite kopijom
+
+    Podržava deo interfejsa BLBSConnector-a koji koriste izveštaji
+    (connect, execute, iter_query, describe, fetch_sample), pa ponovljeni
+    dnevni i trend izveštaji ne opterećuju produkcionu bazu. Upiti se pišu
+    SQLite dijalektom nad istim imenima tabela i kolona.
+    """
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH):
+        self.path = path
+        self.config = {'database': 'local', 'host': 'local', 'port': '0'}
+        self.connection = None
+        self.description = None
+        self.cancelled = False
+        self.digest: Optional[ResultDigest] = None
+
+    def connect(self) -> bool:
+        try:
+            self.connection = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+            return True
+        except sqlite3.Error as e:
+            print(f"Greška pri otvaranju lokalne kopije: {e}")
+            return False
+
+    def disconnect(self):
+        if self.connection:
+            self.connection.close()
+            self.connection = None
+
+    def execute_query(self, query: str) -> Optional[list]:
+        return self.execute(query)
+
+    def execute(self, query: str, params=None, prepare: bool = False, use_cache: bool = True) -> Optional[list]:
+        rows = self._fetch_all(query, params)
+        if self.digest is not None and rows is not None:
+            self.digest.mark('rows').update(rows)
+        return rows
+
+    def start_digest(self) -> ResultDigest:
+        """Počinje nov otisak sadržaja vraćenih rezultata (kao BLBSConnector.start_digest)"""
+        self.digest = ResultDigest()
+        return self.digest
+
+    def iter_query(self, query: str, params=None, batch_size: int = 1000) -> Iterator[list]:
+        cursor = self._cursor(query, params)
+        if self.digest is not None:
+            self.digest.mark('rows')
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            if self.digest is not None:
+                self.digest.update(rows)
+            yield rows
+
+    def describe(self, query: str) -> Optional[tuple]:
+        if self._fetch_all(query_planner.describe_query(query)) is None:
+            return None
+        return self.description
+
+    def fetch_sample(self, query: str, sample_size: int = 50) -> Optional[Tuple[list, int]]:
+        result = self._fetch_sample(query, sample_size)
+        if self.digest is not None and result is not None:
+            self.digest.mark('sample').update(result[0]).mark('total').update([(result[1],)])
+        return result
+
+    def _fetch_sample(self, query: str, sample_size: int) -> Optional[Tuple[list, int]]:
+        plan = query_planner.plan_sample(query, sample_size)
+        if plan is None:
+            rows = self._fetch_all(query)
+            return (list(rows[:sample_size]), len(rows)) if rows is not None else None
+        sample_sql, count_sql = plan
+        sample = self._fetch_all(sample_sql)
+        if sample is None:
+            return None
+        if len(sample) < sample_size:
+            return list(sample), len(sample)
+        total = self._fetch_all(count_sql)
+        return (list(sample), int(total[0][0])) if total else None
+
+    def _fetch_all(self, query: str, params=None) -> Optional[list]:
+        try:
+            return self._cursor(query, params).fetchall()
+        except Exception as e:
+            print(f"Greška pri izvršavanju upita: {e}")
+            return None
+
+    def _cursor(self, query: str, params):
+        if not self.connection and not self.connect():
+            raise ConnectionError("Nije moguće otvoriti lokalnu kopiju")
+        if params:
+            query = to_server_placeholders(query)
+        cursor = self.connection.execute(query, tuple(params or ()))
+        self.description = cursor.description
+        return cursor
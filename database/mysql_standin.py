@@ -0,0 +1,482 @@
+"""
+Lokalni MySQL stand-in server - govori MySQL protokol, a upite izvršava nad SQLite bazom
+"""
+import datetime
+import itertools
+import os
+import re
+import socket
+import socketserver
+import sqlite3
+import struct
+import threading
+import uuid
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+# Capability flagovi koje stand-in oglašava
+CLIENT_LONG_PASSWORD = 0x00000001
+CLIENT_FOUND_ROWS = 0x00000002
+CLIENT_LONG_FLAG = 0x00000004
+CLIENT_CONNECT_WITH_DB = 0x00000008
+CLIENT_PROTOCOL_41 = 0x00000200
+CLIENT_TRANSACTIONS = 0x00002000
+CLIENT_SECURE_CONNECTION = 0x00008000
+CLIENT_MULTI_STATEMENTS = 0x00010000
+CLIENT_MULTI_RESULTS = 0x00020000
+CLIENT_PLUGIN_AUTH = 0x00080000
+
+SERVER_CAPABILITIES = (
+    CLIENT_LONG_PASSWORD | CLIENT_FOUND_ROWS | CLIENT_LONG_FLAG | CLIENT_CONNECT_WITH_DB
+    | CLIENT_PROTOCOL_41 | CLIENT_TRANSACTIONS | CLIENT_SECURE_CONNECTION
+    | CLIENT_MULTI_STATEMENTS | CLIENT_MULTI_RESULTS | CLIENT_PLUGIN_AUTH
+)
+
+SERVER_STATUS_AUTOCOMMIT = 0x0002
+SERVER_MORE_RESULTS_EXISTS = 0x0008
+
+COM_QUIT = 0x01
+COM_INIT_DB = 0x02
+COM_QUERY = 0x03
+COM_PING = 0x0e
+
+# MySQL tipovi kolona
+TYPE_DOUBLE = 5
+TYPE_NULL = 6
+TYPE_LONGLONG = 8
+TYPE_DATETIME = 12
+TYPE_BLOB = 252
+TYPE_VAR_STRING = 253
+
+CHARSET_UTF8MB4 = 45
+CHARSET_BINARY = 63
+
+_DATETIME_RE = re.compile(r'^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}$')
+_SET_VAR_RE = re.compile(r"@(\w+)\s*=\s*('(?:[^'\\]|\\.)*'|[^,]+)")
+_PREPARE_RE = re.compile(r"^PREPARE\s+(\w+)\s+FROM\s+'((?:[^'\\]|\\.|'')*)'$", re.I | re.S)
+_EXECUTE_RE = re.compile(r"^EXECUTE\s+(\w+)(?:\s+USING\s+(.+))?$", re.I | re.S)
+_DEALLOCATE_RE = re.compile(r"^(?:DEALLOCATE|DROP)\s+PREPARE\s+(\w+)$", re.I)
+_KILL_RE = re.compile(r"^KILL\s+(?:QUERY\s+)?(\d+)$", re.I)
+
+
+class StandInError(Exception):
+    """Greška koju stand-in vraća klijentu kao MySQL ERR paket"""
+
+    def __init__(self, code: int, message: str, state: str = 'HY000'):
+        super().__init__(message)
+        self.code = code
+        self.state = state
+
+
+def _lenenc_int(value: int) -> bytes:
+    if value < 251:
+        return bytes([value])
+    if value < 2 ** 16:
+        return b'\xfc' + struct.pack('<H', value)
+    if value < 2 ** 24:
+        return b'\xfd' + struct.pack('<I', value)[:3]
+    return b'\xfe' + struct.pack('<Q', value)
+
+
+def _lenenc_str(value: bytes) -> bytes:
+    return _lenenc_int(len(value)) + value
+
+
+def _split_statements(sql: str) -> List[str]:
+    """Deli multi-statement tekst na pojedinačne naredbe (poštuje navodnike)"""
+    statements, current, quote = [], [], None
+    for ch in sql:
+        if quote:
+            current.append(ch)
+            if ch == quote:
+                quote = None
+        elif ch in ("'", '"', '`'):
+            quote = ch
+            current.append(ch)
+        elif ch == ';':
+            statements.append(''.join(current))
+            current = []
+        else:
+            current.append(ch)
+    statements.append(''.join(current))
+    return [s.strip() for s in statements if s.strip()]
+
+
+def _parse_literal(text: str):
+    text = text.strip()
+    if text.upper() == 'NULL':
+        return None
+    if text.startswith("'") and text.endswith("'"):
+        return text[1:-1].replace("\\'", "'").replace("''", "'")
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        return float(text)
+    except ValueError:
+        return text
+
+
+class _Session:
+    """Stanje jedne klijentske konekcije na stand-in serveru"""
+
+    def __init__(self, server: 'MySQLStandInServer', connection_id: int):
+        self.server = server
+        self.connection_id = connection_id
+        self.db = server._open_sqlite()
+        self.variables: Dict[str, object] = {}
+        self.prepared: Dict[str, str] = {}
+        self.client_flags = 0
+
+    def close(self):
+        try:
+            self.db.close()
+        except sqlite3.Error:
+            pass
+
+
+class _StandInHandler(socketserver.BaseRequestHandler):
+    """Obrađuje MySQL protokol za jednu TCP konekciju"""
+
+    def setup(self):
+        self.sequence = 0
+        self.session = self.server.standin._register_session()
+
+    def finish(self):
+        self.server.standin._unregister_session(self.session)
+
+    # --- Paketi ---
+
+    def _recv_exact(self, size: int) -> bytes:
+        data = b''
+        while len(data) < size:
+            chunk = self.request.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError('klijent je zatvorio konekciju')
+            data += chunk
+        return data
+
+    def _read_packet(self) -> bytes:
+        header = self._recv_exact(4)
+        length = header[0] | (header[1] << 8) | (header[2] << 16)
+        self.sequence = (header[3] + 1) % 256
+        return self._recv_exact(length)
+
+    def _packet(self, payload: bytes) -> bytes:
+        data = struct.pack('<I', len(payload))[:3] + bytes([self.sequence]) + payload
+        self.sequence = (self.sequence + 1) % 256
+        return data
+
+    def _send(self, *payloads: bytes):
+        self.request.sendall(b''.join(self._packet(p) for p in payloads))
+
+    def _ok(self, affected: int = 0, status: int = SERVER_STATUS_AUTOCOMMIT) -> bytes:
+        return b'\x00' + _lenenc_int(affected) + _lenenc_int(0) + struct.pack('<HH', status, 0)
+
+    def _eof(self, status: int = SERVER_STATUS_AUTOCOMMIT) -> bytes:
+        return b'\xfe' + struct.pack('<HH', 0, status)
+
+    def _err(self, code: int, message: str, state: str = 'HY000') -> bytes:
+        return b'\xff' + struct.pack('<H', code) + b'#' + state.encode()[:5] + message.encode('utf-8')
+
+    # --- Tok konekcije ---
+
+    def handle(self):
+        try:
+            self._handshake()
+            while True:
+                self.sequence = 0
+                packet = self._read_packet()
+                if not packet:
+                    continue
+                command, body = packet[0], packet[1:]
+                if command == COM_QUIT:
+                    return
+                if command in (COM_PING, COM_INIT_DB):
+                    self._send(self._ok())
+                elif command == COM_QUERY:
+                    self._handle_query(body.decode('utf-8', 'replace'))
+                else:
+                    self._send(self._err(1047, 'Unknown command'))
+        except (ConnectionError, OSError):
+            return
+
+    def _handshake(self):
+        salt = os.urandom(20).replace(b'\0', b'\1')
+        payload = (
+            b'\x0a' + self.server.standin.server_version.encode() + b'\0'
+            + struct.pack('<I', self.session.connection_id)
+            + salt[:8] + b'\0'
+            + struct.pack('<H', SERVER_CAPABILITIES & 0xffff)
+            + bytes([CHARSET_UTF8MB4])
+            + struct.pack('<H', SERVER_STATUS_AUTOCOMMIT)
+            + struct.pack('<H', SERVER_CAPABILITIES >> 16)
+            + bytes([21]) + b'\0' * 10
+            + salt[8:] + b'\0'
+            + b'mysql_native_password\0'
+        )
+        self._send(payload)
+        response = self._read_packet()
+        self.session.client_flags = struct.unpack('<I', response[:4])[0]
+        # Stand-in prihvata bilo koje kredencijale
+        self._send(self._ok())
+
+    def _handle_query(self, sql: str):
+        if self.session.client_flags & CLIENT_MULTI_STATEMENTS:
+            statements = _split_statements(sql) or ['']
+        else:
+            statements = [sql.strip().rstrip(';')]
+
+        for index, statement in enumerate(statements):
+            more = index < len(statements) - 1
+            status = SERVER_STATUS_AUTOCOMMIT | (SERVER_MORE_RESULTS_EXISTS if more else 0)
+            try:
+                result = self.server.standin._execute(self.session, statement)
+            except StandInError as e:
+                self._send(self._err(e.code, str(e), e.state))
+                return
+            if isinstance(result, int):
+                self._send(self._ok(affected=result, status=status))
+            else:
+                self._send_resultset(result[0], result[1], status)
+
+    def _send_resultset(self, names: List[str], rows: Iterable[tuple], status: int):
+        rows = list(rows)
+        types = []
+        for col in range(len(names)):
+            types.append(self._column_type(row[col] for row in rows))
+
+        header = [_lenenc_int(len(names))]
+        for name, col_type in zip(names, types):
+            charset = CHARSET_BINARY if col_type in (TYPE_LONGLONG, TYPE_DOUBLE, TYPE_NULL) else CHARSET_UTF8MB4
+            encoded = name.encode('utf-8')
+            header.append(
+                _lenenc_str(b'def') + _lenenc_str(b'') + _lenenc_str(b'') + _lenenc_str(b'')
+                + _lenenc_str(encoded) + _lenenc_str(encoded)
+                + b'\x0c' + struct.pack('<HIBHB', charset, 255, col_type, 0, 0) + b'\0\0'
+            )
+        header.append(self._eof())
+        self._send(*header)
+
+        batch = []
+        for row in rows:
+            batch.append(b''.join(b'\xfb' if value is None else _lenenc_str(self._encode(value)) for value in row))
+            if len(batch) >= 256:
+                self._send(*batch)
+                batch = []
+        batch.append(self._eof(status))
+        self._send(*batch)
+
+    @staticmethod
+    def _column_type(values) -> int:
+        for value in values:
+            if value is None:
+                continue
+            if isinstance(value, bool) or isinstance(value, int):
+                return TYPE_LONGLONG
+            if isinstance(value, float):
+                return TYPE_DOUBLE
+            if isinstance(value, bytes):
+                return TYPE_BLOB
+            if isinstance(value, str) and _DATETIME_RE.match(value):
+                return TYPE_DATETIME
+            return TYPE_VAR_STRING
+        return TYPE_VAR_STRING
+
+    @staticmethod
+    def _encode(value) -> bytes:
+        if isinstance(value, bytes):
+            return value
+        if isinstance(value, float):
+            return repr(value).encode()
+        return str(value).encode('utf-8')
+
+
+class _ThreadingServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class MySQLStandInServer:
+    """Lokalni MySQL stand-in za testiranje bez prave baze
+
+    Govori dovoljan podskup MySQL protokola (handshake, COM_QUERY, COM_PING,
+    multi-statements, KILL QUERY, PREPARE/EXECUTE) da pymysql radi nad njim,
+    a same upite izvršava nad deljenom SQLite bazom u memoriji.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, setup_sql: Optional[str] = None,
+                 server_version: str = '8.0.36-blbs-standin'):
+        self.server_version = server_version
+        self.database_uri = f'file:blbs_standin_{uuid.uuid4().hex}?mode=memory&cache=shared'
+        # Sidrena konekcija drži deljenu bazu u memoriji živom
+        self._anchor = self._open_sqlite()
+        if setup_sql:
+            self._anchor.executescript(setup_sql)
+            self._anchor.commit()
+        self._sessions: Dict[int, _Session] = {}
+        self._sessions_lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._server = _ThreadingServer((host, port), _StandInHandler)
+        self._server.standin = self
+        self._thread: Optional[threading.Thread] = None
+        self.queries: List[str] = []
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self._server.server_address[0], self._server.server_address[1]
+
+    def config(self, database: str = 'blbs') -> Dict[str, str]:
+        """Vraća konfiguraciju u formatu ConfigManager-a"""
+        host, port = self.address
+        return {'host': host, 'username': 'standin', 'password': 'standin',
+                'database': database, 'port': str(port)}
+
+    def start(self) -> 'MySQLStandInServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        with self._sessions_lock:
+            sessions = list(self._sessions.values())
+        for session in sessions:
+            session.close()
+        self._anchor.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def execute_script(self, sql: str):
+        """Izvršava setup SQL direktno nad SQLite bazom"""
+        self._anchor.executescript(sql)
+        self._anchor.commit()
+
+    @property
+    def active_sessions(self) -> int:
+        with self._sessions_lock:
+            return len(self._sessions)
+
+    # --- Interno ---
+
+    def _open_sqlite(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.database_uri, uri=True, check_same_thread=False, isolation_level=None)
+        db.create_function('VERSION', 0, lambda: self.server_version)
+        db.create_function('DATABASE', 0, lambda: 'blbs')
+        db.create_function('SLEEP', 1, _sleep)
+        db.create_function('DATE_FORMAT', 2, _date_format)
+        db.create_function('HOUR', 1, lambda value: _parse_datetime(value).hour if value is not None else None)
+        return db
+
+    def _register_session(self) -> _Session:
+        session = _Session(self, next(self._ids))
+        session.db.create_function('CONNECTION_ID', 0, lambda: session.connection_id)
+        with self._sessions_lock:
+            self._sessions[session.connection_id] = session
+        return session
+
+    def _unregister_session(self, session: _Session):
+        with self._sessions_lock:
+            self._sessions.pop(session.connection_id, None)
+        session.close()
+
+    def _execute(self, session: _Session, statement: str):
+        """Vraća (imena kolona, redovi) za upite sa rezultatom, inače broj izmenjenih redova"""
+        self.queries.append(statement)
+        upper = statement.lstrip().upper()
+
+        if not statement:
+            raise StandInError(1065, 'Query was empty', '42000')
+
+        if upper.startswith('SET '):
+            for name, value in _SET_VAR_RE.findall(statement[4:]):
+                session.variables[name] = _parse_literal(value)
+            return 0
+
+        match = _KILL_RE.match(statement)
+        if match:
+            with self._sessions_lock:
+                target = self._sessions.get(int(match.group(1)))
+            if target is None:
+                raise StandInError(1094, f'Unknown thread id: {match.group(1)}')
+            target.db.interrupt()
+            return 0
+
+        match = _PREPARE_RE.match(statement)
+        if match:
+            session.prepared[match.group(1)] = match.group(2).replace("\\'", "'").replace("''", "'")
+            return 0
+
+        match = _DEALLOCATE_RE.match(statement)
+        if match:
+            if session.prepared.pop(match.group(1), None) is None:
+                raise StandInError(1243, f'Unknown prepared statement handler ({match.group(1)}) given to DEALLOCATE PREPARE')
+            return 0
+
+        params: Tuple = ()
+        match = _EXECUTE_RE.match(statement)
+        if match:
+            name = match.group(1)
+            if name not in session.prepared:
+                raise StandInError(1243, f'Unknown prepared statement handler ({name}) given to EXECUTE')
+            names = [n.strip().lstrip('@') for n in (match.group(2) or '').split(',') if n.strip()]
+            params = tuple(session.variables.get(n) for n in names)
+            statement = session.prepared[name]
+
+        try:
+            cursor = session.db.execute(statement, params)
+            if cursor.description is None:
+                return max(cursor.rowcount, 0)
+            names = [d[0] for d in cursor.description]
+            return names, cursor.fetchall()
+        except sqlite3.OperationalError as e:
+            if 'interrupted' in str(e):
+                raise StandInError(1317, 'Query execution was interrupted', '70100')
+            raise StandInError(1064, f'You have an error in your SQL syntax: {e}', '42000')
+        except sqlite3.Error as e:
+            raise StandInError(1105, str(e))
+
+
+def _sleep(seconds):
+    threading.Event().wait(float(seconds or 0))
+    return 0
+
+
+def _parse_datetime(value) -> datetime.datetime:
+    return datetime.datetime.fromisoformat(str(value))
+
+
+def _date_format(value, fmt):
+    """MySQL DATE_FORMAT za specifikatore koje koriste izveštaji (%Y %m %d %H %i %s)"""
+    if value is None:
+        return None
+    return _parse_datetime(value).strftime(str(fmt).replace('%i', '%M').replace('%s', '%S'))
+
+
+def main():
+    """Pokreće stand-in iz komandne linije: python -m database.mysql_standin [port] [setup.sql]"""
+    import sys
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 3307
+    setup_sql = None
+    if len(sys.argv) > 2:
+        with open(sys.argv[2], 'r', encoding='utf-8') as f:
+            setup_sql = f.read()
+
+    server = MySQLStandInServer(port=port, setup_sql=setup_sql)
+    print(f"MySQL stand-in sluša na {server.address[0]}:{server.address[1]} (Ctrl+C za kraj)")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
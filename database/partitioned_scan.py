@@ -0,0 +1,213 @@
+"""
+Paralelno čitanje velikih tabela po opsezima primarnog ključa
+"""
+import queue
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from database.aggregation_planner import quote_identifier
+from database.blbs_connector import BLBSConnector
+from database.connection_pool import get_pool
+
+
+PRIMARY_KEY_QUERY = """
+SELECT COLUMN_NAME, DATA_TYPE
+FROM information_schema.COLUMNS
+WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_KEY = 'PRI'
+ORDER BY ORDINAL_POSITION
+"""
+
+INTEGER_KEY_TYPES = ('tinyint', 'smallint', 'mediumint', 'int', 'integer', 'bigint')
+
+_DONE = object()
+
+
+class _Failure:
+    def __init__(self, error: Exception):
+        self.error = error
+
+
+def key_ranges(low: int, high: int, partitions: int) -> List[Tuple[int, int]]:
+    """Deli [low, high] na najviše `partitions` poluotvorenih opsega [od, do)"""
+    if low is None or high is None or high < low:
+        return []
+    partitions = max(1, min(partitions, high - low + 1))
+    step = -(-(high - low + 1) // partitions)
+    return [(start, min(start + step, high + 1)) for start in range(low, high + 1, step)]
+
+
+class PartitionedScan:
+    """Čita tabelu u N paralelnih opsega primarnog ključa preko pool-a konekcija
+
+    Opsezi se dodeljuju nitima po redu, a svaka nit strimuje svoj opseg
+    (SSCursor) u ograničen red čekanja. Sa ordered=True paketi se vraćaju po
+    redosledu ključa (opsezi se spajaju jedan za drugim dok se ostali već
+    čitaju), a sa ordered=False čim stignu. Ako ključ nije jedna celobrojna
+    kolona, tabela se čita jednim običnim upitom.
+    """
+
+    def __init__(self, config: Dict[str, str], table: str, columns: str = '*',
+                 where: Optional[str] = None, params: Optional[tuple] = None,
+                 key_column: Optional[str] = None, partitions: int = 4, ordered: bool = True,
+                 batch_size: int = 1000, pool=None, timeout: Optional[float] = None,
+                 queue_size: int = 4):
+        self.config = config
+        self.table = table
+        self.columns = columns
+        self.where = where
+        self.params = tuple(params or ())
+        self.key_column = key_column
+        self.partitions = partitions
+        self.ordered = ordered
+        self.batch_size = batch_size
+        self.pool = pool if pool is not None else get_pool(config, timeout=timeout)
+        self.timeout = timeout
+        self.queue_size = queue_size
+        self.description = None
+
+    def __iter__(self) -> Iterator[list]:
+        return self.iter_batches()
+
+    def rows(self) -> Iterator[tuple]:
+        """Redovi jedan po jedan"""
+        for batch in self.iter_batches():
+            yield from batch
+
+    def plan(self) -> Optional[List[Tuple[int, int]]]:
+        """Opsezi ključa za paralelno čitanje ili None ako tabela ne može da se podeli"""
+        connector = self._connector()
+        try:
+            key = self.key_column or self._find_integer_key(connector)
+            if key is None:
+                return None
+            self.key_column = key
+            bounds = connector.execute(
+                f"SELECT MIN({quote_identifier(key)}), MAX({quote_identifier(key)})\n"
+                f"FROM {quote_identifier(self.table)}{self._where_clause()}",
+                self.params or None, use_cache=False)
+            if not bounds:
+                return None
+            low, high = bounds[0]
+            if low is not None and not (isinstance(low, int) and isinstance(high, int)):
+                print(f"Ključ {key} nije celobrojan, tabela {self.table} se čita bez podele")
+                return None
+            return key_ranges(low, high, self.partitions)
+        finally:
+            connector.disconnect()
+
+    def partition_query(self, low: int, high: int) -> Tuple[str, tuple]:
+        """SELECT za jedan opseg [low, high)"""
+        key = quote_identifier(self.key_column)
+        condition = f"{key} >= %s AND {key} < %s"
+        where = f"({self.where}) AND {condition}" if self.where else condition
+        query = f"SELECT {self.columns}\nFROM {quote_identifier(self.table)}\nWHERE {where}"
+        if self.ordered:
+            query += f"\nORDER BY {key}"
+        return query, self.params + (low, high)
+
+    def iter_batches(self) -> Iterator[list]:
+        """Paketi redova iz svih opsega (paralelno, pa spojeni)"""
+        ranges = self.plan()
+        if ranges is None:
+            yield from self._single_scan()
+            return
+        if not ranges:
+            return
+
+        workers = max(1, min(len(ranges), self.pool.max_size))
+        if self.ordered:
+            queues = [queue.Queue(self.queue_size) for _ in ranges]
+        else:
+            shared = queue.Queue(self.queue_size * workers)
+            queues = [shared] * len(ranges)
+
+        stop = threading.Event()
+        next_index = iter(range(len(ranges)))
+        index_lock = threading.Lock()
+
+        def work():
+            while not stop.is_set():
+                with index_lock:
+                    index = next(next_index, None)
+                if index is None:
+                    return
+                self._scan_range(ranges[index], queues[index], stop)
+
+        threads = [threading.Thread(target=work, daemon=True) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+
+        try:
+            if self.ordered:
+                for partition_queue in queues:
+                    yield from self._drain(partition_queue, 1)
+            else:
+                yield from self._drain(shared, len(ranges))
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+    def _scan_range(self, key_range: Tuple[int, int], target: queue.Queue, stop: threading.Event):
+        connector = self._connector()
+        query, params = self.partition_query(*key_range)
+        stream = connector.iter_query(query, params, self.batch_size)
+        try:
+            for rows in stream:
+                if self.description is None:
+                    self.description = connector.description
+                if not self._put(target, rows, stop):
+                    break
+            self._put(target, _DONE, stop)
+        except Exception as e:
+            self._put(target, _Failure(e), stop)
+        finally:
+            # Prekinut strim odbacuje konekciju umesto da čita ostatak opsega
+            stream.close()
+            connector.disconnect()
+
+    @staticmethod
+    def _put(target: queue.Queue, item, stop: threading.Event) -> bool:
+        while not stop.is_set():
+            try:
+                target.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    @staticmethod
+    def _drain(source: queue.Queue, producers: int) -> Iterator[list]:
+        while producers:
+            item = source.get()
+            if item is _DONE:
+                producers -= 1
+            elif isinstance(item, _Failure):
+                raise item.error
+            else:
+                yield item
+
+    def _single_scan(self) -> Iterator[list]:
+        connector = self._connector()
+        query = f"SELECT {self.columns}\nFROM {quote_identifier(self.table)}{self._where_clause()}"
+        stream = connector.iter_query(query, self.params or None, self.batch_size)
+        try:
+            for rows in stream:
+                self.description = connector.description
+                yield rows
+        finally:
+            stream.close()
+            connector.disconnect()
+
+    def _find_integer_key(self, connector) -> Optional[str]:
+        rows = connector.execute(PRIMARY_KEY_QUERY, (self.table,), use_cache=False)
+        if not rows or len(rows) != 1 or str(rows[0][1]).lower() not in INTEGER_KEY_TYPES:
+            print(f"Tabela {self.table} nema celobrojni primarni ključ od jedne kolone, čita se bez podele")
+            return None
+        return rows[0][0]
+
+    def _where_clause(self) -> str:
+        return f"\nWHERE {self.where}" if self.where else ""
+
+    def _connector(self) -> BLBSConnector:
+        return BLBSConnector(self.config, pool=self.pool, timeout=self.timeout)
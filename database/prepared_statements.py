@@ -0,0 +1,105 @@
+"""
+Keš server-side prepared statement-a po konekciji
+"""
+import itertools
+import re
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Optional, Sequence
+
+from database.sql_normalizer import canonical_sql
+
+
+_PLACEHOLDER_RE = re.compile(r'%%|%s')
+
+# Broj grešaka "Unknown prepared statement handler" - npr. posle reconnect-a
+ER_UNKNOWN_STMT_HANDLER = 1243
+
+
+def to_server_placeholders(query: str) -> str:
+    """Pretvara pymysql `%s` placeholdere u `?` koje očekuje PREPARE"""
+    return _PLACEHOLDER_RE.sub(lambda m: '%' if m.group(0) == '%%' else '?', query)
+
+
+class PreparedStatementCache:
+    """LRU keš PREPARE-ovanih naredbi jedne konekcije
+
+    pymysql govori samo tekstualni protokol, pa se naredbe pripremaju preko
+    SQL-a (PREPARE / EXECUTE ... USING / DEALLOCATE PREPARE). Najstarija
+    naredba se oslobađa na serveru kada keš pređe `capacity`.
+    """
+
+    _names = itertools.count(1)
+
+    def __init__(self, capacity: int = 32):
+        self.capacity = capacity
+        self._statements: 'OrderedDict[tuple, str]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._statements)
+
+    def execute(self, cursor, query: str, params: Optional[Sequence] = None):
+        """Izvršava upit preko keširane prepared naredbe"""
+        try:
+            self._execute(cursor, query, params)
+        except Exception as e:
+            if getattr(e, 'args', (None,))[0] != ER_UNKNOWN_STMT_HANDLER:
+                raise
+            # Server je zaboravio naredbe (nova sesija) - pripremi ponovo
+            self._statements.clear()
+            self._execute(cursor, query, params)
+
+    def clear(self, cursor):
+        """Oslobađa sve naredbe na serveru"""
+        while self._statements:
+            _, name = self._statements.popitem(last=False)
+            cursor.execute(f"DEALLOCATE PREPARE {name}")
+
+    def _execute(self, cursor, query: str, params: Optional[Sequence]):
+        params = tuple(params or ())
+        name = self._prepare(cursor, query, bool(params))
+        if params:
+            variables = [f"@blbs_p{i}" for i in range(len(params))]
+            cursor.execute("SET " + ", ".join(f"{v} = %s" for v in variables), params)
+            cursor.execute(f"EXECUTE {name} USING {', '.join(variables)}")
+        else:
+            cursor.execute(f"EXECUTE {name}")
+
+    def _prepare(self, cursor, query: str, has_params: bool) -> str:
+        key = (canonical_sql(query), has_params)
+        name = self._statements.get(key)
+        if name is not None:
+            self._statements.move_to_end(key)
+            self.hits += 1
+            return name
+
+        self.misses += 1
+        name = f"blbs_stmt_{next(self._names)}"
+        # Serveru ide originalni tekst - normalizacija služi samo za ključ
+        text = query.strip().rstrip(';')
+        if has_params:
+            text = to_server_placeholders(text)
+        cursor.execute(f"PREPARE {name} FROM %s", (text,))
+        self._statements[key] = name
+
+        if len(self._statements) > self.capacity:
+            _, evicted = self._statements.popitem(last=False)
+            cursor.execute(f"DEALLOCATE PREPARE {evicted}")
+        return name
+
+
+_caches = weakref.WeakKeyDictionary()
+_caches_lock = threading.Lock()
+
+
+def cache_for(connection, capacity: int = 32) -> PreparedStatementCache:
+    """Vraća keš prepared naredbi vezan za datu konekciju"""
+    with _caches_lock:
+        cache = _caches.get(connection)
+        if cache is None:
+            cache = PreparedStatementCache(capacity)
+            _caches[connection] = cache
+        return cache
@@ -0,0 +1,121 @@
+"""
+Praćenje upita koji se izvršavaju i otkazivanje preko KILL QUERY
+"""
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+
+# Koliko dugo se pamti otkazivanje upita koji još nije pokrenut (ili nikada neće biti)
+CANCEL_TTL = 600.0
+MAX_CANCELLED = 10_000
+
+
+class QueryCancelledError(Exception):
+    """Upit je otkazan pre ili tokom izvršavanja"""
+
+
+def kill_query(config: Dict[str, str], thread_id: int):
+    """Šalje `KILL QUERY <thread id>` preko zasebne konekcije"""
+    # Lokalni import - blbs_connector uvozi ovaj modul
+    from database.blbs_connector import create_connection
+    connection = create_connection(config, connect_timeout=5, read_timeout=10)
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f"KILL QUERY {int(thread_id)}")
+    finally:
+        connection.close()
+
+
+class QueryRegistry:
+    """Registar upita u toku: query_id -> (konfiguracija, MySQL thread id)
+
+    Otkazivanje šalje `KILL QUERY <thread id>` preko zasebne konekcije, pa se
+    i MySQL nit i Flask/Tk nit koja čeka rezultat oslobađaju odmah. KILL se
+    šalje van zajedničkog lock-a; samo `unregister` upita koji se ubija čeka
+    da KILL stigne, da konekcija ne bi bila vraćena u pool i dodeljena drugom
+    upitu pre toga. Otkazivanje upita koji još nije pokrenut pamti se
+    `CANCEL_TTL` sekundi.
+    """
+
+    def __init__(self, kill: Callable[[Dict[str, str], int], None] = kill_query,
+                 clock: Callable[[], float] = time.monotonic):
+        self._running: Dict[str, Tuple[Dict[str, str], int]] = {}
+        self._cancelled: Dict[str, float] = {}
+        self._killing: Dict[str, threading.Event] = {}
+        self._kill = kill
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    def register(self, query_id: str, config: Dict[str, str], thread_id: int):
+        """Beleži da je upit pokrenut na datoj MySQL niti"""
+        with self._lock:
+            if query_id in self._cancelled:
+                raise QueryCancelledError(f"Upit {query_id} je otkazan")
+            self._running[query_id] = (config, thread_id)
+
+    def unregister(self, query_id: str):
+        """Upit je završen - konekcija se sme ponovo koristiti (posle KILL-a koji je u toku)"""
+        while True:
+            with self._lock:
+                killing = self._killing.get(query_id)
+                if killing is None:
+                    self._running.pop(query_id, None)
+                    return
+            killing.wait()
+
+    def forget(self, query_id: str):
+        """Briše sve podatke o upitu (poziva se kada je obrada zahteva gotova)"""
+        with self._lock:
+            self._running.pop(query_id, None)
+            self._cancelled.pop(query_id, None)
+
+    def is_cancelled(self, query_id: Optional[str]) -> bool:
+        with self._lock:
+            return query_id in self._cancelled
+
+    def is_running(self, query_id: str) -> bool:
+        with self._lock:
+            return query_id in self._running
+
+    def cancelled_count(self) -> int:
+        with self._lock:
+            return len(self._cancelled)
+
+    def cancel(self, query_id: str) -> Tuple[bool, str]:
+        """Otkazuje upit; ako još nije pokrenut, biće odbijen pri pokretanju"""
+        with self._lock:
+            self._expire()
+            self._cancelled[query_id] = self._clock()
+            running = self._running.get(query_id)
+            if running is None:
+                return True, "Upit će biti otkazan pre izvršavanja."
+            if query_id in self._killing:
+                return True, "Otkazivanje upita je već u toku."
+            killing = threading.Event()
+            self._killing[query_id] = killing
+
+        config, thread_id = running
+        try:
+            self._kill(config, thread_id)
+            return True, "Upit je otkazan."
+        except Exception as e:
+            return False, f"Greška pri otkazivanju upita: {e}"
+        finally:
+            with self._lock:
+                self._killing.pop(query_id, None)
+            killing.set()
+
+    def _expire(self):
+        """Zaboravlja stara otkazivanja i najstarija preko MAX_CANCELLED (poziva se pod lock-om)"""
+        cutoff = self._clock() - CANCEL_TTL
+        expired = [query_id for query_id, cancelled_at in self._cancelled.items()
+                   if cancelled_at < cutoff and query_id not in self._running]
+        for query_id in expired:
+            del self._cancelled[query_id]
+        # Rečnik čuva redosled dodavanja - prvi su najstariji
+        while len(self._cancelled) >= MAX_CANCELLED:
+            del self._cancelled[next(iter(self._cancelled))]
+
+
+query_registry = QueryRegistry()
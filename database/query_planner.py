@@ -0,0 +1,84 @@
+"""
+Planiranje upita za AI izveštaje - LIMIT pushdown i odvojen COUNT(*)
+"""
+import re
+from typing import List, Optional, Tuple
+
+from database import sql_normalizer
+
+
+_TRAILING_LIMIT_RE = re.compile(r'\bLIMIT\s+\d+\s*(?:(?:,|OFFSET)\s*\d+\s*)?$', re.I)
+_TRAILING_LOCK_RE = re.compile(r'\b(?:FOR\s+UPDATE|FOR\s+SHARE|LOCK\s+IN\s+SHARE\s+MODE)(?:\s+\w+)*\s*$', re.I)
+_FIRST_SELECT_RE = re.compile(r'^((?:\s+|--[^\n]*\n|#[^\n]*\n|/\*.*?\*/)*)(SELECT)\b', re.I | re.S)
+
+
+def clean_query(query: str) -> str:
+    """Uklanja komentare, završne ';' i vodeće/prateće praznine (hint-ovi /*+ */ i /*! */ ostaju)
+
+    Obmotani upit ne sme da nosi komentar posle kog bi LIMIT ili zagrada
+    završili u komentaru, niti ';' koji bi se našao unutar podupita.
+    """
+    tokens = sql_normalizer.tokenize(query)
+    while tokens and (tokens[-1].kind in ('space', 'comment') or tokens[-1][:2] == ('punct', ';')):
+        tokens.pop()
+    parts = []
+    for index, token in enumerate(tokens):
+        if token.kind != 'comment':
+            parts.append(token.text)
+        elif 0 < index < len(tokens) - 1 and 'space' not in (tokens[index - 1].kind, tokens[index + 1].kind):
+            # a/*x*/b -> a b
+            parts.append(' ')
+    return ''.join(parts).strip()
+
+
+def split_statements(query: str) -> List[str]:
+    """Deli tekst na naredbe po ';' koji nije u navodnicima ili komentaru"""
+    return sql_normalizer.split_statements(query)
+
+
+def is_select(query: str) -> bool:
+    """Da li je upit jedan SELECT (ili WITH ... SELECT) bez INTO koji sme da se obmota"""
+    return sql_normalizer.is_select(query)
+
+
+def has_trailing_limit(query: str) -> bool:
+    """Da li upit već završava sopstvenim LIMIT-om"""
+    return bool(_TRAILING_LIMIT_RE.search(clean_query(query)))
+
+
+def sample_query(query: str, limit: int) -> str:
+    """Upit koji vraća najviše `limit` redova originalnog upita"""
+    query = clean_query(query)
+    if has_trailing_limit(query) or _TRAILING_LOCK_RE.search(query):
+        return f"SELECT * FROM (\n{query}\n) AS blbs_sample LIMIT {int(limit)}"
+    return f"{query}\nLIMIT {int(limit)}"
+
+
+def count_query(query: str) -> str:
+    """Upit koji vraća ukupan broj redova originalnog upita"""
+    return f"SELECT COUNT(*) FROM (\n{clean_query(query)}\n) AS blbs_count"
+
+
+def describe_query(query: str) -> str:
+    """Upit koji vraća samo opis kolona originalnog upita (bez redova)"""
+    return f"SELECT * FROM (\n{clean_query(query)}\n) AS blbs_meta LIMIT 0"
+
+
+def plan_sample(query: str, limit: int) -> Optional[Tuple[str, str]]:
+    """Vraća (sample upit, count upit) ili None ako upit ne može da se obmota"""
+    if not is_select(query):
+        return None
+    return sample_query(query, limit), count_query(query)
+
+
+def with_time_limit(query: str, timeout: float) -> str:
+    """Dodaje MAX_EXECUTION_TIME hint na SELECT najvišeg nivoa
+
+    Upiti koji ne počinju sa SELECT (npr. WITH) ostaju nepromenjeni - za njih
+    važi samo read timeout klijenta.
+    """
+    if 'MAX_EXECUTION_TIME' in query.upper():
+        return query
+    milliseconds = max(1, int(timeout * 1000))
+    return _FIRST_SELECT_RE.sub(
+        lambda m: f"{m.group(1)}{m.group(2)} /*+ MAX_EXECUTION_TIME({milliseconds}) */", query, count=1)
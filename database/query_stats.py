@@ -0,0 +1,207 @@
+"""
+Statistika latencije po "otisku" upita (literali uklonjeni) - p50/p95/p99, broj, redovi, bajtovi
+"""
+import math
+import threading
+from typing import Dict, List, Optional
+
+from database.sql_normalizer import fingerprint
+
+
+# Histogram: logaritamske korpe od 50 µs do ~1h, svaka korpa je 10% šira od prethodne
+_BUCKET_BASE_MS = 0.05
+_BUCKET_GROWTH = 1.1
+_BUCKET_COUNT = 192
+_LOG_GROWTH = math.log(_BUCKET_GROWTH)
+
+# Svi otisci preko ograničenja se sabiraju pod ovim ključem
+OTHER_FINGERPRINT = '<ostali upiti>'
+
+
+def estimate_bytes(rows, sample: int = 20) -> int:
+    """Procena veličine redova (tekstualna dužina vrednosti) na osnovu prvih `sample` redova"""
+    if not rows:
+        return 0
+    head = rows[:sample]
+    size = 0
+    for row in head:
+        for value in (row.values() if isinstance(row, dict) else row):
+            if value is None:
+                size += 1
+            elif isinstance(value, (str, bytes)):
+                size += len(value)
+            else:
+                size += 8
+    return size * len(rows) // len(head)
+
+
+def _bucket(ms: float) -> int:
+    if ms <= _BUCKET_BASE_MS:
+        return 0
+    return min(int(math.log(ms / _BUCKET_BASE_MS) / _LOG_GROWTH) + 1, _BUCKET_COUNT - 1)
+
+
+def _bucket_value(index: int) -> float:
+    """Reprezentativna vrednost korpe (geometrijska sredina granica)"""
+    if index == 0:
+        return _BUCKET_BASE_MS
+    return _BUCKET_BASE_MS * _BUCKET_GROWTH ** (index - 0.5)
+
+
+class _Series:
+    """Brojači jednog otiska u jednoj niti"""
+    __slots__ = ('example', 'count', 'errors', 'rows', 'bytes', 'total_ms', 'max_ms', 'buckets')
+
+    def __init__(self, example: str):
+        self.example = example
+        self.count = 0
+        self.errors = 0
+        self.rows = 0
+        self.bytes = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * _BUCKET_COUNT
+
+    def merge(self, other: '_Series'):
+        self.count += other.count
+        self.errors += other.errors
+        self.rows += other.rows
+        self.bytes += other.bytes
+        self.total_ms += other.total_ms
+        self.max_ms = max(self.max_ms, other.max_ms)
+        buckets = self.buckets
+        for index, value in enumerate(other.buckets):
+            if value:
+                buckets[index] += value
+
+    def percentile(self, fraction: float) -> float:
+        """Vrednost ispod koje je `fraction` izmerenih latencija (greška ~5%)"""
+        measured = sum(self.buckets)
+        if not measured:
+            return 0.0
+        rank = max(1, math.ceil(measured * fraction))
+        seen = 0
+        for index, value in enumerate(self.buckets):
+            seen += value
+            if seen >= rank:
+                return min(_bucket_value(index), self.max_ms)
+        return self.max_ms
+
+
+class QueryStats:
+    """Statistika izvršenih upita grupisana po otisku
+
+    Svaka nit piše samo u svoj deo (shard), pa snimanje merenja ne uzima lock -
+    zaključava se samo registracija nove niti i čitanje (spajanje delova).
+    Delovi niti koje su završile se pri čitanju pretapaju u zajednički zbir.
+    """
+
+    def __init__(self, max_fingerprints: int = 500, example_length: int = 500):
+        self.max_fingerprints = max_fingerprints
+        self.example_length = example_length
+        self._local = threading.local()
+        self._shards: List[tuple] = []
+        self._retired: Dict[str, _Series] = {}
+        self._lock = threading.Lock()
+
+    def record(self, query: str, elapsed: float, rows: int = 0, size: int = 0, error: bool = False):
+        """Beleži jedno izvršavanje upita (elapsed u sekundama)"""
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._register_shard()
+
+        key = fingerprint(query)
+        series = shard.get(key)
+        if series is None:
+            if len(shard) >= self.max_fingerprints:
+                key = OTHER_FINGERPRINT
+                series = shard.get(key)
+            if series is None:
+                series = shard[key] = _Series(query[:self.example_length])
+
+        series.count += 1
+        if error:
+            series.errors += 1
+            return
+        ms = elapsed * 1000.0
+        series.rows += rows
+        series.bytes += size
+        series.total_ms += ms
+        if ms > series.max_ms:
+            series.max_ms = ms
+        series.buckets[_bucket(ms)] += 1
+
+    def snapshot(self, limit: Optional[int] = None, sort: str = 'total_ms') -> List[Dict]:
+        """Zbirna statistika po otisku, sortirana opadajuće po `sort` koloni"""
+        merged: Dict[str, _Series] = {}
+        with self._lock:
+            alive = []
+            for thread, shard in self._shards:
+                target = merged if thread.is_alive() else self._retired
+                for key, series in list(shard.items()):
+                    self._merge_into(target, key, series)
+                if thread.is_alive():
+                    alive.append((thread, shard))
+            self._shards = alive
+            for key, series in self._retired.items():
+                self._merge_into(merged, key, series)
+
+        stats = []
+        for key, series in merged.items():
+            measured = series.count - series.errors
+            stats.append({
+                'fingerprint': key,
+                'example': series.example,
+                'count': series.count,
+                'errors': series.errors,
+                'rows': series.rows,
+                'bytes': series.bytes,
+                'total_ms': round(series.total_ms, 2),
+                'avg_ms': round(series.total_ms / measured, 2) if measured else 0.0,
+                'p50_ms': round(series.percentile(0.50), 2),
+                'p95_ms': round(series.percentile(0.95), 2),
+                'p99_ms': round(series.percentile(0.99), 2),
+                'max_ms': round(series.max_ms, 2),
+            })
+        stats.sort(key=lambda item: item.get(sort, 0), reverse=True)
+        return stats[:limit] if limit else stats
+
+    def reset(self):
+        """Briše svu prikupljenu statistiku"""
+        with self._lock:
+            for _, shard in self._shards:
+                shard.clear()
+            self._retired = {}
+
+    def _register_shard(self) -> dict:
+        shard = {}
+        with self._lock:
+            self._shards.append((threading.current_thread(), shard))
+        self._local.shard = shard
+        return shard
+
+    @staticmethod
+    def _merge_into(target: Dict[str, _Series], key: str, series: _Series):
+        existing = target.get(key)
+        if existing is None:
+            existing = target[key] = _Series(series.example)
+        existing.merge(series)
+
+
+def format_stats(stats: List[Dict]) -> str:
+    """Tekstualna tabela statistike (za Tk panel i konzolu)"""
+    if not stats:
+        return "Još nema izvršenih upita."
+    lines = [f"{'Broj':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'Ukupno s':>9} {'Redova':>10}  Upit",
+             "-" * 90]
+    for item in stats:
+        text = item['fingerprint']
+        if len(text) > 120:
+            text = text[:117] + "..."
+        errors = f" ({item['errors']} grešaka)" if item['errors'] else ""
+        lines.append(f"{item['count']:>7} {item['p50_ms']:>9.1f} {item['p95_ms']:>9.1f} {item['p99_ms']:>9.1f} "
+                     f"{item['total_ms'] / 1000:>9.2f} {item['rows']:>10}  {text}{errors}")
+    return "\n".join(lines)
+
+
+query_stats = QueryStats()
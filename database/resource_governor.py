@@ -0,0 +1,97 @@
+"""
+Ograničenje broja redova i bajtova koje jedan upit sme da prenese (po korisniku i ruti)
+"""
+from typing import Dict, Optional
+
+from database.query_stats import estimate_bytes
+
+
+def _tighter(a: Optional[int], b: Optional[int]) -> Optional[int]:
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return min(a, b)
+
+
+class ResultLimits:
+    """Najveći broj redova i (procenjenih) bajtova rezultata jednog upita; None = bez ograničenja"""
+
+    def __init__(self, max_rows: Optional[int] = None, max_bytes: Optional[int] = None):
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+
+    def tighter(self, other: Optional['ResultLimits']) -> 'ResultLimits':
+        """Kombinacija sa drugim ograničenjem - važi strože od dva"""
+        if other is None:
+            return self
+        return ResultLimits(_tighter(self.max_rows, other.max_rows), _tighter(self.max_bytes, other.max_bytes))
+
+    def to_dict(self) -> Dict[str, Optional[int]]:
+        return {'max_rows': self.max_rows, 'max_bytes': self.max_bytes}
+
+    def __repr__(self):
+        return f"ResultLimits(max_rows={self.max_rows}, max_bytes={self.max_bytes})"
+
+
+class LimitPolicy:
+    """Ograničenja po ruti i korisniku
+
+    Ruta bira svoje ograničenje (ili podrazumevano), a ograničenje korisnika
+    se kombinuje sa njim tako da važi strože - korisnik ne može da zaobiđe
+    ograničenje rute.
+    """
+
+    def __init__(self, default: ResultLimits, routes: Optional[Dict[str, ResultLimits]] = None,
+                 users: Optional[Dict[str, ResultLimits]] = None):
+        self.default = default
+        self.routes = dict(routes or {})
+        self.users = dict(users or {})
+
+    def limits_for(self, user: Optional[str] = None, route: Optional[str] = None) -> ResultLimits:
+        """Efektivno ograničenje za korisnika na datoj ruti"""
+        limits = self.routes.get(route, self.default)
+        return limits.tighter(self.users.get(user))
+
+
+class ResultGovernor:
+    """Brojač redova i bajtova jednog strimovanog rezultata
+
+    `admit` propušta deo paketa koji staje u ograničenje; kada je ograničenje
+    prekoračeno, `exceeded` sadrži razlog, a pozivalac prekida upit na serveru.
+    """
+
+    def __init__(self, limits: ResultLimits):
+        self.limits = limits
+        self.rows = 0
+        self.bytes = 0
+        self.exceeded: Optional[str] = None
+
+    def batch_size(self, requested: int) -> int:
+        """Veličina sledećeg paketa - ne čita se (mnogo) više od preostalog budžeta redova"""
+        if self.limits.max_rows is None:
+            return requested
+        return max(1, min(requested, self.limits.max_rows - self.rows + 1))
+
+    def admit(self, rows):
+        """Vraća redove paketa koji staju u ograničenje (ceo paket ako nije prekoračeno)"""
+        if not rows:
+            return rows
+        accepted = len(rows)
+        size = estimate_bytes(rows)
+        max_rows, max_bytes = self.limits.max_rows, self.limits.max_bytes
+        if max_rows is not None and self.rows + accepted > max_rows:
+            accepted = max(0, max_rows - self.rows)
+            self.exceeded = f"prekoračeno ograničenje od {max_rows} redova"
+
+        if max_bytes is not None and self.bytes + size * accepted // len(rows) > max_bytes:
+            per_row = max(1, size // len(rows))
+            accepted = min(accepted, max(0, (max_bytes - self.bytes) // per_row))
+            self.exceeded = f"prekoračeno ograničenje od {max_bytes / (1024 * 1024):.1f} MB"
+
+        if accepted < len(rows):
+            size = size * accepted // len(rows)
+            rows = rows[:accepted]
+        self.rows += accepted
+        self.bytes += size
+        return rows
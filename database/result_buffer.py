@@ -0,0 +1,374 @@
+"""
+Bafer rezultata upita koji posle zadate veličine preliva redove u mmap privremeni fajl
+"""
+import datetime
+import decimal
+import mmap
+import struct
+import tempfile
+import threading
+import time
+import uuid
+from array import array
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from database import sql_normalizer
+from database.query_stats import estimate_bytes
+
+
+DEFAULT_MEMORY_BYTES = 32 * 1024 * 1024
+
+# Najviše različitih vrednosti koje statistika broji po tekstualnoj koloni
+MAX_DISTINCT = 10000
+
+# Koliko dugo (i koliko najviše) profilisanih rezultata čeka izvoz
+BUFFER_TTL = 600.0
+MAX_BUFFERS = 4
+
+# Oznake tipova u binarnom formatu reda: [oznaka][vrednost] za svaku kolonu
+_NONE, _INT, _FLOAT, _STR, _BYTES, _DECIMAL, _DATETIME, _DATE, _TIME, _TIMEDELTA, _BIGINT = range(11)
+
+_INT64 = struct.Struct('<q')
+_FLOAT64 = struct.Struct('<d')
+_LENGTH = struct.Struct('<I')
+_INT64_MIN, _INT64_MAX = -2 ** 63, 2 ** 63 - 1
+
+
+def _encode_text(out: bytearray, tag: int, text: str):
+    data = text.encode('utf-8', 'surrogatepass')
+    out.append(tag)
+    out += _LENGTH.pack(len(data))
+    out += data
+
+
+def encode_row(row: Sequence, out: bytearray):
+    """Dodaje binarni zapis reda u `out`"""
+    for value in row:
+        if value is None:
+            out.append(_NONE)
+        elif isinstance(value, int):
+            if _INT64_MIN <= value <= _INT64_MAX:
+                out.append(_INT)
+                out += _INT64.pack(value)
+            else:
+                _encode_text(out, _BIGINT, str(value))
+        elif isinstance(value, float):
+            out.append(_FLOAT)
+            out += _FLOAT64.pack(value)
+        elif isinstance(value, str):
+            _encode_text(out, _STR, value)
+        elif isinstance(value, (bytes, bytearray)):
+            out.append(_BYTES)
+            out += _LENGTH.pack(len(value))
+            out += value
+        elif isinstance(value, decimal.Decimal):
+            _encode_text(out, _DECIMAL, str(value))
+        elif isinstance(value, datetime.datetime):
+            _encode_text(out, _DATETIME, value.isoformat())
+        elif isinstance(value, datetime.date):
+            _encode_text(out, _DATE, value.isoformat())
+        elif isinstance(value, datetime.time):
+            _encode_text(out, _TIME, value.isoformat())
+        elif isinstance(value, datetime.timedelta):
+            out.append(_TIMEDELTA)
+            out += _INT64.pack((value.days * 86400 + value.seconds) * 1_000_000 + value.microseconds)
+        else:
+            # npr. SET kolona (Python set) - čuva se kao tekst
+            _encode_text(out, _STR, str(value))
+
+
+_TEXT_DECODERS = {
+    _STR: lambda text: text,
+    _BIGINT: int,
+    _DECIMAL: decimal.Decimal,
+    _DATETIME: datetime.datetime.fromisoformat,
+    _DATE: datetime.date.fromisoformat,
+    _TIME: datetime.time.fromisoformat,
+}
+
+
+def decode_row(data, offset: int, width: int):
+    """Čita red od pozicije `offset`, vraća (red, pozicija iza reda)"""
+    values = []
+    for _ in range(width):
+        tag = data[offset]
+        offset += 1
+        if tag == _NONE:
+            values.append(None)
+        elif tag == _INT:
+            values.append(_INT64.unpack_from(data, offset)[0])
+            offset += 8
+        elif tag == _FLOAT:
+            values.append(_FLOAT64.unpack_from(data, offset)[0])
+            offset += 8
+        elif tag == _TIMEDELTA:
+            values.append(datetime.timedelta(microseconds=_INT64.unpack_from(data, offset)[0]))
+            offset += 8
+        else:
+            size = _LENGTH.unpack_from(data, offset)[0]
+            raw = data[offset + 4:offset + 4 + size]
+            offset += 4 + size
+            values.append(bytes(raw) if tag == _BYTES
+                          else _TEXT_DECODERS[tag](raw.decode('utf-8', 'surrogatepass')))
+    return tuple(values), offset
+
+
+class ResultBuffer:
+    """Ceo rezultat upita sa ograničenom memorijom i slučajnim pristupom
+
+    Prvih `memory_bytes` (procena iz query_stats.estimate_bytes) ostaje kao
+    lista tuple-ova; ostali paketi se kodiraju u kompaktan binarni format i
+    dopisuju u privremeni fajl, a čitaju preko mmap-a. Pozicija svakog reda
+    na disku se čuva (8 bajtova po redu), pa `buffer[i]` ne čita fajl
+    redom. Rezultat može da se prođe više puta (statistika, pa izvoz) bez
+    ponovnog izvršavanja upita. Fajl se briše pri close().
+    """
+
+    def __init__(self, description: Optional[Sequence] = None, memory_bytes: int = DEFAULT_MEMORY_BYTES,
+                 directory: Optional[str] = None):
+        self.description = description
+        self.memory_bytes = memory_bytes
+        self.directory = directory
+        self.width: Optional[int] = None
+        self._memory: List[tuple] = []
+        self._memory_size = 0
+        self._file = None
+        self._offsets = array('Q')
+        self._written = 0
+        self._map = None
+        self._mapped = 0
+
+    def __len__(self) -> int:
+        return len(self._memory) + len(self._offsets)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @property
+    def spilled(self) -> bool:
+        return len(self._offsets) > 0
+
+    @property
+    def column_names(self) -> List[str]:
+        return [d[0] for d in self.description or ()]
+
+    def extend(self, rows: Sequence[Sequence]):
+        """Dodaje paket redova (u memoriju dok ima mesta, zatim na disk)"""
+        if not rows:
+            return
+        if self.width is None:
+            self.width = len(rows[0])
+        if not self._offsets and self._memory_size < self.memory_bytes:
+            self._memory.extend(tuple(row) for row in rows)
+            self._memory_size += estimate_bytes(rows)
+            return
+        if self._file is None:
+            self._file = tempfile.TemporaryFile(prefix='blbs_result_', dir=self.directory)
+        out = bytearray()
+        position = self._written
+        for row in rows:
+            self._offsets.append(position + len(out))
+            encode_row(row, out)
+        self._file.write(out)
+        self._written += len(out)
+
+    def __getitem__(self, index: int) -> tuple:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("indeks reda van opsega")
+        if index < len(self._memory):
+            return self._memory[index]
+        return decode_row(self._data(), self._offsets[index - len(self._memory)], self.width)[0]
+
+    def __iter__(self) -> Iterator[tuple]:
+        return self.iter_rows()
+
+    def iter_rows(self, start: int = 0) -> Iterator[tuple]:
+        """Redovi od `start` do kraja; disk se čita sekvencijalno, bez indeksa pozicija"""
+        in_memory = len(self._memory)
+        for index in range(start, in_memory):
+            yield self._memory[index]
+        count = len(self._offsets)
+        first = max(0, start - in_memory)
+        if first >= count:
+            return
+        data, offset, width = self._data(), self._offsets[first], self.width
+        for _ in range(count - first):
+            row, offset = decode_row(data, offset, width)
+            yield row
+
+    def iter_batches(self, batch_size: int = 1000) -> Iterator[List[tuple]]:
+        """Redovi u paketima (isti oblik kao BLBSConnector.iter_query)"""
+        batch = []
+        for row in self.iter_rows():
+            batch.append(row)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def summary(self) -> Dict[str, Dict[str, object]]:
+        """Statistika po koloni u jednom prolazu: broj NULL-ova, min/max/prosek ili broj različitih vrednosti"""
+        names = self.column_names or [f"col{i + 1}" for i in range(self.width or 0)]
+        nulls = [0] * len(names)
+        minimum: List[object] = [None] * len(names)
+        maximum: List[object] = [None] * len(names)
+        totals: List[object] = [0] * len(names)
+        counts = [0] * len(names)
+        kinds: List[Optional[str]] = [None] * len(names)
+        distinct = [set() for _ in names]
+        comparable = [True] * len(names)
+
+        for row in self.iter_rows():
+            for i, value in enumerate(row):
+                if value is None:
+                    nulls[i] += 1
+                    continue
+                counts[i] += 1
+                if kinds[i] is None:
+                    kinds[i] = type(value).__name__
+                    # Min/max binarnih vrednosti nema smisla
+                    comparable[i] = not isinstance(value, (bytes, bytearray))
+                if totals[i] is not None:
+                    try:
+                        totals[i] += value
+                    except TypeError:
+                        totals[i] = None
+                if isinstance(value, str) and len(distinct[i]) < MAX_DISTINCT:
+                    distinct[i].add(value)
+                if comparable[i]:
+                    try:
+                        if minimum[i] is None or value < minimum[i]:
+                            minimum[i] = value
+                        if maximum[i] is None or value > maximum[i]:
+                            maximum[i] = value
+                    except TypeError:
+                        comparable[i] = False
+
+        summary = {}
+        for i, name in enumerate(names):
+            info: Dict[str, object] = {'type': kinds[i], 'nulls': nulls[i]}
+            if counts[i] and comparable[i]:
+                info.update(min=minimum[i], max=maximum[i])
+            if counts[i] and totals[i] is not None:
+                info['avg'] = totals[i] / counts[i]
+            if distinct[i]:
+                info['distinct'] = len(distinct[i]) if len(distinct[i]) < MAX_DISTINCT else f">={MAX_DISTINCT}"
+            summary[name] = info
+        return summary
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'rows': len(self),
+            'memory_rows': len(self._memory),
+            'disk_rows': len(self._offsets),
+            'disk_bytes': self._written,
+        }
+
+    def close(self):
+        """Oslobađa memoriju i briše privremeni fajl"""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._memory = []
+        self._offsets = array('Q')
+        self._written = self._mapped = 0
+
+    def _data(self):
+        """mmap koji pokriva sve upisano (ponovo se mapira ako je fajl u međuvremenu porastao)"""
+        if self._file is None:
+            raise ValueError("bafer je zatvoren")
+        if self._mapped != self._written:
+            self._file.flush()
+            # Stari mmap se ne zatvara - generator koji ga koristi završava nad njim
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._mapped = self._written
+        return self._map
+
+
+def buffer_query(connector, query: str, params=None, memory_bytes: int = DEFAULT_MEMORY_BYTES,
+                 batch_size: int = 1000, directory: Optional[str] = None) -> Optional[ResultBuffer]:
+    """Strimuje ceo rezultat upita (iter_query) u ResultBuffer, vraća None pri grešci"""
+    valid, reason = sql_normalizer.validate_select(query)
+    if not valid:
+        print(f"Greška: baferovanje je dozvoljeno samo za SELECT upite - {reason}")
+        return None
+    buffer = ResultBuffer(memory_bytes=memory_bytes, directory=directory)
+    try:
+        for rows in connector.iter_query(query, params, batch_size):
+            buffer.extend(rows)
+        buffer.description = connector.description
+        return buffer
+    except Exception as e:
+        buffer.close()
+        print(f"Greška pri baferovanju rezultata: {e}")
+        return None
+
+
+class BufferRegistry:
+    """Profilisani rezultati koji čekaju izvoz: id -> (ResultBuffer, upit, vreme)
+
+    Izvoz preuzima bafer sa `take` (samo za isti upit) i zatvara ga kada
+    završi, pa se upit ne izvršava ponovo. Bafer koji niko ne preuzme
+    zatvara se posle `BUFFER_TTL` sekundi ili kada ih ima više od `MAX_BUFFERS`.
+    """
+
+    def __init__(self, ttl: float = BUFFER_TTL, max_buffers: int = MAX_BUFFERS,
+                 clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.max_buffers = max_buffers
+        self._clock = clock
+        self._buffers: Dict[str, Tuple[ResultBuffer, str, float]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._buffers)
+
+    def add(self, buffer: ResultBuffer, query: str) -> str:
+        """Čuva bafer za kasniji izvoz i vraća njegov identifikator"""
+        buffer_id = uuid.uuid4().hex
+        with self._lock:
+            expired = self._expire(reserve=1)
+            self._buffers[buffer_id] = (buffer, sql_normalizer.canonical_sql(query), self._clock())
+        for old in expired:
+            old.close()
+        return buffer_id
+
+    def take(self, buffer_id: Optional[str], query: str) -> Optional[ResultBuffer]:
+        """Preuzima bafer (pozivalac ga zatvara); None ako ne postoji, istekao je ili je upit drugi"""
+        with self._lock:
+            expired = self._expire()
+            entry = self._buffers.get(buffer_id)
+            if entry is not None and entry[1] == sql_normalizer.canonical_sql(query):
+                del self._buffers[buffer_id]
+            else:
+                entry = None
+        for old in expired:
+            old.close()
+        return entry[0] if entry is not None else None
+
+    def close(self):
+        """Zatvara sve bafere koji čekaju"""
+        with self._lock:
+            buffers, self._buffers = [entry[0] for entry in self._buffers.values()], {}
+        for buffer in buffers:
+            buffer.close()
+
+    def _expire(self, reserve: int = 0) -> List[ResultBuffer]:
+        """Izbacuje istekle i najstarije preko `max_buffers` (poziva se pod lock-om); zatvaranje je van lock-a"""
+        cutoff = self._clock() - self.ttl
+        expired = [buffer_id for buffer_id, (_, _, added) in self._buffers.items() if added < cutoff]
+        buffers = [self._buffers.pop(buffer_id)[0] for buffer_id in expired]
+        # Rečnik čuva redosled dodavanja - prvi su najstariji
+        while self._buffers and len(self._buffers) + reserve > self.max_buffers:
+            buffers.append(self._buffers.pop(next(iter(self._buffers)))[0])
+        return buffers
@@ -0,0 +1,114 @@
+"""
+Keš rezultata SQL upita sa TTL-om i LRU izbacivanjem po veličini
+"""
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+from database.sql_normalizer import canonical_sql
+
+
+def estimate_size(value) -> int:
+    """Gruba procena memorije rezultata (tuple redova) u bajtovima"""
+    if isinstance(value, (tuple, list)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class ResultCache:
+    """Thread-safe keš rezultata upita
+
+    - unos ističe posle `ttl` sekundi
+    - ukupna procenjena veličina je ograničena na `max_bytes` (LRU izbacivanje)
+    - rezultat veći od `max_entry_bytes` se ne kešira
+    """
+
+    def __init__(self, ttl: float = 60.0, max_bytes: int = 32 * 1024 * 1024,
+                 max_entry_bytes: Optional[int] = None):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes if max_entry_bytes is not None else max_bytes // 4
+        self._entries: 'OrderedDict[Hashable, Tuple[object, int, float]]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def make_key(namespace: Hashable, query: str, params=None) -> Hashable:
+        """Ključ keša: baza (namespace) + kanonski SQL + parametri"""
+        if isinstance(params, dict):
+            params = tuple(sorted(params.items()))
+        elif isinstance(params, list):
+            params = tuple(params)
+        return namespace, canonical_sql(query), params
+
+    def get(self, key: Hashable):
+        """Vraća keširan rezultat ili None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, size, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value, size: Optional[int] = None):
+        """Čuva rezultat u kešu (izbacuje najstarije unose po potrebi)"""
+        size = estimate_size(value) if size is None else size
+        if size > self.max_entry_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, time.monotonic() + self.ttl)
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], object],
+                    cacheable: Optional[Callable[[object], bool]] = None):
+        """Vraća keširan rezultat ili ga učitava; None (i nekeširljivi, npr. skraćeni) rezultati se ne keširaju"""
+        value = self.get(key)
+        if value is None:
+            value = loader()
+            if value is not None and (cacheable is None or cacheable(value)):
+                self.put(key, value)
+        return value
+
+    def clear(self):
+        """Briše ceo keš"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, float]:
+        """Brojači pogodaka/promašaja i zauzeće"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+    def _remove(self, key: Hashable):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
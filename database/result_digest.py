@@ -0,0 +1,92 @@
+"""
+Otisak sadržaja rezultata upita i čuvanje AI izveštaja dok se podaci ne promene
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+from database.sql_normalizer import canonical_sql
+
+
+class ResultDigest:
+    """Inkrementalni BLAKE2b otisak redova koje konektor vraća
+
+    Svaki red se hešira posebno (tip i repr vrednosti), pa otisak ne zavisi
+    od veličine paketa u kojima su redovi stigli - isti podaci daju isti
+    otisak bilo da su pročitani iz keša, baferovano ili strimovanjem.
+    """
+
+    def __init__(self):
+        self._hash = hashlib.blake2b(digest_size=16)
+        self.rows = 0
+
+    def update(self, rows: Iterable) -> 'ResultDigest':
+        """Dodaje redove (tuple vrednosti) u otisak"""
+        update = self._hash.update
+        count = 0
+        for row in rows:
+            update(repr(tuple((type(v).__name__, v) for v in row)).encode('utf-8', 'surrogatepass'))
+            update(b'\n')
+            count += 1
+        self.rows += count
+        return self
+
+    def mark(self, label: str) -> 'ResultDigest':
+        """Razdvaja skupove rezultata (npr. uzorak i COUNT) u otisku"""
+        self._hash.update(b'\x00' + label.encode('utf-8') + b'\x00')
+        return self
+
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
+
+
+class ReportMemo:
+    """Poslednji AI izveštaj po (upit, tip izveštaja) uz otisak podataka iz kojih je nastao
+
+    `lookup` vraća sačuvan izveštaj samo ako se otisak poklapa; izmenjeni
+    podaci znače novo generisanje. Broj unosa je ograničen (LRU izbacivanje).
+    """
+
+    def __init__(self, max_entries: int = 500):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[Tuple[str, str], Dict]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(query: str, report_type: str) -> Tuple[str, str]:
+        return canonical_sql(query), report_type
+
+    def lookup(self, query: str, report_type: str, content_hash: str) -> Optional[Dict]:
+        """Sačuvan izveštaj za iste podatke ili None"""
+        key = self.make_key(query, report_type)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry['hash'] != content_hash:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            entry['hits'] += 1
+            self.hits += 1
+            return dict(entry)
+
+    def store(self, query: str, report_type: str, content_hash: str, report: str):
+        """Pamti izveštaj generisan nad podacima sa datim otiskom"""
+        key = self.make_key(query, report_type)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = {'hash': content_hash, 'report': report,
+                                  'generated_at': time.time(), 'hits': 0}
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
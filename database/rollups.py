@@ -0,0 +1,592 @@
+"""
+Materijalizovani sažeci (rollup tabele) - inkrementalno osvežavanje i prepisivanje upita izveštaja
+"""
+import datetime
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from database.aggregation_planner import quote_identifier
+from database.local_sync import LocalConnector, source_name, to_local_value
+from database.sql_normalizer import canonical_sql
+
+
+DEFAULT_ROLLUP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                   'config', 'blbs_rollups.sqlite3')
+
+STATE_TABLE = 'blbs_rollup_state'
+
+# Verzija formata sažetaka (PRAGMA user_version); starija verzija se puni ispočetka
+# 2: redovi bez vremena (NULL) se sabiraju u NULL korpu
+ROLLUP_FORMAT = 2
+
+# Granulacija -> (MySQL DATE_FORMAT format, dužina oznake korpe); redom od najfinije
+GRANULARITIES = {
+    'hour': ('%Y-%m-%d %H:00:00', 19),
+    'day': ('%Y-%m-%d', 10),
+    'month': ('%Y-%m', 7),
+}
+_GRANULARITY_ORDER = list(GRANULARITIES)
+
+# Broj ključeva izvorne tabele koji se sabira jednim upitom pri osvežavanju
+DEFAULT_REFRESH_STEP = 1_000_000
+
+_QUERY_RE = re.compile(
+    r"^select (?P<select>.+?) from (?P<table>`[^`]+`|\w+)"
+    r"(?: where (?P<where>.+?))?"
+    r"(?: group by (?P<group>.+?))?"
+    r"(?: order by (?P<order>.+?))?"
+    r"(?: limit (?P<limit>\d+))?$", re.I | re.S)
+_ALIAS_RE = re.compile(r"^(?P<expr>.+?) as (?P<alias>`[^`]+`|\w+)$", re.I | re.S)
+_CONDITION_RE = re.compile(r"^(?P<column>`[^`]+`|\w+) ?(?P<op>>=|<=|<>|!=|=|<|>| in ) ?(?P<value>.+)$", re.I | re.S)
+_LITERAL_RE = re.compile(r"^(?:'[^'\\]*'|-?\d+(?:\.\d+)?)$")
+_IN_LIST_RE = re.compile(r"^\((?:'[^'\\]*'|-?\d+(?:\.\d+)?)(?: ?, ?(?:'[^'\\]*'|-?\d+(?:\.\d+)?))*\)$")
+_IN_ITEM_RE = re.compile(r"'[^'\\]*'|-?\d+(?:\.\d+)?")
+_FUNCTION_RE = re.compile(r"^(?P<name>\w+) ?\((?P<args>.*)\)$", re.S)
+
+
+def _quote_local(name: str) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _unquote(name: str) -> str:
+    name = name.strip()
+    return name[1:-1].replace('``', '`') if name.startswith('`') else name
+
+
+def _split_top_level(text: str, separator: str = ',') -> List[str]:
+    """Deli tekst po separatoru van zagrada i navodnika"""
+    parts, depth, quote, start = [], 0, None, 0
+    lowered = text.lower()
+    i = 0
+    while i < len(text):
+        ch = text[i]
+        if quote:
+            if ch == quote:
+                quote = None
+        elif ch in ("'", '`', '"'):
+            quote = ch
+        elif ch == '(':
+            depth += 1
+        elif ch == ')':
+            depth -= 1
+        elif depth == 0 and lowered.startswith(separator, i):
+            parts.append(text[start:i].strip())
+            i += len(separator)
+            start = i
+            continue
+        i += 1
+    parts.append(text[start:].strip())
+    return parts
+
+
+class RollupDefinition:
+    """Rollup jedne tabele: broj redova po (vremenska korpa, dimenzije) i SUM/MIN/MAX/COUNT mera
+
+    Osvežava se po rastućem ključu (auto-increment `key_column`), pa prati samo
+    nove redove: rollup je namenjen tabelama u koje se samo upisuje (karte,
+    validacije). Izmene i brisanja starih redova se ne vide dok se ne pozove
+    `rebuild`. Redovi bez vremena (NULL) idu u NULL korpu, kao u MySQL-ovom
+    GROUP BY. Osvežavanje iz druge baze (promenjena MySQL konfiguracija) briše
+    sažetke i kreće od početka.
+    """
+
+    def __init__(self, name: str, table: str, time_column: str, granularity: str = 'day',
+                 dimensions: Sequence[str] = (), measures: Sequence[str] = (), key_column: str = 'id'):
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Nepoznata granulacija: {granularity} (dozvoljeno: {', '.join(GRANULARITIES)})")
+        if not re.match(r'^\w+$', name):
+            raise ValueError(f"Neispravno ime rollup-a: {name}")
+        self.name = name
+        self.table = table
+        self.time_column = time_column
+        self.granularity = granularity
+        self.dimensions = list(dimensions)
+        self.measures = list(measures)
+        self.key_column = key_column
+
+    @property
+    def local_table(self) -> str:
+        return f"rollup_{self.name}"
+
+    def to_dict(self) -> Dict:
+        return {'name': self.name, 'table': self.table, 'time_column': self.time_column,
+                'granularity': self.granularity, 'dimensions': self.dimensions,
+                'measures': self.measures, 'key_column': self.key_column}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'RollupDefinition':
+        return cls(**data)
+
+    def refresh_query(self) -> str:
+        """MySQL upit koji sabira redove iz opsega ključeva (key > %s AND key <= %s)"""
+        bucket_format = GRANULARITIES[self.granularity][0].replace('%', '%%')
+        q_time, q_key = quote_identifier(self.time_column), quote_identifier(self.key_column)
+        # NULL vreme daje NULL korpu - upiti bez vremenskog filtera moraju da vide i te redove
+        parts = [f"DATE_FORMAT({q_time}, '{bucket_format}') AS bucket"]
+        parts.extend(quote_identifier(d) for d in self.dimensions)
+        parts.append("COUNT(*)")
+        for measure in self.measures:
+            column = quote_identifier(measure)
+            parts.extend([f"SUM({column})", f"MIN({column})", f"MAX({column})", f"COUNT({column})"])
+        group = ", ".join(["bucket"] + [quote_identifier(d) for d in self.dimensions])
+        select_list = ",\n       ".join(parts)
+        return (f"SELECT {select_list}\nFROM {quote_identifier(self.table)}\n"
+                f"WHERE {q_key} > %s AND {q_key} <= %s\n"
+                f"GROUP BY {group}")
+
+    def local_columns(self) -> List[str]:
+        columns = ['bucket'] + self.dimensions + ['cnt']
+        for measure in self.measures:
+            columns.extend([f"sum_{measure}", f"min_{measure}", f"max_{measure}", f"nn_{measure}"])
+        return columns
+
+
+class RollupStore:
+    """Lokalna SQLite baza sa rollup tabelama i oznakom (watermark) osvežavanja za svaki rollup
+
+    `rewrite` prepoznaje agregatne upite nad izvornom tabelom (COUNT/SUM/MIN/MAX/AVG
+    grupisano po DATE(...)/DATE_FORMAT(...)/HOUR(...) i dimenzijama, uz filtere
+    `dimenzija = literal` i `vreme >= / < granica korpe`) i prepisuje ih u upit nad
+    rollup tabelom, pa trajanje trend izveštaja ne raste sa istorijom.
+
+    Samo za tabele u koje se samo upisuje: `rewrite_fresh` sabira redove iza
+    oznake, pa UPDATE/DELETE već sabranih redova daje zastarele agregate do
+    sledećeg `rebuild`.
+    """
+
+    def __init__(self, path: str = DEFAULT_ROLLUP_PATH):
+        self.path = path
+        self._refresh_lock = threading.Lock()
+        self._initialized = False
+
+    @contextmanager
+    def _open(self) -> Iterator[sqlite3.Connection]:
+        """SQLite konekcija u transakciji (commit na kraju bloka, zatim zatvaranje)"""
+        db = sqlite3.connect(self.path, timeout=30)
+        try:
+            with db:
+                if not self._initialized:
+                    db.execute(f"""CREATE TABLE IF NOT EXISTS {STATE_TABLE} (
+                        name TEXT PRIMARY KEY,
+                        definition TEXT NOT NULL,
+                        watermark,
+                        rows_folded INTEGER NOT NULL DEFAULT 0,
+                        refreshed_at REAL,
+                        source TEXT,
+                        dimension_kinds TEXT
+                    )""")
+                    # Baza napravljena pre praćenja izvora i tipova dimenzija
+                    existing = [row[1] for row in db.execute(f"PRAGMA table_info({STATE_TABLE})")]
+                    for column in ('source', 'dimension_kinds'):
+                        if column not in existing:
+                            db.execute(f"ALTER TABLE {STATE_TABLE} ADD COLUMN {column} TEXT")
+                    if db.execute("PRAGMA user_version").fetchone()[0] < ROLLUP_FORMAT:
+                        # Sažeci starijeg formata nemaju NULL korpu - pune se ponovo
+                        for (name,) in db.execute(f"SELECT name FROM {STATE_TABLE}").fetchall():
+                            db.execute(f"DELETE FROM {_quote_local('rollup_' + name)}")
+                        db.execute(f"UPDATE {STATE_TABLE} SET watermark = NULL, rows_folded = 0, "
+                                   f"dimension_kinds = NULL")
+                        db.execute(f"PRAGMA user_version = {ROLLUP_FORMAT}")
+                    self._initialized = True
+                yield db
+        finally:
+            db.close()
+
+    def define(self, definition: RollupDefinition):
+        """Dodaje rollup (izmenjena definicija briše stare sažetke i kreće od početka)"""
+        with self._open() as db:
+            row = db.execute(f"SELECT definition FROM {STATE_TABLE} WHERE name = ?", (definition.name,)).fetchone()
+            if row is not None and json.loads(row[0]) == definition.to_dict():
+                return
+            db.execute(f"DROP TABLE IF EXISTS {_quote_local(definition.local_table)}")
+            columns = ", ".join(_quote_local(c) for c in definition.local_columns())
+            db.execute(f"CREATE TABLE {_quote_local(definition.local_table)} ({columns})")
+            keys = ", ".join(_quote_local(c) for c in ['bucket'] + definition.dimensions)
+            db.execute(f"CREATE INDEX {_quote_local(definition.local_table + '_key')} "
+                       f"ON {_quote_local(definition.local_table)} ({keys})")
+            db.execute(f"INSERT OR REPLACE INTO {STATE_TABLE} (name, definition) VALUES (?, ?)",
+                       (definition.name, json.dumps(definition.to_dict())))
+
+    def drop(self, name: str):
+        """Uklanja rollup i njegove sažetke"""
+        with self._open() as db:
+            db.execute(f"DELETE FROM {STATE_TABLE} WHERE name = ?", (name,))
+            db.execute(f"DROP TABLE IF EXISTS {_quote_local('rollup_' + name)}")
+
+    def definitions(self) -> List[RollupDefinition]:
+        with self._open() as db:
+            return [RollupDefinition.from_dict(json.loads(row[0]))
+                    for row in db.execute(f"SELECT definition FROM {STATE_TABLE} ORDER BY name")]
+
+    def status(self) -> List[Dict]:
+        """Definicija, izvorna baza, oznaka i broj redova sažetka za svaki rollup"""
+        result = []
+        with self._open() as db:
+            for name, definition, watermark, folded, refreshed_at, source in db.execute(
+                    f"SELECT name, definition, watermark, rows_folded, refreshed_at, source "
+                    f"FROM {STATE_TABLE} ORDER BY name"):
+                rows = db.execute(f"SELECT COUNT(*) FROM {_quote_local('rollup_' + name)}").fetchone()[0]
+                result.append({'name': name, 'definition': json.loads(definition), 'source': source,
+                               'watermark': watermark, 'rows_folded': folded, 'summary_rows': rows,
+                               'refreshed_at': refreshed_at})
+        return result
+
+    def refresh(self, connector, name: str, step: int = DEFAULT_REFRESH_STEP) -> Optional[int]:
+        """Sabira nove redove izvorne tabele (iza oznake) u rollup, vraća broj novih redova ili None"""
+        with self._refresh_lock:
+            definition = next((d for d in self.definitions() if d.name == name), None)
+            if definition is None:
+                print(f"Rollup {name} nije definisan")
+                return None
+            try:
+                return self._refresh(connector, definition, step)
+            except Exception as e:
+                print(f"Greška pri osvežavanju rollup-a {name}: {e}")
+                return None
+
+    def refresh_all(self, connector, step: int = DEFAULT_REFRESH_STEP) -> Dict[str, Optional[int]]:
+        return {definition.name: self.refresh(connector, definition.name, step) for definition in self.definitions()}
+
+    def rebuild(self, connector, name: str) -> Optional[int]:
+        """Ponovo računa rollup od početka (posle izmena ili brisanja starih redova)"""
+        with self._open() as db:
+            db.execute(f"DELETE FROM {_quote_local('rollup_' + name)}")
+            db.execute(f"UPDATE {STATE_TABLE} SET watermark = NULL, rows_folded = 0, dimension_kinds = NULL "
+                       f"WHERE name = ?", (name,))
+        return self.refresh(connector, name)
+
+    def connector(self) -> LocalConnector:
+        """Konektor nad rollup bazom - za izvršavanje prepisanih upita"""
+        return LocalConnector(self.path)
+
+    def _refresh(self, connector, definition: RollupDefinition, step: int) -> int:
+        q_key = quote_identifier(definition.key_column)
+        current = source_name(connector.config)
+        with self._open() as db:
+            watermark, source = db.execute(f"SELECT watermark, source FROM {STATE_TABLE} WHERE name = ?",
+                                           (definition.name,)).fetchone()
+            if source != current:
+                # Sažeci i oznaka druge baze (ili nepoznatog izvora) ne smeju da se mešaju sa ovom
+                if source is not None or watermark is not None:
+                    print(f"Rollup {definition.name}: izvor je promenjen ({source} -> {current}), "
+                          f"sažetak se računa ispočetka")
+                db.execute(f"DELETE FROM {_quote_local(definition.local_table)}")
+                db.execute(f"UPDATE {STATE_TABLE} SET watermark = NULL, rows_folded = 0, dimension_kinds = NULL, "
+                           f"source = ? WHERE name = ?", (current, definition.name))
+                watermark = None
+            bounds = connector.execute(
+                f"SELECT MIN({q_key}), MAX({q_key}) FROM {quote_identifier(definition.table)}"
+                + (f" WHERE {q_key} > %s" if watermark is not None else ""),
+                (watermark,) if watermark is not None else None, use_cache=False)
+            if bounds is None:
+                raise ConnectionError("upit ka MySQL bazi nije uspeo")
+            low, high = bounds[0]
+            if high is None:
+                db.execute(f"UPDATE {STATE_TABLE} SET refreshed_at = ? WHERE name = ?", (time.time(), definition.name))
+                return 0
+
+            low, high = int(low) - 1, int(high)
+            query = definition.refresh_query()
+            total = 0
+            while low < high:
+                upper = min(low + step, high)
+                rows = connector.execute(query, (low, upper), use_cache=False)
+                if rows is None:
+                    raise ConnectionError("upit ka MySQL bazi nije uspeo")
+                folded = self._fold(db, definition, rows)
+                total += folded
+                # Oznaka se pomera u istoj transakciji sa sažecima
+                db.execute(f"UPDATE {STATE_TABLE} SET watermark = ?, rows_folded = rows_folded + ? WHERE name = ?",
+                           (upper, folded, definition.name))
+                db.commit()
+                low = upper
+            db.execute(f"UPDATE {STATE_TABLE} SET refreshed_at = ? WHERE name = ?", (time.time(), definition.name))
+        return total
+
+    @staticmethod
+    def _fold(db: sqlite3.Connection, definition: RollupDefinition, rows) -> int:
+        """Dodaje delimične sažetke postojećim redovima rollup-a (ili ih upisuje kao nove)"""
+        table = _quote_local(definition.local_table)
+        keys = ['bucket'] + definition.dimensions
+        where = " AND ".join(f"{_quote_local(k)} IS ?" for k in keys)
+        updates = ["cnt = cnt + ?"]
+        for measure in definition.measures:
+            s, lo, hi, nn = (_quote_local(f"{p}_{measure}") for p in ('sum', 'min', 'max', 'nn'))
+            updates.extend([f"{s} = COALESCE({s} + ?, {s}, ?)",
+                            f"{lo} = MIN(COALESCE({lo}, ?), COALESCE(?, {lo}))",
+                            f"{hi} = MAX(COALESCE({hi}, ?), COALESCE(?, {hi}))",
+                            f"{nn} = {nn} + ?"])
+        update_sql = f"UPDATE {table} SET {', '.join(updates)} WHERE {where}"
+        columns = definition.local_columns()
+        insert_sql = (f"INSERT INTO {table} ({', '.join(_quote_local(c) for c in columns)}) "
+                      f"VALUES ({', '.join('?' * len(columns))})")
+
+        state = db.execute(f"SELECT dimension_kinds FROM {STATE_TABLE} WHERE name = ?",
+                           (definition.name,)).fetchone()[0]
+        kinds = {d: set(k) for d, k in json.loads(state or '{}').items()}
+        folded = 0
+        for row in rows:
+            row = [to_local_value(v) for v in row]
+            key_values, count = row[:len(keys)], int(row[len(keys)])
+            for dimension, value in zip(definition.dimensions, key_values[1:]):
+                if value is not None:
+                    kinds.setdefault(dimension, set()).add(_value_kind(value))
+            params = [count]
+            measures = row[len(keys) + 1:]
+            for i in range(0, len(measures), 4):
+                total, low, high, non_null = measures[i:i + 4]
+                params.extend([total, total, low, low, high, high, int(non_null)])
+            if db.execute(update_sql, params + key_values).rowcount == 0:
+                db.execute(insert_sql, row)
+            folded += count
+        db.execute(f"UPDATE {STATE_TABLE} SET dimension_kinds = ? WHERE name = ?",
+                   (json.dumps({d: sorted(k) for d, k in kinds.items()}), definition.name))
+        return folded
+
+    def dimension_kinds(self) -> Dict[str, Dict[str, set]]:
+        """Vrste sačuvanih vrednosti dimenzija po rollup-u ('number', 'ascii', 'text')"""
+        with self._open() as db:
+            return {name: {d: set(k) for d, k in json.loads(kinds or '{}').items()}
+                    for name, kinds in db.execute(f"SELECT name, dimension_kinds FROM {STATE_TABLE}")}
+
+    # --- Prepisivanje upita ---
+
+    def rewrite(self, query: str, name: Optional[str] = None) -> Optional[Tuple[RollupDefinition, str]]:
+        """Vraća (rollup, SQLite upit nad rollup tabelom) ako upit može da se odgovori iz sažetka"""
+        if not os.path.exists(self.path):
+            return None
+        parsed = _parse_aggregate_query(query)
+        if parsed is None:
+            return None
+        kinds = self.dimension_kinds()
+        # Najgrublji odgovarajući rollup ima najmanje redova
+        candidates = sorted((d for d in self.definitions() if name is None or d.name == name),
+                            key=lambda d: (-_GRANULARITY_ORDER.index(d.granularity), len(d.dimensions)))
+        for definition in candidates:
+            sql = _rewrite_for(definition, parsed, kinds.get(definition.name, {}))
+            if sql is not None:
+                return definition, sql
+        return None
+
+    def rewrite_fresh(self, connector, query: str) -> Optional[Tuple[RollupDefinition, str]]:
+        """Kao `rewrite`, ali rollup se prvo inkrementalno osveži; bez prepisivanja ako osvežavanje ne uspe
+
+        Osvežavanje prati samo nove ključeve - izmenjeni ili obrisani stari
+        redovi ostaju u sažetku do `rebuild` (rollup je samo za append-only tabele).
+        """
+        rewritten = self.rewrite(query)
+        if rewritten is None or self.refresh(connector, rewritten[0].name) is None:
+            return None
+        # Nove vrednosti dimenzija mogu biti druge vrste - filteri se proveravaju ponovo
+        return self.rewrite(query, rewritten[0].name)
+
+
+def _parse_aggregate_query(query: str) -> Optional[Dict]:
+    """Raščlanjuje jednostavan agregatni SELECT (jedna tabela, bez podupita i OR uslova)"""
+    text = canonical_sql(query)
+    match = _QUERY_RE.match(text)
+    if match is None or re.search(r"\b(select|join|union|having|or|distinct)\b", match.group('select') + ' '
+                                  + (match.group('where') or '') + ' ' + (match.group('group') or ''), re.I):
+        return None
+
+    items = []
+    for raw in _split_top_level(match.group('select')):
+        alias_match = _ALIAS_RE.match(raw)
+        expr, alias = (alias_match.group('expr'), _unquote(alias_match.group('alias'))) if alias_match else (raw, None)
+        item = _classify(expr)
+        if item is None:
+            return None
+        item['name'] = alias or expr
+        items.append(item)
+
+    def resolve(reference: str) -> Optional[int]:
+        reference = reference.strip()
+        if reference.isdigit():
+            index = int(reference) - 1
+            return index if 0 <= index < len(items) else None
+        for index, item in enumerate(items):
+            if _unquote(reference) == item['name'] or _normalize(reference) == item['expr']:
+                return index
+        return None
+
+    group = []
+    for reference in _split_top_level(match.group('group')) if match.group('group') else []:
+        index = resolve(reference)
+        if index is None or items[index]['kind'] == 'aggregate':
+            return None
+        group.append(index)
+    if sorted(group) != [i for i, item in enumerate(items) if item['kind'] != 'aggregate']:
+        return None
+
+    order = []
+    for reference in _split_top_level(match.group('order')) if match.group('order') else []:
+        direction = ''
+        parts = reference.rsplit(' ', 1)
+        if len(parts) == 2 and parts[1].lower() in ('asc', 'desc'):
+            reference, direction = parts[0], ' ' + parts[1].upper()
+        index = resolve(reference)
+        if index is None:
+            return None
+        order.append(f"{index + 1}{direction}")
+
+    conditions = []
+    for condition in _split_top_level(match.group('where'), ' and ') if match.group('where') else []:
+        condition_match = _CONDITION_RE.match(condition)
+        if condition_match is None:
+            return None
+        value = condition_match.group('value').strip()
+        op = condition_match.group('op').strip().lower()
+        if not (_IN_LIST_RE.match(value) if op == 'in' else _LITERAL_RE.match(value)):
+            return None
+        conditions.append((_unquote(condition_match.group('column')), op, value))
+
+    return {'table': _unquote(match.group('table')), 'items': items, 'conditions': conditions,
+            'order': order, 'limit': match.group('limit')}
+
+
+def _normalize(expr: str) -> str:
+    return re.sub(r"\s+", "", expr).replace('`', '').lower()
+
+
+def _classify(expr: str) -> Optional[Dict]:
+    """Vrsta izraza iz SELECT liste: vremenska korpa, dimenzija ili agregat"""
+    normalized = _normalize(expr)
+    function = _FUNCTION_RE.match(expr.strip())
+    if function is None:
+        if re.match(r"^(`[^`]+`|\w+)$", expr.strip()):
+            return {'kind': 'dimension', 'column': _unquote(expr), 'expr': normalized}
+        return None
+
+    name, args = function.group('name').lower(), [a.strip() for a in _split_top_level(function.group('args'))]
+    if name in ('count', 'sum', 'min', 'max', 'avg') and len(args) == 1:
+        if args[0] == '*':
+            return {'kind': 'aggregate', 'function': 'count', 'column': None, 'expr': normalized} \
+                if name == 'count' else None
+        if re.match(r"^(`[^`]+`|\w+)$", args[0]):
+            return {'kind': 'aggregate', 'function': name, 'column': _unquote(args[0]), 'expr': normalized}
+        return None
+    if name == 'date' and len(args) == 1:
+        return {'kind': 'bucket', 'granularity': 'day', 'column': _unquote(args[0]), 'expr': normalized}
+    if name == 'hour' and len(args) == 1:
+        return {'kind': 'bucket', 'granularity': 'hour_of_day', 'column': _unquote(args[0]), 'expr': normalized}
+    if name == 'date_format' and len(args) == 2:
+        for granularity, (bucket_format, _) in GRANULARITIES.items():
+            if args[1] == f"'{bucket_format}'":
+                return {'kind': 'bucket', 'granularity': granularity, 'column': _unquote(args[0]),
+                        'expr': normalized}
+    return None
+
+
+def _bucket_boundary(literal: str, granularity: str) -> Optional[str]:
+    """Oznaka korpe za vremensku granicu, ili None ako granica ne pada na početak korpe"""
+    if not literal.startswith("'"):
+        return None
+    try:
+        moment = datetime.datetime.fromisoformat(literal.strip("'"))
+    except ValueError:
+        return None
+    if moment.minute or moment.second or moment.microsecond:
+        return None
+    if granularity in ('day', 'month') and moment.hour:
+        return None
+    if granularity == 'month' and moment.day != 1:
+        return None
+    return moment.strftime(GRANULARITIES[granularity][0])
+
+
+def _value_kind(value) -> str:
+    """Vrsta vrednosti dimenzije: broj, ASCII tekst bez završnih razmaka ili ostali tekst"""
+    if isinstance(value, (int, float)):
+        return 'number'
+    if isinstance(value, str) and value.isascii() and not value.endswith(' '):
+        return 'ascii'
+    return 'text'
+
+
+def _dimension_filter(column: str, op: str, value: str, kinds: set) -> Optional[str]:
+    """Uslov nad dimenzijom u SQLite-u koji daje isto što i MySQL, ili None
+
+    SQLite ne konvertuje tipove pri poređenju netipizovanih kolona i razlikuje
+    velika i mala slova, a MySQL poredi '5' sa brojem 5 i (podrazumevana _ci
+    kolacija) 'bg' sa 'BG'. Zato broj sme samo na dimenziju sa brojevima, a
+    tekst samo na dimenziju sa ASCII tekstom, uz COLLATE NOCASE.
+    """
+    literals = _IN_ITEM_RE.findall(value) if op == 'in' else [value]
+    quoted = [literal.startswith("'") for literal in literals]
+    if not any(quoted):
+        return f"{_quote_local(column)} {op.upper()} {value}" if kinds <= {'number'} else None
+    if all(quoted) and kinds <= {'ascii'} and all(_value_kind(literal[1:-1]) == 'ascii' for literal in literals):
+        return f"{_quote_local(column)} COLLATE NOCASE {op.upper()} {value}"
+    return None
+
+
+def _rewrite_for(definition: RollupDefinition, parsed: Dict, kinds: Optional[Dict[str, set]] = None) -> Optional[str]:
+    """SQLite upit nad rollup tabelom ili None ako rollup ne može da odgovori na upit"""
+    if parsed['table'] != definition.table:
+        return None
+    rollup_level = _GRANULARITY_ORDER.index(definition.granularity)
+
+    select = []
+    for item in parsed['items']:
+        if item['kind'] == 'dimension':
+            if item['column'] not in definition.dimensions:
+                return None
+            sql = _quote_local(item['column'])
+        elif item['kind'] == 'bucket':
+            if item['column'] != definition.time_column:
+                return None
+            if item['granularity'] == 'hour_of_day':
+                if definition.granularity != 'hour':
+                    return None
+                sql = "CAST(substr(bucket, 12, 2) AS INTEGER)"
+            else:
+                if _GRANULARITY_ORDER.index(item['granularity']) < rollup_level:
+                    return None
+                length = GRANULARITIES[item['granularity']][1]
+                sql = "bucket" if item['granularity'] == definition.granularity else f"substr(bucket, 1, {length})"
+        else:
+            column = item['column']
+            if column is None:
+                sql = "COALESCE(SUM(cnt), 0)"
+            elif column not in definition.measures:
+                return None
+            elif item['function'] == 'count':
+                sql = f"COALESCE(SUM({_quote_local('nn_' + column)}), 0)"
+            elif item['function'] == 'avg':
+                sql = f"SUM({_quote_local('sum_' + column)}) * 1.0 / SUM({_quote_local('nn_' + column)})"
+            else:
+                sql = f"{item['function'].upper()}({_quote_local(item['function'] + '_' + column)})"
+        select.append(f"{sql} AS {_quote_local(item['name'])}")
+
+    where = []
+    for column, op, value in parsed['conditions']:
+        if column in definition.dimensions and op in ('=', '<>', '!=', 'in'):
+            condition = _dimension_filter(column, op, value, (kinds or {}).get(column, set()))
+            if condition is None:
+                return None
+            where.append(condition)
+        elif column == definition.time_column and op in ('>=', '<'):
+            boundary = _bucket_boundary(value, definition.granularity)
+            if boundary is None:
+                return None
+            where.append(f"bucket {op} '{boundary}'")
+        else:
+            return None
+
+    group = [str(i + 1) for i, item in enumerate(parsed['items']) if item['kind'] != 'aggregate']
+    sql = f"SELECT {', '.join(select)}\nFROM {_quote_local(definition.local_table)}"
+    if where:
+        sql += f"\nWHERE {' AND '.join(where)}"
+    if group:
+        sql += f"\nGROUP BY {', '.join(group)}"
+    if parsed['order']:
+        sql += f"\nORDER BY {', '.join(parsed['order'])}"
+    if parsed['limit']:
+        sql += f"\nLIMIT {parsed['limit']}"
+    return sql
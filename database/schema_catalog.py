@@ -0,0 +1,210 @@
+"""
+Katalog šeme BLBS baze - information_schema snimak sačuvan na disku
+"""
+import json
+import os
+import re
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+
+DEFAULT_SNAPSHOT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                     'config', 'blbs_schema.json')
+
+_TABLE_REF_RE = re.compile(r'\b(?:FROM|JOIN)\s+((?:`[^`]+`|\w+)(?:\s*\.\s*(?:`[^`]+`|\w+))?)', re.I)
+
+TABLES_QUERY = """
+SELECT TABLE_NAME, TABLE_TYPE, TABLE_ROWS, CREATE_TIME, UPDATE_TIME
+FROM information_schema.TABLES
+WHERE TABLE_SCHEMA = DATABASE()
+"""
+
+COLUMNS_QUERY = """
+SELECT TABLE_NAME, COLUMN_NAME, COLUMN_TYPE, IS_NULLABLE, COLUMN_KEY
+FROM information_schema.COLUMNS
+WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN ({placeholders})
+ORDER BY TABLE_NAME, ORDINAL_POSITION
+"""
+
+INDEXES_QUERY = """
+SELECT TABLE_NAME, INDEX_NAME, NON_UNIQUE, COLUMN_NAME
+FROM information_schema.STATISTICS
+WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN ({placeholders})
+ORDER BY TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX
+"""
+
+
+def _stamp(value) -> Optional[str]:
+    return value.isoformat() if hasattr(value, 'isoformat') else (str(value) if value is not None else None)
+
+
+class SchemaCatalog:
+    """Snimak šeme (tabele, kolone, tipovi, indeksi, približan broj redova)
+
+    Snimak se čuva u JSON fajlu, pa pokretanje, autocomplete i pravljenje
+    prompta ne idu u bazu. Osvežavanje čita samo information_schema.TABLES
+    i ponovo učitava kolone/indekse isključivo za tabele kojima su se
+    promenili CREATE_TIME, UPDATE_TIME ili TABLE_ROWS.
+    """
+
+    def __init__(self, snapshot_path: str = DEFAULT_SNAPSHOT_PATH):
+        self.snapshot_path = snapshot_path
+        self.tables: Dict[str, Dict] = {}
+        self.database: Optional[str] = None
+        self.refreshed_at = 0.0
+        self._attempted_at = 0.0
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self) -> bool:
+        """Učitava snimak sa diska"""
+        if not os.path.exists(self.snapshot_path):
+            return False
+        try:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+            self.tables = snapshot.get('tables', {})
+            self.database = snapshot.get('database')
+            self.refreshed_at = snapshot.get('refreshed_at', 0.0)
+            return True
+        except Exception as e:
+            print(f"Greška pri učitavanju šeme: {e}")
+            return False
+
+    def save(self) -> bool:
+        """Čuva snimak na disk"""
+        try:
+            snapshot = {'database': self.database, 'refreshed_at': self.refreshed_at, 'tables': self.tables}
+            tmp_path = self.snapshot_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.snapshot_path)
+            return True
+        except Exception as e:
+            print(f"Greška pri čuvanju šeme: {e}")
+            return False
+
+    def refresh(self, connector) -> Optional[List[str]]:
+        """Inkrementalno osvežava snimak, vraća imena ponovo učitanih tabela"""
+        with self._lock:
+            database = connector.config.get('database')
+            if database != self.database:
+                self.tables, self.database = {}, database
+
+            rows = connector.execute(TABLES_QUERY, use_cache=False)
+            if rows is None:
+                return None
+
+            current = {}
+            for name, table_type, table_rows, create_time, update_time in rows:
+                current[name] = {'type': table_type, 'rows': table_rows,
+                                 'created': _stamp(create_time), 'updated': _stamp(update_time)}
+
+            changed = [name for name, info in current.items()
+                       if self._is_changed(self.tables.get(name), info)]
+            for name in set(self.tables) - set(current):
+                del self.tables[name]
+
+            if changed and not self._load_details(connector, changed, current):
+                return None
+
+            for name in changed:
+                self.tables[name] = current[name]
+            self.refreshed_at = time.time()
+            self.save()
+            return changed
+
+    def refresh_if_stale(self, connector, max_age: float = 3600.0) -> bool:
+        """Osvežava snimak samo ako je stariji od `max_age` sekundi ili je za drugu bazu"""
+        same_database = self.database == connector.config.get('database')
+        last = max(self.refreshed_at, self._attempted_at) if same_database else 0.0
+        if time.time() - last < max_age:
+            return False
+        # Neuspeli pokušaj se ne ponavlja pri svakom izveštaju
+        self._attempted_at = time.time()
+        return self.refresh(connector) is not None
+
+    def invalidate(self):
+        """Označava snimak zastarelim (npr. posle promene MySQL konfiguracije)"""
+        self.refreshed_at = 0.0
+        self._attempted_at = 0.0
+
+    def table(self, name: str) -> Optional[Dict]:
+        return self.tables.get(name) or self.tables.get(name.lower())
+
+    def complete(self, prefix: str, limit: int = 20) -> List[str]:
+        """Predlozi za autocomplete: tabele i `tabela.kolona` koji počinju prefiksom"""
+        prefix = prefix.lower()
+        matches = []
+        for name, info in sorted(self.tables.items()):
+            if name.lower().startswith(prefix):
+                matches.append(name)
+            for column in info.get('columns', []):
+                qualified = f"{name}.{column['name']}"
+                if column['name'].lower().startswith(prefix) or qualified.lower().startswith(prefix):
+                    matches.append(qualified)
+            if len(matches) >= limit:
+                break
+        return matches[:limit]
+
+    @staticmethod
+    def tables_in_query(query: str) -> List[str]:
+        """Imena tabela iz FROM/JOIN delova upita"""
+        names = []
+        for reference in _TABLE_REF_RE.findall(query):
+            name = reference.split('.')[-1].strip().strip('`')
+            if name not in names:
+                names.append(name)
+        return names
+
+    def describe_tables(self, names: Iterable[str]) -> str:
+        """Kratak opis tabela za AI prompt (bez upita ka bazi)"""
+        lines = []
+        for name in names:
+            info = self.table(name)
+            if not info:
+                continue
+            columns = ", ".join(
+                f"{c['name']} {c['type']}{' PK' if c.get('key') == 'PRI' else ''}"
+                for c in info.get('columns', []))
+            indexes = ", ".join(
+                f"{i['name']}({', '.join(i['columns'])})" for i in info.get('indexes', []))
+            rows = f"~{info['rows']} redova" if info.get('rows') is not None else info.get('type', '')
+            lines.append(f"- {name} ({rows}): {columns}")
+            if indexes:
+                lines.append(f"  indeksi: {indexes}")
+        return "\n".join(lines)
+
+    def describe_query_tables(self, query: str) -> str:
+        return self.describe_tables(self.tables_in_query(query))
+
+    @staticmethod
+    def _is_changed(previous: Optional[Dict], current: Dict) -> bool:
+        if previous is None or 'columns' not in previous:
+            return True
+        return any(previous.get(key) != current.get(key) for key in ('created', 'updated', 'rows'))
+
+    @staticmethod
+    def _load_details(connector, names: List[str], current: Dict[str, Dict]) -> bool:
+        placeholders = ", ".join(["%s"] * len(names))
+        columns = connector.execute(COLUMNS_QUERY.format(placeholders=placeholders), names, use_cache=False)
+        indexes = connector.execute(INDEXES_QUERY.format(placeholders=placeholders), names, use_cache=False)
+        if columns is None or indexes is None:
+            return False
+
+        for name in names:
+            current[name]['columns'] = []
+            current[name]['indexes'] = []
+        for table, column, column_type, nullable, key in columns:
+            current[table]['columns'].append(
+                {'name': column, 'type': column_type, 'nullable': nullable == 'YES', 'key': key})
+
+        by_index: Dict[tuple, Dict] = {}
+        for table, index, non_unique, column in indexes:
+            entry = by_index.get((table, index))
+            if entry is None:
+                entry = by_index[(table, index)] = {'name': index, 'unique': not int(non_unique), 'columns': []}
+                current[table]['indexes'].append(entry)
+            entry['columns'].append(column)
+        return True
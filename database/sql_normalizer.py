@@ -0,0 +1,229 @@
+"""
+Tokenizacija i normalizacija SQL-a - kanonski oblik, otisak bez literala i provera SELECT upita
+"""
+import functools
+import re
+from typing import List, NamedTuple, Optional, Tuple
+
+
+class Token(NamedTuple):
+    kind: str
+    text: str
+    start: int
+    end: int
+
+
+_TOKEN_RE = re.compile(r"""
+     (?P<space>\s+)
+    |(?P<hint>/\*[+!].*?(?:\*/|\Z))
+    |(?P<comment>/\*.*?(?:\*/|\Z)|\#[^\n]*|--(?=\s|\Z)[^\n]*)
+    |(?P<string>[xXbBnN]?'(?:[^'\\]|\\.|'')*(?:'|\Z)|"(?:[^"\\]|\\.|"")*(?:"|\Z))
+    |(?P<quoted>`(?:[^`]|``)*(?:`|\Z))
+    |(?P<param>%\([^)]*\)s|%s|\?)
+    |(?P<number>(?:0x[0-9a-fA-F]+|0b[01]+|(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][+-]?\d+)?)(?![\w$]))
+    |(?P<variable>@@?(?:[\w$.]+|`(?:[^`]|``)*`|'(?:[^'\\]|\\.)*'))
+    |(?P<word>[\w$]+)
+    |(?P<operator><=>|->>|->|<=|>=|<>|!=|:=|\|\||&&|<<|>>|[-+*/%=<>!~^&|])
+    |(?P<punct>[(),;.])
+    |(?P<other>.)
+""", re.S | re.X)
+
+# Rezervisane reči MySQL-a - samo one se pišu velikim slovima; nerezervisane (MODE, OFFSET, END...)
+# mogu biti ime tabele, a imena tabela na Linux-u razlikuju velika i mala slova
+KEYWORDS = frozenset("""
+    ACCESSIBLE ALL ALTER AND ANALYZE AS ASC BETWEEN BINARY BY CALL CASE CREATE CROSS CUBE CURRENT_DATE
+    CURRENT_TIME CURRENT_TIMESTAMP DELETE DESC DESCRIBE DISTINCT DISTINCTROW DIV DROP DUAL ELSE EXCEPT
+    EXISTS EXPLAIN FALSE FOR FORCE FROM GRANT GROUP HAVING HIGH_PRIORITY IGNORE IN INDEX INNER INSERT
+    INTERSECT INTERVAL INTO IS JOIN KEY KILL LATERAL LEFT LIKE LIMIT LOAD LOCK MOD NATURAL NOT NULL
+    ON OPTIMIZE OR ORDER OUTER OUTFILE OVER PARTITION PROCEDURE RECURSIVE REGEXP RENAME REPLACE
+    RIGHT RLIKE SELECT SET SHOW SQL_BIG_RESULT SQL_CALC_FOUND_ROWS SQL_SMALL_RESULT
+    STRAIGHT_JOIN TABLE THEN TRUE UNION UNLOCK UPDATE USE USING VALUES WHEN WHERE WINDOW WITH XOR
+""".split())
+
+# Funkcije (imena funkcija u MySQL-u ne razlikuju velika i mala slova) - velika slova samo ispred '('
+FUNCTIONS = frozenset("""
+    ABS AVG CAST CEIL CEILING CHAR_LENGTH COALESCE CONCAT CONCAT_WS CONVERT COUNT CURDATE CURTIME DATE
+    DATEDIFF DATE_ADD DATE_FORMAT DATE_SUB DAY DAYOFWEEK DENSE_RANK FIRST_VALUE FLOOR FROM_UNIXTIME
+    GREATEST GROUP_CONCAT HOUR IF IFNULL JSON_EXTRACT LAG LAST_VALUE LEAD LEAST LENGTH LOWER LTRIM MAX
+    MIN MINUTE MONTH NOW NULLIF RANK ROUND ROW_NUMBER RTRIM SECOND SLEEP STR_TO_DATE SUBSTR SUBSTRING SUM
+    TIME TIMESTAMP TIMESTAMPDIFF TRIM UNIX_TIMESTAMP UPPER WEEK YEAR
+""".split()) | {'CHAR', 'LEFT', 'RIGHT', 'REPLACE', 'INSERT', 'MOD'}
+
+_SKIPPED = ('space', 'comment')
+_LITERALS = ('string', 'number', 'param')
+_STATEMENT_KEYWORDS = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE', 'TABLE', 'VALUES')
+# Ključne reči koje su same vrednost - '-' posle njih je operator, a ne predznak
+_OPERAND_KEYWORDS = ('NULL', 'TRUE', 'FALSE', 'CURRENT_DATE', 'CURRENT_TIME', 'CURRENT_TIMESTAMP')
+
+
+def tokenize(query: str) -> List[Token]:
+    """Svi tokeni upita, uključujući praznine i komentare (pozicije pokazuju na originalni tekst)"""
+    return [Token(match.lastgroup, match.group(), match.start(), match.end())
+            for match in _TOKEN_RE.finditer(query)]
+
+
+def _significant(query: str) -> List[Token]:
+    """Tokeni bez praznina, komentara i završnih ';'"""
+    tokens = [token for token in tokenize(query) if token.kind not in _SKIPPED]
+    while tokens and tokens[-1].text == ';':
+        tokens.pop()
+    return tokens
+
+
+def _is_keyword(token: Token) -> bool:
+    return token.kind == 'word' and token.text.upper() in KEYWORDS
+
+
+def _is_sign(tokens: List[Token], index: int) -> bool:
+    """Da li je '-'/'+' na poziciji `index` predznak (unarni operator)"""
+    if tokens[index].text not in ('-', '+'):
+        return False
+    if index == 0:
+        return True
+    previous = tokens[index - 1]
+    if _is_keyword(previous):
+        return previous.text.upper() not in _OPERAND_KEYWORDS
+    return previous.kind in ('operator', 'hint') or previous.text in ('(', ',')
+
+
+def _render(tokens: List[Token], lower: bool = False) -> str:
+    """Spaja tokene sa jednim razmakom; bez razmaka oko '.', posle '(' i ispred ',' ')' ';' i poziva funkcije"""
+    out = []
+    for index, token in enumerate(tokens):
+        text = token.text
+        following = tokens[index + 1].text if index + 1 < len(tokens) else None
+        if token.kind == 'word':
+            upper = text.upper()
+            if upper in KEYWORDS or (following == '(' and upper in FUNCTIONS):
+                text = upper
+            if lower:
+                text = text.lower()
+        elif lower and token.kind == 'hint':
+            text = text.lower()
+
+        if index:
+            previous = tokens[index - 1]
+            if token.text in (',', ')', ';', '.') or previous.text in ('(', '.') or _is_sign(tokens, index - 1):
+                space = False
+            elif token.text == '(' and previous.kind in ('word', 'quoted'):
+                # COUNT(*) i t(a, b), ali IN (...), VALUES (...), FROM (...)
+                space = _is_keyword(previous) and previous.text.upper() not in FUNCTIONS
+            else:
+                space = True
+            if space:
+                out.append(' ')
+        out.append(text)
+    return ''.join(out)
+
+
+@functools.lru_cache(maxsize=2048)
+def canonical_sql(query: str) -> str:
+    """Kanonski oblik upita za ključ keša
+
+    Bez komentara i završnog ';', sa ključnim rečima i poznatim funkcijama
+    velikim slovima i jednoobraznim razmacima. Literali, identifikatori u
+    `navodnicima` i optimizer hint-ovi (/*+ ... */, /*! ... */) ostaju
+    netaknuti jer menjaju rezultat ili izvršavanje.
+    """
+    return _render(_significant(query))
+
+
+@functools.lru_cache(maxsize=2048)
+def fingerprint(query: str) -> str:
+    """Otisak upita: kanonski oblik malim slovima, literali zamenjeni sa '?', IN (...)/VALUES liste sažete"""
+    tokens = []
+    source = _significant(query)
+    for index, token in enumerate(source):
+        if token.kind in _LITERALS:
+            if tokens and tokens[-1].text in ('-', '+') and _is_sign(source, index - 1):
+                tokens.pop()
+            tokens.append(Token('param', '?', token.start, token.end))
+            continue
+        if token.text == ')' and _collapse_list(tokens, token):
+            continue
+        tokens.append(token)
+    return _render(tokens, lower=True)
+
+
+def _collapse_list(tokens: List[Token], closing: Token) -> bool:
+    """Na zatvorenoj zagradi: IN (?, ?, ...) -> IN (?+), a VALUES (?, ?), (?, ?) -> VALUES (?+)"""
+    index = len(tokens) - 1
+    while index >= 2 and tokens[index].kind == 'param' and tokens[index - 1].text == ',':
+        index -= 2
+    if index < 2 or tokens[index].kind != 'param' or tokens[index - 1].text != '(':
+        return False
+    opening = index - 1
+    before = tokens[opening - 1]
+    if before.text == ',' and opening >= 2 and tokens[opening - 2].kind == 'list':
+        # Sledeća torka iste VALUES liste
+        del tokens[opening - 1:]
+        return True
+    if before.text.upper() not in ('IN', 'VALUES', 'VALUE'):
+        return False
+    start = tokens[opening].start
+    del tokens[opening:]
+    tokens.append(Token('list', '(?+)', start, closing.end))
+    return True
+
+
+def split_statements(query: str) -> List[str]:
+    """Deli tekst na naredbe po ';' koji nije u navodnicima ili komentaru (originalni tekst naredbi)"""
+    statements, start, significant = [], 0, False
+    for token in tokenize(query):
+        if token.text == ';' and token.kind == 'punct':
+            if significant:
+                statements.append(query[start:token.start].strip())
+            start, significant = token.end, False
+        elif token.kind not in _SKIPPED:
+            significant = True
+    if significant:
+        statements.append(query[start:].strip())
+    return statements
+
+
+@functools.lru_cache(maxsize=2048)
+def statement_type(query: str) -> Optional[str]:
+    """Vrsta naredbe ('SELECT', 'SHOW', 'DELETE', ...) - za WITH odlučuje naredba posle CTE-ova"""
+    tokens = [token for token in _significant(query) if token.text != '(']
+    if not tokens or tokens[0].kind != 'word':
+        return None
+    first = tokens[0].text.upper()
+    if first != 'WITH':
+        return first
+    depth = 0
+    for token in _significant(query):
+        if token.text == '(':
+            depth += 1
+        elif token.text == ')':
+            depth -= 1
+        elif depth == 0 and token.kind == 'word' and token.text.upper() in _STATEMENT_KEYWORDS:
+            return token.text.upper()
+    return None
+
+
+def is_select(query: str) -> bool:
+    """Jedna SELECT (ili WITH ... SELECT) naredba bez INTO - sme da se obmota i kešira"""
+    if len(split_statements(query)) != 1 or statement_type(query) != 'SELECT':
+        return False
+    return not any(token.kind == 'word' and token.text.upper() == 'INTO' for token in _significant(query))
+
+
+def validate_select(query: str) -> Tuple[bool, str]:
+    """Proverava upit pre slanja na MySQL: samo jedan SELECT koji ne piše i ne zaključava redove"""
+    statements = split_statements(query)
+    if not statements:
+        return False, "Upit je prazan"
+    if len(statements) > 1:
+        return False, "Dozvoljen je samo jedan upit (bez ';' između naredbi)"
+    kind = statement_type(query)
+    if kind != 'SELECT':
+        return False, f"Dozvoljeni su samo SELECT upiti (ne {kind or 'nepoznata naredba'})"
+    words = [token.text.upper() if token.kind == 'word' else token.text for token in _significant(query)]
+    if 'INTO' in words:
+        return False, "SELECT ... INTO nije dozvoljen"
+    for index, word in enumerate(words[:-1]):
+        if (word == 'FOR' and words[index + 1] in ('UPDATE', 'SHARE')) or (word == 'LOCK' and words[index + 1] == 'IN'):
+            return False, "Zaključavajuće čitanje (FOR UPDATE / LOCK IN SHARE MODE) nije dozvoljeno"
+    if any(token.kind == 'hint' and token.text.startswith('/*!') for token in _significant(query)):
+        return False, "Izvršni komentari (/*! ... */) nisu dozvoljeni"
+    return True, ""
@@ -0,0 +1,135 @@
+"""
+Test planera agregacija (sažeci kolona i grupisanje po datumu računaju se u MySQL-u)
+"""
+import datetime
+
+from pymysql.constants import FIELD_TYPE
+
+from database.aggregation_planner import AggregationPlanner, format_summary
+from database.blbs_connector import BLBSConnector
+from database.mysql_standin import MySQLStandInServer
+
+
+SETUP_SQL = """
+CREATE TABLE tickets (id INTEGER PRIMARY KEY, created_at TEXT, line TEXT, price REAL);
+WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 365)
+INSERT INTO tickets SELECT i, datetime('2024-01-01', '+' || (i - 1) || ' days', '+8 hours'), 'L' || (i % 3),
+                           CASE WHEN i % 5 = 0 THEN NULL ELSE i * 1.0 END FROM n;
+"""
+
+COLUMNS = [('line', FIELD_TYPE.VAR_STRING), ('price', FIELD_TYPE.DOUBLE), ('created_at', FIELD_TYPE.DATETIME)]
+
+
+class TypedConnector(BLBSConnector):
+    """Stand-in ne zna tipove kolona praznog rezultata (LIMIT 0) - tipove zadaje test"""
+
+    def __init__(self, config, types, **options):
+        super().__init__(config, **options)
+        self.types = types
+
+    def describe(self, query):
+        description = super().describe(query)
+        if description is None:
+            return None
+        return tuple((d[0], self.types.get(d[0], d[1])) + tuple(d[2:]) for d in description)
+
+
+def test_summary_sql():
+    print("[TEST] SQL sažetka, raščlanjivanje reda i upiti po datumu...")
+
+    sql = AggregationPlanner.summary_query("SELECT line, price, created_at FROM tickets; -- svi", COLUMNS)
+    assert sql == ("SELECT COUNT(*),\n"
+                   "       COUNT(`line`),\n       COUNT(DISTINCT `line`),\n"
+                   "       COUNT(`price`),\n       COUNT(DISTINCT `price`),\n"
+                   "       MIN(`price`),\n       MAX(`price`),\n       AVG(`price`),\n"
+                   "       COUNT(`created_at`),\n       COUNT(DISTINCT `created_at`),\n"
+                   "       MIN(`created_at`),\n       MAX(`created_at`)\n"
+                   "FROM (\nSELECT line, price, created_at FROM tickets\n) AS blbs_agg")
+
+    row = (10, 10, 3, 8, 8, 1.0, 9.0, 4.5, 9, 9, '2024-01-01 08:00:00', '2024-01-09 08:00:00')
+    assert AggregationPlanner._parse_summary(COLUMNS, row) == {
+        'line': {'non_null': 10, 'distinct': 3},
+        'price': {'non_null': 8, 'distinct': 8, 'min': 1.0, 'max': 9.0, 'avg': 4.5},
+        'created_at': {'non_null': 9, 'distinct': 9, 'min': '2024-01-01 08:00:00', 'max': '2024-01-09 08:00:00'},
+    }
+
+    planner = AggregationPlanner(None, max_buckets=31)
+    assert planner.bucket_query("SELECT * FROM tickets", 'created`at') == (
+        "SELECT DATE(`created``at`) AS bucket, COUNT(*) AS cnt\nFROM (\nSELECT * FROM tickets\n) AS blbs_agg\n"
+        "WHERE `created``at` IS NOT NULL\nGROUP BY bucket ORDER BY bucket\nLIMIT 31")
+    assert "DATE_FORMAT(`created_at`, '%Y-%m') AS bucket" in planner.bucket_query("SELECT 1", 'created_at', True)
+
+    # Raspon datuma: objekti (podrazumevani profil) i ISO tekst ("lean" profil)
+    assert AggregationPlanner._span_days(datetime.datetime(2024, 1, 1), datetime.datetime(2024, 6, 1)) == 152
+    assert AggregationPlanner._span_days('2024-01-01 08:00:00', '2024-01-31 08:00:00') == 30
+    assert AggregationPlanner._span_days(None, '2024-01-31') == 0
+    assert AggregationPlanner._span_days('nije datum', '2024-01-31') == 0
+    return True
+
+def test_summarize_on_server():
+    print("[TEST] Sažetak nad stand-in serverom (dan/mesec, lean profil)...")
+
+    types = dict(COLUMNS)
+    with MySQLStandInServer(setup_sql=SETUP_SQL) as server:
+        for profile in (None, 'lean'):
+            connector = TypedConnector(server.config(), types, profile=profile)
+            try:
+                planner = AggregationPlanner(connector)
+                assert planner.summarize("SHOW TABLES") is None
+
+                # Mesec dana podataka -> grupisanje po danu
+                summary = planner.summarize("SELECT line, price, created_at FROM tickets "
+                                            "WHERE created_at < '2024-01-31' ORDER BY id", sample_size=5)
+                assert summary['row_count'] == 30 and len(summary['sample']) == 5
+                price = summary['columns']['price']
+                assert (price['non_null'], price['min'], price['max'], price['avg']) == (24, 1.0, 29.0, 15.0)
+                assert summary['columns']['line'] == {'non_null': 30, 'distinct': 3}
+                days = summary['buckets']['created_at']
+                assert days['granularity'] == 'dan' and len(days['counts']) == 30
+                assert days['counts'][0] == ('2024-01-01', 1)
+
+                # Cela godina -> grupisanje po mesecu (u lean profilu min/max su tekst)
+                summary = planner.summarize("SELECT line, price, created_at FROM tickets", sample_size=0)
+                created = summary['columns']['created_at']
+                assert isinstance(created['min'], str if profile == 'lean' else datetime.datetime)
+                months = summary['buckets']['created_at']
+                assert months['granularity'] == 'mesec' and len(months['counts']) == 12
+                assert months['counts'][1] == ('2024-02', 29) and summary['sample'] == []
+                assert sum(count for _, count in months['counts']) == summary['row_count'] == 365
+
+                assert planner.summarize("SELECT created_at FROM tickets", buckets=False)['buckets'] == {}
+                assert "Broj redova po mesecu (created_at):" in format_summary(summary)
+            finally:
+                connector.disconnect()
+    return True
+
+def main():
+    print("*** BLBS AI Agent - Test planera agregacija ***")
+    print("=" * 45)
+
+    tests = [
+        ("SQL sažetka", test_summary_sql),
+        ("Sažetak na serveru", test_summarize_on_server)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            print()
+            results.append((test_name, test_func(), None))
+        except Exception as e:
+            results.append((test_name, False, str(e) or type(e).__name__))
+
+    print()
+    print("=" * 45)
+    for test_name, success, error in results:
+        status = "PROSAO" if success else "NEUSPESNO"
+        print(f"{test_name:20} : {status}")
+        if error:
+            print(f"                     Greska: {error}")
+
+    total_passed = sum(1 for _, success, _ in results if success)
+    print(f"\nUkupno: {total_passed}/{len(results)} testova proslo")
+
+if __name__ == "__main__":
+    main()
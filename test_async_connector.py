@@ -0,0 +1,143 @@
+"""
+Test asyncio konektora nad lokalnim MySQL stand-in serverom
+"""
+import asyncio
+import threading
+import time
+
+from database import async_connector
+from database.async_connector import AsyncBLBSConnector, AsyncConnectionPool
+from database.circuit_breaker import OPEN, CircuitBreaker
+from database.mysql_standin import MySQLStandInServer
+from database.query_control import QueryRegistry
+
+
+SETUP_SQL = """
+CREATE TABLE tickets (id INTEGER PRIMARY KEY, line TEXT, price REAL);
+WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 2500)
+INSERT INTO tickets SELECT i, 'L' || (i % 7), i * 0.5 FROM n;
+"""
+
+
+def test_concurrent_queries():
+    print("[TEST] Konkurentni upiti na jednoj event petlji...")
+
+    async def scenario(config):
+        pool = AsyncConnectionPool(config, max_size=8)
+
+        async def report(i):
+            async with AsyncBLBSConnector(config, pool=pool) as connector:
+                rows = await connector.execute("SELECT SLEEP(0.2), %s", (i,))
+                return rows[0][1]
+
+        try:
+            started = time.monotonic()
+            results = await asyncio.gather(*(report(i) for i in range(16)))
+            elapsed = time.monotonic() - started
+            return results, elapsed, pool.stats()
+        finally:
+            await pool.close()
+
+    # Upit koji se završi dok njegov KILL čeka server ne sme da blokira event petlju
+    async def slow_kill(config):
+        release = threading.Event()
+        registry = QueryRegistry(kill=lambda config, thread_id: release.wait(5))
+        original, async_connector.query_registry = async_connector.query_registry, registry
+        try:
+            asyncio.get_running_loop().call_later(0.4, release.set)
+            started = time.monotonic()
+            async with AsyncBLBSConnector(config, query_id='spor-kill') as connector:
+                query = asyncio.ensure_future(connector.execute("SELECT SLEEP(0.2), 1"))
+                await asyncio.sleep(0.05)
+                cancelled = await connector.cancel()
+                rows = await query
+            return rows, cancelled, time.monotonic() - started
+        finally:
+            async_connector.query_registry = original
+
+    with MySQLStandInServer(setup_sql=SETUP_SQL) as server:
+        results, elapsed, stats = asyncio.run(scenario(server.config()))
+        rows, cancelled, kill_elapsed = asyncio.run(slow_kill(server.config()))
+
+    assert results == list(range(16))
+    # 16 upita po 0.2s preko 8 konekcija - dva talasa umesto šesnaest
+    assert elapsed < 1.5, elapsed
+    assert stats['size'] == 8 and stats['in_use'] == 0
+    assert rows == ((0, 1),) and cancelled == (True, "Upit je otkazan.")
+    assert kill_elapsed < 1.5, kill_elapsed
+    print(f"   16 upita za {elapsed:.2f}s, pool: {stats}")
+    return True
+
+def test_stream_and_sample():
+    print("[TEST] Strimovanje i uzorak...")
+
+    async def scenario(config):
+        pool = AsyncConnectionPool(config, max_size=2)
+        try:
+            connector = AsyncBLBSConnector(config, pool=pool)
+            batches = [len(rows) async for rows in connector.stream("SELECT * FROM tickets", batch_size=1000)]
+            sample = await connector.fetch_sample("SELECT id, line FROM tickets", 5)
+
+            # Prekinuto strimovanje odbacuje konekciju umesto čitanja ostatka
+            stream = connector.stream("SELECT * FROM tickets", batch_size=100)
+            async for _ in stream:
+                break
+            await stream.aclose()
+            await connector.disconnect()
+            return batches, sample, connector.description, pool.stats()
+        finally:
+            await pool.close()
+
+    with MySQLStandInServer(setup_sql=SETUP_SQL) as server:
+        batches, sample, description, stats = asyncio.run(scenario(server.config()))
+
+    assert batches == [1000, 1000, 500]
+    assert sample == ([(i, f"L{i % 7}") for i in range(1, 6)], 2500)
+    assert description[0][0] == 'id'
+    assert stats == {'size': 0, 'idle': 0, 'in_use': 0, 'max_size': 2}
+
+    # Bez pool-a konekcija ide preko istog circuit breaker-a kao sinhroni konektor
+    async def dead_host(config, breaker):
+        connector = AsyncBLBSConnector(config, breaker=breaker)
+        outcomes = [await connector.connect(), await connector.connect()]
+        started = time.monotonic()
+        outcomes.append(await connector.connect())
+        return outcomes, time.monotonic() - started
+
+    breaker = CircuitBreaker('standin-async', minimum_calls=2, cooldown=60)
+    outcomes, elapsed = asyncio.run(dead_host(server.config(), breaker))
+    assert outcomes == [False, False, False] and breaker.state == OPEN
+    assert breaker.rejected == 1 and elapsed < 0.1
+    print(f"   Paketi: {batches}, uzorak: {len(sample[0])}/{sample[1]}")
+    return True
+
+def main():
+    print("*** BLBS AI Agent - Test asyncio konektora ***")
+    print("=" * 45)
+
+    tests = [
+        ("Konkurentni upiti", test_concurrent_queries),
+        ("Strimovanje", test_stream_and_sample)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            print()
+            results.append((test_name, test_func(), None))
+        except Exception as e:
+            results.append((test_name, False, str(e) or type(e).__name__))
+
+    print()
+    print("=" * 45)
+    for test_name, success, error in results:
+        status = "PROSAO" if success else "NEUSPESNO"
+        print(f"{test_name:20} : {status}")
+        if error:
+            print(f"                     Greska: {error}")
+
+    total_passed = sum(1 for _, success, _ in results if success)
+    print(f"\nUkupno: {total_passed}/{len(results)} testova proslo")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Test paketnog izvršavanja više SELECT upita (CLIENT.MULTI_STATEMENTS)
+"""
+from database.blbs_connector import BLBSConnector
+from database.mysql_standin import MySQLStandInServer
+from database.query_planner import split_statements
+from database.result_cache import ResultCache
+
+
+SETUP_SQL = """
+CREATE TABLE tickets (id INTEGER PRIMARY KEY, line TEXT, price REAL);
+WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 120)
+INSERT INTO tickets SELECT i, 'L' || (i % 4), i * 0.5 FROM n;
+"""
+
+MORNING_PACK = [
+    "SELECT COUNT(*) FROM tickets",
+    "SELECT line, COUNT(*) AS cnt FROM tickets GROUP BY line ORDER BY line -- po liniji",
+    "SELECT MAX(price) FROM tickets WHERE line = 'L;1'",
+]
+
+
+def count_round_trips(connector) -> list:
+    """Broji COM_QUERY slanja na konekciji konektora"""
+    calls = []
+    query = connector.connection.query
+
+    def counted(sql, unbuffered=False):
+        calls.append(sql)
+        return query(sql, unbuffered)
+
+    connector.connection.query = counted
+    return calls
+
+
+def test_split_and_validation():
+    print("[TEST] Deljenje naredbi i odbijanje ne-SELECT paketa...")
+
+    assert split_statements("SELECT ';' FROM t; SELECT 2 -- a;b\n;") == ["SELECT ';' FROM t", "SELECT 2 -- a;b"]
+    assert split_statements("SELECT 1 /* ; */") == ["SELECT 1 /* ; */"]
+
+    with MySQLStandInServer(setup_sql=SETUP_SQL) as server:
+        connector = BLBSConnector(server.config(), profile='multi')
+        try:
+            assert connector.execute_batch(["SELECT 1", "SELECT 1; DELETE FROM tickets"]) is None
+            assert connector.execute_batch(["DELETE FROM tickets"]) is None
+            assert connector.execute("SELECT COUNT(*) FROM tickets")[0][0] == 120
+        finally:
+            connector.disconnect()
+    return True
+
+def test_one_round_trip_and_errors():
+    print("[TEST] Jedno slanje za ceo paket, greške i keš...")
+
+    with MySQLStandInServer(setup_sql=SETUP_SQL) as server:
+        connector = BLBSConnector(server.config(), profile='multi', cache=ResultCache(ttl=60))
+        try:
+            connector.connect()
+            calls = count_round_trips(connector)
+            results = connector.execute_batch(MORNING_PACK)
+            assert len(calls) == 1
+            assert results[0]['rows'] == ((120,),)
+            assert results[1]['columns'] == ['line', 'cnt'] and len(results[1]['rows']) == 4
+            assert results[2]['rows'] == ((None,),) and all(r['error'] is None for r in results)
+
+            # Keširani upiti se ne šalju ponovo - samo novi
+            results = connector.execute_batch(MORNING_PACK + ["SELECT MIN(id) FROM tickets"])
+            assert len(calls) == 2 and calls[1].startswith("SELECT MIN(id)")
+            assert results[3]['rows'] == ((1,),)
+
+            # Server prekida paket na prvoj grešci, ostali upiti dobijaju napomenu
+            results = connector.execute_batch(["SELECT 7", "SELECT * FROM missing", "SELECT 8"], use_cache=False)
+            assert results[0]['rows'] == ((7,),)
+            assert 'missing' in results[1]['error'] and results[2]['rows'] is None
+            assert connector.execute("SELECT 9", use_cache=False) == ((9,),)
+        finally:
+            connector.disconnect()
+
+        # Bez MULTI_STATEMENTS - isti rezultat, jedno slanje po upitu
+        connector = BLBSConnector(server.config())
+        try:
+            connector.connect()
+            calls = count_round_trips(connector)
+            results = connector.execute_batch(MORNING_PACK)
+            assert len(calls) == 3 and results[0]['rows'] == ((120,),)
+        finally:
+            connector.disconnect()
+    return True
+
+def main():
+    print("*** BLBS AI Agent - Test paketa upita ***")
+    print("=" * 45)
+
+    tests = [
+        ("Validacija paketa", test_split_and_validation),
+        ("Jedno slanje", test_one_round_trip_and_errors)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            print()
+            results.append((test_name, test_func(), None))
+        except Exception as e:
+            results.append((test_name, False, str(e) or type(e).__name__))
+
+    print()
+    print("=" * 45)
+    for test_name, success, error in results:
+        status = "PROSAO" if success else "NEUSPESNO"
+        print(f"{test_name:20} : {status}")
+        if error:
+            print(f"                     Greska: {error}")
+
+    total_passed = sum(1 for _, success, _ in results if success)
+    print(f"\nUkupno: {total_passed}/{len(results)} testova proslo")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Test circuit breaker-a - brzo odbijanje zahteva ka MySQL host-u koji ne odgovara
+"""
+import time
+
+import pymysql
+
+from database.blbs_connector import BLBSConnector
+from database.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, format_breakers
+from database.connection_pool import ConnectionPool
+from database.mysql_standin import MySQLStandInServer
+
+
+SETUP_SQL = """
+CREATE TABLE tickets (id INTEGER PRIMARY KEY, line TEXT);
+INSERT INTO tickets VALUES (1, 'L1'), (2, 'L2');
+"""
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_state_transitions():
+    print("[TEST] Prelazi zatvoren -> otvoren -> poluotvoren...")
+
+    clock = FakeClock()
+    breaker = CircuitBreaker('db:3306', failure_threshold=0.5, minimum_calls=4, window=60, cooldown=10,
+                             clock=clock)
+    down = pymysql.err.OperationalError(2003, "Can't connect to MySQL server")
+
+    # Greške u upitu i kredencijalima znače da host odgovara - ne otvaraju prekidač
+    for _ in range(5):
+        breaker.record(pymysql.err.ProgrammingError(1064, "syntax error"))
+        breaker.record(pymysql.err.OperationalError(1045, "Access denied"))
+    assert breaker.state == CLOSED
+
+    # Udeo grešaka host-a se računa tek od minimum_calls ishoda
+    breaker.record()
+    breaker.record(down)
+    breaker.record()
+    assert breaker.state == CLOSED
+    breaker.record(down)
+    assert breaker.state == OPEN and breaker.trips == 1
+    assert not breaker.allow() and breaker.rejected == 1
+    try:
+        breaker.check()
+        assert False, "otvoren prekidač mora da odbije zahtev"
+    except CircuitOpenError as e:
+        assert 'db:3306' in str(e)
+
+    # Posle cooldown-a prolazi samo jedna proba; neuspela proba ponovo otvara
+    clock.now = 10
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow() and not breaker.allow()
+    breaker.record(down)
+    assert breaker.state == OPEN and breaker.trips == 2
+    assert breaker.status()['retry_in'] == 10
+
+    # Uspešna proba zatvara prekidač i briše istoriju
+    clock.now = 25
+    assert breaker.allow()
+    breaker.record()
+    status = breaker.status()
+    assert status['state'] == CLOSED and status['calls'] == 0
+
+    # Stari ishodi ispadaju iz prozora
+    for _ in range(3):
+        breaker.record(down)
+    clock.now = 100
+    breaker.record(down)
+    assert breaker.state == CLOSED and breaker.status()['failures'] == 1
+    print(f"   {format_breakers([breaker.status()])}")
+    return True
+
+def test_connector_fails_fast():
+    print("[TEST] Konektor odbija zahteve bez čekanja na nedostupan host...")
+
+    breaker = CircuitBreaker('standin', minimum_calls=2, cooldown=0.3)
+    with MySQLStandInServer(setup_sql=SETUP_SQL) as server:
+        config = server.config()
+    # Server je ugašen - port odbija konekcije
+    dead = BLBSConnector(config, breaker=breaker)
+    assert not dead.connect() and not dead.connect()
+    assert breaker.state == OPEN
+
+    started = time.perf_counter()
+    assert dead.connect() is False
+    assert dead.execute("SELECT * FROM tickets") is None
+    assert time.perf_counter() - started < 0.1
+    assert breaker.rejected == 2
+
+    # Posle cooldown-a proba ka živom host-u zatvara prekidač
+    time.sleep(0.35)
+    with MySQLStandInServer(setup_sql=SETUP_SQL) as server:
+        connector = BLBSConnector(server.config(), breaker=breaker)
+        try:
+            assert breaker.state == HALF_OPEN
+            assert connector.execute("SELECT * FROM tickets") == ((1, 'L1'), (2, 'L2'))
+            assert breaker.state == CLOSED
+        finally:
+            connector.disconnect()
+
+    # Ručni test zatvara prekidač tek kada server odgovori - konekcija iz pool-a nije dokaz
+    breaker = CircuitBreaker('standin-pool', minimum_calls=1, cooldown=60)
+    with MySQLStandInServer(setup_sql=SETUP_SQL) as server:
+        pool = ConnectionPool(server.config(), max_size=1)
+        pooled = BLBSConnector(server.config(), pool=pool, breaker=breaker)
+        assert pooled.test_connection()[0] and pool.stats()['idle'] == 1
+    try:
+        breaker.record_failure(pymysql.err.OperationalError(2003, "Can't connect to MySQL server"))
+        assert breaker.state == OPEN
+        success, _ = pooled.test_connection()
+        assert not success and breaker.state == OPEN
+    finally:
+        pool.close()
+    print(f"   Odbijeno bez konekcije: {breaker.rejected}, otvaran: {breaker.trips}x")
+    return True
+
+def main():
+    print("*** BLBS AI Agent - Test circuit breaker-a ***")
+    print("=" * 45)
+
+    tests = [
+        ("Prelazi stanja", test_state_transitions),
+        ("Brzo odbijanje", test_connector_fails_fast)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            print()
+            results.append((test_name, test_func(), None))
+        except Exception as e:
+            results.append((test_name, False, str(e) or type(e).__name__))
+
+    print()
+    print("=" * 45)
+    for test_name, success, error in results:
+        status = "PROSAO" if success else "NEUSPESNO"
+        print(f"{test_name:20} : {status}")
+        if error:
+            print(f"                     Greska: {error}")
+
+    total_passed = sum(1 for _, success, _ in results if success)
+    print(f"\nUkupno: {total_passed}/{len(results)} testova proslo")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Test kolonskog prikaza rezultata upita
+"""
+from decimal import Decimal
+
+from pymysql.constants import FIELD_TYPE
+
+from database.blbs_connector import BLBSConnector
+from database.columnar import ColumnarResult
+from database.mysql_standin import MySQLStandInServer
+
+
+DESCRIPTION = (
+    ('id', FIELD_TYPE.LONGLONG),
+    ('line', FIELD_TYPE.VAR_STRING),
+    ('price', FIELD_TYPE.DOUBLE),
+    ('amount', FIELD_TYPE.NEWDECIMAL),
+)
+
+BATCHES = [
+    [(1, 'L1', 1.5, Decimal('10.00')), (2, 'L2', None, Decimal('11.00'))],
+    [(3, 'L1', 2.5, None)],
+]
+
+SETUP_SQL = """
+CREATE TABLE tickets (id INTEGER PRIMARY KEY, line TEXT, price REAL);
+WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 2500)
+INSERT INTO tickets SELECT i, 'L' || (i % 7), CASE WHEN i % 10 = 0 THEN NULL ELSE i * 0.5 END FROM n;
+"""
+
+
+def test_build_from_batches():
+    print("[TEST] Građenje iz paketa...")
+
+    result = ColumnarResult.from_batches(DESCRIPTION, BATCHES)
+    assert len(result) == 3
+    assert [c.kind for c in result.columns] == ['int', 'dictionary', 'float', 'object']
+    rows = [row for batch in BATCHES for row in batch]
+    assert result.rows() == rows
+    assert result.rows(1, 3) == rows[1:3] and result.head(2) == rows[:2] and result.rows(2, 99) == rows[2:]
+    assert result.column('price').to_list(1, 3) == [None, 2.5] and result.column('line').to_list(2) == ['L1']
+    assert result.column('line').distinct_count() == 2
+
+    # Kolonski rezultat upita preko konektora (paketi iz nebaferovanog kursora)
+    with MySQLStandInServer(setup_sql=SETUP_SQL) as server:
+        connector = BLBSConnector(server.config())
+        try:
+            columnar = connector.query_columnar("SELECT id, line, price FROM tickets ORDER BY id", batch_size=300)
+            assert len(columnar) == 2500 and columnar.column_names == ['id', 'line', 'price']
+            assert [c.kind for c in columnar.columns] == ['int', 'dictionary', 'float']
+            assert columnar.rows(8, 11) == [(9, 'L2', 4.5), (10, 'L3', None), (11, 'L4', 5.5)]
+            assert columnar.summary()['price']['nulls'] == 250
+            assert connector.query_columnar("SELECT nema FROM tickets") is None
+        finally:
+            connector.disconnect()
+
+    summary = result.summary()
+    assert summary['price'] == {'type': 'float', 'nulls': 1, 'min': 1.5, 'max': 2.5, 'avg': 2.0}
+    print(f"   Statistika: {summary['id']}")
+    return True
+
+def test_promotion_on_overflow():
+    print("[TEST] Prelazak na objekte...")
+
+    result = ColumnarResult.from_batches(DESCRIPTION[:1], [[(1,)], [(2 ** 64 - 1,)]])
+    assert result.columns[0].kind == 'object'
+    assert result.rows() == [(1,), (2 ** 64 - 1,)]
+    print("   UNSIGNED BIGINT: objektna kolona")
+    return True
+
+def main():
+    print("*** BLBS AI Agent - Test kolonskog rezultata ***")
+    print("=" * 45)
+
+    tests = [
+        ("Građenje", test_build_from_batches),
+        ("Prelazak na objekte", test_promotion_on_overflow)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            print()
+            results.append((test_name, test_func(), None))
+        except Exception as e:
+            results.append((test_name, False, str(e) or type(e).__name__))
+
+    print()
+    print("=" * 45)
+    for test_name, success, error in results:
+        status = "PROSAO" if success else "NEUSPESNO"
+        print(f"{test_name:20} : {status}")
+        if error:
+            print(f"                     Greska: {error}")
+
+    total_passed = sum(1 for _, success, _ in results if success)
+    print(f"\nUkupno: {total_passed}/{len(results)} testova proslo")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Test lokalne kolonske kopije (blokovi, zone mape, filter/group-by) nad MySQL stand-in serverom
+"""
+import os
+import tempfile
+
+from database.aggregation_planner import format_summary
+from database.blbs_connector import BLBSConnector
+from database.columnar_store import ColumnarMirror, parse_report_query
+from database.mysql_standin import MySQLStandInServer
+
+
+SETUP_SQL = """
+CREATE TABLE tickets (id INTEGER PRIMARY KEY, line TEXT, price REAL, created_at TEXT);
+WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 3000)
+INSERT INTO tickets SELECT i, CASE WHEN i % 10 = 0 THEN NULL ELSE 'L' || (i % 3) END, i * 0.5,
+       datetime('2024-01-01', '+' || (i / 20) || ' days') FROM n;
+"""
+
+
+def _mirror(tmp, server):
+    connector = BLBSConnector(server.config())
+    try:
+        mirror = ColumnarMirror(tmp, chunk_rows=1000)
+        assert mirror.mirror(connector, 'tickets') == 3000
+        return mirror
+    finally:
+        connector.disconnect()
+
+def test_filter_and_project():
+    print("[TEST] Filter, projekcija i zone mape...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with MySQLStandInServer(setup_sql=SETUP_SQL) as server:
+            mirror = _mirror(tmp, server)
+
+        assert mirror.tables() == ['tickets']
+        with mirror.open('tickets') as table:
+            rows = list(table.select(['id', 'price'], filters=[('id', '>', 2500), ('line', '=', 'L1')]))
+            assert rows == [(i, i * 0.5) for i in range(2501, 3001) if i % 3 == 1 and i % 10]
+            # Blokovi sa id <= 2000 se preskaču samo na osnovu min/max
+            assert table.chunks_skipped == 2 and table.chunks_scanned == 1
+            assert list(table.select(['line'], filters=[('id', 'in', (10, 11))])) == [(None,), ('L2',)]
+            print(f"   Redova: {len(rows)}, preskočeno blokova: {table.chunks_skipped}")
+
+        # Ime tabele ne sme da izađe iz direktorijuma kopija (rmtree nad '<ime>.tmp')
+        victim = os.path.join(tmp, 'victim.tmp')
+        os.makedirs(victim)
+        store = ColumnarMirror(os.path.join(tmp, 'store'))
+        for name in ('../victim', os.path.join(tmp, 'victim'), 'tickets/../../victim', '.', ''):
+            assert store.mirror(None, name) is None and store.open(name) is None
+        assert os.path.isdir(victim)
+    return True
+
+def test_group_by_and_summary():
+    print("[TEST] Group-by i sažetak za izveštaj...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with MySQLStandInServer(setup_sql=SETUP_SQL) as server:
+            mirror = _mirror(tmp, server)
+
+        with mirror.open('tickets') as table:
+            by_line = table.aggregate(group_by=['line'], aggregates={'n': ('count', None),
+                                                                     'avg': ('avg', 'price')})
+            assert [row[:2] for row in by_line] == [('L0', 900), ('L1', 900), ('L2', 900), (None, 300)]
+
+            monthly = table.aggregate(group_by=[('month', 'created_at')])
+            assert monthly[0] == ('2024-01', 619) and sum(row[1] for row in monthly) == 3000
+
+            summary = table.summarize(date_column='created_at', monthly=True)
+            assert summary['row_count'] == 3000
+            assert summary['columns']['line'] == {'non_null': 2700, 'distinct': 3}
+            assert summary['columns']['price']['max'] == 1500.0
+            text = format_summary(summary)
+            assert "Broj redova po mesecu (created_at):" in text
+            print(f"   Grupe po liniji: {[row[:2] for row in by_line]}")
+    return True
+
+def test_report_data():
+    print("[TEST] Podaci za AI izveštaj iz kolonske kopije...")
+
+    assert parse_report_query("SELECT id, `line` FROM `tickets` WHERE id > 10 AND line IN ('L1', 'L2');") == \
+        ('tickets', ['id', 'line'], [('id', '>', 10), ('line', 'in', ('L1', 'L2'))])
+    assert parse_report_query("SELECT * FROM tickets WHERE line <> 'it''s'") == \
+        ('tickets', None, [('line', '!=', "it's")])
+    for query in ("SELECT COUNT(*) FROM tickets", "SELECT * FROM tickets t JOIN lines l ON t.line = l.id",
+                  "SELECT * FROM tickets WHERE id > 1 OR id < 0", "SELECT * FROM tickets ORDER BY id"):
+        assert parse_report_query(query) is None, query
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with MySQLStandInServer(setup_sql=SETUP_SQL) as server:
+            mirror = _mirror(tmp, server)
+
+        data = mirror.report_data("SELECT id, price FROM tickets WHERE line = 'L1' AND id > 2500", 'osnovni', 5)
+        assert data['total'] == 150 and data['summary'] is None
+        assert data['sample'] == [(i, i * 0.5) for i in (2503, 2506, 2509, 2512, 2515)]
+
+        # Trend: sažetak samo filtriranih redova i grupisanje po mesecu (raspon > 120 dana)
+        data = mirror.report_data("SELECT * FROM tickets WHERE line = 'L2'", 'trend analiza', 50)
+        summary = data['summary']
+        assert data['total'] == summary['row_count'] == 900 and len(data['sample']) == 20
+        assert summary['columns']['line'] == {'non_null': 900, 'distinct': 1}
+        assert summary['columns']['price']['min'] == 1.0 and summary['columns']['price']['max'] == 1499.5
+        months = summary['buckets']['created_at']
+        assert months['granularity'] == 'mesec' and sum(count for _, count in months['counts']) == 900
+
+        again = mirror.report_data("SELECT * FROM tickets WHERE line = 'L2'", 'statistički', 50)
+        assert again['summary']['buckets'] == {} and again['content_hash'] == data['content_hash']
+
+        # Nepokriven upit, nepoznata tabela ili kolona -> None (izveštaj ide preko MySQL-a)
+        assert mirror.report_data("SELECT line, COUNT(*) FROM tickets GROUP BY line", 'osnovni') is None
+        assert mirror.report_data("SELECT * FROM orders", 'osnovni') is None
+        assert mirror.report_data("SELECT nema FROM tickets", 'statistički') is None
+    return True
+
+def main():
+    print("*** BLBS AI Agent - Test kolonske kopije ***")
+    print("=" * 45)
+
+    tests = [
+        ("Filter/projekcija", test_filter_and_project),
+        ("Group-by", test_group_by_and_summary),
+        ("Izveštaj iz kopije", test_report_data)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            print()
+            results.append((test_name, test_func(), None))
+        except Exception as e:
+            results.append((test_name, False, str(e) or type(e).__name__))
+
+    print()
+    print("=" * 45)
+    for test_name, success, error in results:
+        status = "PROSAO" if success else "NEUSPESNO"
+        print(f"{test_name:20} : {status}")
+        if error:
+            print(f"                     Greska: {error}")
+
+    total_passed = sum(1 for _, success, _ in results if success)
+    print(f"\nUkupno: {total_passed}/{len(results)} testova proslo")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Test pool-a konekcija bez prave MySQL baze
+"""
+import threading
+import time
+
+from database.connection_pool import ConnectionPool, PoolExhaustedError
+
+
+class FakeConnection:
+    """Lažna konekcija koja broji ping/close pozive"""
+
+    def __init__(self):
+        self.open = True
+        self.pings = 0
+
+    def ping(self, reconnect=False):
+        self.pings += 1
+        if not self.open:
+            raise ConnectionError("konekcija je zatvorena")
+
+    def close(self):
+        self.open = False
+
+
+def _pool(**options):
+    created = []
+
+    def factory():
+        connection = FakeConnection()
+        created.append(connection)
+        return connection
+
+    return ConnectionPool({}, connection_factory=factory, **options), created
+
+def test_pool_reuse():
+    print("[TEST] Ponovna upotreba konekcije...")
+    pool, created = _pool()
+
+    first = pool.acquire()
+    pool.release(first)
+    second = pool.acquire()
+    pool.release(second)
+
+    assert first is second and len(created) == 1
+    print(f"   Kreirano konekcija: {len(created)}")
+    return True
+
+def test_pool_per_thread_checkout():
+    print("[TEST] Pozajmica po niti...")
+    pool, created = _pool(max_size=2)
+
+    outer = pool.acquire()
+    inner = pool.acquire()
+    assert outer is inner
+    pool.release(inner)
+    assert pool.stats()['in_use'] == 1
+    pool.release(outer)
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(pool.acquire()))
+    thread.start()
+    thread.join()
+    assert other[0] is outer
+
+    # Odbacivanje u ugnježdenoj pozajmici ne zatvara konekciju spoljnom nosiocu
+    pool, created = _pool(max_size=2)
+    outer = pool.acquire()
+    inner = pool.acquire()
+    pool.release(inner, discard=True)
+    assert outer.open and pool.stats()['in_use'] == 1
+    pool.release(outer)
+    assert not outer.open and pool.stats() == {'size': 0, 'idle': 0, 'in_use': 0, 'max_size': 2}
+    assert pool.acquire() is not outer and len(created) == 2
+    print(f"   Stanje: {pool.stats()}")
+    return True
+
+def test_pool_bounded():
+    print("[TEST] Ograničena veličina...")
+    pool, created = _pool(max_size=1, acquire_timeout=0.2)
+
+    held = pool.acquire()
+    errors = []
+
+    def borrow():
+        try:
+            pool.acquire()
+        except PoolExhaustedError as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=borrow)
+    thread.start()
+    thread.join()
+    pool.release(held)
+
+    assert len(errors) == 1 and len(created) == 1
+    print(f"   Poruka: {errors[0]}")
+    return True
+
+def test_pool_idle_eviction_and_health_check():
+    print("[TEST] Izbacivanje i health-check...")
+    pool, created = _pool(idle_timeout=0.05, health_check_interval=0.0)
+
+    connection = pool.acquire()
+    pool.release(connection)
+    reused = pool.acquire()
+    assert reused is connection and connection.pings == 1
+    pool.release(reused)
+
+    time.sleep(0.1)
+    fresh = pool.acquire()
+    assert fresh is not connection and not connection.open
+
+    fresh.close()
+    pool.release(fresh)
+    assert pool.stats()['size'] == 0
+    print(f"   Stanje: {pool.stats()}")
+    return True
+
+def main():
+    print("*** BLBS AI Agent - Test pool-a konekcija ***")
+    print("=" * 45)
+
+    tests = [
+        ("Ponovna upotreba", test_pool_reuse),
+        ("Pozajmica po niti", test_pool_per_thread_checkout),
+        ("Ograničen pool", test_pool_bounded),
+        ("Izbacivanje", test_pool_idle_eviction_and_health_check)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            print()
+            results.append((test_name, test_func(), None))
+        except Exception as e:
+            results.append((test_name, False, str(e) or type(e).__name__))
+
+    print()
+    print("=" * 45)
+    for test_name, success, error in results:
+        status = "PROSAO" if success else "NEUSPESNO"
+        print(f"{test_name:20} : {status}")
+        if error:
+            print(f"                     Greska: {error}")
+
+    total_passed = sum(1 for _, success, _ in results if success)
+    print(f"\nUkupno: {total_passed}/{len(results)} testova proslo")
+
+if __name__ == "__main__":
+    main()
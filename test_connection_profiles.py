@@ -0,0 +1,94 @@
+"""
+Test profila konekcije (lean konverteri, kompresija, pool po profilu)
+"""
+import datetime
+
+from database.blbs_connector import BLBSConnector, READ_TIMEOUT_GRACE
+from database.connection_pool import DEFAULT_READ_TIMEOUT, close_pools, get_pool
+from database.connection_profiles import compression_supported, profile_options
+from database.mysql_standin import MySQLStandInServer
+
+
+SETUP_SQL = """
+CREATE TABLE tickets (id INTEGER PRIMARY KEY, created_at TEXT, price REAL);
+INSERT INTO tickets VALUES (1, '2024-03-01 08:15:00', 12.5), (2, '2024-03-02 09:30:00', 7.25);
+"""
+
+
+def test_lean_profile_keeps_raw_values():
+    print("[TEST] Lean profil vraća datume kao tekst...")
+
+    with MySQLStandInServer(setup_sql=SETUP_SQL) as server:
+        results = {}
+        for profile in ('default', 'lean'):
+            connector = BLBSConnector(server.config(), profile=profile)
+            try:
+                results[profile] = connector.execute_query("SELECT id, created_at FROM tickets ORDER BY id")
+            finally:
+                connector.disconnect()
+
+    default_value = results['default'][0][1]
+    lean_value = results['lean'][0][1]
+    assert isinstance(default_value, datetime.datetime)
+    assert lean_value == '2024-03-01 08:15:00'
+    assert results['lean'][1][0] == 2
+    print(f"   default: {default_value!r}, lean: {lean_value!r}")
+    return True
+
+def test_profile_options_and_pools():
+    print("[TEST] Opcije profila i pool po profilu...")
+
+    assert profile_options(None) == {}
+    assert 'conv' in profile_options('lean')
+    assert ('compress' in profile_options('wan')) == compression_supported()
+    try:
+        profile_options('nepostojeci')
+        assert False, "Nepoznat profil mora da baci ValueError"
+    except ValueError:
+        pass
+
+    config = {'host': '127.0.0.1', 'port': '3306', 'user': 'u', 'password': '', 'database': 'blbs'}
+    try:
+        assert get_pool(config, profile='lean') is get_pool(config, profile='lean')
+        assert get_pool(config, profile='lean') is not get_pool(config)
+        assert get_pool(config, profile='lean').profile == 'lean'
+
+        # Read timeout sledi vremenski budžet upita kao kod konekcije van pool-a
+        budgeted = get_pool(config, profile='lean', timeout=120)
+        assert budgeted is not get_pool(config, profile='lean') and budgeted is get_pool(config, profile='lean', timeout=120)
+        assert budgeted.read_timeout == 120 + READ_TIMEOUT_GRACE
+        assert get_pool(config).read_timeout == DEFAULT_READ_TIMEOUT
+    finally:
+        close_pools()
+    return True
+
+def main():
+    print("*** BLBS AI Agent - Test profila konekcije ***")
+    print("=" * 45)
+
+    tests = [
+        ("Lean profil", test_lean_profile_keeps_raw_values),
+        ("Opcije i pool", test_profile_options_and_pools)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            print()
+            results.append((test_name, test_func(), None))
+        except Exception as e:
+            results.append((test_name, False, str(e) or type(e).__name__))
+
+    print()
+    print("=" * 45)
+    for test_name, success, error in results:
+        status = "PROSAO" if success else "NEUSPESNO"
+        print(f"{test_name:20} : {status}")
+        if error:
+            print(f"                     Greska: {error}")
+
+    total_passed = sum(1 for _, success, _ in results if success)
+    print(f"\nUkupno: {total_passed}/{len(results)} testova proslo")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Test pre-flight procene cene upita (EXPLAIN FORMAT=JSON) bez prave MySQL baze
+"""
+import json
+
+from database.aggregation_planner import fetch_report_data
+from database.cost_guard import QueryCostGuard, analyze_plan, format_estimate
+
+
+JOIN_PLAN = {
+    "query_block": {
+        "select_id": 1,
+        "cost_info": {"query_cost": "240512.75"},
+        "ordering_operation": {
+            "using_filesort": True,
+            "nested_loop": [
+                {"table": {"table_name": "t", "access_type": "ALL", "possible_keys": None,
+                           "rows_examined_per_scan": 200000, "rows_produced_per_join": 20000}},
+                {"table": {"table_name": "l", "access_type": "eq_ref", "possible_keys": ["PRIMARY"],
+                           "key": "PRIMARY", "rows_examined_per_scan": 1, "rows_produced_per_join": 20000}},
+            ]
+        }
+    }
+}
+
+
+class FakeConnector:
+    """Vraća zadati EXPLAIN plan i beleži izvršene upite"""
+
+    def __init__(self, plan):
+        self.plan = plan
+        self.queries = []
+
+    def execute(self, query, params=None, use_cache=True):
+        self.queries.append(query)
+        if query.startswith("EXPLAIN"):
+            return ((json.dumps(self.plan),),)
+        return ((1, 'L1'), (2, 'L2'))
+
+
+def test_analyze_plan():
+    print("[TEST] Analiza EXPLAIN plana...")
+
+    estimate = analyze_plan(JOIN_PLAN)
+    # 200000 redova tabele t + 20000 pretraga po PRIMARY ključu tabele l
+    assert estimate['rows_examined'] == 220000
+    assert estimate['query_cost'] == 240512.75
+    assert estimate['full_scans'] == ['t']
+    assert any("nema upotrebljivog indeksa" in w for w in estimate['warnings'])
+    assert any("filesort" in w for w in estimate['warnings'])
+    print(f"   Procena: {estimate['rows_examined']} redova, upozorenja: {len(estimate['warnings'])}")
+    return True
+
+def test_budget_actions():
+    print("[TEST] Budžet - odbijanje i uzorak...")
+
+    query = "SELECT t.id, l.name FROM tickets t JOIN lines l ON l.id = t.line_id ORDER BY t.created_at"
+    assert QueryCostGuard(max_rows_examined=1_000_000).check(FakeConnector(JOIN_PLAN), query)['action'] == 'run'
+
+    refused = QueryCostGuard(max_rows_examined=100_000, action='refuse').check(FakeConnector(JOIN_PLAN), query)
+    assert refused['action'] == 'refuse' and "odbijen" in refused['message']
+
+    connector = FakeConnector(JOIN_PLAN)
+    estimate = QueryCostGuard(max_rows_examined=100_000).check(connector, query)
+    assert estimate['action'] == 'sample'
+    data = fetch_report_data(connector, query, 'statistički', 50, sample_only=True)
+    assert data['total'] is None and data['summary'] is None
+    assert connector.queries[-1].endswith("LIMIT 50") and len(connector.queries) == 2
+
+    assert QueryCostGuard().check(FakeConnector(JOIN_PLAN), "SHOW TABLES")['action'] == 'run'
+    print(f"   {format_estimate(estimate).splitlines()[0]}")
+    return True
+
+def main():
+    print("*** BLBS AI Agent - Test procene cene upita ***")
+    print("=" * 45)
+
+    tests = [
+        ("Analiza plana", test_analyze_plan),
+        ("Budžet", test_budget_actions)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            print()
+            results.append((test_name, test_func(), None))
+        except Exception as e:
+            results.append((test_name, False, str(e) or type(e).__name__))
+
+    print()
+    print("=" * 45)
+    for test_name, success, error in results:
+        status = "PROSAO" if success else "NEUSPESNO"
+        print(f"{test_name:20} : {status}")
+        if error:
+            print(f"                     Greska: {error}")
+
+    total_passed = sum(1 for _, success, _ in results if success)
+    print(f"\nUkupno: {total_passed}/{len(results)} testova proslo")
+
+if __name__ == "__main__":
+    main()
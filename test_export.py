@@ -0,0 +1,102 @@
+"""
+Test strimovanog izvoza u CSV/JSONL nad lokalnim MySQL stand-in serverom
+"""
+import csv
+import io
+import json
+import os
+import tempfile
+
+from database.blbs_connector import BLBSConnector
+from database.connection_pool import ConnectionPool
+from database.export import export_to_file, iter_csv, iter_jsonl
+from database.mysql_standin import MySQLStandInServer
+
+
+SETUP_SQL = """
+CREATE TABLE tickets (id INTEGER PRIMARY KEY, line TEXT, price REAL);
+WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 2500)
+INSERT INTO tickets SELECT i, CASE WHEN i % 4 = 0 THEN 'L, "A"' ELSE 'L' || (i % 3) END, i * 0.5 FROM n;
+"""
+
+
+def test_csv_and_jsonl_chunks():
+    print("[TEST] CSV i JSONL u delovima...")
+
+    with MySQLStandInServer(setup_sql=SETUP_SQL) as server:
+        connector = BLBSConnector(server.config())
+        try:
+            chunks = list(iter_csv(connector, "SELECT * FROM tickets", batch_size=1000))
+            lines = list(iter_jsonl(connector, "SELECT id, line FROM tickets WHERE id <= 3"))
+            empty = list(iter_csv(connector, "SELECT id, line FROM tickets WHERE id < 0"))
+        finally:
+            connector.disconnect()
+
+    # Jedan deo po paketu redova, zaglavlje samo u prvom
+    assert len(chunks) == 3
+    rows = list(csv.reader(io.StringIO("".join(chunks))))
+    assert rows[0] == ['id', 'line', 'price'] and len(rows) == 2501
+    assert rows[4] == ['4', 'L, "A"', '2.0']
+    assert [json.loads(line) for line in "".join(lines).splitlines()] == [
+        {'id': 1, 'line': 'L1'}, {'id': 2, 'line': 'L2'}, {'id': 3, 'line': 'L0'}]
+    assert empty == ["id,line\r\n"]
+    print(f"   Delova: {len(chunks)}, redova: {len(rows) - 1}")
+    return True
+
+def test_early_stop_and_file_export():
+    print("[TEST] Prekid preuzimanja i izvoz u fajl...")
+
+    with tempfile.TemporaryDirectory() as tmp, MySQLStandInServer(setup_sql=SETUP_SQL) as server:
+        pool = ConnectionPool(server.config(), max_size=2)
+        try:
+            connector = BLBSConnector(server.config(), pool=pool)
+            chunks = iter_csv(connector, "SELECT * FROM tickets", batch_size=100)
+            next(chunks)
+            # Klijent je prekinuo preuzimanje - konekcija se odbacuje, ne čita se ostatak
+            chunks.close()
+            connector.disconnect()
+            assert pool.stats()['in_use'] == 0
+
+            path = os.path.join(tmp, 'tickets.jsonl')
+            connector = BLBSConnector(server.config(), pool=pool)
+            success, message = export_to_file(connector, "SELECT * FROM tickets", path, 'jsonl')
+            connector.disconnect()
+            with open(path, encoding='utf-8') as f:
+                exported = sum(1 for _ in f)
+        finally:
+            pool.close()
+
+    assert success and exported == 2500
+    print(f"   {message}")
+    return True
+
+def main():
+    print("*** BLBS AI Agent - Test izvoza ***")
+    print("=" * 45)
+
+    tests = [
+        ("CSV/JSONL", test_csv_and_jsonl_chunks),
+        ("Prekid i fajl", test_early_stop_and_file_export)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            print()
+            results.append((test_name, test_func(), None))
+        except Exception as e:
+            results.append((test_name, False, str(e) or type(e).__name__))
+
+    print()
+    print("=" * 45)
+    for test_name, success, error in results:
+        status = "PROSAO" if success else "NEUSPESNO"
+        print(f"{test_name:20} : {status}")
+        if error:
+            print(f"                     Greska: {error}")
+
+    total_passed = sum(1 for _, success, _ in results if success)
+    print(f"\nUkupno: {total_passed}/{len(results)} testova proslo")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Test upita nad više BLBS baza (paralelno izvršavanje i spajanje sa kolonom izvora)
+"""
+import os
+import socket
+import tempfile
+import time
+
+from config.config_manager import ConfigManager
+from database.fan_out import SOURCE_COLUMN, FanOutQuery
+from database.mysql_standin import MySQLStandInServer
+from database.resource_governor import ResultLimits
+
+
+def city_sql(rows: int) -> str:
+    return f"""
+CREATE TABLE tickets (id INTEGER PRIMARY KEY, line TEXT, price REAL);
+WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {rows})
+INSERT INTO tickets SELECT i, 'L' || (i % 3), i * 1.0 FROM n;
+"""
+
+
+# Druga šema, a redovi stižu posle ostalih baza
+NIS_SQL = """
+CREATE TABLE routes (id INTEGER PRIMARY KEY, route TEXT);
+INSERT INTO routes VALUES (1, 'R1');
+CREATE VIEW tickets AS SELECT id, route, SLEEP(0.3) AS pause FROM routes;
+"""
+
+
+def unused_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def test_merge_and_partial_failure():
+    print("[TEST] Spajanje rezultata sa kolonom izvora i delimičan neuspeh...")
+
+    with MySQLStandInServer(setup_sql=city_sql(2500)) as beograd, \
+            MySQLStandInServer(setup_sql=city_sql(700)) as novi_sad, \
+            MySQLStandInServer(setup_sql=NIS_SQL) as nis:
+        offline = {**beograd.config(), 'port': str(unused_port())}
+        targets = [{'name': 'beograd', **beograd.config()}, {'name': 'novi_sad', **novi_sad.config()},
+                   {'name': 'kragujevac', **offline}]
+
+        fan_out = FanOutQuery(targets, batch_size=300)
+        rows = fan_out.execute("SELECT id, line FROM tickets ORDER BY id")
+        assert len(rows) == 3200
+        assert [d[0] for d in fan_out.description] == [SOURCE_COLUMN, 'id', 'line']
+        assert sum(1 for row in rows if row[0] == 'novi_sad') == 700 and rows[0][0] in ('beograd', 'novi_sad')
+        assert list(fan_out.failed) == ['kragujevac']
+        status = {s['source']: s for s in fan_out.status()}
+        assert status['beograd']['rows'] == 2500 and status['beograd']['error'] is None
+
+        # Baza sa drugačijim kolonama ne ulazi u spojeni rezultat
+        fan_out = FanOutQuery(targets[:2] + [{'name': 'nis', **nis.config()}],
+                              limits=ResultLimits(max_rows=100))
+        rows = fan_out.execute("SELECT * FROM tickets")
+        assert len(rows) == 200 and all(len(row) == 4 for row in rows)
+        assert fan_out.sources['beograd']['truncated'] and 'route' in fan_out.failed['nis']
+
+        # Nijedna baza nije uspela
+        assert FanOutQuery(targets[2:]).execute("SELECT 1") is None
+        try:
+            next(FanOutQuery(targets).iter_batches("DELETE FROM tickets"))
+            assert False, "ne-SELECT upit mora biti odbijen"
+        except ValueError:
+            pass
+    return True
+
+def test_parallel_and_targets_config():
+    print("[TEST] Baze se izvršavaju paralelno i čuvaju u ConfigManager-u...")
+
+    with MySQLStandInServer(setup_sql=city_sql(10)) as first, MySQLStandInServer(setup_sql=city_sql(20)) as second, \
+            MySQLStandInServer(setup_sql=city_sql(30)) as third, tempfile.TemporaryDirectory() as tmp:
+        manager = ConfigManager()
+        manager.config_file = os.path.join(tmp, 'blbs_config.json')
+        manager.targets_file = os.path.join(tmp, 'blbs_targets.json')
+        assert manager.load_targets() == []
+        assert manager.save_config(first.config())
+        assert manager.save_target('drugi', second.config()) and manager.save_target('treci', third.config())
+        # Ime mora biti jedinstveno - ni ponovljeno, ni isto kao osnovna baza (baza@host)
+        main_name = f"{first.config()['database']}@{first.config()['host']}"
+        assert not manager.save_target('treci', second.config()) and not manager.save_target(main_name, third.config())
+        assert not manager.delete_target('nepostojeci')
+        targets = manager.load_targets()
+        assert [t['name'] for t in targets] == [main_name, 'drugi', 'treci']
+        assert targets[2]['port'] == third.config()['port']
+
+        started = time.perf_counter()
+        rows = FanOutQuery(targets).execute("SELECT COUNT(*), SLEEP(0.4) FROM tickets")
+        elapsed = time.perf_counter() - started
+        assert sorted((row[0], row[1]) for row in rows) == [(main_name, 10), ('drugi', 20), ('treci', 30)]
+        # Traje koliko najsporija baza, ne zbir (3 x 0.4s)
+        assert elapsed < 1.0, elapsed
+
+        assert manager.delete_target('drugi')
+        assert manager.target_names() == [main_name, 'treci']
+    print(f"   Tri baze za {elapsed:.2f}s")
+    return True
+
+def main():
+    print("*** BLBS AI Agent - Test upita nad više baza ***")
+    print("=" * 45)
+
+    tests = [
+        ("Spajanje rezultata", test_merge_and_partial_failure),
+        ("Paralelno i konfig.", test_parallel_and_targets_config)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            print()
+            results.append((test_name, test_func(), None))
+        except Exception as e:
+            results.append((test_name, False, str(e) or type(e).__name__))
+
+    print()
+    print("=" * 45)
+    for test_name, success, error in results:
+        status = "PROSAO" if success else "NEUSPESNO"
+        print(f"{test_name:20} : {status}")
+        if error:
+            print(f"                     Greska: {error}")
+
+    total_passed = sum(1 for _, success, _ in results if success)
+    print(f"\nUkupno: {total_passed}/{len(results)} testova proslo")
+
+if __name__ == "__main__":
+    main()
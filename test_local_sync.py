@@ -0,0 +1,144 @@
+"""
+Test inkrementalne sinhronizacije u lokalnu kopiju nad MySQL stand-in serverom
+"""
+import os
+import tempfile
+
+from database.blbs_connector import BLBSConnector
+from database.local_sync import LocalStore
+from database.mysql_standin import MySQLStandInServer
+
+
+SETUP_SQL = """
+CREATE TABLE tickets (id INTEGER PRIMARY KEY, line TEXT, price REAL, updated_at TEXT);
+WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 1200)
+INSERT INTO tickets SELECT i, 'L' || (i % 5), i * 0.5, '2024-03-01 10:00:00' FROM n;
+CREATE TABLE stops (id INTEGER PRIMARY KEY, name TEXT, updated_at TEXT);
+WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 40)
+INSERT INTO stops SELECT i, 'S' || i, CASE WHEN i <= 30 THEN NULL ELSE '2024-03-01 10:00:' || (10 + i) END FROM n;
+"""
+
+
+def _query_count(server, table):
+    return sum(1 for q in server.queries if f"FROM `{table}`" in q)
+
+def test_incremental_sync():
+    print("[TEST] Inkrementalna sinhronizacija...")
+
+    with tempfile.TemporaryDirectory() as tmp, MySQLStandInServer(setup_sql=SETUP_SQL) as server:
+        store = LocalStore(os.path.join(tmp, 'local.sqlite3'))
+        store.track('tickets', watermark_column='updated_at', key_column='id')
+        connector = BLBSConnector(server.config())
+        try:
+            assert store.sync(connector, 'tickets', batch_size=500) == 1200
+            first_pass = _query_count(server, 'tickets')
+
+            # Novi red i izmena postojećeg reda - samo oni se prenose
+            server.execute_script("""
+                INSERT INTO tickets VALUES (1201, 'L9', 1.0, '2024-03-02 08:00:00');
+                UPDATE tickets SET price = 99.5, updated_at = '2024-03-02 09:00:00' WHERE id = 7;
+            """)
+            assert store.sync_all(connector, batch_size=500) == {'tickets': 2}
+            assert store.sync(connector, 'tickets') == 0
+        finally:
+            connector.disconnect()
+
+        state = store.tracked()[0]
+        local = store.connector()
+        try:
+            assert local.execute("SELECT COUNT(*) FROM tickets") == [(1201,)]
+            assert local.execute("SELECT price FROM tickets WHERE id = %s", (7,)) == [(99.5,)]
+            sample, total = local.fetch_sample("SELECT id, line FROM tickets ORDER BY id", 5)
+            assert total == 1201 and sample[0] == (1, 'L1')
+        finally:
+            local.disconnect()
+
+        # Druga baza (promenjena konfiguracija) ne nastavlja od stare oznake i ne meša redove
+        with MySQLStandInServer(setup_sql=SETUP_SQL.replace('i < 1200', 'i < 300')) as other:
+            switched = BLBSConnector(other.config())
+            try:
+                assert store.sync(switched, 'tickets', batch_size=500) == 300
+                moved = store.tracked()[0]
+                assert moved['rows_synced'] == 300 and moved['source'].endswith(f":{other.config()['port']}/blbs")
+            finally:
+                switched.disconnect()
+        local = store.connector()
+        try:
+            assert local.execute("SELECT COUNT(*), MAX(id) FROM tickets") == [(300, 300)]
+        finally:
+            local.disconnect()
+
+        store.reset()
+        assert [(s['watermark'], s['rows_synced'], s['source']) for s in store.tracked()] == [(None, 0, None)]
+
+    assert state['watermark'] == '2024-03-02 09:00:00' and state['watermark_key'] == 7
+    assert state['rows_synced'] == 1202
+    print(f"   Prvi prolaz: {first_pass} upita, oznaka: {state['watermark']} / {state['watermark_key']}")
+    return True
+
+def test_null_watermark_rows():
+    print("[TEST] Redovi bez vrednosti u koloni oznake...")
+
+    with tempfile.TemporaryDirectory() as tmp, MySQLStandInServer(setup_sql=SETUP_SQL) as server:
+        store = LocalStore(os.path.join(tmp, 'local.sqlite3'))
+        store.track('stops', watermark_column='updated_at', key_column='id')
+        connector = BLBSConnector(server.config())
+        try:
+            # 30 NULL redova (sortiraju se prvi) je više od paketa - ranije beskonačna petlja
+            assert store.sync(connector, 'stops', batch_size=10) == 40
+            assert store.tracked()[0]['watermark'] == '2024-03-01 10:00:50'
+
+            assert store.tracked()[0]['null_key'] == 30
+
+            # Već prenet NULL red se ne prenosi (ni broji) ponovo; novi NULL red i red koji
+            # dobije vrednost oznake se prenose
+            assert store.sync(connector, 'stops', batch_size=10) == 0
+            server.execute_script("""
+                INSERT INTO stops VALUES (41, 'S41', NULL);
+                UPDATE stops SET name = 'Centar', updated_at = '2024-03-02 08:00:00' WHERE id = 3;
+            """)
+            assert store.sync(connector, 'stops', batch_size=10) == 2
+            state = store.tracked()[0]
+            assert (state['null_key'], state['rows_synced']) == (41, 42)
+        finally:
+            connector.disconnect()
+
+        local = store.connector()
+        try:
+            assert local.execute("SELECT COUNT(*) FROM stops") == [(41,)]
+            assert local.execute("SELECT name FROM stops WHERE id = 3") == [('Centar',)]
+        finally:
+            local.disconnect()
+    print(f"   Preneto ukupno: {state['rows_synced']} redova")
+    return True
+
+def main():
+    print("*** BLBS AI Agent - Test lokalne kopije ***")
+    print("=" * 45)
+
+    tests = [
+        ("Sinhronizacija", test_incremental_sync),
+        ("NULL oznaka", test_null_watermark_rows)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            print()
+            results.append((test_name, test_func(), None))
+        except Exception as e:
+            results.append((test_name, False, str(e) or type(e).__name__))
+
+    print()
+    print("=" * 45)
+    for test_name, success, error in results:
+        status = "PROSAO" if success else "NEUSPESNO"
+        print(f"{test_name:20} : {status}")
+        if error:
+            print(f"                     Greska: {error}")
+
+    total_passed = sum(1 for _, success, _ in results if success)
+    print(f"\nUkupno: {total_passed}/{len(results)} testova proslo")
+
+if __name__ == "__main__":
+    main()
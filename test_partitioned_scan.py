@@ -0,0 +1,80 @@
+"""
+Test paralelnog čitanja po opsezima ključa nad lokalnim MySQL stand-in serverom
+"""
+from database.connection_pool import ConnectionPool
+from database.mysql_standin import MySQLStandInServer
+from database.partitioned_scan import PartitionedScan, key_ranges
+
+
+SETUP_SQL = """
+CREATE TABLE tickets (id INTEGER PRIMARY KEY, line TEXT, price REAL);
+WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 5000)
+INSERT INTO tickets SELECT i * 3, 'L' || (i % 7), i * 0.5 FROM n;
+"""
+
+
+def test_key_ranges():
+    print("[TEST] Podela opsega ključa...")
+
+    assert key_ranges(1, 10, 3) == [(1, 5), (5, 9), (9, 11)]
+    assert key_ranges(7, 8, 4) == [(7, 8), (8, 9)]
+    assert key_ranges(None, None, 4) == []
+    print(f"   [1, 10] na 3: {key_ranges(1, 10, 3)}")
+    return True
+
+def test_ordered_and_unordered_merge():
+    print("[TEST] Spajanje sa i bez redosleda...")
+
+    with MySQLStandInServer(setup_sql=SETUP_SQL) as server:
+        config = server.config()
+        pool = ConnectionPool(config, max_size=3)
+        try:
+            ordered = list(PartitionedScan(config, 'tickets', key_column='id', partitions=6,
+                                           batch_size=250, pool=pool).rows())
+            unordered = list(PartitionedScan(config, 'tickets', columns='id, line', where='line = %s',
+                                             params=('L3',), key_column='id', partitions=4,
+                                             ordered=False, batch_size=100, pool=pool).rows())
+
+            # Potrošač koji stane posle prvog paketa ne ostavlja zauzete konekcije
+            for _ in PartitionedScan(config, 'tickets', key_column='id', partitions=5, batch_size=10, pool=pool):
+                break
+            stats = pool.stats()
+        finally:
+            pool.close()
+
+    assert [row[0] for row in ordered] == [i * 3 for i in range(1, 5001)]
+    assert sorted(unordered) == [(i * 3, 'L3') for i in range(1, 5001) if i % 7 == 3]
+    assert stats['in_use'] == 0
+    print(f"   Redova: {len(ordered)} (po redu), {len(unordered)} (bez redosleda), pool: {stats}")
+    return True
+
+def main():
+    print("*** BLBS AI Agent - Test paralelnog čitanja ***")
+    print("=" * 45)
+
+    tests = [
+        ("Opsezi ključa", test_key_ranges),
+        ("Spajanje", test_ordered_and_unordered_merge)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            print()
+            results.append((test_name, test_func(), None))
+        except Exception as e:
+            results.append((test_name, False, str(e) or type(e).__name__))
+
+    print()
+    print("=" * 45)
+    for test_name, success, error in results:
+        status = "PROSAO" if success else "NEUSPESNO"
+        print(f"{test_name:20} : {status}")
+        if error:
+            print(f"                     Greska: {error}")
+
+    total_passed = sum(1 for _, success, _ in results if success)
+    print(f"\nUkupno: {total_passed}/{len(results)} testova proslo")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Test keša server-side prepared naredbi (PREPARE / EXECUTE / DEALLOCATE) nad MySQL stand-in serverom
+"""
+import pymysql
+
+from database import prepared_statements
+from database.blbs_connector import BLBSConnector, create_connection
+from database.mysql_standin import MySQLStandInServer
+from database.prepared_statements import PreparedStatementCache, to_server_placeholders
+
+
+SETUP_SQL = """
+CREATE TABLE tickets (id INTEGER PRIMARY KEY, line TEXT, price REAL);
+INSERT INTO tickets VALUES (1, 'L1', 2.5), (2, 'L2', 3.0), (3, 'L1', 4.5), (4, 'X%', 1.0);
+"""
+
+
+def test_lru_and_placeholders():
+    print("[TEST] LRU keš naredbi i pretvaranje placeholdera...")
+
+    assert to_server_placeholders("SELECT * FROM t WHERE a = %s AND b LIKE 'x%%' AND c = %s") == \
+        "SELECT * FROM t WHERE a = ? AND b LIKE 'x%' AND c = ?"
+
+    with MySQLStandInServer(setup_sql=SETUP_SQL) as server:
+        connection = create_connection(server.config())
+        try:
+            cache = PreparedStatementCache(capacity=2)
+            queries = ["SELECT id FROM tickets WHERE line = %s ORDER BY id",
+                       "SELECT COUNT(*) FROM tickets WHERE price > %s",
+                       "SELECT id FROM tickets WHERE line LIKE 'X%%' AND id > %s"]
+            with connection.cursor() as cursor:
+                cache.execute(cursor, queries[0], ('L1',))
+                assert cursor.fetchall() == ((1,), (3,))
+                cache.execute(cursor, queries[1], (2.0,))
+                assert cursor.fetchall() == ((3,),)
+                # Isti šablon (i drugačije napisan) koristi već pripremljenu naredbu
+                cache.execute(cursor, "select id from tickets\nwhere line = %s order by id;", ('L2',))
+                assert cursor.fetchall() == ((2,),)
+                assert (cache.hits, cache.misses, len(cache)) == (1, 2, 2)
+
+                # Treća naredba izbacuje najdavnije korišćenu (drugu) i oslobađa je na serveru
+                before = len(server.queries)
+                cache.execute(cursor, queries[2], (0,))
+                assert cursor.fetchall() == ((4,),)
+                issued = server.queries[before:]
+                assert any(q.startswith("PREPARE") and "X%\\' AND id > ?'" in q for q in issued), issued
+                deallocated = [q for q in issued if q.startswith("DEALLOCATE PREPARE")]
+                assert len(deallocated) == 1 and len(cache) == 2
+                cache.execute(cursor, queries[0], ('L1',))
+                assert cache.hits == 2
+
+                cache.clear(cursor)
+                assert len(cache) == 0
+                assert sum(q.startswith("DEALLOCATE PREPARE") for q in server.queries) == 3
+        finally:
+            connection.close()
+
+        # Konektor sa prepare=True daje isti rezultat kao običan upit
+        connector = BLBSConnector(server.config())
+        try:
+            query = "SELECT line, SUM(price) FROM tickets WHERE id <= %s GROUP BY line ORDER BY line"
+            plain = connector.execute(query, (3,), use_cache=False)
+            for limit in (3, 3, 2):
+                prepared = connector.execute(query, (limit,), prepare=True, use_cache=False)
+                assert prepared == connector.execute(query, (limit,), use_cache=False)
+            assert prepared != plain
+            cache = prepared_statements.cache_for(connector.connection)
+            assert (cache.hits, cache.misses) == (2, 1)
+        finally:
+            connector.disconnect()
+    return True
+
+def test_retry_and_executemany():
+    print("[TEST] Ponovna priprema posle greške 1243 i executemany...")
+
+    with MySQLStandInServer(setup_sql=SETUP_SQL) as server:
+        connection = create_connection(server.config())
+        try:
+            cache = PreparedStatementCache()
+            query = "SELECT id FROM tickets WHERE line = %s ORDER BY id"
+            with connection.cursor() as cursor:
+                cache.execute(cursor, query, ('L1',))
+                cursor.fetchall()
+                # Server je zaboravio naredbu (npr. nova sesija posle reconnect-a)
+                name = next(q.split()[1] for q in server.queries if q.startswith("PREPARE"))
+                cursor.execute(f"DEALLOCATE PREPARE {name}")
+                cache.execute(cursor, query, ('L2',))
+                assert cursor.fetchall() == ((2,),)
+                assert cache.misses == 2 and len(cache) == 1
+
+                # Ostale greške se ne ponavljaju
+                try:
+                    cache.execute(cursor, "SELECT nema FROM tickets WHERE id = %s", (1,))
+                    assert False, "greška u upitu mora da se prosledi"
+                except pymysql.MySQLError as e:
+                    assert e.args[0] == 1064
+        finally:
+            connection.close()
+
+        connector = BLBSConnector(server.config())
+        try:
+            assert connector.executemany("INSERT INTO tickets (id, line, price) VALUES (%s, %s, %s)",
+                                         [(10, 'L3', 1.0), (11, 'L3', 2.0), (12, 'L3', 3.0)]) == 3
+            assert connector.execute("SELECT COUNT(*), SUM(price) FROM tickets WHERE line = 'L3'",
+                                     use_cache=False) == ((3, 6.0),)
+            assert connector.executemany("INSERT INTO tickets (id, line) VALUES (%s, %s)", [(10, 'dup')]) is None
+        finally:
+            connector.disconnect()
+    return True
+
+def main():
+    print("*** BLBS AI Agent - Test prepared naredbi ***")
+    print("=" * 45)
+
+    tests = [
+        ("LRU i placeholderi", test_lru_and_placeholders),
+        ("Greška 1243", test_retry_and_executemany)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            print()
+            results.append((test_name, test_func(), None))
+        except Exception as e:
+            results.append((test_name, False, str(e) or type(e).__name__))
+
+    print()
+    print("=" * 45)
+    for test_name, success, error in results:
+        status = "PROSAO" if success else "NEUSPESNO"
+        print(f"{test_name:20} : {status}")
+        if error:
+            print(f"                     Greska: {error}")
+
+    total_passed = sum(1 for _, success, _ in results if success)
+    print(f"\nUkupno: {total_passed}/{len(results)} testova proslo")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Test otkazivanja upita (KILL QUERY van zajedničkog lock-a, ograničen spisak otkazanih upita)
+"""
+import threading
+import time
+
+from database import query_control
+from database.query_control import QueryCancelledError, QueryRegistry
+
+
+CONFIG = {'host': '127.0.0.1', 'port': '3306', 'user': 'blbs', 'password': '', 'database': 'blbs'}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_kill_outside_lock():
+    print("[TEST] Spor KILL ne blokira druge upite...")
+
+    started, release = threading.Event(), threading.Event()
+    killed = []
+
+    def slow_kill(config, thread_id):
+        started.set()
+        release.wait(5)
+        killed.append(thread_id)
+
+    registry = QueryRegistry(kill=slow_kill)
+    registry.register('q1', CONFIG, 11)
+    registry.register('q2', CONFIG, 12)
+    results = []
+    canceller = threading.Thread(target=lambda: results.append(registry.cancel('q1')))
+    canceller.start()
+    assert started.wait(5)
+
+    # Drugi upiti se prijavljuju i završavaju dok KILL čeka server
+    begin = time.perf_counter()
+    registry.unregister('q2')
+    registry.register('q3', CONFIG, 13)
+    assert registry.is_running('q3') and not registry.is_cancelled('q3')
+    assert registry.cancel('q1') == (True, "Otkazivanje upita je već u toku.")
+    assert time.perf_counter() - begin < 0.5
+
+    # Upit koji se ubija ne vraća konekciju pre nego što KILL stigne do servera
+    finished = threading.Event()
+    waiter = threading.Thread(target=lambda: (registry.unregister('q1'), finished.set()))
+    waiter.start()
+    assert not finished.wait(0.2) and registry.is_running('q1')
+    release.set()
+    canceller.join(5)
+    waiter.join(5)
+    assert finished.is_set() and not registry.is_running('q1')
+    assert results == [(True, "Upit je otkazan.")] and killed == [11]
+    assert registry.is_cancelled('q1')
+
+    # Greška KILL-a se vraća pozivaocu i ne ostavlja upit zaključan
+    def broken_kill(config, thread_id):
+        raise ConnectionError("server ne odgovara")
+
+    broken = QueryRegistry(kill=broken_kill)
+    broken.register('q4', CONFIG, 14)
+    success, message = broken.cancel('q4')
+    assert not success and 'server ne odgovara' in message
+    broken.unregister('q4')
+    assert not broken.is_running('q4')
+    return True
+
+def test_cancelled_ids_expire():
+    print("[TEST] Otkazivanja nepokrenutih upita se zaboravljaju...")
+
+    clock = FakeClock()
+    registry = QueryRegistry(kill=lambda config, thread_id: None, clock=clock)
+    assert registry.cancel('pending') == (True, "Upit će biti otkazan pre izvršavanja.")
+    try:
+        registry.register('pending', CONFIG, 1)
+        assert False, "otkazan upit ne sme da se pokrene"
+    except QueryCancelledError:
+        pass
+
+    # Posle CANCEL_TTL nepoznati identifikatori nestaju pri sledećem otkazivanju
+    for i in range(100):
+        registry.cancel(f"bogus-{i}")
+    assert registry.cancelled_count() == 101
+    clock.now = query_control.CANCEL_TTL + 1
+    registry.cancel('late')
+    assert registry.cancelled_count() == 1 and registry.is_cancelled('late')
+    assert not registry.is_cancelled('pending')
+
+    # Ni bez isteka vremena spisak ne raste preko MAX_CANCELLED
+    limit = query_control.MAX_CANCELLED
+    for i in range(limit + 50):
+        registry.cancel(f"flood-{i}")
+    assert registry.cancelled_count() == limit
+    assert registry.is_cancelled(f"flood-{limit + 49}") and not registry.is_cancelled('flood-0')
+
+    registry.forget(f"flood-{limit + 49}")
+    assert not registry.is_cancelled(f"flood-{limit + 49}")
+    print(f"   Pamti se najviše {limit} otkazivanja, {query_control.CANCEL_TTL:.0f}s")
+    return True
+
+def main():
+    print("*** BLBS AI Agent - Test otkazivanja upita ***")
+    print("=" * 45)
+
+    tests = [
+        ("KILL van lock-a", test_kill_outside_lock),
+        ("Istek otkazivanja", test_cancelled_ids_expire)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            print()
+            results.append((test_name, test_func(), None))
+        except Exception as e:
+            results.append((test_name, False, str(e) or type(e).__name__))
+
+    print()
+    print("=" * 45)
+    for test_name, success, error in results:
+        status = "PROSAO" if success else "NEUSPESNO"
+        print(f"{test_name:20} : {status}")
+        if error:
+            print(f"                     Greska: {error}")
+
+    total_passed = sum(1 for _, success, _ in results if success)
+    print(f"\nUkupno: {total_passed}/{len(results)} testova proslo")
+
+if __name__ == "__main__":
+    main()
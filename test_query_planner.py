@@ -0,0 +1,74 @@
+"""
+Test planiranja upita za AI izveštaje
+"""
+from database import query_planner
+
+
+def test_sample_plan():
+    print("[TEST] LIMIT pushdown...")
+
+    sample_sql, count_sql = query_planner.plan_sample("SELECT * FROM tickets;", 50)
+    assert sample_sql == "SELECT * FROM tickets\nLIMIT 50"
+    assert count_sql == "SELECT COUNT(*) FROM (\nSELECT * FROM tickets\n) AS blbs_count"
+
+    sample_sql, _ = query_planner.plan_sample("SELECT * FROM tickets LIMIT 10", 50)
+    assert sample_sql.startswith("SELECT * FROM (\n") and sample_sql.endswith("LIMIT 50")
+
+    sample_sql, _ = query_planner.plan_sample("SELECT * FROM tickets -- svi redovi", 5)
+    assert sample_sql == "SELECT * FROM tickets\nLIMIT 5"
+
+    # Komentar posle LIMIT-a ne sakriva postojeći LIMIT
+    sample_sql, _ = query_planner.plan_sample("SELECT * FROM tickets LIMIT 10 -- napomena", 50)
+    assert sample_sql == "SELECT * FROM (\nSELECT * FROM tickets LIMIT 10\n) AS blbs_sample LIMIT 50"
+    assert query_planner.has_trailing_limit("SELECT * FROM tickets LIMIT 10 # napomena\n")
+
+    # ';' ispred komentara ne sme da završi unutar podupita
+    sample_sql, count_sql = query_planner.plan_sample("SELECT 1; -- napomena", 5)
+    assert count_sql == "SELECT COUNT(*) FROM (\nSELECT 1\n) AS blbs_count"
+    assert query_planner.describe_query("SELECT 1 /* a */ ;\n-- b\n") == \
+        "SELECT * FROM (\nSELECT 1\n) AS blbs_meta LIMIT 0"
+    assert query_planner.clean_query("SELECT a/*x*/FROM t") == "SELECT a FROM t"
+    assert query_planner.clean_query("SELECT /*+ NO_ICP(t) */ ';' /* x */ FROM t -- y") == \
+        "SELECT /*+ NO_ICP(t) */ ';'  FROM t"
+    print(f"   Uzorak: {sample_sql!r}")
+    return True
+
+def test_non_select_is_not_planned():
+    print("[TEST] Upiti koji se ne obmotavaju...")
+
+    assert query_planner.plan_sample("SHOW TABLES", 50) is None
+    assert query_planner.plan_sample("SELECT * FROM tickets INTO OUTFILE '/tmp/x'", 50) is None
+    assert query_planner.is_select("/* izveštaj */ WITH t AS (SELECT 1) SELECT * FROM t")
+    print("   SHOW/INTO OUTFILE: preskočeni")
+    return True
+
+def main():
+    print("*** BLBS AI Agent - Test planiranja upita ***")
+    print("=" * 45)
+
+    tests = [
+        ("LIMIT pushdown", test_sample_plan),
+        ("Ne-SELECT upiti", test_non_select_is_not_planned)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            print()
+            results.append((test_name, test_func(), None))
+        except Exception as e:
+            results.append((test_name, False, str(e) or type(e).__name__))
+
+    print()
+    print("=" * 45)
+    for test_name, success, error in results:
+        status = "PROSAO" if success else "NEUSPESNO"
+        print(f"{test_name:20} : {status}")
+        if error:
+            print(f"                     Greska: {error}")
+
+    total_passed = sum(1 for _, success, _ in results if success)
+    print(f"\nUkupno: {total_passed}/{len(results)} testova proslo")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Test statistike upita po otisku (otisci, percentili, više niti, BLBSConnector)
+"""
+import threading
+
+from database.blbs_connector import BLBSConnector
+from database.mysql_standin import MySQLStandInServer
+from database.query_stats import QueryStats, fingerprint
+
+
+SETUP_SQL = """
+CREATE TABLE tickets (id INTEGER PRIMARY KEY, line TEXT, price REAL);
+WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 300)
+INSERT INTO tickets SELECT i, 'L' || (i % 3), i * 0.5 FROM n;
+"""
+
+
+def test_fingerprint_and_percentiles():
+    print("[TEST] Otisci upita i percentili...")
+
+    a = fingerprint("SELECT * FROM tickets  WHERE id = 42 AND line = 'L1' -- komentar")
+    b = fingerprint("select * from tickets where id = 7 and line = 'it''s'")
+    assert a == b == "select * from tickets where id = ? and line = ?"
+    assert fingerprint("SELECT * FROM t1 WHERE id IN (1, 2, 3)") == "select * from t1 where id in (?+)"
+    assert fingerprint("INSERT INTO t1 VALUES (1, 'a'), (2, 'b')") == "insert into t1 values (?+)"
+    assert fingerprint("SELECT `col 1` FROM `t2` WHERE x = %s") == "select `col 1` from `t2` where x = ?"
+
+    stats = QueryStats()
+    # 1..1000 ms - p50 ~500, p95 ~950, p99 ~990 (korpe su široke 10%)
+    for ms in range(1, 1001):
+        stats.record(f"SELECT * FROM tickets WHERE id = {ms}", ms / 1000.0, rows=2, size=10)
+    stats.record("SELECT * FROM tickets WHERE id = 0", 0, error=True)
+    item = stats.snapshot()[0]
+    assert item['count'] == 1001 and item['errors'] == 1 and item['rows'] == 2000
+    for key, expected in (('p50_ms', 500), ('p95_ms', 950), ('p99_ms', 990)):
+        assert abs(item[key] - expected) / expected < 0.06, (key, item[key])
+    assert item['max_ms'] == 1000.0
+    print(f"   p50={item['p50_ms']} p95={item['p95_ms']} p99={item['p99_ms']}")
+    return True
+
+def test_threads_and_connector():
+    print("[TEST] Upis iz više niti i merenje u BLBSConnector-u...")
+
+    stats = QueryStats(max_fingerprints=3)
+
+    def worker(offset):
+        for i in range(500):
+            stats.record(f"SELECT {offset + i}", 0.001)
+
+    threads = [threading.Thread(target=worker, args=(n * 1000,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # Delovi završenih niti se pretapaju u zajednički zbir i ne gube se
+    assert stats.snapshot()[0]['count'] == 4000
+    assert stats.snapshot()[0]['count'] == 4000
+
+    with MySQLStandInServer(setup_sql=SETUP_SQL) as server:
+        connector = BLBSConnector(server.config(), stats=stats)
+        try:
+            for i in range(1, 6):
+                connector.execute("SELECT * FROM tickets WHERE id > %s", (i,))
+            streamed = sum(len(rows) for rows in connector.iter_query("SELECT line FROM tickets", batch_size=100))
+            connector.execute("SELECT * FROM missing_table")
+            connector.execute("SELECT 1 UNION SELECT 2")
+            connector.execute("SELECT 3 UNION SELECT 4")
+        finally:
+            connector.disconnect()
+
+    by_fingerprint = {item['fingerprint']: item for item in stats.snapshot()}
+    assert by_fingerprint["select * from tickets where id > ?"]['count'] == 5
+    assert by_fingerprint["select line from tickets"]['rows'] == streamed == 300
+    assert by_fingerprint["select line from tickets"]['bytes'] > 0
+    assert by_fingerprint["select * from missing_table"]['errors'] == 1
+    # Preko ograničenja otisaka (po niti) - sve ide pod "<ostali upiti>"
+    assert by_fingerprint['<ostali upiti>']['count'] == 2
+
+    stats.reset()
+    assert stats.snapshot() == []
+    return True
+
+def main():
+    print("*** BLBS AI Agent - Test statistike upita ***")
+    print("=" * 45)
+
+    tests = [
+        ("Otisci i percentili", test_fingerprint_and_percentiles),
+        ("Niti i konektor", test_threads_and_connector)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            print()
+            results.append((test_name, test_func(), None))
+        except Exception as e:
+            results.append((test_name, False, str(e) or type(e).__name__))
+
+    print()
+    print("=" * 45)
+    for test_name, success, error in results:
+        status = "PROSAO" if success else "NEUSPESNO"
+        print(f"{test_name:20} : {status}")
+        if error:
+            print(f"                     Greska: {error}")
+
+    total_passed = sum(1 for _, success, _ in results if success)
+    print(f"\nUkupno: {total_passed}/{len(results)} testova proslo")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Test ograničenja redova i bajtova strimovanog rezultata
+"""
+from database.blbs_connector import BLBSConnector
+from database.connection_pool import ConnectionPool
+from database.mysql_standin import MySQLStandInServer
+from database.resource_governor import LimitPolicy, ResultGovernor, ResultLimits
+from database.result_cache import ResultCache
+
+
+SETUP_SQL = """
+CREATE TABLE tickets (id INTEGER PRIMARY KEY, line TEXT, price REAL);
+WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 2500)
+INSERT INTO tickets SELECT i, 'Linija ' || (i % 7), i * 0.5 FROM n;
+"""
+
+
+def test_policy_and_governor():
+    print("[TEST] Ograničenja po ruti/korisniku i brojanje paketa...")
+
+    policy = LimitPolicy(default=ResultLimits(max_rows=1000, max_bytes=10_000),
+                         routes={'generate_report': ResultLimits(max_rows=500)},
+                         users={'analiticar': ResultLimits(max_rows=5000, max_bytes=2000)})
+    assert policy.limits_for(None, 'export').to_dict() == {'max_rows': 1000, 'max_bytes': 10_000}
+    assert policy.limits_for(None, 'generate_report').to_dict() == {'max_rows': 500, 'max_bytes': None}
+    # Korisnik ne može da olabavi ograničenje rute, samo da ga pooštri
+    assert policy.limits_for('analiticar', 'generate_report').to_dict() == {'max_rows': 500, 'max_bytes': 2000}
+
+    governor = ResultGovernor(ResultLimits(max_rows=25))
+    assert len(governor.admit([(i,) for i in range(10)])) == 10 and not governor.exceeded
+    assert governor.batch_size(100) == 16
+    assert len(governor.admit([(i,) for i in range(16)])) == 15
+    assert governor.exceeded and governor.rows == 25
+
+    governor = ResultGovernor(ResultLimits(max_bytes=1000))
+    rows = governor.admit([('x' * 92,)] * 50)
+    assert governor.exceeded and len(rows) == 10 and governor.bytes <= 1000
+    return True
+
+def test_connector_truncates_and_kills():
+    print("[TEST] Konektor skraćuje rezultat i prekida upit na serveru...")
+
+    with MySQLStandInServer(setup_sql=SETUP_SQL) as server:
+        pool = ConnectionPool(server.config(), max_size=2)
+        cache = ResultCache(ttl=60)
+        try:
+            connector = BLBSConnector(server.config(), pool=pool, cache=cache,
+                                      limits=ResultLimits(max_rows=250))
+            streamed = sum(len(rows) for rows in connector.iter_query("SELECT * FROM tickets", batch_size=100))
+            assert streamed == 250 and '250' in connector.truncated
+            assert any(q.upper().startswith('KILL QUERY') for q in server.queries)
+            # Konekcija prekinutog upita se ne vraća u pool
+            assert pool.stats() == {'size': 0, 'idle': 0, 'in_use': 0, 'max_size': 2}
+
+            rows = connector.execute("SELECT * FROM tickets")
+            assert len(rows) == 250 and cache.stats()['entries'] == 0
+            # Uzorak (LIMIT) i COUNT(*) ostaju u ograničenju - ukupan broj je tačan
+            sample, total = connector.fetch_sample("SELECT * FROM tickets", 20)
+            assert len(sample) == 20 and total == 2500
+            # Skraćivanje prethodnog poziva ne prelazi na sledeći (ni u odluku o keširanju)
+            assert connector.truncated is None and cache.stats()['entries'] == 1
+            results = connector.execute_batch(["SELECT * FROM tickets", "SELECT COUNT(*) FROM tickets"])
+            assert [bool(r['truncated']) for r in results] == [True, False] and '250' in connector.truncated
+            assert connector.execute("SELECT * FROM tickets WHERE id <= 10") is not None
+            assert connector.truncated is None
+            connector.disconnect()
+
+            # Rezultat unutar ograničenja se ne skraćuje i kešira se normalno
+            connector = BLBSConnector(server.config(), pool=pool, cache=cache,
+                                      limits=ResultLimits(max_rows=5000, max_bytes=10 * 1024 * 1024))
+            rows = connector.execute("SELECT * FROM tickets")
+            connector.disconnect()
+            assert len(rows) == 2500 and connector.truncated is None
+            assert cache.stats()['entries'] == 4
+        finally:
+            pool.close()
+    print(f"   Skraćeno na {streamed} redova")
+    return True
+
+def main():
+    print("*** BLBS AI Agent - Test ograničenja rezultata ***")
+    print("=" * 45)
+
+    tests = [
+        ("Politika i brojač", test_policy_and_governor),
+        ("Skraćivanje upita", test_connector_truncates_and_kills)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            print()
+            results.append((test_name, test_func(), None))
+        except Exception as e:
+            results.append((test_name, False, str(e) or type(e).__name__))
+
+    print()
+    print("=" * 45)
+    for test_name, success, error in results:
+        status = "PROSAO" if success else "NEUSPESNO"
+        print(f"{test_name:20} : {status}")
+        if error:
+            print(f"                     Greska: {error}")
+
+    total_passed = sum(1 for _, success, _ in results if success)
+    print(f"\nUkupno: {total_passed}/{len(results)} testova proslo")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Test bafera rezultata koji se preliva na disk (mmap) sa slučajnim pristupom
+"""
+import datetime
+import decimal
+
+from database.blbs_connector import BLBSConnector
+from database.export import iter_buffer, iter_csv
+from database.mysql_standin import MySQLStandInServer
+from database.result_buffer import BufferRegistry, ResultBuffer, buffer_query
+
+
+SETUP_SQL = """
+CREATE TABLE tickets (id INTEGER PRIMARY KEY, line TEXT, price REAL, note TEXT);
+WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 5000)
+INSERT INTO tickets SELECT i, 'L' || (i % 7), i * 0.25, CASE WHEN i % 3 = 0 THEN NULL ELSE 'napomena ' || i END FROM n;
+"""
+
+
+def test_spill_and_random_access():
+    print("[TEST] Prelivanje na disk, tipovi vrednosti i slučajan pristup...")
+
+    rows = [(i, i * 0.5, f"red {i}", None, decimal.Decimal('12.30') + i, datetime.datetime(2024, 5, 1, 8, i % 60),
+             datetime.date(2024, 5, 1 + i % 28), datetime.timedelta(hours=i, microseconds=7),
+             b'\x00\xff', 2 ** 64 - i, 'ćčž' * (i % 3))
+            for i in range(1000)]
+    with ResultBuffer(memory_bytes=2000) as buffer:
+        for start in range(0, len(rows), 64):
+            buffer.extend(rows[start:start + 64])
+        stats = buffer.stats()
+        assert buffer.spilled and 0 < stats['memory_rows'] < 1000 and stats['disk_rows'] + stats['memory_rows'] == 1000
+
+        assert list(buffer) == rows
+        # Drugi prolaz i obrnut redosled čitanja preko indeksa
+        assert list(buffer.iter_rows(500)) == rows[500:]
+        assert all(buffer[i] == rows[i] for i in range(999, -1, -37)) and buffer[-1] == rows[-1]
+        assert sum(len(batch) for batch in buffer.iter_batches(300)) == 1000
+
+        # Dopisivanje posle čitanja (ponovno mapiranje fajla)
+        buffer.extend([rows[0]])
+        assert len(buffer) == 1001 and buffer[1000] == rows[0]
+    try:
+        buffer[0]
+        assert False, "zatvoren bafer ne sme da vraća redove"
+    except IndexError:
+        pass
+    return True
+
+def test_buffered_query_stats_and_export():
+    print("[TEST] Ceo rezultat upita: statistika i izvoz bez ponovnog upita...")
+
+    with MySQLStandInServer(setup_sql=SETUP_SQL) as server:
+        connector = BLBSConnector(server.config())
+        try:
+            assert buffer_query(connector, "DELETE FROM tickets") is None
+            buffer = buffer_query(connector, "SELECT * FROM tickets ORDER BY id", memory_bytes=16 * 1024,
+                                  batch_size=500)
+            executed = len(server.queries)
+            with buffer:
+                assert len(buffer) == 5000 and buffer.spilled
+                assert buffer.column_names == ['id', 'line', 'price', 'note']
+                summary = buffer.summary()
+                assert summary['id'] == {'type': 'int', 'nulls': 0, 'min': 1, 'max': 5000, 'avg': 2500.5}
+                assert summary['line']['distinct'] == 7 and summary['note']['nulls'] == 1666
+
+                exported = "".join(iter_buffer(buffer, 'csv'))
+                assert len(server.queries) == executed
+                assert exported == "".join(iter_csv(connector, "SELECT * FROM tickets ORDER BY id"))
+                assert buffer[4321] == (4322, 'L3', 1080.5, 'napomena 4322')
+
+            # Profil predaje bafer izvozu: isti upit (i drugačije napisan) ga preuzima jednom
+            clock = [0.0]
+            registry = BufferRegistry(ttl=60, max_buffers=2, clock=lambda: clock[0])
+            profiled = buffer_query(connector, "SELECT * FROM tickets ORDER BY id", memory_bytes=16 * 1024)
+            profile_id = registry.add(profiled, "SELECT * FROM tickets ORDER BY id")
+            assert registry.take(profile_id, "SELECT id FROM tickets") is None and len(registry) == 1
+            taken = registry.take(profile_id, "select *  from tickets order by id;")
+            assert taken is profiled and registry.take(profile_id, "SELECT * FROM tickets ORDER BY id") is None
+            with taken:
+                assert "".join(iter_buffer(taken, 'csv')) == exported
+
+            # Nepreuzeti baferi se zatvaraju posle TTL-a ili kada ih ima previše
+            buffers = [buffer_query(connector, f"SELECT * FROM tickets WHERE id <= {n}") for n in (10, 20, 30)]
+            ids = [registry.add(b, f"SELECT * FROM tickets WHERE id <= {n}") for b, n in zip(buffers, (10, 20, 30))]
+            assert len(registry) == 2 and len(buffers[0]) == 0
+            clock[0] = 61
+            assert registry.take(ids[2], "SELECT * FROM tickets WHERE id <= 30") is None
+            assert len(registry) == 0 and len(buffers[2]) == 0
+        finally:
+            connector.disconnect()
+    return True
+
+def main():
+    print("*** BLBS AI Agent - Test bafera rezultata ***")
+    print("=" * 45)
+
+    tests = [
+        ("Prelivanje na disk", test_spill_and_random_access),
+        ("Statistika i izvoz", test_buffered_query_stats_and_export)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            print()
+            results.append((test_name, test_func(), None))
+        except Exception as e:
+            results.append((test_name, False, str(e) or type(e).__name__))
+
+    print()
+    print("=" * 45)
+    for test_name, success, error in results:
+        status = "PROSAO" if success else "NEUSPESNO"
+        print(f"{test_name:20} : {status}")
+        if error:
+            print(f"                     Greska: {error}")
+
+    total_passed = sum(1 for _, success, _ in results if success)
+    print(f"\nUkupno: {total_passed}/{len(results)} testova proslo")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Test keša rezultata upita
+"""
+import time
+
+from database.result_cache import ResultCache, canonical_sql
+
+
+def test_canonical_sql():
+    print("[TEST] Kanonski SQL...")
+
+    variants = [
+        "SELECT * FROM tickets",
+        "SELECT *\n  FROM   tickets;",
+        "SELECT * /* svi */ FROM tickets -- komentar",
+        "# jutarnji izveštaj\nSELECT * FROM tickets",
+    ]
+    forms = {canonical_sql(q) for q in variants}
+    assert forms == {"SELECT * FROM tickets"}
+
+    # Literali i hint-ovi ostaju netaknuti
+    assert canonical_sql("SELECT 'a  -- b'  FROM t") == "SELECT 'a  -- b' FROM t"
+    assert canonical_sql("SELECT /*+ MAX_EXECUTION_TIME(5) */ 1") == "SELECT /*+ MAX_EXECUTION_TIME(5) */ 1"
+    print(f"   Oblik: {forms.pop()}")
+    return True
+
+def test_ttl_and_counters():
+    print("[TEST] TTL i brojači...")
+
+    cache = ResultCache(ttl=0.05)
+    key = cache.make_key('blbs', "SELECT 1")
+    assert cache.get_or_load(key, lambda: ((1,),)) == ((1,),)
+    assert cache.get_or_load(key, lambda: ((2,),)) == ((1,),)
+    time.sleep(0.1)
+    assert cache.get(key) is None
+
+    stats = cache.stats()
+    assert stats['hits'] == 1 and stats['misses'] == 2 and stats['expirations'] == 1
+    print(f"   Stanje: {stats}")
+    return True
+
+def test_lru_eviction_by_size():
+    print("[TEST] LRU izbacivanje po veličini...")
+
+    cache = ResultCache(ttl=60, max_bytes=300, max_entry_bytes=300)
+    for name in ('a', 'b', 'c'):
+        cache.put(name, name, size=100)
+    cache.get('a')
+    cache.put('d', 'd', size=100)
+
+    assert cache.get('b') is None and cache.get('a') == 'a'
+    assert cache.stats()['evictions'] == 1 and cache.stats()['bytes'] == 300
+    print(f"   Stanje: {cache.stats()}")
+    return True
+
+def main():
+    print("*** BLBS AI Agent - Test keša rezultata ***")
+    print("=" * 45)
+
+    tests = [
+        ("Kanonski SQL", test_canonical_sql),
+        ("TTL i brojači", test_ttl_and_counters),
+        ("LRU po veličini", test_lru_eviction_by_size)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            print()
+            results.append((test_name, test_func(), None))
+        except Exception as e:
+            results.append((test_name, False, str(e) or type(e).__name__))
+
+    print()
+    print("=" * 45)
+    for test_name, success, error in results:
+        status = "PROSAO" if success else "NEUSPESNO"
+        print(f"{test_name:20} : {status}")
+        if error:
+            print(f"                     Greska: {error}")
+
+    total_passed = sum(1 for _, success, _ in results if success)
+    print(f"\nUkupno: {total_passed}/{len(results)} testova proslo")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Test otiska rezultata i ponovne upotrebe AI izveštaja nad nepromenjenim podacima
+"""
+from database.aggregation_planner import fetch_report_data
+from database.blbs_connector import BLBSConnector
+from database.mysql_standin import MySQLStandInServer
+from database.result_cache import ResultCache
+from database.result_digest import ReportMemo, ResultDigest
+
+
+SETUP_SQL = """
+CREATE TABLE tickets (id INTEGER PRIMARY KEY, line TEXT, price REAL);
+WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 300)
+INSERT INTO tickets SELECT i, 'L' || (i % 4), i * 0.5 FROM n;
+"""
+
+REPORT_QUERY = "SELECT line, COUNT(*) AS cnt, SUM(price) AS total FROM tickets GROUP BY line ORDER BY line"
+
+
+def report_hash(connector, query: str, report_type: str = 'osnovni') -> str:
+    digest = connector.start_digest()
+    assert fetch_report_data(connector, query, report_type, 50) is not None
+    return digest.hexdigest()
+
+
+def test_digest_is_stable():
+    print("[TEST] Otisak ne zavisi od paketa, keša i načina čitanja...")
+
+    rows = [(i, f"L{i % 3}", i * 1.5) for i in range(10)]
+    whole = ResultDigest().update(rows).hexdigest()
+    assert ResultDigest().update(rows[:3]).update(rows[3:]).hexdigest() == whole
+    assert ResultDigest().update(rows[:9]).hexdigest() != whole
+    # 1 i '1' nisu isti podatak
+    assert ResultDigest().update([(1,)]).hexdigest() != ResultDigest().update([('1',)]).hexdigest()
+
+    with MySQLStandInServer(setup_sql=SETUP_SQL) as server:
+        connector = BLBSConnector(server.config(), cache=ResultCache(ttl=60))
+        try:
+            first = report_hash(connector, REPORT_QUERY)
+            # Drugi put iz keša - isti otisak
+            assert report_hash(connector, REPORT_QUERY) == first
+            assert connector.cache.stats()['hits'] >= 1
+
+            digest = connector.start_digest()
+            streamed = sum(len(rows) for rows in connector.iter_query("SELECT * FROM tickets", batch_size=7))
+            assert streamed == 300 and digest.rows == 300
+            digest_all = connector.start_digest()
+            assert len(connector.execute("SELECT * FROM tickets", use_cache=False)) == 300
+            assert digest_all.hexdigest() == digest.hexdigest()
+        finally:
+            connector.disconnect()
+    return True
+
+def test_report_reused_until_data_changes():
+    print("[TEST] Sačuvan izveštaj važi dok se podaci ne promene...")
+
+    memo = ReportMemo(max_entries=2)
+    with MySQLStandInServer(setup_sql=SETUP_SQL) as server:
+        connector = BLBSConnector(server.config())
+        try:
+            content_hash = report_hash(connector, REPORT_QUERY, 'detaljni')
+            assert memo.lookup(REPORT_QUERY, 'detaljni', content_hash) is None
+            memo.store(REPORT_QUERY, 'detaljni', content_hash, "=== AI IZVEŠTAJ ===")
+
+            # Isti upit (drugačije formatiran) nad istim podacima
+            same = report_hash(connector, REPORT_QUERY.replace(" FROM", "\n  FROM"), 'detaljni')
+            entry = memo.lookup(REPORT_QUERY.replace(" FROM", "\n  FROM"), 'detaljni', same)
+            assert entry['report'] == "=== AI IZVEŠTAJ ===" and entry['hits'] == 1
+            assert memo.lookup(REPORT_QUERY, 'osnovni', same) is None
+
+            server.execute_script("UPDATE tickets SET price = price + 1 WHERE id = 17;")
+            changed = report_hash(connector, REPORT_QUERY, 'detaljni')
+            assert changed != content_hash and memo.lookup(REPORT_QUERY, 'detaljni', changed) is None
+        finally:
+            connector.disconnect()
+
+    memo.store("SELECT 2", 'osnovni', 'b', 'drugi')
+    memo.store("SELECT 3", 'osnovni', 'c', 'treći')
+    assert memo.stats()['entries'] == 2 and memo.lookup(REPORT_QUERY, 'detaljni', content_hash) is None
+    return True
+
+def main():
+    print("*** BLBS AI Agent - Test otiska rezultata ***")
+    print("=" * 45)
+
+    tests = [
+        ("Stabilan otisak", test_digest_is_stable),
+        ("Ponovna upotreba", test_report_reused_until_data_changes)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            print()
+            results.append((test_name, test_func(), None))
+        except Exception as e:
+            results.append((test_name, False, str(e) or type(e).__name__))
+
+    print()
+    print("=" * 45)
+    for test_name, success, error in results:
+        status = "PROSAO" if success else "NEUSPESNO"
+        print(f"{test_name:20} : {status}")
+        if error:
+            print(f"                     Greska: {error}")
+
+    total_passed = sum(1 for _, success, _ in results if success)
+    print(f"\nUkupno: {total_passed}/{len(results)} testova proslo")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Test materijalizovanih sažetaka (inkrementalno osvežavanje i prepisivanje upita)
+"""
+import os
+import sqlite3
+import tempfile
+
+from database.blbs_connector import BLBSConnector
+from database.mysql_standin import MySQLStandInServer
+from database.rollups import RollupDefinition, RollupStore
+
+
+SETUP_SQL = """
+CREATE TABLE tickets (id INTEGER PRIMARY KEY, created_at TEXT, line TEXT, price REAL);
+WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 3000)
+INSERT INTO tickets SELECT i, datetime('2024-01-01', '+' || (i * 23) || ' minutes'), 'L' || (i % 4),
+                           CASE WHEN i % 10 = 0 THEN NULL ELSE i * 0.5 END FROM n;
+UPDATE tickets SET created_at = NULL WHERE id % 97 = 0;
+"""
+
+NEW_ROWS_SQL = """
+WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 40)
+INSERT INTO tickets SELECT 3000 + i, datetime('2024-03-01', '+' || i || ' minutes'), 'L1', 2.5 FROM n;
+"""
+
+TREND_QUERIES = [
+    "SELECT DATE(created_at) AS day, line, COUNT(*) AS cnt, SUM(price) AS total, AVG(price) FROM tickets "
+    "WHERE line IN ('L1', 'L2') AND created_at >= '2024-01-10' AND created_at < '2024-02-01' "
+    "GROUP BY day, line ORDER BY day, line",
+    "SELECT DATE_FORMAT(created_at, '%Y-%m') AS month, COUNT(*) FROM tickets GROUP BY 1 ORDER BY 1 DESC",
+    "SELECT HOUR(created_at) AS h, COUNT(*), MAX(price) FROM tickets GROUP BY h ORDER BY h",
+    "SELECT line, COUNT(price), MIN(price) FROM tickets GROUP BY line ORDER BY line",
+    # Bez vremenske korpe i filtera - i redovi bez vremena (NULL) moraju da se vide
+    "SELECT COUNT(*), SUM(price) FROM tickets",
+    "SELECT DATE(created_at), COUNT(*) FROM tickets WHERE line = 'L2' GROUP BY 1 ORDER BY 1 LIMIT 3",
+]
+
+
+def rounded(rows):
+    return [tuple(round(v, 6) if isinstance(v, float) else v for v in row) for row in rows]
+
+
+def test_incremental_refresh_and_rewrite():
+    print("[TEST] Inkrementalno osvežavanje i prepisani upiti daju iste rezultate...")
+
+    with tempfile.TemporaryDirectory() as tmp, MySQLStandInServer(setup_sql=SETUP_SQL) as server:
+        store = RollupStore(os.path.join(tmp, 'rollups.sqlite3'))
+        store.define(RollupDefinition('tickets_hourly', 'tickets', 'created_at', 'hour', ['line'], ['price']))
+        connector = BLBSConnector(server.config())
+        local = store.connector()
+        try:
+            assert store.refresh(connector, 'tickets_hourly', step=700) == 3000
+            server.execute_script(NEW_ROWS_SQL)
+            # Drugo osvežavanje čita samo nove redove iza oznake
+            before = len(server.queries)
+            assert store.refresh(connector, 'tickets_hourly') == 40
+            assert all('> 3000' in q or 'MAX(' in q for q in server.queries[before:] if 'tickets' in q)
+            assert store.status()[0]['watermark'] == 3040
+
+            for query in TREND_QUERIES:
+                definition, rewritten = store.rewrite(query)
+                assert definition.name == 'tickets_hourly' and 'rollup_tickets_hourly' in rewritten
+                expected = connector.execute(query, use_cache=False)
+                assert rounded(local.execute(rewritten)) == rounded(expected), query
+
+            # MySQL (_ci kolacija) ne razlikuje velika i mala slova - ni prepisani upit
+            lower = store.rewrite_fresh(connector, "SELECT line, COUNT(*) FROM tickets WHERE line = 'l1' GROUP BY line")
+            expected = connector.execute("SELECT line, COUNT(*) FROM tickets WHERE line = 'L1' GROUP BY line",
+                                         use_cache=False)
+            assert list(local.execute(lower[1])) == list(expected)
+            # Literal druge vrste od sačuvanih vrednosti dimenzije se ne prepisuje
+            store.define(RollupDefinition('tickets_by_price', 'tickets', 'created_at', 'month', ['price']))
+            assert store.refresh(connector, 'tickets_by_price') == 3040
+            assert store.rewrite("SELECT price, COUNT(*) FROM tickets WHERE price = 2.5 GROUP BY price") is not None
+            for query in ["SELECT price, COUNT(*) FROM tickets WHERE price = '2.5' GROUP BY price",
+                          "SELECT line, COUNT(*) FROM tickets WHERE line = 1 GROUP BY line",
+                          "SELECT line, COUNT(*) FROM tickets WHERE line IN ('L1', 2) GROUP BY line",
+                          "SELECT line, COUNT(*) FROM tickets WHERE line = 'L1 ' GROUP BY line"]:
+                assert store.rewrite(query) is None, query
+            store.drop('tickets_by_price')
+
+            # Druga baza (promenjena konfiguracija) ne sme da se sabira u stare sažetke
+            with MySQLStandInServer(setup_sql=SETUP_SQL.replace('i < 3000', 'i < 50')) as other:
+                switched = BLBSConnector(other.config())
+                try:
+                    assert store.refresh(switched, 'tickets_hourly') == 50
+                    status = store.status()[0]
+                    assert status['source'].endswith(f":{other.config()['port']}/{other.config()['database']}")
+                    assert status['watermark'] == 50 and status['rows_folded'] == 50
+                    query = "SELECT line, COUNT(*) FROM tickets GROUP BY line ORDER BY line"
+                    expected = switched.execute(query, use_cache=False)
+                    assert list(local.execute(store.rewrite(query)[1])) == list(expected)
+                finally:
+                    switched.disconnect()
+
+            # Sažeci starijeg formata (bez NULL korpe) se pune ispočetka
+            with sqlite3.connect(store.path) as db:
+                db.execute("PRAGMA user_version = 1")
+            reopened = RollupStore(store.path)
+            assert [(s['watermark'], s['rows_folded'], s['summary_rows']) for s in reopened.status()] == [(None, 0, 0)]
+        finally:
+            local.disconnect()
+            connector.disconnect()
+    return True
+
+def test_rewrite_rules():
+    print("[TEST] Pravila prepisivanja (granulacija, filteri, izbor rollup-a)...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = RollupStore(os.path.join(tmp, 'rollups.sqlite3'))
+        assert store.rewrite("SELECT COUNT(*) FROM tickets") is None
+        store.define(RollupDefinition('by_day', 'tickets', 'created_at', 'day', ['line'], ['price']))
+        store.define(RollupDefinition('by_month', 'tickets', 'created_at', 'month'))
+
+        # Mesečni upit bez dimenzija ide na najgrublji rollup
+        assert store.rewrite("SELECT DATE_FORMAT(created_at, '%Y-%m'), COUNT(*) FROM tickets GROUP BY 1")[0].name \
+            == 'by_month'
+        assert store.rewrite("SELECT line, COUNT(*) FROM tickets GROUP BY line")[0].name == 'by_day'
+        for query in [
+            "SELECT HOUR(created_at), COUNT(*) FROM tickets GROUP BY 1",                        # finije od dana
+            "SELECT DATE(created_at), COUNT(*) FROM tickets WHERE created_at >= '2024-01-10 12:30:00' GROUP BY 1",
+            "SELECT DATE(created_at), COUNT(*) FROM tickets WHERE created_at <= '2024-01-10' GROUP BY 1",
+            "SELECT id, COUNT(*) FROM tickets GROUP BY id",
+            "SELECT COUNT(DISTINCT line) FROM tickets",
+            "SELECT line, COUNT(*) FROM tickets WHERE line = 'a' OR line = 'b' GROUP BY line",
+            "SELECT line, COUNT(*) FROM tickets",
+            "SELECT line, COUNT(*) FROM routes GROUP BY line",
+        ]:
+            assert store.rewrite(query) is None, query
+
+        # Izmenjena definicija briše stare sažetke
+        store.define(RollupDefinition('by_day', 'tickets', 'created_at', 'day', ['line']))
+        assert store.rewrite("SELECT line, SUM(price) FROM tickets GROUP BY line") is None
+    return True
+
+def main():
+    print("*** BLBS AI Agent - Test materijalizovanih sažetaka ***")
+    print("=" * 45)
+
+    tests = [
+        ("Osvežavanje", test_incremental_refresh_and_rewrite),
+        ("Pravila", test_rewrite_rules)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            print()
+            results.append((test_name, test_func(), None))
+        except Exception as e:
+            results.append((test_name, False, str(e) or type(e).__name__))
+
+    print()
+    print("=" * 45)
+    for test_name, success, error in results:
+        status = "PROSAO" if success else "NEUSPESNO"
+        print(f"{test_name:20} : {status}")
+        if error:
+            print(f"                     Greska: {error}")
+
+    total_passed = sum(1 for _, success, _ in results if success)
+    print(f"\nUkupno: {total_passed}/{len(results)} testova proslo")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Test kataloga šeme bez prave MySQL baze
+"""
+import os
+import tempfile
+
+from database.schema_catalog import SchemaCatalog
+
+
+class FakeConnector:
+    """Vraća unapred pripremljene information_schema redove i broji upite"""
+
+    def __init__(self):
+        self.config = {'database': 'blbs'}
+        self.queries = []
+        self.tables = [('tickets', 'BASE TABLE', 1000, '2024-01-01 00:00:00', '2024-03-01 10:00:00'),
+                       ('lines', 'BASE TABLE', 12, '2024-01-01 00:00:00', None)]
+
+    def execute(self, query, params=None, use_cache=True):
+        self.queries.append((query.split()[-1], params))
+        if 'information_schema.TABLES' in query:
+            return tuple(self.tables)
+        if 'information_schema.COLUMNS' in query:
+            return tuple(row for row in (('tickets', 'id', 'bigint', 'NO', 'PRI'),
+                                         ('tickets', 'line_id', 'int', 'YES', 'MUL'),
+                                         ('lines', 'id', 'int', 'NO', 'PRI')) if row[0] in params)
+        return tuple(row for row in (('tickets', 'PRIMARY', 0, 'id'),
+                                     ('tickets', 'idx_line', 1, 'line_id'),
+                                     ('lines', 'PRIMARY', 0, 'id')) if row[0] in params)
+
+
+def test_incremental_refresh():
+    print("[TEST] Inkrementalno osvežavanje...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'schema.json')
+        connector = FakeConnector()
+        catalog = SchemaCatalog(path)
+
+        assert sorted(catalog.refresh(connector)) == ['lines', 'tickets']
+        assert catalog.refresh(connector) == []
+
+        connector.tables[0] = ('tickets', 'BASE TABLE', 1500, '2024-01-01 00:00:00', '2024-03-02 08:00:00')
+        assert catalog.refresh(connector) == ['tickets']
+
+        # Novi objekat čita snimak sa diska bez upita ka bazi
+        reloaded = SchemaCatalog(path)
+        assert reloaded.table('tickets')['rows'] == 1500
+        assert reloaded.table('tickets')['indexes'][0] == {'name': 'PRIMARY', 'unique': True, 'columns': ['id']}
+        print(f"   Upita ka bazi: {len(connector.queries)}")
+    return True
+
+def test_prompt_and_autocomplete():
+    print("[TEST] Opis za prompt i autocomplete...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        catalog = SchemaCatalog(os.path.join(tmp, 'schema.json'))
+        catalog.refresh(FakeConnector())
+
+        query = "SELECT * FROM tickets t JOIN `blbs`.`lines` l ON l.id = t.line_id"
+        assert catalog.tables_in_query(query) == ['tickets', 'lines']
+        description = catalog.describe_query_tables(query)
+        assert "- tickets (~1000 redova): id bigint PK, line_id int" in description
+        assert catalog.complete('tickets.l') == ['tickets.line_id']
+        print(f"   Opis:\n{description}")
+    return True
+
+def main():
+    print("*** BLBS AI Agent - Test kataloga šeme ***")
+    print("=" * 45)
+
+    tests = [
+        ("Osvežavanje", test_incremental_refresh),
+        ("Prompt/autocomplete", test_prompt_and_autocomplete)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            print()
+            results.append((test_name, test_func(), None))
+        except Exception as e:
+            results.append((test_name, False, str(e) or type(e).__name__))
+
+    print()
+    print("=" * 45)
+    for test_name, success, error in results:
+        status = "PROSAO" if success else "NEUSPESNO"
+        print(f"{test_name:20} : {status}")
+        if error:
+            print(f"                     Greska: {error}")
+
+    total_passed = sum(1 for _, success, _ in results if success)
+    print(f"\nUkupno: {total_passed}/{len(results)} testova proslo")
+
+if __name__ == "__main__":
+    main()
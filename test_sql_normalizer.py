@@ -0,0 +1,100 @@
+"""
+Test tokenizacije i normalizacije SQL upita
+"""
+from database.query_stats import QueryStats
+from database.result_cache import ResultCache
+from database.result_digest import ReportMemo
+from database.sql_normalizer import canonical_sql, fingerprint, split_statements, validate_select
+
+
+def test_shared_keys():
+    print("[TEST] Zajednički ključevi keševa...")
+
+    variants = [
+        "SELECT line, COUNT(*) FROM tickets WHERE id IN (1, 2) GROUP BY line",
+        "select line,count(*)\n  from tickets -- komentar\n where id in (1,2)\ngroup  by line;",
+        "/* jutarnji */ Select line , Count( * ) From tickets Where id In ( 1 , 2 ) Group By line",
+    ]
+    forms = {canonical_sql(q) for q in variants}
+    assert forms == {"SELECT line, COUNT(*) FROM tickets WHERE id IN (1, 2) GROUP BY line"}
+
+    # Keš rezultata, keš AI izveštaja i statistika dele isti ključ za sve varijante
+    cache = ResultCache()
+    assert len({cache.make_key('blbs', q) for q in variants}) == 1
+    assert len({ReportMemo.make_key(q, 'osnovni') for q in variants}) == 1
+    stats = QueryStats()
+    for q in variants + ["SELECT line, COUNT(*) FROM tickets WHERE id IN (7, 8, 9) GROUP BY line"]:
+        stats.record(q, 1.0)
+    assert [item['fingerprint'] for item in stats.snapshot()] == \
+        ["select line, count(*) from tickets where id in (?+) group by line"]
+
+    # Literali, identifikatori u navodnicima i nerezervisane reči (mogu biti ime tabele) ostaju netaknuti
+    assert canonical_sql("select 'Select' from `From` where mode = -1") == "SELECT 'Select' FROM `From` WHERE mode = -1"
+    assert fingerprint("SELECT a - 1, -2 FROM t WHERE x = -3") == "select a - ?, ? from t where x = ?"
+    print(f"   Oblik: {forms.pop()}")
+    return True
+
+def test_validate_select():
+    print("[TEST] Provera SELECT upita...")
+
+    accepted = [
+        "SELECT * FROM tickets;",
+        "/* izveštaj */ WITH t AS (SELECT 1 AS x) SELECT * FROM t",
+        "(SELECT 1) UNION (SELECT 2)",
+        "SELECT ';' FROM t -- DELETE FROM t",
+    ]
+    for query in accepted:
+        assert validate_select(query) == (True, ""), query
+
+    rejected = [
+        "",
+        "-- samo komentar",
+        "SELECT 1; DROP TABLE tickets",
+        "DELETE FROM tickets",
+        "WITH t AS (SELECT 1) DELETE FROM tickets",
+        "SELECT * INTO OUTFILE '/tmp/x' FROM tickets",
+        "SELECT * FROM tickets FOR UPDATE",
+        "SELECT * FROM tickets LOCK IN SHARE MODE",
+        "SELECT /*!50000 SLEEP(1) */ 1",
+    ]
+    reasons = []
+    for query in rejected:
+        valid, reason = validate_select(query)
+        assert not valid and reason, query
+        reasons.append(reason)
+
+    assert split_statements("SELECT ';' FROM t; SELECT 2 -- a;b\n;") == ["SELECT ';' FROM t", "SELECT 2 -- a;b"]
+    assert split_statements(" ; -- prazno\n;") == []
+    print(f"   Odbijeno: {len(reasons)} upita, npr. {reasons[3]}")
+    return True
+
+def main():
+    print("*** BLBS AI Agent - Test normalizacije SQL-a ***")
+    print("=" * 45)
+
+    tests = [
+        ("Zajednički ključevi", test_shared_keys),
+        ("Provera SELECT-a", test_validate_select)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            print()
+            results.append((test_name, test_func(), None))
+        except Exception as e:
+            results.append((test_name, False, str(e) or type(e).__name__))
+
+    print()
+    print("=" * 45)
+    for test_name, success, error in results:
+        status = "PROSAO" if success else "NEUSPESNO"
+        print(f"{test_name:20} : {status}")
+        if error:
+            print(f"                     Greska: {error}")
+
+    total_passed = sum(1 for _, success, _ in results if success)
+    print(f"\nUkupno: {total_passed}/{len(results)} testova proslo")
+
+if __name__ == "__main__":
+    main()
@@ -4,13 +4,37 @@ Prošireni glavni UI sa tab-ovima za BLBS AI Agent
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext, filedialog
 import threading
+import time
+import uuid
 from config.config_manager import ConfigManager
 from config.vertex_config_manager import VertexConfigManager
 from database.blbs_connector import BLBSConnector
+from database.connection_pool import get_pool, close_pools
+from database.circuit_breaker import OPEN, breaker_status, format_breakers, reset_breakers
+from database.result_cache import ResultCache
+from database.query_control import query_registry
+from database.aggregation_planner import fetch_report_data, format_summary
+from database.schema_catalog import SchemaCatalog
+from database.cost_guard import QueryCostGuard, format_estimate
+from database.local_sync import LocalStore
+from database.rollups import RollupStore
+from database.columnar_store import ColumnarMirror
+from database.export import export_to_file
+from database.query_stats import format_stats, query_stats
+from database.result_digest import ReportMemo
+from database.sql_normalizer import validate_select
 from ai.vertex_ai_manager import VertexAIManager
 
 
 class BLBSTabbedMainWindow:
+    # Vremenski budžet za SQL upit izveštaja (sekunde)
+    REPORT_QUERY_TIMEOUT = 120
+    # Budžet procenjenih pregledanih redova (EXPLAIN) i šta se radi sa preskupim upitom ('sample' ili 'refuse')
+    REPORT_ROW_BUDGET = 5_000_000
+    REPORT_OVER_BUDGET_ACTION = 'sample'
+    # Profil konekcije za izveštaje i izvoz: kompresija (ako je drajver podržava) i tekst umesto datetime/Decimal
+    REPORT_CONNECTION_PROFILE = 'wan_lean'
+    
     def __init__(self):
         self.root = tk.Tk()
         self.root.title("BLBS AI Agent - Proširena verzija")
@@ -21,6 +45,15 @@ class BLBSTabbedMainWindow:
         self.config_manager = ConfigManager()
         self.vertex_config_manager = VertexConfigManager()
         self.vertex_ai_manager = None
+        self.result_cache = ResultCache(ttl=120)
+        self.schema_catalog = SchemaCatalog()
+        self.local_store = LocalStore()
+        self.rollup_store = RollupStore()
+        self.columnar_mirror = ColumnarMirror()
+        self.report_memo = ReportMemo()
+        self.cost_guard = QueryCostGuard(max_rows_examined=self.REPORT_ROW_BUDGET,
+                                         action=self.REPORT_OVER_BUDGET_ACTION)
+        self.current_query_id = None
         
         # Setup UI
         self.setup_ui()
@@ -53,6 +86,7 @@ class BLBSTabbedMainWindow:
         self.create_database_tab()
         self.create_vertex_ai_tab()
         self.create_reports_tab()
+        self.create_query_stats_tab()
         
         # Status bar
         self.status_var = tk.StringVar()
@@ -88,7 +122,10 @@ class BLBSTabbedMainWindow:
                    command=self.show_database_configuration).pack(side=tk.LEFT, padx=(0, 10))
         
         ttk.Button(db_button_frame, text="Obriši MySQL config", 
-                   command=self.delete_database_configuration).pack(side=tk.LEFT)
+                   command=self.delete_database_configuration).pack(side=tk.LEFT, padx=(0, 10))
+        
+        ttk.Button(db_button_frame, text="Stanje host-a",
+                   command=self.show_breaker_status).pack(side=tk.LEFT)
         
         # Initial status
         self.update_db_status("MySQL konfiguracija.\nKliknite 'MySQL konfiguracija' za setup.")
@@ -150,6 +187,21 @@ class BLBSTabbedMainWindow:
         
         ttk.Button(control_frame, text="Generiši izveštaj", 
                    command=self.generate_ai_report).pack(side=tk.LEFT, padx=(0, 10))
+        self.cancel_report_button = ttk.Button(control_frame, text="Otkaži", state=tk.DISABLED,
+                                               command=self.cancel_ai_report)
+        self.cancel_report_button.pack(side=tk.LEFT, padx=(0, 10))
+        
+        ttk.Button(control_frame, text="Izvezi...",
+                   command=self.export_query_results).pack(side=tk.LEFT, padx=(0, 10))
+        
+        self.use_local_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(control_frame, text="Lokalna kopija",
+                        variable=self.use_local_var).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(control_frame, text="Sinhronizuj",
+                   command=self.sync_local_copy).pack(side=tk.LEFT, padx=(0, 10))
+        self.use_columnar_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(control_frame, text="Kolonska kopija",
+                        variable=self.use_columnar_var).pack(side=tk.LEFT, padx=(0, 10))
         
         ttk.Label(control_frame, text="Tip izveštaja:").pack(side=tk.LEFT, padx=(10, 5))
         self.report_type_var = tk.StringVar(value="osnovni")
@@ -166,6 +218,44 @@ class BLBSTabbedMainWindow:
         self.report_output = scrolledtext.ScrolledText(output_frame, height=15, width=70)
         self.report_output.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
     
+    def create_query_stats_tab(self):
+        """Kreira tab sa statistikom latencije upita po otisku"""
+        stats_frame = ttk.Frame(self.notebook, padding="10")
+        self.notebook.add(stats_frame, text="Statistika upita")
+        
+        # Configure grid
+        stats_frame.columnconfigure(0, weight=1)
+        stats_frame.rowconfigure(0, weight=1)
+        
+        table_frame = ttk.LabelFrame(stats_frame, text="Najskuplji upiti (ukupno vreme)", padding="10")
+        table_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        table_frame.columnconfigure(0, weight=1)
+        table_frame.rowconfigure(0, weight=1)
+        
+        self.query_stats_text = scrolledtext.ScrolledText(table_frame, height=20, width=90, wrap=tk.NONE,
+                                                          font=("Courier", 9))
+        self.query_stats_text.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        
+        stats_button_frame = ttk.Frame(stats_frame)
+        stats_button_frame.grid(row=1, column=0, pady=(10, 0), sticky=tk.W)
+        
+        ttk.Button(stats_button_frame, text="Osveži",
+                   command=self.refresh_query_stats).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Button(stats_button_frame, text="Obriši statistiku",
+                   command=self.reset_query_stats).pack(side=tk.LEFT)
+        
+        self.refresh_query_stats()
+    
+    def refresh_query_stats(self):
+        """Prikazuje trenutnu statistiku upita"""
+        self.query_stats_text.delete(1.0, tk.END)
+        self.query_stats_text.insert(1.0, format_stats(query_stats.snapshot(limit=50)))
+    
+    def reset_query_stats(self):
+        """Briše prikupljenu statistiku upita"""
+        query_stats.reset()
+        self.refresh_query_stats()
+    
     def show_database_configuration(self):
         """Prikazuje dijalog za MySQL konfiguraciju"""
         config_window = tk.Toplevel(self.root)
@@ -224,6 +314,11 @@ class BLBSTabbedMainWindow:
                 return
             
             if self.config_manager.save_config(config_data):
+                close_pools()
+                reset_breakers()
+                self.result_cache.clear()
+                self.schema_catalog.invalidate()
+                self.local_store.reset()
                 messagebox.showinfo("Uspeh", "MySQL konfiguracija je sačuvana!")
                 config_window.destroy()
                 self.update_db_status("MySQL konfiguracija je ažurirana.\nKliknite 'Testiraj MySQL konekciju' za proveru.")
@@ -343,8 +438,9 @@ Napomene:
         self.status_var.set("Testiram MySQL...")
         
         def run_test():
-            connector = BLBSConnector(config)
+            connector = BLBSConnector(config, pool=get_pool(config))
             success, message = connector.test_connection()
+            message += "\n" + format_breakers(breaker_status())
             self.root.after(0, lambda: self.update_db_status(message))
             self.root.after(0, lambda: self.status_var.set("MySQL test završen"))
         
@@ -393,48 +489,141 @@ Napomene:
             messagebox.showwarning("Upozorenje", "Unesite SQL upit!")
             return
         
+        valid, reason = validate_select(sql_query)
+        if not valid:
+            messagebox.showwarning("Upozorenje", reason)
+            return
+        
         self.report_output.delete(1.0, tk.END)
         self.report_output.insert(tk.END, "Generiram izveštaj...\n⏳ Molimo sačekajte...")
         self.status_var.set("Generiram AI izveštaj...")
         
+        report_type = self.report_type_var.get()
+        use_local = self.use_local_var.get()
+        use_columnar = self.use_columnar_var.get()
+        query_id = uuid.uuid4().hex
+        self.current_query_id = query_id
+        self.cancel_report_button.configure(state=tk.NORMAL)
+        
         def generate_report():
             try:
-                # Execute SQL query
-                db_connector = BLBSConnector(db_config)
-                if not db_connector.connect():
-                    error_msg = "Greška: Nije moguće povezati sa MySQL bazom!"
+                if use_columnar:
+                    # Izveštaj iz kolonske kopije tabele - bez upita ka MySQL-u
+                    rollup, estimate = None, {'available': False, 'action': 'run'}
+                    report_data = self.columnar_mirror.report_data(sql_query, report_type, 50)
+                else:
+                    # Execute SQL query (lokalna kopija ne opterećuje produkcionu bazu)
+                    if use_local:
+                        db_connector = self.local_store.connector()
+                    else:
+                        db_connector = BLBSConnector(db_config,
+                                                     pool=get_pool(db_config, profile=self.REPORT_CONNECTION_PROFILE,
+                                                                   timeout=self.REPORT_QUERY_TIMEOUT),
+                                                     cache=self.result_cache,
+                                                     timeout=self.REPORT_QUERY_TIMEOUT, query_id=query_id)
+                    if not db_connector.connect():
+                        if use_local:
+                            error_msg = "Greška: Lokalna kopija ne postoji - prvo pokrenite sinhronizaciju!"
+                        elif db_connector.breaker.state == OPEN:
+                            error_msg = f"Greška: {db_connector.breaker.describe()}"
+                        else:
+                            error_msg = "Greška: Nije moguće povezati sa MySQL bazom!"
+                        self.root.after(0, lambda: self.finish_report_query(query_id))
+                        self.root.after(0, lambda: self.report_output.delete(1.0, tk.END))
+                        self.root.after(0, lambda: self.report_output.insert(tk.END, error_msg))
+                        return
+                
+                    try:
+                        # Agregatni upit koji pokriva materijalizovani sažetak čita se iz rollup tabele
+                        rollup = None if use_local else self.rollup_store.rewrite_fresh(db_connector, sql_query)
+                        if rollup is not None or use_local:
+                            estimate = {'available': False, 'action': 'run'}
+                        else:
+                            self.schema_catalog.refresh_if_stale(db_connector)
+                            estimate = self.cost_guard.check(db_connector, sql_query)
+                        if estimate['action'] == 'refuse':
+                            report_data = None
+                        elif rollup is not None:
+                            rollup_connector = self.rollup_store.connector()
+                            try:
+                                digest = rollup_connector.start_digest()
+                                report_data = fetch_report_data(rollup_connector, rollup[1], report_type, 50)
+                            finally:
+                                rollup_connector.disconnect()
+                        else:
+                            digest = db_connector.start_digest()
+                            report_data = fetch_report_data(db_connector, sql_query, report_type, 50,  # Limit to 50 rows
+                                                            sample_only=estimate['action'] == 'sample')
+                    finally:
+                        db_connector.disconnect()
+                
+                self.root.after(0, lambda: self.finish_report_query(query_id))
+                estimate_str = format_estimate(estimate)
+                
+                if report_data is None:
+                    if estimate['action'] == 'refuse':
+                        error_msg = estimate_str
+                    elif use_columnar:
+                        error_msg = ("Greška: Upit nije pokriven kolonskom kopijom "
+                                     "(SELECT kolone FROM tabela [WHERE ...] nad tabelom koja ima kopiju)!")
+                    elif db_connector.cancelled:
+                        error_msg = "Izveštaj je otkazan."
+                    else:
+                        error_msg = "Greška: SQL upit nije uspešno izvršen!"
                     self.root.after(0, lambda: self.report_output.delete(1.0, tk.END))
                     self.root.after(0, lambda: self.report_output.insert(tk.END, error_msg))
                     return
                 
-                sql_results = db_connector.execute_query(sql_query)
-                db_connector.disconnect()
-                
-                if sql_results is None:
-                    error_msg = "Greška: SQL upit nije uspešno izvršen!"
+                # Nepromenjeni podaci - prikazuje se sačuvan izveštaj bez poziva modela
+                content_hash = report_data['content_hash'] if use_columnar else digest.hexdigest()
+                memo = self.report_memo.lookup(sql_query, report_type, content_hash)
+                if memo is not None:
+                    generated_at = time.strftime('%d.%m.%Y %H:%M', time.localtime(memo['generated_at']))
                     self.root.after(0, lambda: self.report_output.delete(1.0, tk.END))
-                    self.root.after(0, lambda: self.report_output.insert(tk.END, error_msg))
+                    self.root.after(0, lambda: self.report_output.insert(tk.END, memo['report']))
+                    self.root.after(0, lambda: self.status_var.set(
+                        f"Podaci nepromenjeni - prikazan izveštaj od {generated_at}"))
                     return
                 
+                sample_rows, total_rows = report_data['sample'], report_data['total']
+                
                 # Prepare data for AI
                 sql_data_str = f"SQL Upit: {sql_query}\n\nRezultati:\n"
-                for i, row in enumerate(sql_results[:50]):  # Limit to 50 rows
+                for i, row in enumerate(sample_rows):
                     sql_data_str += f"Red {i+1}: {row}\n"
                 
-                if len(sql_results) > 50:
-                    sql_data_str += f"\n... i još {len(sql_results) - 50} redova"
+                if total_rows is None:
+                    sql_data_str += f"\n... samo uzorak; upit je preskup za puno izvršavanje (procena ~{estimate['rows_examined']} pregledanih redova)"
+                elif total_rows > len(sample_rows):
+                    sql_data_str += f"\n... i još {total_rows - len(sample_rows)} redova"
+                
+                if report_data['summary'] is not None:
+                    summary_str = format_summary(report_data['summary'])
+                    sql_data_str += f"\n\nAgregati izračunati u bazi:\n{summary_str}"
+                
+                if rollup is not None:
+                    sql_data_str += f"\n\nIzvor: materijalizovani sažetak '{rollup[0].name}' ({rollup[0].granularity}, osvežen inkrementalno - samo novi redovi)"
+                elif use_columnar:
+                    sql_data_str += f"\n\nIzvor: kolonska kopija tabele '{report_data['table']}' (stanje u trenutku pravljenja kopije)"
+                
+                schema_str = self.schema_catalog.describe_query_tables(sql_query)
+                if schema_str:
+                    sql_data_str += f"\n\nŠema tabela:\n{schema_str}"
                 
                 # Generate AI report
                 if not self.vertex_ai_manager:
                     self.vertex_ai_manager = VertexAIManager(ai_config)
                 
-                report_type = self.report_type_var.get()
                 success, ai_report = self.vertex_ai_manager.generate_report(sql_data_str, report_type)
                 
                 if success:
                     final_report = f"=== AI IZVEŠTAJ ({report_type.upper()}) ===\n\n{ai_report}"
                 else:
                     final_report = f"Greška pri generisanju AI izveštaja: {ai_report}"
+                if estimate_str:
+                    final_report = f"{estimate_str}\n\n{final_report}"
+                if success:
+                    self.report_memo.store(sql_query, report_type, content_hash, final_report)
                 
                 self.root.after(0, lambda: self.report_output.delete(1.0, tk.END))
                 self.root.after(0, lambda: self.report_output.insert(tk.END, final_report))
@@ -448,10 +637,94 @@ Napomene:
         
         threading.Thread(target=generate_report, daemon=True).start()
     
+    def cancel_ai_report(self):
+        """Otkazuje SQL upit izveštaja koji je u toku"""
+        if not self.current_query_id:
+            return
+        
+        query_id = self.current_query_id
+        self.status_var.set("Otkazujem upit...")
+        
+        def run_cancel():
+            success, message = query_registry.cancel(query_id)
+            self.root.after(0, lambda: self.status_var.set(message))
+        
+        threading.Thread(target=run_cancel, daemon=True).start()
+    
+    def export_query_results(self):
+        """Strimuje rezultate SQL upita u CSV ili JSONL fajl"""
+        db_config = self.config_manager.load_config()
+        if not db_config:
+            messagebox.showwarning("Upozorenje", "Prvo konfigurisajte MySQL konekciju!")
+            return
+        
+        sql_query = self.sql_input.get(1.0, tk.END).strip()
+        if not sql_query:
+            messagebox.showwarning("Upozorenje", "Unesite SQL upit!")
+            return
+        
+        path = filedialog.asksaveasfilename(
+            title="Izvoz rezultata",
+            defaultextension=".csv",
+            filetypes=[("CSV fajlovi", "*.csv"), ("JSON Lines fajlovi", "*.jsonl")]
+        )
+        if not path:
+            return
+        export_format = 'jsonl' if path.lower().endswith('.jsonl') else 'csv'
+        self.status_var.set("Izvozim rezultate...")
+        
+        def run_export():
+            db_connector = BLBSConnector(db_config, pool=get_pool(db_config, profile=self.REPORT_CONNECTION_PROFILE))
+            try:
+                success, message = export_to_file(db_connector, sql_query, path, export_format)
+            finally:
+                db_connector.disconnect()
+            self.root.after(0, lambda: self.status_var.set(message))
+            if not success:
+                self.root.after(0, lambda: messagebox.showerror("Greška", message))
+        
+        threading.Thread(target=run_export, daemon=True).start()
+    
+    def sync_local_copy(self):
+        """Inkrementalno sinhronizuje praćene tabele u lokalnu kopiju"""
+        db_config = self.config_manager.load_config()
+        if not db_config:
+            messagebox.showwarning("Upozorenje", "Prvo konfigurisajte MySQL konekciju!")
+            return
+        
+        if not self.local_store.tracked():
+            self.local_store.track('tickets')
+        self.status_var.set("Sinhronizujem lokalnu kopiju...")
+        
+        def run_sync():
+            db_connector = BLBSConnector(db_config, pool=get_pool(db_config))
+            try:
+                results = self.local_store.sync_all(db_connector)
+            finally:
+                db_connector.disconnect()
+            if any(count is None for count in results.values()):
+                message = "Greška pri sinhronizaciji lokalne kopije"
+            else:
+                message = "Lokalna kopija: " + ", ".join(f"{name} +{count}" for name, count in results.items())
+            self.root.after(0, lambda: self.status_var.set(message))
+        
+        threading.Thread(target=run_sync, daemon=True).start()
+    
+    def finish_report_query(self, query_id: str):
+        """SQL deo izveštaja je završen - otkazivanje više nije moguće"""
+        if self.current_query_id == query_id:
+            self.current_query_id = None
+            self.cancel_report_button.configure(state=tk.DISABLED)
+    
     def delete_database_configuration(self):
         """Briše MySQL konfiguraciju"""
         if messagebox.askyesno("Potvrda", "Da li ste sigurni da želite da obrišete MySQL konfiguraciju?"):
             if self.config_manager.delete_config():
+                close_pools()
+                reset_breakers()
+                self.result_cache.clear()
+                self.schema_catalog.invalidate()
+                self.local_store.reset()
                 messagebox.showinfo("Uspeh", "MySQL konfiguracija je obrisana!")
                 self.update_db_status("MySQL konfiguracija je obrisana.\nPotrebno je ponovo konfigurisati konekciju.")
             else:
@@ -467,6 +740,10 @@ Napomene:
             else:
                 messagebox.showerror("Greška", "Greška pri brisanju Vertex AI konfiguracije!")
     
+    def show_breaker_status(self):
+        """Prikazuje stanje circuit breaker-a po MySQL host-u"""
+        self.update_db_status(format_breakers(breaker_status()))
+    
     def update_db_status(self, message: str):
         """Ažurira MySQL status tekst"""
         self.db_status_text.delete(1.0, tk.END)
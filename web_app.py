@@ -3,7 +3,7 @@ BLBS AI Agent - Web verzija
 """
 import sys
 import os
-from flask import Flask, render_template, request, jsonify, redirect, url_for
+from flask import Flask, render_template, request, jsonify, redirect, url_for, Response, stream_with_context
 import json
 import threading
 
@@ -13,6 +13,23 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from config.config_manager import ConfigManager
 from config.vertex_config_manager import VertexConfigManager
 from database.blbs_connector import BLBSConnector
+from database.connection_pool import get_pool, close_pools
+from database.circuit_breaker import OPEN, breaker_status, reset_breakers
+from database.result_cache import ResultCache
+from database.query_control import query_registry
+from database.aggregation_planner import fetch_report_data, format_summary
+from database.schema_catalog import SchemaCatalog
+from database.cost_guard import QueryCostGuard
+from database.local_sync import LocalStore
+from database.rollups import RollupDefinition, RollupStore
+from database.columnar_store import ColumnarMirror, valid_table_name
+from database.export import EXPORT_FORMATS, iter_buffer
+from database.result_buffer import BufferRegistry, buffer_query
+from database.fan_out import FanOutQuery
+from database.query_stats import query_stats
+from database.resource_governor import LimitPolicy, ResultLimits
+from database.result_digest import ReportMemo
+from database.sql_normalizer import validate_select
 from ai.vertex_ai_manager import VertexAIManager
 
 app = Flask(__name__)
@@ -21,6 +38,48 @@ app = Flask(__name__)
 config_manager = ConfigManager()
 vertex_config_manager = VertexConfigManager()
 vertex_ai_manager = None
+result_cache = ResultCache(ttl=120)
+schema_catalog = SchemaCatalog()
+local_store = LocalStore()
+rollup_store = RollupStore()
+columnar_mirror = ColumnarMirror()
+# Rezultati /reports/profile koji čekaju izvoz (/reports/export sa profile_id)
+profile_buffers = BufferRegistry()
+# Poslednji AI izveštaj po (upit, tip) - vraća se bez generisanja dok se podaci ne promene
+report_memo = ReportMemo()
+
+# Vremenski budžet za SQL upit izveštaja (sekunde)
+REPORT_QUERY_TIMEOUT = 120
+
+# Budžet procenjenih pregledanih redova (EXPLAIN) i šta se radi sa preskupim upitom ('sample' ili 'refuse')
+REPORT_ROW_BUDGET = 5_000_000
+REPORT_OVER_BUDGET_ACTION = 'sample'
+cost_guard = QueryCostGuard(max_rows_examined=REPORT_ROW_BUDGET, action=REPORT_OVER_BUDGET_ACTION)
+
+# Profil konekcije za izveštaje i izvoz: kompresija (ako je drajver podržava) i tekst umesto datetime/Decimal
+REPORT_CONNECTION_PROFILE = 'wan_lean'
+
+# Deo rezultata /reports/profile koji ostaje u memoriji; ostatak se preliva u privremeni fajl
+PROFILE_MEMORY_BYTES = 64 * 1024 * 1024
+
+# Upit nad svim BLBS bazama (/reports/fanout): najviše istovremenih baza
+FANOUT_MAX_WORKERS = 8
+
+# Paket izveštaja (/reports/batch): svi upiti u jednom slanju preko posebnog multi-statement pool-a
+BATCH_CONNECTION_PROFILE = 'wan_lean_multi'
+BATCH_MAX_QUERIES = 20
+
+# Najviše redova/bajtova koje jedan upit sme da prenese u Flask proces (po ruti, uz opciona ograničenja po korisniku)
+result_limits = LimitPolicy(
+    default=ResultLimits(max_rows=200_000, max_bytes=64 * 1024 * 1024),
+    routes={'generate_report': ResultLimits(max_rows=100_000, max_bytes=32 * 1024 * 1024),
+            'batch_reports': ResultLimits(max_rows=1000),
+            # Profil celog rezultata ide kroz ResultBuffer (preliva se na disk), pa sme više od memorije
+            'profile_report': ResultLimits(max_rows=20_000_000, max_bytes=4 * 1024 * 1024 * 1024),
+            # Po bazi u upitu nad celom mrežom
+            'fanout_report': ResultLimits(max_rows=10_000, max_bytes=16 * 1024 * 1024)},
+    users={},
+)
 
 @app.route('/')
 def index():
@@ -30,7 +89,8 @@ def index():
     
     return render_template('index.html', 
                          mysql_configured=mysql_configured,
-                         vertex_configured=vertex_configured)
+                         vertex_configured=vertex_configured,
+                         breakers=breaker_status())
 
 @app.route('/mysql')
 def mysql_page():
@@ -49,10 +109,37 @@ def save_mysql():
         return jsonify({'success': False, 'message': 'Sva polja moraju biti popunjena!'})
     
     if config_manager.save_config(data):
+        close_pools()
+        reset_breakers()
+        result_cache.clear()
+        schema_catalog.invalidate()
+        local_store.reset()
+        profile_buffers.close()
         return jsonify({'success': True, 'message': 'MySQL konfiguracija je sačuvana!'})
     else:
         return jsonify({'success': False, 'message': 'Greška pri čuvanju konfiguracije!'})
 
+@app.route('/mysql/targets', methods=['GET', 'POST', 'DELETE'])
+def mysql_targets():
+    """Lista BLBS baza za upite nad celom mrežom (GET), dodavanje (POST) i uklanjanje (DELETE) dodatne baze"""
+    data = (request.json or {}) if request.method != 'GET' else {}
+    name = (data.get('name') or '').strip()
+    if request.method == 'POST':
+        required = ['host', 'username', 'password', 'database']
+        if not name or not all(data.get(key) for key in required):
+            return jsonify({'success': False, 'message': 'Ime i sva polja baze moraju biti popunjeni!'})
+        if name in config_manager.target_names():
+            return jsonify({'success': False, 'message': f'Baza sa imenom {name} već postoji!'})
+        if not config_manager.save_target(name, data):
+            return jsonify({'success': False, 'message': 'Greška pri čuvanju baze!'})
+    elif request.method == 'DELETE':
+        if not config_manager.delete_target(name):
+            return jsonify({'success': False, 'message': f'Baza {name} nije u listi!'})
+    
+    targets = [{'name': t['name'], 'host': t['host'], 'database': t['database'], 'port': t['port']}
+               for t in config_manager.load_targets()]
+    return jsonify({'success': True, 'targets': targets})
+
 @app.route('/mysql/test', methods=['POST'])
 def test_mysql():
     """Testira MySQL konekciju"""
@@ -61,7 +148,7 @@ def test_mysql():
         return jsonify({'success': False, 'message': 'Prvo konfigurisajte MySQL konekciju!'})
     
     try:
-        connector = BLBSConnector(config)
+        connector = BLBSConnector(config, pool=get_pool(config))
         success, message = connector.test_connection()
         return jsonify({'success': success, 'message': message})
     except Exception as e:
@@ -119,10 +206,19 @@ def generate_report():
     data = request.json
     sql_query = data.get('sql_query', '').strip()
     report_type = data.get('report_type', 'osnovni')
+    query_id = data.get('query_id') or None
+    use_local = bool(data.get('use_local'))
+    use_columnar = bool(data.get('use_columnar'))
+    regenerate = bool(data.get('regenerate'))
     
     if not sql_query:
         return jsonify({'success': False, 'message': 'Unesite SQL upit!'})
     
+    # Upit koji nije jedan čist SELECT se odbija pre konekcije na bazu
+    valid, reason = validate_select(sql_query)
+    if not valid:
+        return jsonify({'success': False, 'message': f'Greška: {reason}'})
+    
     # Proverava konfiguracije
     db_config = config_manager.load_config()
     ai_config = vertex_config_manager.load_config()
@@ -134,24 +230,97 @@ def generate_report():
         return jsonify({'success': False, 'message': 'Prvo konfigurisajte Vertex AI!'})
     
     try:
-        # Execute SQL query
-        db_connector = BLBSConnector(db_config)
-        if not db_connector.connect():
-            return jsonify({'success': False, 'message': 'Greška: Nije moguće povezati sa MySQL bazom!'})
+        if use_columnar:
+            # Izveštaj iz kolonske kopije tabele - bez upita ka MySQL-u
+            report_data = columnar_mirror.report_data(sql_query, report_type, 50)
+            if report_data is None:
+                return jsonify({'success': False, 'message': 'Greška: Upit nije pokriven kolonskom kopijom '
+                                '(SELECT kolone FROM tabela [WHERE ...] nad tabelom koja ima kopiju)!'})
+            rollup, truncated, content_hash = None, None, report_data['content_hash']
+            estimate = {'available': False, 'action': 'run'}
+        else:
+            # Execute SQL query (lokalna kopija ne opterećuje produkcionu bazu)
+            if use_local:
+                db_connector = local_store.connector()
+            else:
+                limits = result_limits.limits_for(request.remote_user or request.remote_addr, request.endpoint)
+                db_connector = BLBSConnector(db_config, pool=get_pool(db_config, profile=REPORT_CONNECTION_PROFILE,
+                                                                      timeout=REPORT_QUERY_TIMEOUT),
+                                             cache=result_cache,
+                                             timeout=REPORT_QUERY_TIMEOUT, query_id=query_id, limits=limits)
+            if not db_connector.connect():
+                if use_local:
+                    return jsonify({'success': False, 'message': 'Greška: Lokalna kopija ne postoji - prvo pokrenite sinhronizaciju!'})
+                if db_connector.breaker.state == OPEN:
+                    return jsonify({'success': False, 'message': f'Greška: {db_connector.breaker.describe()}'})
+                return jsonify({'success': False, 'message': 'Greška: Nije moguće povezati sa MySQL bazom!'})
         
-        sql_results = db_connector.execute_query(sql_query)
-        db_connector.disconnect()
+            try:
+                # Agregatni upit koji pokriva materijalizovani sažetak čita se iz rollup tabele
+                rollup = None if use_local else rollup_store.rewrite_fresh(db_connector, sql_query)
+                if rollup is not None or use_local:
+                    estimate = {'available': False, 'action': 'run'}
+                else:
+                    schema_catalog.refresh_if_stale(db_connector)
+                    estimate = cost_guard.check(db_connector, sql_query)
+                if estimate['action'] == 'refuse':
+                    return jsonify({'success': False, 'message': estimate['message'], 'estimate': estimate})
+                if rollup is not None:
+                    rollup_connector = rollup_store.connector()
+                    try:
+                        digest = rollup_connector.start_digest()
+                        report_data = fetch_report_data(rollup_connector, rollup[1], report_type, 50)
+                    finally:
+                        rollup_connector.disconnect()
+                else:
+                    digest = db_connector.start_digest()
+                    report_data = fetch_report_data(db_connector, sql_query, report_type, 50,  # Limit to 50 rows
+                                                    sample_only=estimate['action'] == 'sample')
+            finally:
+                db_connector.disconnect()
+        
+            if report_data is None:
+                if db_connector.cancelled:
+                    return jsonify({'success': False, 'message': 'Izveštaj je otkazan.', 'estimate': estimate})
+                return jsonify({'success': False, 'message': 'Greška: SQL upit nije uspešno izvršen!', 'estimate': estimate})
+        
+            truncated = getattr(db_connector, 'truncated', None)
+            content_hash = digest.hexdigest()
+        
+        # Nepromenjeni podaci - vraća se sačuvan izveštaj bez poziva modela
+        memo = None if regenerate else report_memo.lookup(sql_query, report_type, content_hash)
+        if memo is not None:
+            return jsonify({'success': True, 'report': memo['report'], 'estimate': estimate,
+                            'truncated': bool(truncated), 'truncation': truncated,
+                            'rollup': rollup[0].name if rollup is not None else None,
+                            'unchanged': True, 'generated_at': memo['generated_at'], 'content_hash': content_hash})
         
-        if sql_results is None:
-            return jsonify({'success': False, 'message': 'Greška: SQL upit nije uspešno izvršen!'})
+        sample_rows, total_rows = report_data['sample'], report_data['total']
         
         # Prepare data for AI
         sql_data_str = f"SQL Upit: {sql_query}\\n\\nRezultati:\\n"
-        for i, row in enumerate(sql_results[:50]):  # Limit to 50 rows
+        for i, row in enumerate(sample_rows):
             sql_data_str += f"Red {i+1}: {row}\\n"
         
-        if len(sql_results) > 50:
-            sql_data_str += f"\\n... i još {len(sql_results) - 50} redova"
+        if total_rows is None:
+            sql_data_str += f"\\n... samo uzorak; upit je preskup za puno izvršavanje (procena ~{estimate['rows_examined']} pregledanih redova)"
+        elif truncated:
+            sql_data_str += f"\\n... rezultat je skraćen ({truncated}); pročitano najmanje {total_rows} redova"
+        elif total_rows > len(sample_rows):
+            sql_data_str += f"\\n... i još {total_rows - len(sample_rows)} redova"
+        
+        if report_data['summary'] is not None:
+            summary_str = format_summary(report_data['summary'])
+            sql_data_str += f"\\n\\nAgregati izračunati u bazi:\\n{summary_str}"
+        
+        if rollup is not None:
+            sql_data_str += f"\\n\\nIzvor: materijalizovani sažetak '{rollup[0].name}' ({rollup[0].granularity}, osvežen inkrementalno - samo novi redovi)"
+        elif use_columnar:
+            sql_data_str += f"\\n\\nIzvor: kolonska kopija tabele '{report_data['table']}' (stanje u trenutku pravljenja kopije)"
+        
+        schema_str = schema_catalog.describe_query_tables(sql_query)
+        if schema_str:
+            sql_data_str += f"\\n\\nŠema tabela:\\n{schema_str}"
         
         # Generate AI report
         if not vertex_ai_manager:
@@ -161,13 +330,358 @@ def generate_report():
         
         if success:
             final_report = f"=== AI IZVEŠTAJ ({report_type.upper()}) ===\\n\\n{ai_report}"
-            return jsonify({'success': True, 'report': final_report})
+            report_memo.store(sql_query, report_type, content_hash, final_report)
+            return jsonify({'success': True, 'report': final_report, 'estimate': estimate,
+                            'truncated': bool(truncated), 'truncation': truncated,
+                            'rollup': rollup[0].name if rollup is not None else None,
+                            'unchanged': False, 'content_hash': content_hash})
         else:
-            return jsonify({'success': False, 'message': f'Greška pri generisanju AI izveštaja: {ai_report}'})
+            return jsonify({'success': False, 'message': f'Greška pri generisanju AI izveštaja: {ai_report}',
+                            'estimate': estimate, 'truncated': bool(truncated), 'truncation': truncated})
             
     except Exception as e:
         return jsonify({'success': False, 'message': f'Greška: {str(e)}'})
 
+@app.route('/reports/export', methods=['POST'])
+def export_report_data():
+    """Strimuje sirove rezultate upita kao CSV ili JSONL fajl (konstantna memorija)
+
+    Sa `profile_id` iz /reports/profile (za isti upit) izvozi se već pročitan
+    rezultat iz bafera profila, bez ponovnog izvršavanja upita.
+    """
+    data = request.form if request.form else (request.json or {})
+    sql_query = data.get('sql_query', '').strip()
+    export_format = data.get('format', 'csv')
+    
+    if not sql_query:
+        return jsonify({'success': False, 'message': 'Unesite SQL upit!'})
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'success': False, 'message': f'Nepoznat format izvoza: {export_format}'})
+    
+    encoder, mimetype = EXPORT_FORMATS[export_format]
+    buffer = profile_buffers.take(data.get('profile_id'), sql_query)
+    if buffer is not None:
+        def generate_buffered():
+            try:
+                yield from iter_buffer(buffer, export_format)
+            except Exception as e:
+                print(f"Greška pri izvozu: {e}")
+            finally:
+                buffer.close()
+        
+        return Response(stream_with_context(generate_buffered()), mimetype=mimetype,
+                        headers={'Content-Disposition': f'attachment; filename=blbs_export.{export_format}'})
+    
+    db_config = config_manager.load_config()
+    if not db_config:
+        return jsonify({'success': False, 'message': 'Prvo konfigurisajte MySQL konekciju!'})
+    
+    db_connector = BLBSConnector(db_config, pool=get_pool(db_config, profile=REPORT_CONNECTION_PROFILE))
+    chunks = encoder(db_connector, sql_query)
+    try:
+        # Prvi deo se čita pre slanja zaglavlja, da bi greška u SQL-u stigla kao JSON
+        first_chunk = next(chunks, '')
+    except Exception as e:
+        db_connector.disconnect()
+        return jsonify({'success': False, 'message': f'Greška pri izvozu: {str(e)}'})
+    
+    def generate():
+        try:
+            yield first_chunk
+            yield from chunks
+        except Exception as e:
+            print(f"Greška pri izvozu: {e}")
+        finally:
+            chunks.close()
+            db_connector.disconnect()
+    
+    return Response(stream_with_context(generate()), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename=blbs_export.{export_format}'})
+
+@app.route('/reports/batch', methods=['POST'])
+def batch_reports():
+    """Izvršava paket upita (npr. jutarnji dashboard) u jednom mrežnom slanju
+
+    Telo: {"queries": [{"name": ..., "sql_query": ...}, ...]} (ili lista SQL stringova).
+    Svaki upit dobija svoje kolone i redove ili grešku; redovi su ograničeni po upitu.
+    """
+    data = request.json or {}
+    queries = [item if isinstance(item, dict) else {'sql_query': item} for item in data.get('queries', [])]
+    if not queries:
+        return jsonify({'success': False, 'message': 'Paket ne sadrži nijedan upit!'})
+    if len(queries) > BATCH_MAX_QUERIES:
+        return jsonify({'success': False, 'message': f'Paket može da ima najviše {BATCH_MAX_QUERIES} upita!'})
+    sql_queries = [(item.get('sql_query') or '').strip() for item in queries]
+    if not all(sql_queries):
+        return jsonify({'success': False, 'message': 'Svaki upit u paketu mora imati SQL!'})
+    
+    db_config = config_manager.load_config()
+    if not db_config:
+        return jsonify({'success': False, 'message': 'Prvo konfigurisajte MySQL konekciju!'})
+    
+    limits = result_limits.limits_for(request.remote_user or request.remote_addr, request.endpoint)
+    db_connector = BLBSConnector(db_config, pool=get_pool(db_config, profile=BATCH_CONNECTION_PROFILE,
+                                                          timeout=REPORT_QUERY_TIMEOUT),
+                                 cache=result_cache, timeout=REPORT_QUERY_TIMEOUT,
+                                 query_id=data.get('query_id') or None, limits=limits)
+    try:
+        results = db_connector.execute_batch(sql_queries)
+    finally:
+        db_connector.disconnect()
+    
+    if results is None:
+        if db_connector.cancelled:
+            return jsonify({'success': False, 'message': 'Paket je otkazan.'})
+        return jsonify({'success': False, 'message': 'Greška: paket sme da sadrži samo pojedinačne SELECT upite i '
+                                                     'baza mora biti dostupna!'})
+    
+    reports = []
+    for index, (item, result) in enumerate(zip(queries, results)):
+        rows = result['rows']
+        if rows is not None:
+            rows = [[value.decode('utf-8', 'replace') if isinstance(value, bytes) else value for value in row]
+                    for row in rows]
+        reports.append({'name': item.get('name') or f'Upit {index + 1}', 'columns': result['columns'],
+                        'rows': rows, 'error': result['error'], 'truncated': result['truncated']})
+    failed = sum(1 for report in reports if report['error'])
+    return jsonify({'success': not failed, 'reports': reports,
+                    'message': f'Izvršeno {len(reports) - failed}/{len(reports)} upita u jednom slanju.'})
+
+@app.route('/reports/profile', methods=['POST'])
+def profile_report():
+    """Statistika po koloni nad celim rezultatom upita (veći od memorije se preliva na disk)
+
+    Bafer ostaje sačuvan pod vraćenim `profile_id`, pa /reports/export istog
+    upita čita njega umesto da ponovo izvršava upit.
+    """
+    data = request.json or {}
+    sql_query = data.get('sql_query', '').strip()
+    if not sql_query:
+        return jsonify({'success': False, 'message': 'Unesite SQL upit!'})
+    
+    db_config = config_manager.load_config()
+    if not db_config:
+        return jsonify({'success': False, 'message': 'Prvo konfigurisajte MySQL konekciju!'})
+    
+    limits = result_limits.limits_for(request.remote_user or request.remote_addr, request.endpoint)
+    db_connector = BLBSConnector(db_config, pool=get_pool(db_config, profile=REPORT_CONNECTION_PROFILE,
+                                                          timeout=REPORT_QUERY_TIMEOUT),
+                                 timeout=REPORT_QUERY_TIMEOUT, query_id=data.get('query_id') or None,
+                                 limits=limits)
+    try:
+        buffer = buffer_query(db_connector, sql_query, memory_bytes=PROFILE_MEMORY_BYTES)
+    finally:
+        db_connector.disconnect()
+    if buffer is None:
+        if db_connector.cancelled:
+            return jsonify({'success': False, 'message': 'Upit je otkazan.'})
+        return jsonify({'success': False, 'message': 'Greška: SQL upit nije uspešno izvršen!'})
+    
+    try:
+        summary, stats = buffer.summary(), buffer.stats()
+    except Exception:
+        buffer.close()
+        raise
+    if db_connector.truncated:
+        # Skraćen rezultat se ne izvozi - izvoz ponovo izvršava upit bez ograničenja
+        buffer.close()
+        profile_id = None
+    else:
+        profile_id = profile_buffers.add(buffer, sql_query)
+    return jsonify({'success': True, 'columns': list(summary), 'summary': summary, 'buffer': stats,
+                    'profile_id': profile_id,
+                    'truncated': bool(db_connector.truncated), 'truncation': db_connector.truncated})
+
+@app.route('/reports/fanout', methods=['POST'])
+def fanout_report():
+    """Isti SELECT nad svim (ili izabranim) BLBS bazama paralelno, spojen sa kolonom izvora"""
+    data = request.json or {}
+    sql_query = data.get('sql_query', '').strip()
+    if not sql_query:
+        return jsonify({'success': False, 'message': 'Unesite SQL upit!'})
+    
+    targets = config_manager.load_targets()
+    selected = data.get('targets')
+    if selected:
+        targets = [t for t in targets if t['name'] in selected]
+    if not targets:
+        return jsonify({'success': False, 'message': 'Prvo konfigurisajte bar jednu MySQL bazu!'})
+    
+    limits = result_limits.limits_for(request.remote_user or request.remote_addr, request.endpoint)
+    fan_out = FanOutQuery(targets, max_workers=FANOUT_MAX_WORKERS, profile=REPORT_CONNECTION_PROFILE,
+                          timeout=REPORT_QUERY_TIMEOUT, limits=limits)
+    rows = fan_out.execute(sql_query)
+    sources = fan_out.status()
+    if rows is None:
+        return jsonify({'success': False, 'message': 'Greška: upit nije uspeo ni na jednoj bazi!', 'sources': sources})
+    
+    rows = [[value.decode('utf-8', 'replace') if isinstance(value, bytes) else value for value in row] for row in rows]
+    failed = fan_out.failed
+    message = f'Izvršeno na {len(targets) - len(failed)}/{len(targets)} baza, {len(rows)} redova.'
+    if failed:
+        message += ' Neuspele: ' + ', '.join(f'{name} ({error})' for name, error in failed.items())
+    return jsonify({'success': True, 'partial': bool(failed), 'message': message,
+                    'columns': [d[0] for d in fan_out.description or ()], 'rows': rows, 'sources': sources})
+
+@app.route('/reports/cancel', methods=['POST'])
+def cancel_report():
+    """Otkazuje SQL upit izveštaja koji je u toku"""
+    data = request.json or {}
+    query_id = data.get('query_id')
+    if not query_id:
+        return jsonify({'success': False, 'message': 'Nedostaje identifikator upita!'})
+    
+    success, message = query_registry.cancel(query_id)
+    return jsonify({'success': success, 'message': message})
+
+@app.route('/sync', methods=['GET', 'POST'])
+def sync_local():
+    """Stanje lokalne kopije (GET) ili inkrementalna sinhronizacija (POST)
+
+    POST sa {"table": ..., "watermark_column": ..., "key_column": ...} dodaje tabelu
+    u praćenje; bez tabele se sinhronizuju sve praćene tabele.
+    """
+    if request.method == 'GET':
+        return jsonify({'success': True, 'tables': local_store.tracked()})
+    
+    db_config = config_manager.load_config()
+    if not db_config:
+        return jsonify({'success': False, 'message': 'Prvo konfigurisajte MySQL konekciju!'})
+    
+    data = request.json or {}
+    table = data.get('table')
+    if table:
+        local_store.track(table, data.get('watermark_column', 'id'), data.get('key_column', 'id'))
+    elif not local_store.tracked():
+        return jsonify({'success': False, 'message': 'Nijedna tabela nije izabrana za lokalnu kopiju!'})
+    
+    db_connector = BLBSConnector(db_config, pool=get_pool(db_config))
+    try:
+        results = {table: local_store.sync(db_connector, table)} if table else local_store.sync_all(db_connector)
+    finally:
+        db_connector.disconnect()
+    
+    failed = [name for name, count in results.items() if count is None]
+    summary = ", ".join(f"{name}: {count}" for name, count in results.items() if count is not None)
+    if failed:
+        return jsonify({'success': False, 'results': results,
+                        'message': f"Greška pri sinhronizaciji: {', '.join(failed)}"})
+    return jsonify({'success': True, 'results': results, 'message': f"Preneto novih/izmenjenih redova - {summary}"})
+
+@app.route('/rollups', methods=['GET', 'POST'])
+def rollups():
+    """Stanje materijalizovanih sažetaka (GET) ili definisanje/osvežavanje (POST)
+
+    POST sa {"name", "table", "time_column", "granularity", "dimensions", "measures"}
+    definiše rollup i odmah ga puni; bez definicije se inkrementalno osvežavaju svi.
+    Osvežavanje sabira samo nove redove - rollup je za tabele u koje se samo upisuje.
+    """
+    if request.method == 'GET':
+        return jsonify({'success': True, 'rollups': rollup_store.status()})
+    
+    db_config = config_manager.load_config()
+    if not db_config:
+        return jsonify({'success': False, 'message': 'Prvo konfigurisajte MySQL konekciju!'})
+    
+    data = request.json or {}
+    name = data.get('name')
+    if name:
+        try:
+            rollup_store.define(RollupDefinition(
+                name, data.get('table', 'tickets'), data.get('time_column', 'created_at'),
+                data.get('granularity', 'day'), data.get('dimensions', []), data.get('measures', []),
+                data.get('key_column', 'id')))
+        except (TypeError, ValueError) as e:
+            return jsonify({'success': False, 'message': f'Neispravna definicija: {e}'})
+    elif not rollup_store.definitions():
+        return jsonify({'success': False, 'message': 'Nijedan materijalizovani sažetak nije definisan!'})
+    
+    db_connector = BLBSConnector(db_config, pool=get_pool(db_config))
+    try:
+        results = {name: rollup_store.refresh(db_connector, name)} if name else rollup_store.refresh_all(db_connector)
+    finally:
+        db_connector.disconnect()
+    
+    failed = [rollup for rollup, count in results.items() if count is None]
+    summary = ", ".join(f"{rollup}: +{count}" for rollup, count in results.items() if count is not None)
+    if failed:
+        return jsonify({'success': False, 'results': results,
+                        'message': f"Greška pri osvežavanju: {', '.join(failed)}"})
+    return jsonify({'success': True, 'results': results, 'message': f"Sabrano novih redova - {summary}"})
+
+@app.route('/columnar', methods=['GET', 'POST'])
+def columnar_tables():
+    """Lista kolonskih kopija (GET) ili pravljenje kopije tabele (POST {"table": ...})"""
+    if request.method == 'GET':
+        tables = {}
+        for name in columnar_mirror.tables():
+            with columnar_mirror.open(name) as table:
+                tables[name] = {'rows': len(table), 'columns': table.columns,
+                                'chunks': len(table.manifest['chunks'])}
+        return jsonify({'success': True, 'tables': tables})
+    
+    db_config = config_manager.load_config()
+    if not db_config:
+        return jsonify({'success': False, 'message': 'Prvo konfigurisajte MySQL konekciju!'})
+    
+    table = (request.json or {}).get('table')
+    if not table:
+        return jsonify({'success': False, 'message': 'Nedostaje ime tabele!'})
+    if not valid_table_name(table):
+        return jsonify({'success': False, 'message': 'Neispravno ime tabele (dozvoljena su slova, cifre, _ i $)!'})
+    
+    db_connector = BLBSConnector(db_config, pool=get_pool(db_config))
+    try:
+        rows = columnar_mirror.mirror(db_connector, table)
+    finally:
+        db_connector.disconnect()
+    if rows is None:
+        return jsonify({'success': False, 'message': f'Greška pri pravljenju kolonske kopije tabele {table}!'})
+    return jsonify({'success': True, 'rows': rows, 'message': f'Kolonska kopija tabele {table}: {rows} redova'})
+
+@app.route('/stats/queries', methods=['GET', 'DELETE'])
+def query_statistics():
+    """Latencija po otisku upita (p50/p95/p99, broj, redovi); DELETE briše statistiku
+
+    GET parametri: ?limit=N (podrazumevano 50) i ?sort=total_ms|count|p95_ms|rows|bytes
+    """
+    if request.method == 'DELETE':
+        query_stats.reset()
+        return jsonify({'success': True, 'message': 'Statistika upita je obrisana.'})
+    
+    limit = request.args.get('limit', 50, type=int)
+    sort = request.args.get('sort', 'total_ms')
+    if sort not in ('total_ms', 'count', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms', 'rows', 'bytes', 'errors'):
+        return jsonify({'success': False, 'message': f'Nepoznata kolona za sortiranje: {sort}'})
+    return jsonify({'success': True, 'queries': query_stats.snapshot(limit=limit, sort=sort)})
+
+@app.route('/schema')
+def schema():
+    """Vraća snimak šeme ili predloge za autocomplete (?prefix=...)"""
+    prefix = request.args.get('prefix')
+    if prefix is not None:
+        return jsonify({'success': True, 'suggestions': schema_catalog.complete(prefix)})
+    return jsonify({'success': True, 'database': schema_catalog.database,
+                    'refreshed_at': schema_catalog.refreshed_at, 'tables': schema_catalog.tables})
+
+@app.route('/schema/refresh', methods=['POST'])
+def refresh_schema():
+    """Osvežava katalog šeme iz information_schema"""
+    db_config = config_manager.load_config()
+    if not db_config:
+        return jsonify({'success': False, 'message': 'Prvo konfigurisajte MySQL konekciju!'})
+    
+    db_connector = BLBSConnector(db_config, pool=get_pool(db_config))
+    try:
+        changed = schema_catalog.refresh(db_connector)
+    finally:
+        db_connector.disconnect()
+    
+    if changed is None:
+        return jsonify({'success': False, 'message': 'Greška pri čitanju šeme!'})
+    return jsonify({'success': True, 'message': f'Šema osvežena ({len(changed)} tabela ponovo učitano).',
+                    'changed': changed})
+
 # Create templates directory
 import os
 if not os.path.exists('templates'):
@@ -211,6 +725,20 @@ INDEX_HTML = '''<!DOCTYPE html>
             {% endif %}
         </div>
         
+        {% for breaker in breakers %}
+        <div class="status {% if breaker.state == 'closed' %}ok{% else %}error{% endif %}">
+            <strong>MySQL host {{ breaker.name }}:</strong> 
+            {% if breaker.state == 'closed' %}
+                ✅ Dostupan ({{ breaker.failures }}/{{ breaker.calls }} grešaka u poslednjih {{ breaker.window|int }}s)
+            {% elif breaker.state == 'open' %}
+                ❌ Ne odgovara - zahtevi se odbijaju odmah, nova provera za {{ breaker.retry_in|int }}s
+                {% if breaker.last_error %}<br><small>Poslednja greška: {{ breaker.last_error }}</small>{% endif %}
+            {% else %}
+                ⏳ Provera dostupnosti u toku (circuit breaker poluotvoren)
+            {% endif %}
+        </div>
+        {% endfor %}
+        
         <div class="status {% if vertex_configured %}ok{% else %}error{% endif %}">
             <strong>Vertex AI:</strong> 
             {% if vertex_configured %}
@@ -446,11 +974,15 @@ REPORTS_HTML = '''<!DOCTYPE html>
         button:hover { background: #2980b9; }
         .back { background: #95a5a6; }
         .back:hover { background: #7f8c8d; }
+        .cancel { background: #e74c3c; }
+        .cancel:hover { background: #c0392b; }
+        .cancel:disabled { background: #bdc3c7; cursor: default; }
         .message { padding: 10px; margin: 10px 0; border-radius: 4px; }
         .success { background: #d4edda; color: #155724; }
         .error { background: #f8d7da; color: #721c24; }
         .report { background: #f8f9fa; border: 1px solid #dee2e6; padding: 15px; margin: 15px 0; border-radius: 4px; white-space: pre-wrap; font-family: monospace; min-height: 200px; }
         .controls { display: flex; gap: 10px; align-items: center; }
+        .estimate { background: #fff3cd; color: #856404; padding: 10px; margin: 10px 0; border-radius: 4px; white-space: pre-wrap; display: none; }
     </style>
 </head>
 <body>
@@ -472,10 +1004,17 @@ REPORTS_HTML = '''<!DOCTYPE html>
             </select>
             
             <button onclick="generateReport()">Generiši Izveštaj</button>
+            <button id="cancelButton" class="cancel" onclick="cancelReport()" disabled>Otkaži</button>
+            <button onclick="exportData('csv')">Izvezi CSV</button>
+            <button onclick="exportData('jsonl')">Izvezi JSONL</button>
+            <label><input type="checkbox" id="useLocal"> Lokalna kopija</label>
+            <button onclick="syncLocal()">Sinhronizuj</button>
+            <label><input type="checkbox" id="useColumnar"> Kolonska kopija</label>
             <button class="back" onclick="location.href='/'">Nazad</button>
         </div>
         
         <div id="message"></div>
+        <div id="estimate" class="estimate"></div>
         
         <div class="form-group">
             <label>AI Izveštaj:</label>
@@ -484,6 +1023,8 @@ REPORTS_HTML = '''<!DOCTYPE html>
     </div>
 
     <script>
+        let currentQueryId = null;
+        
         function generateReport() {
             const sqlQuery = document.getElementById('sqlQuery').value.trim();
             const reportType = document.getElementById('reportType').value;
@@ -498,21 +1039,38 @@ REPORTS_HTML = '''<!DOCTYPE html>
             
             reportDiv.textContent = 'Generiram izveštaj...⏳ Molimo sačekajte...';
             messageDiv.textContent = '';
+            showEstimate(null);
+            
+            const queryId = Date.now().toString(36) + Math.random().toString(36).slice(2);
+            currentQueryId = queryId;
+            document.getElementById('cancelButton').disabled = false;
             
             fetch('/reports/generate', {
                 method: 'POST',
                 headers: {'Content-Type': 'application/json'},
                 body: JSON.stringify({
                     sql_query: sqlQuery,
-                    report_type: reportType
+                    report_type: reportType,
+                    query_id: queryId,
+                    use_local: document.getElementById('useLocal').checked,
+                    use_columnar: document.getElementById('useColumnar').checked
                 })
             })
             .then(response => response.json())
             .then(result => {
+                if (currentQueryId === queryId) {
+                    currentQueryId = null;
+                    document.getElementById('cancelButton').disabled = true;
+                }
+                showEstimate(result.estimate);
                 if (result.success) {
                     reportDiv.textContent = result.report;
                     messageDiv.className = 'message success';
-                    messageDiv.textContent = 'Izveštaj je uspešno generisan!';
+                    messageDiv.textContent = result.unchanged
+                        ? 'Podaci se nisu promenili - prikazan je izveštaj generisan ' + new Date(result.generated_at * 1000).toLocaleString() + '.'
+                        : result.truncated
+                        ? 'Izveštaj je generisan nad skraćenim rezultatom (' + result.truncation + ').'
+                        : 'Izveštaj je uspešno generisan!';
                 } else {
                     reportDiv.textContent = 'Greška pri generisanju izveštaja.';
                     messageDiv.className = 'message error';
@@ -525,6 +1083,79 @@ REPORTS_HTML = '''<!DOCTYPE html>
                 messageDiv.textContent = 'Greška: ' + error.message;
             });
         }
+        
+        function showEstimate(estimate) {
+            const estimateDiv = document.getElementById('estimate');
+            if (!estimate || !estimate.available) {
+                estimateDiv.style.display = 'none';
+                return;
+            }
+            const lines = [estimate.message];
+            if (estimate.query_cost !== null) {
+                lines.push('Cena po optimizatoru: ' + estimate.query_cost.toFixed(1));
+            }
+            estimate.warnings.forEach(warning => lines.push('⚠ ' + warning));
+            estimateDiv.textContent = lines.join('\\n');
+            estimateDiv.style.display = 'block';
+        }
+        
+        function exportData(format) {
+            const sqlQuery = document.getElementById('sqlQuery').value.trim();
+            if (!sqlQuery) {
+                const messageDiv = document.getElementById('message');
+                messageDiv.className = 'message error';
+                messageDiv.textContent = 'Unesite SQL upit!';
+                return;
+            }
+            // Običan POST formular - pregledač sam preuzima strimovani fajl
+            const form = document.createElement('form');
+            form.method = 'POST';
+            form.action = '/reports/export';
+            [['sql_query', sqlQuery], ['format', format]].forEach(([name, value]) => {
+                const input = document.createElement('input');
+                input.type = 'hidden';
+                input.name = name;
+                input.value = value;
+                form.appendChild(input);
+            });
+            document.body.appendChild(form);
+            form.submit();
+            form.remove();
+        }
+        
+        function syncLocal() {
+            const messageDiv = document.getElementById('message');
+            messageDiv.className = 'message';
+            messageDiv.textContent = 'Sinhronizujem lokalnu kopiju... ⏳';
+            fetch('/sync', {method: 'POST', headers: {'Content-Type': 'application/json'}, body: '{}'})
+            .then(response => response.json())
+            .then(result => {
+                messageDiv.className = result.success ? 'message success' : 'message error';
+                messageDiv.textContent = result.message;
+            })
+            .catch(error => {
+                messageDiv.className = 'message error';
+                messageDiv.textContent = 'Greška: ' + error.message;
+            });
+        }
+        
+        function cancelReport() {
+            if (!currentQueryId) {
+                return;
+            }
+            
+            const messageDiv = document.getElementById('message');
+            fetch('/reports/cancel', {
+                method: 'POST',
+                headers: {'Content-Type': 'application/json'},
+                body: JSON.stringify({query_id: currentQueryId})
+            })
+            .then(response => response.json())
+            .then(result => {
+                messageDiv.className = result.success ? 'message success' : 'message error';
+                messageDiv.textContent = result.message;
+            });
+        }
     </script>
 </body>
 </html>'''